@@ -5,32 +5,153 @@ HTTP Trigger: GET/POST /api/apuracao
 Parâmetros (query string):
   outorga  Anos separados por vírgula. Ex: ?outorga=2024 ou ?outorga=2023,2024,2025
            Omitir calcula todas as outorgas configuradas.
+  format   xlsx (default) | json | parquet
 
 Retorno:
-  - 1 outorga  → arquivo .xlsx para download
-  - N outorgas → arquivo .zip com um .xlsx por outorga
+  - xlsx, 1 outorga  → arquivo .xlsx para download
+  - xlsx, N outorgas → arquivo .zip com um .xlsx por outorga
+  - json             → {"outorgas": [...]} com ranking, grupos, componentes do TSR,
+                       dividendos ajustados e eventos corporativos (sem renderizar Excel)
+  - parquet          → arquivo .zip com um .parquet por tabela (outorgas empilhadas)
+
+Cache:
+  Artefatos ficam em cache por (outorgas, formato, config, versão dos dados) —
+  ver src/lti/result_cache.py. Toda resposta leva ETag; `If-None-Match` com o
+  mesmo valor devolve 304 sem recalcular.
+
+Modo assíncrono (apurações longas — ver src/lti/jobs.py):
+  POST /api/apuracao/jobs?outorga=...&format=...  → 202 {"job_id", "status_url", ...}
+  GET  /api/apuracao/jobs/{job_id}                → status e progresso
+  GET  /api/apuracao/jobs/{job_id}/download       → artefato (409 enquanto não concluído)
+  Submissões idênticas em andamento retornam o mesmo job.
 """
 
-import io
+from __future__ import annotations
+
+import json
 import logging
-import zipfile
+import tempfile
 from datetime import datetime
+from typing import TYPE_CHECKING
 
 import azure.functions as func
 
-from src import ticker_service
+# Só módulos leves no carregamento: validação, cache e jobs respondem sem pandas.
+# Engine, base B3 e renderizadores (pandas/polars/curl_cffi/xlsxwriter) são
+# importados em _calcular_artefato, apenas quando há cálculo de fato.
 from src.lti.config import OUTORGAS
-from src.lti.engine import calcular_todas_outorgas
-from src.lti.excel_builder import gerar_excel_bytes, nome_arquivo
+from src.lti.jobs import CONCLUIDO, ERRO, JobManager, LocalJobQueue
+from src.lti.result_cache import (
+    CacheBackend, CacheEntry, LocalFileCacheBackend, chave_resultado, criar_backend, etag_confere, pasta_padrao,
+)
+
+if TYPE_CHECKING:
+    from src.lti.engine import ApuracaoResult
+
+# Mesmos de src.lti.export.FORMATOS — repetido para não importar pandas na validação
+FORMATOS = ("xlsx", "json", "parquet")
 
 app = func.FunctionApp(http_auth_level=func.AuthLevel.FUNCTION)
 
+# Acima deste tamanho o ZIP de múltiplas outorgas é despejado em arquivo temporário
+_ZIP_SPOOL_MAX = 32 * 1024 * 1024
 
-@app.route(route="apuracao", methods=["GET", "POST"])
-def apuracao_lti(req: func.HttpRequest) -> func.HttpResponse:
-    logging.info("Apuração LTI — requisição recebida.")
 
-    # ── Parâmetros ──────────────────────────────────────────────────────────
+def _criar_cache() -> CacheBackend:
+    """
+    Backend de cache de artefatos (LTI_CACHE_BACKEND / LTI_CACHE_DIR / LTI_CACHE_TTL).
+    Configuração inválida não derruba o carregamento do módulo (e todas as
+    rotas com ele): avisa no log e usa o backend local padrão.
+    """
+    try:
+        return criar_backend()
+    except ValueError as exc:
+        logging.warning(f"Cache de artefatos: {exc} Usando o backend local padrão.")
+        return LocalFileCacheBackend(pasta_padrao())
+
+
+_cache = _criar_cache()
+
+_XLSX_MIME = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+
+class _FalhaApuracao(RuntimeError):
+    """Erro do pipeline com mensagem pronta para o cliente (HTTP 500 / status do job)."""
+
+
+def _zip_em_bytes(escrever, resultados: list[ApuracaoResult]) -> bytes:
+    """O ZIP fica em memória só até _ZIP_SPOOL_MAX, depois vai para disco."""
+    with tempfile.SpooledTemporaryFile(max_size=_ZIP_SPOOL_MAX) as zip_tmp:
+        escrever(resultados, zip_tmp)
+        zip_tmp.seek(0)
+        return zip_tmp.read()
+
+
+def _gerar_artefato(
+    resultados: dict[int, ApuracaoResult],
+    formato: str,
+) -> tuple[bytes, dict[str, str]]:
+    """Renderiza o arquivo de resposta. Retorna (corpo, headers HTTP)."""
+    from src.lti.excel_builder import escrever_zip, gerar_excel_bytes, nome_arquivo
+    from src.lti.export import escrever_parquet_zip, gerar_json_bytes
+
+    lista = list(resultados.values())
+    ts = datetime.now().strftime("%Y%m%d")
+
+    if formato == "json":
+        return gerar_json_bytes(lista), {"Content-Type": "application/json; charset=utf-8"}
+
+    if formato == "parquet":
+        body = _zip_em_bytes(escrever_parquet_zip, lista)
+        filename = f"Apuracao_LTI_{ts}_parquet.zip"
+        content_type = "application/zip"
+    elif len(lista) == 1:
+        # Única outorga → .xlsx direto
+        body = gerar_excel_bytes(lista[0])
+        filename = nome_arquivo(lista[0])
+        content_type = _XLSX_MIME
+    else:
+        # Múltiplas outorgas → .zip com um .xlsx por outorga, renderizados em paralelo
+        body = _zip_em_bytes(escrever_zip, lista)
+        filename = f"Apuracao_LTI_{ts}.zip"
+        content_type = "application/zip"
+
+    return body, {
+        "Content-Type": content_type,
+        "Content-Disposition": f'attachment; filename="{filename}"',
+    }
+
+
+def _calcular_artefato(anos: list[int], formato: str, progresso=None) -> tuple[bytes, dict[str, str]]:
+    """Pipeline completo: base de empresas → cálculo → renderização."""
+    from src import ticker_service
+    from src.lti.engine import calcular_todas_outorgas
+
+    logging.info(f"Calculando outorgas: {anos}")
+
+    # ── Base de empresas B3 ──────────────────────────────────────────────────
+    df_empresas = ticker_service.carregar_empresas()
+    if df_empresas.empty:
+        raise _FalhaApuracao("Erro: não foi possível carregar a base de empresas B3.")
+    logging.info(f"{len(df_empresas)} empresas B3 carregadas.")
+
+    # ── Cálculo ──────────────────────────────────────────────────────────────
+    try:
+        resultados = calcular_todas_outorgas(
+            anos, df_empresas, logger=logging.info, progresso=progresso,
+        )
+    except Exception as exc:
+        logging.exception("Erro durante o cálculo.")
+        raise _FalhaApuracao(f"Erro no cálculo: {exc}") from exc
+
+    if not resultados:
+        raise _FalhaApuracao("Nenhum resultado gerado.")
+
+    return _gerar_artefato(resultados, formato)
+
+
+def _parametros(req: func.HttpRequest) -> tuple[list[int], str] | func.HttpResponse:
+    """Valida outorga/format. Retorna (anos válidos, formato) ou a resposta 400."""
     outorga_param = req.params.get("outorga", "").strip()
     if outorga_param:
         try:
@@ -43,68 +164,116 @@ def apuracao_lti(req: func.HttpRequest) -> func.HttpResponse:
     else:
         anos = list(OUTORGAS.keys())
 
+    formato = req.params.get("format", "xlsx").strip().lower() or "xlsx"
+    if formato not in FORMATOS:
+        return func.HttpResponse(
+            f"Parâmetro 'format' inválido: {formato}. Válidos: {list(FORMATOS)}",
+            status_code=400,
+        )
+
     anos_validos = [a for a in anos if a in OUTORGAS]
     if not anos_validos:
         return func.HttpResponse(
             f"Outorgas inválidas: {anos}. Válidas: {list(OUTORGAS.keys())}",
             status_code=400,
         )
+    return anos_validos, formato
 
-    logging.info(f"Calculando outorgas: {anos_validos}")
 
-    # ── Base de empresas B3 ──────────────────────────────────────────────────
-    df_empresas = ticker_service.carregar_empresas()
-    if df_empresas.empty:
+# Jobs assíncronos: fila local em threads (uma apuração por vez por instância)
+_jobs = JobManager(_calcular_artefato, LocalJobQueue(max_workers=1), _cache)
+
+
+def _json(payload: dict, status_code: int = 200, headers: dict | None = None) -> func.HttpResponse:
+    return func.HttpResponse(
+        body=json.dumps(payload, ensure_ascii=False).encode("utf-8"),
+        status_code=status_code,
+        headers={"Content-Type": "application/json; charset=utf-8", **(headers or {})},
+    )
+
+
+@app.route(route="apuracao", methods=["GET", "POST"])
+def apuracao_lti(req: func.HttpRequest) -> func.HttpResponse:
+    logging.info("Apuração LTI — requisição recebida.")
+
+    params = _parametros(req)
+    if isinstance(params, func.HttpResponse):
+        return params
+    anos_validos, formato = params
+
+    # ── Cache / ETag ─────────────────────────────────────────────────────────
+    chave = chave_resultado([OUTORGAS[a] for a in anos_validos], formato)
+    entry = _cache.get(chave)
+    if entry is not None:
+        headers_etag = {"ETag": f'"{entry.etag}"'}
+        if etag_confere(req.headers.get("If-None-Match"), entry.etag):
+            logging.info(f"Cache hit {chave} — 304.")
+            return func.HttpResponse(status_code=304, headers=headers_etag)
+        logging.info(f"Cache hit {chave} — {len(entry.body):,} bytes.")
         return func.HttpResponse(
-            "Erro: não foi possível carregar a base de empresas B3.",
-            status_code=500,
+            body=entry.body, status_code=200, headers={**entry.headers, **headers_etag},
         )
-    logging.info(f"{len(df_empresas)} empresas B3 carregadas.")
 
-    # ── Cálculo ──────────────────────────────────────────────────────────────
     try:
-        resultados = calcular_todas_outorgas(anos_validos, df_empresas, logger=logging.info)
-    except Exception as exc:
-        logging.exception("Erro durante o cálculo.")
-        return func.HttpResponse(f"Erro no cálculo: {exc}", status_code=500)
+        body, headers = _calcular_artefato(anos_validos, formato)
+    except _FalhaApuracao as exc:
+        return func.HttpResponse(str(exc), status_code=500)
 
-    if not resultados:
-        return func.HttpResponse("Nenhum resultado gerado.", status_code=500)
+    try:
+        _cache.put(chave, CacheEntry(body=body, etag=chave, headers=headers))
+    except OSError:
+        logging.warning(f"Falha ao gravar cache {chave}.", exc_info=True)
+    logging.info(f"Retornando {formato} ({len(body):,} bytes), cache {chave}.")
+    return func.HttpResponse(
+        body=body,
+        status_code=200,
+        headers={**headers, "ETag": f'"{chave}"'},
+    )
 
-    # ── Resposta ─────────────────────────────────────────────────────────────
-    if len(anos_validos) == 1:
-        # Única outorga → .xlsx direto
-        ano = anos_validos[0]
-        resultado = resultados[ano]
-        xlsx_bytes = gerar_excel_bytes(resultado)
-        filename = nome_arquivo(resultado)
-        logging.info(f"Retornando {filename} ({len(xlsx_bytes):,} bytes).")
-        return func.HttpResponse(
-            body=xlsx_bytes,
-            status_code=200,
-            headers={
-                "Content-Type": (
-                    "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-                ),
-                "Content-Disposition": f'attachment; filename="{filename}"',
-            },
-        )
-    else:
-        # Múltiplas outorgas → .zip com um .xlsx por outorga
-        zip_buf = io.BytesIO()
-        with zipfile.ZipFile(zip_buf, mode="w", compression=zipfile.ZIP_DEFLATED) as zf:
-            for ano, resultado in resultados.items():
-                xlsx_bytes = gerar_excel_bytes(resultado)
-                zf.writestr(nome_arquivo(resultado), xlsx_bytes)
-
-        ts = datetime.now().strftime("%Y%m%d")
-        zip_filename = f"Apuracao_LTI_{ts}.zip"
-        logging.info(f"Retornando {zip_filename} ({len(zip_buf.getvalue()):,} bytes).")
-        return func.HttpResponse(
-            body=zip_buf.getvalue(),
-            status_code=200,
-            headers={
-                "Content-Type": "application/zip",
-                "Content-Disposition": f'attachment; filename="{zip_filename}"',
-            },
-        )
+
+# ---------------------------------------------------------------------------
+# Modo assíncrono
+# ---------------------------------------------------------------------------
+
+@app.route(route="apuracao/jobs", methods=["POST"])
+def apuracao_job_submeter(req: func.HttpRequest) -> func.HttpResponse:
+    params = _parametros(req)
+    if isinstance(params, func.HttpResponse):
+        return params
+    anos_validos, formato = params
+
+    job = _jobs.submeter(anos_validos, formato)
+    status_url = f"/api/apuracao/jobs/{job.id}"
+    logging.info(f"Job {job.id} ({job.status}) para outorgas {anos_validos} [{formato}].")
+    return _json(
+        {**job.as_dict(), "status_url": status_url, "download_url": f"{status_url}/download"},
+        status_code=202,
+        headers={"Location": status_url},
+    )
+
+
+@app.route(route="apuracao/jobs/{job_id}", methods=["GET"])
+def apuracao_job_status(req: func.HttpRequest) -> func.HttpResponse:
+    job = _jobs.obter(req.route_params.get("job_id", ""))
+    if job is None:
+        return func.HttpResponse("Job não encontrado.", status_code=404)
+    return _json(job.as_dict())
+
+
+@app.route(route="apuracao/jobs/{job_id}/download", methods=["GET"])
+def apuracao_job_download(req: func.HttpRequest) -> func.HttpResponse:
+    job_id = req.route_params.get("job_id", "")
+    job = _jobs.obter(job_id)
+    if job is None:
+        return func.HttpResponse("Job não encontrado.", status_code=404)
+    if job.status == ERRO:
+        return func.HttpResponse(job.erro or "Erro no cálculo.", status_code=500)
+    if job.status != CONCLUIDO:
+        return _json(job.as_dict(), status_code=409)
+
+    entry = _jobs.artefato(job_id)
+    if entry is None:
+        return func.HttpResponse("Artefato expirado — submeta o job novamente.", status_code=410)
+    return func.HttpResponse(
+        body=entry.body, status_code=200, headers={**entry.headers, "ETag": f'"{entry.etag}"'},
+    )
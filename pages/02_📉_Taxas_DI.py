@@ -6,6 +6,7 @@ import sys, os
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 from src import di_service
+from src.di import MotorCurvaDI, PainelDI
 
 st.set_page_config(page_title="Taxas DI1", layout="wide")
 st.title("📉 Curva de Juros Futuros (DI1)")
@@ -58,6 +59,13 @@ else:
         else:
             st.error("Não foi possível encontrar uma coluna com o nome 'Data' no arquivo enviado.")
 
+# --- VÉRTICES DA INTERPOLAÇÃO ---
+vertices_txt = st.text_input(
+    "Vértices para interpolação flat-forward 252 (dias úteis, separados por vírgula):",
+    "21, 63, 126, 252, 504, 756, 1008",
+)
+vertices_du = sorted({int(v) for v in vertices_txt.replace(";", ",").split(",") if v.strip().isdigit() and int(v) > 0})
+
 # --- BOTÃO DE BUSCA ---
 if st.button("Buscar Taxas", type="primary"):
     if not len(datas_para_buscar):
@@ -68,23 +76,27 @@ if st.button("Buscar Taxas", type="primary"):
         st.warning("Por favor, selecione pelo menos um vencimento na caixa acima.")
         st.stop()
 
-    results = []
-    bar = st.progress(0)
-    
+    # Um download por vencimento, qualquer que seja o número de datas
     with st.spinner("Consultando dados no ADVFN..."):
-        for i, data_ref in enumerate(datas_para_buscar):
-            df, err = di_service.consultar_taxas_di_por_tickers(data_ref, tickers_selecionados)
-            
-            if df is not None and not df.empty:
-                # Adiciona a data de referência à tabela
-                df.insert(0, "DATA_REF", data_ref.strftime("%d/%m/%Y"))
-                results.append(df)
-            else:
-                if col_mode == "Data Única": 
-                    st.error(f"{data_ref.strftime('%d/%m/%Y')}: {err}")
-                
-            bar.progress((i + 1) / len(datas_para_buscar))
-            
+        df_lote, err = di_service.consultar_taxas_di_lote(datas_para_buscar, tickers_selecionados)
+
+    results = []
+    df_taxas_ff = df_fatores = None
+    if df_lote is not None:
+        if vertices_du:
+            # Curvas de todas as datas numa passada; vértices nas colunas
+            motor = MotorCurvaDI(PainelDI.de_lote(df_lote))
+            df_taxas_ff = motor.taxas(vertices_du).round(4)
+            df_fatores = motor.fatores_desconto(vertices_du).round(8)
+            for df_v in (df_taxas_ff, df_fatores):
+                df_v.index = df_v.index.strftime("%d/%m/%Y")
+                df_v.index.name = "DATA_REF"
+                df_v.columns = [f"{du} DU" for du in vertices_du]
+        df_lote["DATA_REF"] = pd.to_datetime(df_lote["DATA_REF"]).dt.strftime("%d/%m/%Y")
+        results.append(df_lote)
+    elif col_mode == "Data Única":
+        st.error(f"{datas_para_buscar[0].strftime('%d/%m/%Y')}: {err}")
+
     if results:
         df_final = pd.concat(results, ignore_index=True)
         
@@ -106,10 +118,22 @@ if st.button("Buscar Taxas", type="primary"):
             }
         )
         
+        if df_taxas_ff is not None:
+            st.subheader("Curva Interpolada (flat-forward 252)")
+            st.caption("Taxa a termo constante entre vértices; antes do 1º contrato vale a taxa dele e, "
+                       "depois do último, a taxa a termo do último trecho. Fator de desconto: (1 + taxa)^(−DU/252).")
+            st.markdown("**Taxas (% a.a.)**")
+            st.dataframe(df_taxas_ff, use_container_width=True)
+            st.markdown("**Fatores de desconto**")
+            st.dataframe(df_fatores, use_container_width=True)
+
         # Geração do arquivo para download (no Excel o link vai completo)
         out = BytesIO()
         with pd.ExcelWriter(out, engine='xlsxwriter') as writer:
             df_final.to_excel(writer, index=False)
+            if df_taxas_ff is not None:
+                df_taxas_ff.to_excel(writer, sheet_name="Flat-Forward 252")
+                df_fatores.to_excel(writer, sheet_name="Fatores de Desconto")
         
         st.download_button(
             label="📥 Baixar Consolidado (Excel)", 
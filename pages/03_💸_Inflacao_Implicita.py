@@ -49,11 +49,8 @@ try:
 
     # 3. SELEÇÃO DE DATA E CÁLCULO
     if not df_raw.empty:
-        # Garante que a coluna de data está correta
-        df_raw["Data Base"] = pd.to_datetime(df_raw["Data Base"], errors='coerce')
-        df_raw = df_raw.dropna(subset=["Data Base"])
-        
-        datas_disponiveis = df_raw["Data Base"].sort_values(ascending=False).unique()
+        # carregar_dados_tesouro já entrega Data Base tipada e ordenada: a mais recente primeiro é só inverter
+        datas_disponiveis = df_raw["Data Base"].unique()[::-1]
         
         st.divider()
         col1, col2 = st.columns([1, 2])
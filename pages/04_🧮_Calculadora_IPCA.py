@@ -13,11 +13,10 @@ st.set_page_config(page_title="Calculadora IPCA", layout="wide")
 st.title('🧮 Calculadora de Correção pelo IPCA')
 
 # --- 1. CARREGAMENTO DE DADOS (Cacheado) ---
-if 'df_ipca' not in st.session_state:
-    with st.spinner("Carregando dados oficiais do IBGE..."):
-        st.session_state.df_ipca = carregar_dados_ipca()
-
-df_ipca = st.session_state.df_ipca
+# Série compartilhada pelo processo: cada rerun/sessão recebe uma visão sem cópia,
+# então não há motivo para guardar uma cópia própria no session_state.
+with st.spinner("Carregando dados oficiais do IBGE..."):
+    df_ipca = carregar_dados_ipca()
 
 if df_ipca.empty:
     st.error("Erro ao conectar com o IBGE. Tente novamente mais tarde.")
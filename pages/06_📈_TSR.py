@@ -1,246 +1,140 @@
 import streamlit as st
 import pandas as pd
-import numpy as np
-import requests
-import yfinance as yf
-from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from io import BytesIO
 import sys, os
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
-from src import ticker_service, b3_engine
+from src import ticker_service
+from src.lti.config import OUTORGAS
+from src.tsr import IndicePrecos, buscar_cotacoes_lote, buscar_proventos_lote, calcular_tsr
+from src.tsr import universo
 
 st.set_page_config(page_title="TSR", layout="wide")
 st.title("📈 TSR — Total Shareholder Return")
 st.caption("B3 (COTAHIST + Proventos + Eventos Corporativos) | Internacional (Yahoo Finance)")
 
 # ---------------------------------------------------------------------------
-# Helpers gerais
+# Bases de preço (consultas sobre o índice de somas acumuladas)
 # ---------------------------------------------------------------------------
 
-def _parece_b3(ticker: str) -> bool:
-    """Retorna True se o ticker tiver padrão B3: 4 letras + número (3,4,5,6,11)."""
-    base = ''.join(c for c in ticker if not c.isdigit())
-    num  = ''.join(c for c in ticker if c.isdigit())
-    return len(base) == 4 and num in {'3', '4', '5', '6', '11'}
+_TIPOS_PRECO = {
+    "Fechamento (último dia)": "fechamento",
+    "Média Simples (closes)": "media",
+    "VWAP (média ponderada pelo volume)": "vwap",
+}
 
-def _yf_symbol(ticker: str) -> str:
-    """Converte ticker para símbolo Yahoo Finance: VALE3 → VALE3.SA, AAPL → AAPL."""
-    return f"{ticker}.SA" if _parece_b3(ticker) else ticker
+modo = st.radio("Modo:", ["Lista de tickers", "Universo B3 (screener)"], horizontal=True)
 
 # ---------------------------------------------------------------------------
-# Helpers de preço
+# Screener — todas as ações à vista (BDI 02/12) a partir das bases locais
 # ---------------------------------------------------------------------------
 
-def _buscar_cotacoes_periodo(tickers: list, dt_ini, dt_fim) -> pd.DataFrame:
-    """Baixa COTAHIST para o período e retorna DataFrame com Open/High/Low/Close/Average/Volume."""
-    dias = b3_engine.listar_dias_uteis(dt_ini, dt_fim)
-    frames = []
-    with requests.Session() as session:
-        with ThreadPoolExecutor(max_workers=5) as ex:
-            futs = [ex.submit(b3_engine.baixar_e_parsear_dia, d, tickers, session) for d in dias]
-            for f in futs:
-                r = f.result()
-                if r is not None:
-                    frames.append(r)
-    if not frames:
-        return pd.DataFrame()
-    df = pd.concat(frames, ignore_index=True)
-    df['Date'] = pd.to_datetime(df['Date'])
-    return df.sort_values(['Ticker', 'Date'])
-
-
-def _calcular_preco(df_ticker: pd.DataFrame, tipo: str) -> float | None:
-    """Retorna o preço representativo do período conforme o tipo escolhido."""
-    if df_ticker.empty:
-        return None
-    if tipo == "Fechamento (último dia)":
-        return float(df_ticker.iloc[-1]['Close'])
-    elif tipo == "Média Simples (closes)":
-        return float(df_ticker['Close'].mean())
-    elif tipo == "VWAP (média ponderada pelo volume)":
-        # Usa Quantity (QUANTIDADE_NEGOCIADA do COTAHIST) diretamente
-        qty = df_ticker['Quantity'] if 'Quantity' in df_ticker.columns else df_ticker['Volume'] / df_ticker['Average'].replace(0, np.nan)
-        avg = df_ticker['Average']
-        denom = qty.replace(0, np.nan).sum()
-        if pd.isna(denom) or denom == 0:
-            return float(avg.mean())
-        return float((qty * avg).sum() / denom)
-    return None
-
-# ---------------------------------------------------------------------------
-# Helpers Yahoo Finance (tickers internacionais)
-# ---------------------------------------------------------------------------
+if modo == "Universo B3 (screener)":
+    dt_hoje = datetime.now().date()
+    c1, c2, c3 = st.columns(3)
+    sc_p0_ini = c1.date_input("Início período inicial:", value=dt_hoje - timedelta(days=365),
+                              format="DD/MM/YYYY", key="sc_p0_ini")
+    sc_p0_fim = c2.date_input("Fim período inicial:", value=dt_hoje - timedelta(days=345),
+                              format="DD/MM/YYYY", key="sc_p0_fim")
+    sc_tipo_p0 = c3.selectbox("Tipo de preço inicial:", list(_TIPOS_PRECO), index=2, key="sc_tipo_p0")
+    c1, c2, c3 = st.columns(3)
+    sc_pf_ini = c1.date_input("Início período final:", value=dt_hoje - timedelta(days=20),
+                              format="DD/MM/YYYY", key="sc_pf_ini")
+    sc_pf_fim = c2.date_input("Fim período final:", value=dt_hoje,
+                              format="DD/MM/YYYY", key="sc_pf_fim")
+    sc_tipo_pf = c3.selectbox("Tipo de preço final:", list(_TIPOS_PRECO), index=2, key="sc_tipo_pf")
+
+    janela_p0, janela_pf = (sc_p0_ini, sc_p0_fim), (sc_pf_ini, sc_pf_fim)
+    if sc_p0_fim >= sc_pf_fim:
+        st.warning("A data final deve ser posterior à data inicial.")
+        st.stop()
 
-def _buscar_cotacoes_yf(ticker: str, dt_ini, dt_fim) -> pd.DataFrame:
-    """Cotações via Yahoo Finance. Adiciona .SA automaticamente para tickers B3."""
-    try:
-        df = yf.download(_yf_symbol(ticker), start=dt_ini, end=dt_fim + timedelta(days=1),
-                         auto_adjust=False, progress=False)
-        if df.empty:
-            return pd.DataFrame()
-        if isinstance(df.columns, pd.MultiIndex):
-            df.columns = df.columns.get_level_values(0)
-        df = df.reset_index()
-        df['Ticker'] = ticker
-        df['Date'] = pd.to_datetime(df['Date']).dt.tz_localize(None)
-        # Average como HLC/3; Quantity = Volume (ações negociadas)
-        df['Average'] = (df['High'] + df['Low'] + df['Close']) / 3
-        df['Quantity'] = df['Volume'].astype('Int64')
-        return df[['Ticker', 'Date', 'Open', 'High', 'Low', 'Close', 'Average', 'Volume', 'Quantity']].sort_values('Date')
-    except Exception:
-        return pd.DataFrame()
-
-
-def _buscar_dividendos_yf(ticker: str, t0: pd.Timestamp, t1: pd.Timestamp) -> pd.DataFrame:
-    """Dividendos via Yahoo Finance no período [t0, t1]. Adiciona .SA para tickers B3."""
-    try:
-        divs = yf.Ticker(_yf_symbol(ticker)).dividends
-        if divs.empty:
-            return pd.DataFrame()
-        divs = divs.reset_index()
-        divs.columns = ['Date', 'value']
-        divs['Date'] = pd.to_datetime(divs['Date']).dt.tz_localize(None)
-        divs = divs[(divs['Date'] >= t0) & (divs['Date'] <= t1)].copy()
-        if divs.empty:
-            return pd.DataFrame()
-        divs['Ticker'] = ticker
-        divs['lastDatePriorEx'] = divs['Date'].dt.strftime('%d/%m/%Y')
-        divs['paymentDate'] = ''
-        divs['label'] = 'Dividendo'
-        divs['typeStock'] = ''
-        return divs[['Ticker', 'lastDatePriorEx', 'paymentDate', 'label', 'value']]
-    except Exception:
-        return pd.DataFrame()
-
-
-def _buscar_splits_yf(ticker: str, t0: pd.Timestamp, t1: pd.Timestamp) -> pd.DataFrame:
-    """Splits/reverse splits via Yahoo Finance no período [t0, t1]. Adiciona .SA para tickers B3.
-    O campo 'factor' é o ratio direto (ex: 2.0 para split 2:1).
-    Label 'SPLIT_YF' sinaliza que mult = factor (não aplica fórmula B3).
-    """
-    try:
-        splits = yf.Ticker(_yf_symbol(ticker)).splits
-        if splits.empty:
-            return pd.DataFrame()
-        splits = splits.reset_index()
-        splits.columns = ['Date', 'factor']
-        splits['Date'] = pd.to_datetime(splits['Date']).dt.tz_localize(None)
-        splits = splits[(splits['Date'] >= t0) & (splits['Date'] <= t1)].copy()
-        if splits.empty:
-            return pd.DataFrame()
-        splits['Ticker'] = ticker
-        splits['lastDatePrior'] = splits['Date'].dt.strftime('%d/%m/%Y')
-        splits['label'] = 'SPLIT_YF'
-        return splits[['Ticker', 'lastDatePrior', 'label', 'factor']]
-    except Exception:
-        return pd.DataFrame()
+    st.caption("Cotações (COTAHIST por pregão) e proventos (histórico por empresa) ficam em bases "
+               "locais: a primeira carga de uma janela baixa os dados; as seguintes são imediatas.")
+    bases_chave = (janela_p0, janela_pf)
+    if st.button("Carregar bases", type="primary"):
+        log_bases: list[str] = []
+        with st.spinner("Baixando COTAHIST das janelas (todas as ações)..."):
+            cot_p0 = universo.cotacoes_universo(*janela_p0)
+            cot_pf = universo.cotacoes_universo(*janela_pf)
+        if cot_p0.empty or cot_pf.empty:
+            st.error("Sem cotações em uma das janelas.")
+            st.stop()
+        with st.spinner("Identificando empresas..."):
+            df_empresas = ticker_service.carregar_empresas()
+        if df_empresas.empty:
+            st.error("Não foi possível carregar a base de empresas B3.")
+            st.stop()
+        tickers_universo = tuple(sorted(set(cot_p0["Ticker"]) & set(cot_pf["Ticker"])))
+        with st.spinner(f"Buscando proventos de {len(tickers_universo)} tickers..."):
+            eventos, dividendos, falhos = universo.proventos_universo(
+                tickers_universo, df_empresas, logger=log_bases.append,
+            )
+        st.session_state['sc_bases'] = {
+            'chave': bases_chave, 'cot_p0': cot_p0, 'cot_pf': cot_pf,
+            'eventos': eventos, 'dividendos': dividendos,
+            'classificacao': universo.classificacao_empresas(df_empresas),
+            'log': log_bases, 'falhos': falhos,
+        }
+
+    bases = st.session_state.get('sc_bases')
+    if not bases or bases['chave'] != bases_chave:
+        st.info("Carregue as bases para as janelas selecionadas.")
+        st.stop()
+    if bases['falhos']:
+        st.warning(f"Proventos indisponíveis para {len(bases['falhos'])} tickers "
+                   f"({', '.join(bases['falhos'][:10])}{'...' if len(bases['falhos']) > 10 else ''}): "
+                   "o TSR deles sai sem dividendos e eventos. Carregue as bases de novo para tentar outra vez.")
+    if bases['log']:
+        with st.expander("Log de proventos", expanded=False):
+            st.text("\n".join(bases['log']))
+
+    # ── Filtros (recalcula a cada interação: uma passada vetorizada) ───────
+    listas = {f"IBrX-50 da outorga {cfg.ano}": cfg.tickers for cfg in OUTORGAS.values()}
+    c1, c2 = st.columns(2)
+    filtro = c1.selectbox("Universo:", ["Todas as ações (BDI 02/12)", *listas, "Lista personalizada"])
+    tickers_filtro = None
+    if filtro in listas:
+        tickers_filtro = listas[filtro]
+    elif filtro == "Lista personalizada":
+        texto = c1.text_input("Tickers (separados por vírgula):", key="sc_lista")
+        tickers_filtro = [t.strip().upper() for t in texto.split(',') if t.strip()]
+    segmentos_disp = sorted(seg for seg in bases["classificacao"]["Segmento"].dropna().unique() if seg)
+    segmentos = c2.multiselect("Segmento de listagem:", segmentos_disp)
+
+    df_sc = universo.screener(
+        bases['cot_p0'], bases['cot_pf'], bases['eventos'], bases['dividendos'],
+        janela_p0, janela_pf, _TIPOS_PRECO[sc_tipo_p0], _TIPOS_PRECO[sc_tipo_pf],
+        classificacao=bases['classificacao'], tickers=tickers_filtro, segmentos=segmentos or None,
+    )
 
+    c1, c2, c3 = st.columns(3)
+    ordem = c1.selectbox("Ordenar por:", ['TSR Total (%)', 'Ret. Preço (%)', 'Ret. Dividendos (%)',
+                                          'Percentil', 'Ticker'])
+    crescente = c2.checkbox("Crescente", value=ordem == 'Ticker')
+    pct_min = c3.slider("Percentil mínimo:", 0, 100, 0)
+    df_exib = df_sc[df_sc['Percentil'] >= pct_min].sort_values(ordem, ascending=crescente, kind="stable")
 
-# ---------------------------------------------------------------------------
-# TSR
-# ---------------------------------------------------------------------------
+    m1, m2, m3 = st.columns(3)
+    m1.metric("Tickers", len(df_exib))
+    m2.metric("TSR mediano", f"{df_sc['TSR Total (%)'].median():+.2f}%" if len(df_sc) else "—")
+    m3.metric("TSR P75", f"{df_sc['TSR Total (%)'].quantile(0.75):+.2f}%" if len(df_sc) else "—")
+    st.dataframe(df_exib, use_container_width=True, hide_index=True)
 
-def _parse_float(val):
-    try:
-        return float(str(val).replace(',', '.'))
-    except Exception:
-        return np.nan
-
-
-def calcular_tsr(ticker: str, p0: float, p_final: float,
-                 df_divs: pd.DataFrame, df_bonif: pd.DataFrame,
-                 t0: pd.Timestamp, t1: pd.Timestamp) -> dict:
-    """
-    TSR na base de 1 ação adquirida ao preço P0 em t0.
-
-    Eventos corporativos (bonificações/splits/grupamentos) são tratados como
-    multiplicadores da quantidade de ações:
-        mult = ∏ (1 + factor_i)   para todos os eventos entre t0 e t1
-
-    Dividendos são creditados proporcionalmente à quantidade de ações vigente
-    na data ex (mais ações após splits = mais dividendos totais recebidos).
-
-    TSR = (P_final × mult_final  −  P0  +  Σ div_j × mult_em_j) / P0
-    """
-
-    # --- Eventos corporativos ordenados ---
-    eventos = []
-    if not df_bonif.empty and 'lastDatePrior' in df_bonif.columns:
-        for _, row in df_bonif.iterrows():
-            dt    = pd.to_datetime(row.get('lastDatePrior', ''), format='%d/%m/%Y', errors='coerce')
-            fac   = _parse_float(row.get('factor', 0))
-            label = str(row.get('label', '')).upper()
-            if pd.notna(dt) and pd.notna(fac) and fac != 0:
-                if t0 < dt <= t1:
-                    # Multiplicador por fonte:
-                    # B3: factor = "novas ações por 100 existentes" → mult = 1 + factor/100
-                    #   BONIFICACAO 1%    factor=1    → 1.01
-                    #   DESDOBRAMENTO 5:1 factor=400  → 5.00
-                    #   GRUPAMENTO 5:1    factor=-80  → 0.20
-                    # Yahoo (SPLIT_YF): factor já é o ratio direto → mult = factor
-                    #   Split 2:1  factor=2.0  → 2.00
-                    #   RSplit 1:10 factor=0.1 → 0.10
-                    if label == 'SPLIT_YF':
-                        mult = fac
-                    else:
-                        mult = 1.0 + fac / 100.0
-                    eventos.append({'date': dt, 'mult': round(mult, 8), 'factor': fac, 'label': row.get('label', '')})
-    eventos.sort(key=lambda x: x['date'])
-
-    # Multiplicador acumulado em cada ponto do tempo
-    def mult_ate(data: pd.Timestamp) -> float:
-        m = 1.0
-        for ev in eventos:
-            if ev['date'] <= data:
-                m *= ev['mult']
-        return m
-
-    mult_final = mult_ate(t1)
-
-    # --- Dividendos ---
-    total_divs = 0.0
-    divs_detail = []
-    if not df_divs.empty and 'value' in df_divs.columns:
-        for _, row in df_divs.iterrows():
-            dt_ex = pd.to_datetime(row.get('lastDatePriorEx', ''), format='%d/%m/%Y', errors='coerce')
-            val   = _parse_float(row.get('value', 0))
-            if pd.isna(dt_ex) or pd.isna(val):
-                continue
-            # Quantidade de ações no momento do dividendo
-            m_div = mult_ate(dt_ex)
-            div_total = m_div * val
-            total_divs += div_total
-            divs_detail.append({
-                'Data Ex':          row.get('lastDatePriorEx', ''),
-                'Pagamento':        row.get('paymentDate', ''),
-                'Tipo':             row.get('label', ''),
-                'Valor/Ação (R$)':  val,
-                'Multiplicador':    round(m_div, 6),
-                'Total Recebido (R$)': round(div_total, 6),
-            })
-
-    # --- TSR decomposição ---
-    p_final_adj  = p_final * mult_final
-    ret_preco    = (p_final_adj - p0) / p0
-    ret_divs     = total_divs / p0
-    ret_bonif    = (mult_final - 1) * p_final / p0   # parcela de preço devida aos eventos
-    tsr_total    = ret_preco + ret_divs
-
-    return {
-        'Ticker':             ticker,
-        'P0 (R$)':            round(p0, 4),
-        'P Final (R$)':       round(p_final, 4),
-        'Mult. Corporativo':  round(mult_final, 6),
-        'P Final Ajustado (R$)': round(p_final_adj, 4),
-        'Dividendos/JCP (R$)':   round(total_divs, 4),
-        'Ret. Preço (%)':     round(ret_preco * 100, 2),
-        'Ret. Dividendos (%)': round(ret_divs * 100, 2),
-        'TSR Total (%)':      round(tsr_total * 100, 2),
-        '_divs_detail':       divs_detail,
-        '_eventos':           eventos,
-    }
+    st.download_button(
+        label="📥 Baixar Screener Excel",
+        data=universo.gerar_excel_screener(df_exib, {
+            "Período inicial": f"{sc_p0_ini:%d/%m/%Y} a {sc_p0_fim:%d/%m/%Y} ({sc_tipo_p0})",
+            "Período final": f"{sc_pf_ini:%d/%m/%Y} a {sc_pf_fim:%d/%m/%Y} ({sc_tipo_pf})",
+            "Universo": filtro,
+            "Segmentos": ", ".join(segmentos) or "todos",
+            "Percentil mínimo": pct_min,
+        }),
+        file_name=f"TSR_Screener_{sc_pf_fim:%Y%m%d}.xlsx",
+        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    )
+    st.stop()
 
 # ---------------------------------------------------------------------------
 # Inputs
@@ -270,7 +164,7 @@ if modo_p0 == "Calcular por período":
                                    format="DD/MM/YYYY", key="dt_p0_fim")
     with col_ini3:
         tipo_p0 = st.selectbox("Tipo de preço inicial:",
-                               ["Fechamento (último dia)", "Média Simples (closes)", "VWAP (média ponderada pelo volume)"])
+                               list(_TIPOS_PRECO))
     p0_por_ticker = {}
 else:
     with col_ini1:
@@ -300,7 +194,7 @@ with col_fim2:
                                format="DD/MM/YYYY", key="dt_pf_fim")
 with col_fim3:
     tipo_pf = st.selectbox("Tipo de preço final:",
-                           ["Fechamento (último dia)", "Média Simples (closes)", "VWAP (média ponderada pelo volume)"])
+                           list(_TIPOS_PRECO))
 
 st.markdown("---")
 btn = st.button("Calcular TSR", type="primary")
@@ -336,83 +230,64 @@ if btn:
 
     resultados = []
     log_container = st.expander("Log de processamento", expanded=False)
-
+    p0_manual_ativo = modo_p0 != "Calcular por período"
+
+    # ── Cotações: cada janela baixada uma vez para todos os tickers ────────
+    with st.spinner("Baixando cotações..."):
+        df_ini = (pd.DataFrame() if p0_manual_ativo
+                  else buscar_cotacoes_lote(tickers_b3, tickers_yf, dt_p0_ini, dt_p0_fim))
+        df_fim = buscar_cotacoes_lote(tickers_b3, tickers_yf, dt_pf_ini, dt_pf_fim)
+    idx_ini, idx_fim = IndicePrecos(df_ini), IndicePrecos(df_fim)
+    cot_ini = dict(iter(df_ini.groupby('Ticker', sort=False))) if not df_ini.empty else {}
+    cot_fim = dict(iter(df_fim.groupby('Ticker', sort=False))) if not df_fim.empty else {}
+
+    # ── Preços por ticker ──────────────────────────────────────────────────
+    precos: dict[str, tuple[float, float]] = {}
     for ticker in tickers:
-        is_b3 = ticker in tickers_b3
-        moeda = "R$" if is_b3 else "$"
-
+        moeda = "R$" if ticker in tickers_b3 else "$"
         with log_container:
-            fonte = "B3" if is_b3 else "Yahoo Finance"
+            fonte = "B3" if ticker in tickers_b3 else "Yahoo Finance"
             st.write(f"**── {ticker} ({fonte}) ──**")
-
-        # ── Preço Inicial ──────────────────────────────────────────────────
-        p0_manual = p0_por_ticker.get(ticker)  # None se modo "Calcular por período"
-        if p0_manual:
-            p0 = float(p0_manual)
-            df_ini_t = pd.DataFrame()
-            with log_container:
+            p0_manual = p0_por_ticker.get(ticker)  # None se modo "Calcular por período"
+            if p0_manual:
+                p0 = float(p0_manual)
                 st.write(f"P0 manual: {moeda} {p0:.4f}")
-        else:
-            with log_container:
-                st.write(f"Baixando cotações iniciais ({dt_p0_ini} → {dt_p0_fim})...")
-            if is_b3:
-                df_ini = _buscar_cotacoes_periodo([ticker], dt_p0_ini, dt_p0_fim)
-                df_ini_t = df_ini[df_ini['Ticker'] == ticker] if not df_ini.empty else pd.DataFrame()
             else:
-                df_ini_t = _buscar_cotacoes_yf(ticker, dt_p0_ini, dt_p0_fim)
-            p0 = _calcular_preco(df_ini_t, tipo_p0)
-            if p0 is None:
-                with log_container:
+                p0 = idx_ini.preco(ticker, dt_p0_ini, dt_p0_fim, _TIPOS_PRECO[tipo_p0])
+                if p0 is None:
                     st.warning(f"Sem cotações no período inicial para {ticker}. Pulando.")
-                continue
-            with log_container:
-                st.write(f"P0 ({tipo_p0}): {moeda} {p0:.4f}  ({len(df_ini_t)} pregões)")
-
-        # ── Preço Final ────────────────────────────────────────────────────
-        with log_container:
-            st.write(f"Baixando cotações finais ({dt_pf_ini} → {dt_pf_fim})...")
-        if is_b3:
-            df_fim = _buscar_cotacoes_periodo([ticker], dt_pf_ini, dt_pf_fim)
-            df_fim_t = df_fim[df_fim['Ticker'] == ticker] if not df_fim.empty else pd.DataFrame()
-        else:
-            df_fim_t = _buscar_cotacoes_yf(ticker, dt_pf_ini, dt_pf_fim)
-        p_final = _calcular_preco(df_fim_t, tipo_pf)
-        if p_final is None:
-            with log_container:
+                    continue
+                st.write(f"P0 ({tipo_p0}): {moeda} {p0:.4f}  "
+                         f"({idx_ini.n_pregoes(ticker, dt_p0_ini, dt_p0_fim)} pregões)")
+            p_final = idx_fim.preco(ticker, dt_pf_ini, dt_pf_fim, _TIPOS_PRECO[tipo_pf])
+            if p_final is None:
                 st.warning(f"Sem cotações no período final para {ticker}. Pulando.")
-            continue
-        with log_container:
-            st.write(f"P Final ({tipo_pf}): {moeda} {p_final:.4f}  ({len(df_fim_t)} pregões)")
-
-        # ── Dividendos / JCP ───────────────────────────────────────────────
-        with log_container:
-            st.write(f"Buscando dividendos ({t0.date()} → {t1.date()})...")
-        if is_b3:
-            df_divs = ticker_service.buscar_dividendos_b3(ticker, df_empresas, t0, t1)
-        else:
-            df_divs = _buscar_dividendos_yf(ticker, t0, t1)
-        n_divs = len(df_divs) if not df_divs.empty else 0
-        with log_container:
-            st.write(f"Dividendos encontrados: {n_divs} eventos")
-
-        # ── Eventos Corporativos ───────────────────────────────────────────
-        with log_container:
-            st.write(f"Buscando eventos corporativos ({t0.date()} → {t1.date()})...")
-        if is_b3:
-            df_bonif = ticker_service.buscar_bonificacoes_b3(ticker, df_empresas, t0, t1)
-        else:
-            df_bonif = _buscar_splits_yf(ticker, t0, t1)
-        n_bonif = len(df_bonif) if not df_bonif.empty else 0
+                continue
+            st.write(f"P Final ({tipo_pf}): {moeda} {p_final:.4f}  "
+                     f"({idx_fim.n_pregoes(ticker, dt_pf_ini, dt_pf_fim)} pregões)")
+        precos[ticker] = (p0, p_final)
+
+    # ── Dividendos/JCP e eventos corporativos: todos os tickers em paralelo ─
+    log_proventos: list[str] = []
+    with st.spinner(f"Buscando proventos e eventos corporativos ({t0.date()} → {t1.date()})..."):
+        proventos = buscar_proventos_lote(
+            {t: t in tickers_b3 for t in precos}, df_empresas, t0, t1, logger=log_proventos.append,
+        )
+
+    # ── Cálculo TSR ────────────────────────────────────────────────────────
+    for ticker, (p0, p_final) in precos.items():
+        df_divs, df_bonif = proventos[ticker]
         with log_container:
-            st.write(f"Eventos corporativos: {n_bonif}")
-
-        # ── Cálculo TSR ────────────────────────────────────────────────────
+            st.write(f"{ticker}: {len(df_divs)} dividendos | {len(df_bonif)} eventos corporativos")
         res = calcular_tsr(ticker, p0, p_final, df_divs, df_bonif, t0, t1)
-        res['_df_cotacoes_ini'] = df_ini_t if p0_manual is None else pd.DataFrame()
-        res['_df_cotacoes_fim'] = df_fim_t
+        res['_df_cotacoes_ini'] = cot_ini.get(ticker, pd.DataFrame())
+        res['_df_cotacoes_fim'] = cot_fim.get(ticker, pd.DataFrame())
         res['_df_divs']         = df_divs
         res['_df_bonif']        = df_bonif
         resultados.append(res)
+    if log_proventos:
+        with log_container:
+            st.text("\n".join(log_proventos))
 
     if not resultados:
         st.error("Nenhum resultado calculado. Verifique os tickers e as datas.")
@@ -482,7 +357,7 @@ if 'tsr_resultados' in st.session_state and st.session_state['tsr_resultados']:
 
     st.subheader("Ranking TSR")
     st.dataframe(
-        df_rank.style.applymap(_color_tsr, subset=['TSR Total (%)', 'Ret. Preço (%)', 'Ret. Dividendos (%)']),
+        df_rank.style.map(_color_tsr, subset=['TSR Total (%)', 'Ret. Preço (%)', 'Ret. Dividendos (%)']),
         use_container_width=True
     )
 
@@ -7,6 +7,9 @@ import pandas as pd
 from src.lti.config import OUTORGAS
 from src.lti.engine import calcular_outorga
 from src.lti.excel_builder import gerar_excel_bytes, nome_arquivo
+from src.lti.result_cache import chave_resultado
+from src.lti.trajetoria import carregar_trajetoria
+from src.cache import store
 from src import ticker_service
 
 st.set_page_config(page_title="Apuração LTI", layout="wide")
@@ -55,9 +58,19 @@ if btn:
         st.error("Não foi possível carregar a base de empresas B3.")
         st.stop()
 
-    resultados_session: dict = {}
+    # Resultados ficam no armazém do processo; a sessão guarda só as chaves.
+    # Outra sessão que já calculou a mesma outorga hoje (mesma chave) é reaproveitada.
+    chaves_session: dict[int, str] = {}
     for ano in anos_calcular:
         cfg = OUTORGAS[ano]
+        chave = chave_resultado([cfg], "apuracao")
+        resultado = store.obter_objeto(chave)
+        if resultado is not None:
+            chaves_session[ano] = chave
+            st.success(f"Outorga {ano}: {resultado.n_incluidos} incluídos | "
+                       f"{resultado.n_excluidos} excluídos (calculada em "
+                       f"{resultado.timestamp:%d/%m %H:%M}, reaproveitada)")
+            continue
         st.write(f"**Processando outorga {ano}** ({len(cfg.tickers)} tickers)...")
         prog = st.progress(0)
         total = len(cfg.tickers)
@@ -71,20 +84,26 @@ if btn:
                 prog.progress(min(ticker_idx[0] / total, 1.0))
 
         resultado = calcular_outorga(cfg, df_empresas, logger=_logger_prog)
-        resultados_session[ano] = resultado
+        chaves_session[ano] = store.guardar_objeto(chave, resultado)
         prog.progress(1.0)
         st.success(f"Outorga {ano}: {resultado.n_incluidos} incluídos | {resultado.n_excluidos} excluídos")
 
-    st.session_state["lti_resultados"] = resultados_session
+    st.session_state["lti_chaves"] = chaves_session
     with st.expander("Log de processamento"):
         st.text("\n".join(log_msgs))
 
 # ---------------------------------------------------------------------------
 # Bloco 3 — Resultados
 # ---------------------------------------------------------------------------
-if "lti_resultados" in st.session_state and st.session_state["lti_resultados"]:
+resultados_session = {
+    ano: r for ano, chave in st.session_state.get("lti_chaves", {}).items()
+    if (r := store.obter_objeto(chave)) is not None
+}
+if st.session_state.get("lti_chaves") and not resultados_session:
+    st.info("Resultados anteriores expiraram da memória — calcule novamente.")
+
+if resultados_session:
     st.subheader("3. Resultados")
-    resultados_session = st.session_state["lti_resultados"]
 
     for ano, resultado in sorted(resultados_session.items()):
         st.markdown(f"### Outorga {ano}")
@@ -134,6 +153,35 @@ if "lti_resultados" in st.session_state and st.session_state["lti_resultados"]:
                     label += " ◄ **TIM**"
                 st.markdown(label)
 
+        # Daily mark-to-market path
+        with st.expander("Evolução diária do TSR (mark-to-market)"):
+            chave_traj = f"{st.session_state['lti_chaves'][ano]}:trajetoria"
+            traj = store.obter_objeto(chave_traj)
+            if st.button("Calcular / atualizar trajetória", key=f"traj_{ano}"):
+                with st.spinner("Baixando COTAHIST do período de vesting..."):
+                    # Estende uma cópia: a publicada segue intacta para as outras sessões até a troca
+                    traj = carregar_trajetoria(resultado, trajetoria=traj, logger=lambda _msg: None)
+                store.guardar_objeto(chave_traj, traj)
+            if traj is None:
+                st.caption(
+                    "TSR de cada ticker como se a apuração fosse em cada pregão: VWAP móvel "
+                    "da janela Pf, dividendos e eventos corporativos acumulados até o dia. "
+                    "O primeiro cálculo baixa o COTAHIST de todo o período; os seguintes, só os pregões novos."
+                )
+            else:
+                participantes = [t.ticker_original for t in resultado.ranking]
+                sel_traj = st.multiselect(
+                    "Tickers:", participantes,
+                    default=[t for t in ("TIMS3",) if t in participantes],
+                    key=f"traj_sel_{ano}",
+                )
+                if sel_traj:
+                    st.caption(f"TSR (%) — VWAP móvel de {traj.janela} pregões, até {traj.ultima_data:%d/%m/%Y}")
+                    st.line_chart(traj.tabela("tsr").loc[sel_traj].T * 100)
+                    st.caption("Posição no ranking (1 = maior TSR)")
+                    rank_traj = traj.tabela("rank").loc[sel_traj].T
+                    st.line_chart(rank_traj.where(rank_traj > 0))
+
         # Exclusions and divergences
         excluidos = [t for t in resultado.tickers if t.status != "INCLUIDO"]
         divergencias = [t for t in resultado.tickers if t.divergencia_yf]
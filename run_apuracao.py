@@ -8,16 +8,20 @@ Uso:
   python run_apuracao.py --outorga 2024           # apenas outorga 2024
   python run_apuracao.py --outorga 2023 2025      # outorgas 2023 e 2025
   python run_apuracao.py --output ./resultados/   # pasta de output customizada
+  python run_apuracao.py --format json            # dados em JSON em vez de Excel
+  python run_apuracao.py --format parquet         # um .parquet por tabela
 """
 import argparse
 import os
 import sys
+from datetime import datetime
 
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 from src.lti.config import OUTORGAS
 from src.lti.engine import calcular_todas_outorgas
 from src.lti.excel_builder import salvar_excel, nome_arquivo
+from src.lti.export import FORMATOS, gerar_json_bytes, salvar_parquet
 from src import ticker_service
 
 
@@ -33,7 +37,13 @@ def main() -> None:
     parser.add_argument(
         "--output",
         default="./output",
-        help="Pasta de destino para os arquivos Excel. Default: ./output",
+        help="Pasta de destino para os arquivos gerados. Default: ./output",
+    )
+    parser.add_argument(
+        "--format",
+        choices=FORMATOS,
+        default="xlsx",
+        help="Formato de saída: xlsx (auditoria), json ou parquet (dados). Default: xlsx",
     )
     args = parser.parse_args()
 
@@ -53,12 +63,22 @@ def main() -> None:
 
     resultados = calcular_todas_outorgas(anos, df_empresas, logger=print)
 
+    prefixo = f"Apuracao_LTI_{datetime.now().strftime('%Y%m%d')}"
+    if args.format == "json":
+        fpath = os.path.join(args.output, f"{prefixo}.json")
+        with open(fpath, "wb") as f:
+            f.write(gerar_json_bytes(list(resultados.values())))
+        print(f"\nArquivo: {fpath}")
+    elif args.format == "parquet":
+        for fpath in salvar_parquet(list(resultados.values()), args.output, prefixo):
+            print(f"\nArquivo: {fpath}")
+
     for ano, resultado in resultados.items():
-        fname = nome_arquivo(resultado)
-        fpath = os.path.join(args.output, fname)
-        salvar_excel(resultado, fpath)
         print(f"\nOutorga {ano}: {resultado.n_incluidos} incluídos | {resultado.n_excluidos} excluídos")
-        print(f"  Arquivo: {fpath}")
+        if args.format == "xlsx":
+            fpath = os.path.join(args.output, nome_arquivo(resultado))
+            salvar_excel(resultado, fpath)
+            print(f"  Arquivo: {fpath}")
         print(f"\n  Ranking (top 10):")
         for t in resultado.ranking[:10]:
             tim_mark = " ◄ TIM" if t.ticker == "TIMS3" else ""
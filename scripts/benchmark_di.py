@@ -0,0 +1,171 @@
+"""
+Benchmark da extração do histórico ADVFN (src/di_service.py) e da curva DI1 (src/di).
+
+1. Extração, sobre páginas salvas do ADVFN (html da rota /historico):
+  - extração anterior: BeautifulSoup(html.parser) do documento inteiro para
+    ler o data-options da div#table_more_historical, json.loads e datas em
+    São Paulo pelo .dt do pandas, linha a linha em .dt.date
+  - di_service.extrair_historico_advfn: busca nos bytes só a tag da div,
+    parser JSON em C quando houver (orjson) e epochs → datas em bloco
+
+Sem --paginas, usa a página de tests/di/fixtures e gera páginas sintéticas
+no mesmo formato, do tamanho das reais (~200 KB de marcação em volta do
+payload, --pregoes registros). Confere que as duas extrações dão o mesmo
+DataFrame antes de reportar os tempos.
+
+2. Curva flat-forward 252 de --datas datas × --contratos contratos nos
+   vértices usuais: laço por data (ln P interpolado com np.interp, como na
+   planilha) × src.di.interpolar_flat_forward. Diferença relativa ≤ 1e-12.
+
+Uso:
+    python scripts/benchmark_di.py [--paginas DIR] [--sinteticas 20] [--pregoes 2500] [--repeticoes 5]
+                                   [--datas 2500] [--contratos 40]
+"""
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import argparse
+import base64
+import glob
+import json
+import math
+import time
+
+import numpy as np
+import pandas as pd
+from bs4 import BeautifulSoup
+
+from src.di import interpolar_flat_forward
+from src.di_service import extrair_historico_advfn
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "..", "tests", "di", "fixtures")
+
+
+# ---------------------------------------------------------------------------
+# Implementação anterior (referência — corpo de consultar_taxas_di_advfn)
+# ---------------------------------------------------------------------------
+
+def extrair_legado(texto: str):
+    soup = BeautifulSoup(texto, "html.parser")
+    table_div = soup.find("div", id="table_more_historical")
+    if not table_div:
+        return None, "Div de histórico não encontrada no HTML."
+    data_options_b64 = table_div.get("data-options")
+    if not data_options_b64:
+        return None, "Atributo data-options ausente no HTML."
+    data_json = json.loads(base64.b64decode(data_options_b64).decode("utf-8"))
+    records = data_json.get("data", [])
+    if not records:
+        return None, "A lista de dados retornou vazia."
+    df = pd.DataFrame(records)
+    df["DATA_DT"] = pd.to_datetime(df["Date"].astype(int), unit="s")
+    df["DATA_DT"] = df["DATA_DT"].dt.tz_localize("UTC").dt.tz_convert("America/Sao_Paulo").dt.date
+    df["TAXA"] = df["ClosePrice"].astype(float)
+    return df[["DATA_DT", "TAXA"]], None
+
+
+def curva_por_data(du, taxas, alvos):
+    """Uma data por vez: ln P nos vértices, np.interp e extrapolação pelo último trecho."""
+    saida = np.full((du.shape[0], len(alvos)), np.nan)
+    for t in range(du.shape[0]):
+        ok = np.isfinite(taxas[t])
+        x = np.concatenate([[0.0], du[t, ok]])
+        y = np.concatenate([[0.0], -du[t, ok] / 252 * np.log1p(taxas[t, ok] / 100)])
+        if len(x) < 2:
+            continue
+        log_p = np.interp(alvos, x, y)
+        depois = alvos > x[-1]
+        log_p[depois] = y[-1] + (y[-1] - y[-2]) / (x[-1] - x[-2]) * (alvos[depois] - x[-1])
+        saida[t] = np.expm1(-log_p * 252 / alvos) * 100
+    return saida
+
+
+# ---------------------------------------------------------------------------
+# Páginas sintéticas
+# ---------------------------------------------------------------------------
+
+def gerar_pagina(ticker: str, pregoes: int, seed: int = 0) -> bytes:
+    rng = np.random.default_rng(seed)
+    dias = pd.bdate_range(end="2025-12-30", periods=pregoes)
+    taxas = 10 + np.cumsum(rng.normal(0, 0.05, pregoes))
+    registros = [
+        {"Date": str(int((d + pd.Timedelta(hours=22)).timestamp())), "OpenPrice": f"{t + 0.01:.3f}",
+         "HighPrice": f"{t + 0.04:.3f}", "LowPrice": f"{t - 0.03:.3f}", "ClosePrice": f"{t:.3f}",
+         "Volume": str(int(rng.integers(1_000, 500_000)))}
+        for d, t in zip(dias[::-1], taxas[::-1])
+    ]
+    payload = base64.b64encode(json.dumps({"data": registros, "symbol": f"BMF^{ticker}"}).encode()).decode()
+    # Marcação em volta: menus, tabelas e scripts como na página real
+    menu = "".join(f'<li class="menu-item"><a href="/bolsa/{i}" title="Item {i}">Item {i}</a></li>'
+                   for i in range(700))
+    noticias = "".join(f'<div class="news"><span>{i}</span><p>Notícia &amp; análise {i}</p></div>'
+                       for i in range(700))
+    html = (
+        f'<!DOCTYPE html><html><head><meta charset="utf-8"><title>{ticker} - ADVFN</title>'
+        f'<script>var cfg = {{"id": "table_more_historical_ads"}};</script></head><body>'
+        f'<nav><ul>{menu}</ul></nav><main>'
+        f'<div class="more-historical" id="table_more_historical" data-options="{payload}"></div>'
+        f'</main><aside>{noticias}</aside></body></html>'
+    )
+    return html.encode("utf-8")
+
+
+# ---------------------------------------------------------------------------
+# Execução
+# ---------------------------------------------------------------------------
+
+def _cronometrar(fn, repeticoes: int):
+    melhor, saida = math.inf, None
+    for _ in range(repeticoes):
+        t = time.perf_counter()
+        saida = fn()
+        melhor = min(melhor, time.perf_counter() - t)
+    return melhor, saida
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--paginas", help="pasta com páginas .html salvas do ADVFN")
+    ap.add_argument("--sinteticas", type=int, default=20)
+    ap.add_argument("--pregoes", type=int, default=2500)
+    ap.add_argument("--repeticoes", type=int, default=5)
+    ap.add_argument("--datas", type=int, default=2500)
+    ap.add_argument("--contratos", type=int, default=40)
+    args = ap.parse_args()
+
+    arquivos = sorted(glob.glob(os.path.join(args.paginas or FIXTURES, "*.html")))
+    paginas = [open(a, "rb").read() for a in arquivos]
+    if not args.paginas:
+        paginas += [gerar_pagina(f"DI1F{27 + i % 10}", args.pregoes, i) for i in range(args.sinteticas)]
+    tamanho = sum(map(len, paginas)) / len(paginas) / 1024
+    print(f"{len(paginas)} páginas, {tamanho:.0f} KB em média")
+
+    # O legado lia response.text; o novo, response.content
+    textos = [p.decode("utf-8") for p in paginas]
+    t_leg, ref = _cronometrar(lambda: [extrair_legado(t) for t in textos], args.repeticoes)
+    t_novo, novo = _cronometrar(lambda: [extrair_historico_advfn(p) for p in paginas], args.repeticoes)
+    for (df_ref, err_ref), (df_novo, err_novo) in zip(ref, novo):
+        assert err_ref == err_novo
+        if df_ref is not None:
+            pd.testing.assert_frame_equal(df_novo, df_ref)
+    print("Extração do histórico:")
+    print(f"  BeautifulSoup + .dt:  {t_leg * 1000:9.1f} ms")
+    print(f"  bytes + numpy:        {t_novo * 1000:9.1f} ms   ({t_leg / t_novo:.1f}×)")
+
+    rng = np.random.default_rng(0)
+    # DU dos contratos andando com as datas; ~10% sem fechamento e vencidos saindo da curva
+    du = np.arange(1, args.contratos + 1) * 63.0 - np.arange(args.datas)[:, None] % 63
+    taxas = 10 + 0.05 * np.sqrt(du) + rng.normal(0, 0.05, du.shape)
+    taxas[rng.random(du.shape) < 0.1] = np.nan
+    alvos = np.array([1, 21, 42, 63, 126, 252, 378, 504, 756, 1008, 1260, 2520], dtype=float)
+    t_leg, ref = _cronometrar(lambda: curva_por_data(du, taxas, alvos), args.repeticoes)
+    t_novo, novo = _cronometrar(lambda: interpolar_flat_forward(du, taxas, alvos), args.repeticoes)
+    np.testing.assert_allclose(novo, ref, rtol=1e-12)
+    print(f"Curva flat-forward ({args.datas} datas × {args.contratos} contratos, {len(alvos)} vértices):")
+    print(f"  laço por data:        {t_leg * 1000:9.1f} ms")
+    print(f"  vetorizado:           {t_novo * 1000:9.1f} ms   ({t_leg / t_novo:.1f}×)")
+
+
+if __name__ == "__main__":
+    main()
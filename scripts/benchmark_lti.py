@@ -0,0 +1,161 @@
+"""
+Benchmark de memória das cotações guardadas pela apuração LTI (src/lti/engine.py).
+
+  - anterior: buscar_vwap_mes memoizado devolvia {ticker: (vwap, DataFrame)} —
+    um DataFrame por ticker no cache (memória e disco) e, no resultado,
+    compactar_quadros() empilhava esses mesmos quadros numa segunda tabela;
+    cada leitura de TickerResult.df_cotacoes_* fazia um iloc novo
+  - atual: tsr.dados.buscar_cotacoes_b3 memoiza uma tabela só (base Arrow no
+    SharedStore, compartilhar=True) e os TickerResult guardam fatias dela;
+    a fatia materializada fica guardada na _Fatia
+
+O download é simulado (b3_engine com pregões sintéticos, --tickers × --pregoes
+por período, P0 e Pf). Mede a memória retida por cache + ApuracaoResult com
+tracemalloc (numpy/pandas) somado aos buffers do pyarrow, e o tempo de
+--leituras leituras de df_cotacoes_p0 por ticker. Confere que os quadros das
+duas formas são iguais antes de reportar.
+
+Uso:
+    python scripts/benchmark_lti.py [--tickers 57] [--pregoes 21] [--leituras 20]
+"""
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+os.environ.setdefault("SRC_CACHE_DISCO", "0")
+
+import argparse
+import gc
+import time
+import tracemalloc
+from datetime import date
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from src.cache import limpar_tudo, memoizar
+from src.lti import engine
+from src.lti.config import OUTORGAS
+from src.lti.engine import ApuracaoResult, TickerResult, buscar_cotacoes_periodo
+from src.tsr.precos import IndicePrecos
+
+
+# ---------------------------------------------------------------------------
+# Implementação anterior (referência)
+# ---------------------------------------------------------------------------
+
+@memoizar(ttl=3600, max_itens=16, ignorar=("logger",))
+def buscar_vwap_mes_legado(tickers, dt_ini, dt_fim, logger=print):
+    dias = engine.b3_engine.listar_dias_uteis(dt_ini, dt_fim)
+    frames = [r for d in dias if (r := engine.b3_engine.baixar_e_parsear_dia(d, tickers, None)) is not None]
+    result = {t: (None, pd.DataFrame()) for t in tickers}
+    df_all = pd.concat(frames, ignore_index=True)
+    df_all["Date"] = pd.to_datetime(df_all["Date"])
+    df_all = df_all.sort_values(["Ticker", "Date"], kind="stable", ignore_index=True)
+    indice = IndicePrecos(df_all)
+    por_ticker = dict(iter(df_all.groupby("Ticker", sort=False)))
+    for ticker in tickers:
+        df_t = por_ticker.get(ticker)
+        if df_t is not None:
+            result[ticker] = (indice.vwap(ticker, dt_ini, dt_fim), df_t.reset_index(drop=True))
+    return result
+
+
+def _ler_legado(fatia):
+    # Leitura anterior: um iloc novo a cada acesso
+    return fatia.tabela.iloc[fatia.inicio:fatia.fim].reset_index(drop=True)
+
+
+# ---------------------------------------------------------------------------
+# Pregões sintéticos
+# ---------------------------------------------------------------------------
+
+def _pregoes(pregoes: int):
+    def dia(d, tickers_b3, session):
+        rng = np.random.default_rng(d.toordinal())  # mesmo pregão → mesmos preços nas duas formas
+        n = len(tickers_b3)
+        preco = rng.uniform(5, 80, n)
+        return pd.DataFrame({
+            "Ticker": tickers_b3, "Date": [d] * n,
+            "Open": preco, "High": preco * 1.02, "Low": preco * 0.98, "Close": preco, "Average": preco,
+            "Volume": preco * 1e6, "Quantity": rng.integers(10_000, 5_000_000, n),
+        })
+    def dias(ini, fim):
+        return list(pd.bdate_range(ini, periods=pregoes).date)
+    return patch.multiple(engine.b3_engine, listar_dias_uteis=dias, baixar_e_parsear_dia=dia, ler_cotacoes_dia=dia)
+
+
+def _resultado(tickers, p0, pf) -> ApuracaoResult:
+    return ApuracaoResult(outorga=OUTORGAS[2024], tickers=[
+        TickerResult(ticker=t, ticker_original=t, vwap_p0=p0[t][0], vwap_pf=pf[t][0], dividendos_total=0.0,
+                     df_cotacoes_p0=p0[t][1], df_cotacoes_pf=pf[t][1])
+        for t in tickers
+    ])
+
+
+def _medir(fn):
+    """(valor, bytes retidos): tracemalloc + buffers do pyarrow."""
+    gc.collect()
+    arrow0 = pa.total_allocated_bytes()
+    tracemalloc.start()
+    valor = fn()
+    gc.collect()
+    atual, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return valor, atual + pa.total_allocated_bytes() - arrow0
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--tickers", type=int, default=57)
+    ap.add_argument("--pregoes", type=int, default=21)
+    ap.add_argument("--leituras", type=int, default=20)
+    args = ap.parse_args()
+
+    tickers = [f"TK{i:02d}3" for i in range(args.tickers)]
+    periodos = [(date(2024, 3, 1), date(2024, 3, 31)), (date(2027, 3, 1), date(2027, 3, 31))]
+    limpar_tudo()
+
+    with _pregoes(args.pregoes):
+        def legado():
+            p0, pf = (buscar_vwap_mes_legado(tickers, *p) for p in periodos)
+            return _resultado(tickers, p0, pf)
+
+        def atual():
+            p0, pf = (buscar_cotacoes_periodo(tickers, *p, logger=lambda m: None) for p in periodos)
+            return _resultado(tickers, {t: (p0.vwaps[t], p0.fatia(t)) for t in tickers},
+                              {t: (pf.vwaps[t], pf.fatia(t)) for t in tickers})
+
+        res_leg, mem_leg = _medir(legado)
+        res_novo, mem_novo = _medir(atual)
+
+    for a, b in zip(res_leg.tickers, res_novo.tickers):
+        pd.testing.assert_frame_equal(b.df_cotacoes_p0, a.df_cotacoes_p0)
+        pd.testing.assert_frame_equal(b.df_cotacoes_pf, a.df_cotacoes_pf, check_index_type=False)
+
+    linhas = args.tickers * args.pregoes
+    print(f"{args.tickers} tickers × {args.pregoes} pregões × 2 períodos ({2 * linhas} linhas)")
+    print("Memória retida (cache + ApuracaoResult):")
+    print(f"  quadro por ticker + concat:  {mem_leg / 1024:9.1f} KB")
+    print(f"  tabela única + fatias:       {mem_novo / 1024:9.1f} KB   ({mem_leg / mem_novo:.1f}× menos)")
+
+    bruto = TickerResult.df_cotacoes_p0.bruto
+    fatias = [bruto(t) for t in res_novo.tickers]
+    t = time.perf_counter()
+    for _ in range(args.leituras):
+        for f in fatias:
+            _ler_legado(f)
+    t_leg = time.perf_counter() - t
+    t = time.perf_counter()
+    for _ in range(args.leituras):
+        for r in res_novo.tickers:
+            r.df_cotacoes_p0
+    t_novo = time.perf_counter() - t
+    print(f"Leituras de df_cotacoes_p0 ({args.leituras} × {args.tickers}):")
+    print(f"  iloc a cada acesso:          {t_leg * 1000:9.1f} ms")
+    print(f"  fatia guardada (cópia rasa): {t_novo * 1000:9.1f} ms   ({t_leg / t_novo:.1f}×)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Benchmark da carga dos preços e taxas do Tesouro Direto (src/treasury_service.py).
+
+  - carga anterior: CSV inteiro via response.text → StringIO, read_csv com
+    parse_dates + dayfirst, a cada expiração do cache
+  - carga nova: base local em Parquet (Tipo Titulo categórico, ordenada por
+    Data Base), lida de disco enquanto o CSV do Tesouro não muda
+
+e o filtro de uma Data Base: máscara sobre a coluna × busca binária
+(treasury_service.filtrar_data_base). Sem --csv, gera um CSV sintético no
+formato do PrecoTaxaTesouroDireto.csv (--linhas registros). Confere que as
+duas cargas dão os mesmos dados antes de reportar os tempos.
+
+Uso:
+    python scripts/benchmark_tesouro.py [--csv ARQUIVO] [--linhas 150000] [--repeticoes 5]
+"""
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import argparse
+import math
+import tempfile
+import time
+from io import BytesIO, StringIO
+
+import numpy as np
+import pandas as pd
+
+from src.treasury_service import _indexar, filtrar_data_base, ler_csv_tesouro
+
+TITULOS = ["Tesouro Prefixado", "Tesouro Prefixado com Juros Semestrais", "Tesouro IPCA+",
+           "Tesouro IPCA+ com Juros Semestrais", "Tesouro Selic", "Tesouro Renda+ Aposentadoria Extra"]
+
+
+# ---------------------------------------------------------------------------
+# Implementação anterior (referência — corpo de carregar_dados_tesouro)
+# ---------------------------------------------------------------------------
+
+def carregar_legado(conteudo: bytes):
+    texto = conteudo.decode("latin-1")  # response.text
+    return pd.read_csv(StringIO(texto), sep=';', decimal=',',
+                       parse_dates=['Data Base', 'Data Vencimento'], dayfirst=True)
+
+
+# ---------------------------------------------------------------------------
+# CSV sintético
+# ---------------------------------------------------------------------------
+
+def gerar_csv(linhas: int, seed: int = 0) -> bytes:
+    rng = np.random.default_rng(seed)
+    dias = pd.bdate_range(end="2025-12-30", periods=max(linhas // 30, 1))
+    base = dias[rng.integers(0, len(dias), linhas)]
+    venc = base + pd.to_timedelta(rng.integers(180, 12_000, linhas), unit="D")
+    taxa = rng.uniform(4, 14, linhas)
+    pu = rng.uniform(500, 15_000, linhas)
+    df = pd.DataFrame({
+        "Tipo Titulo": np.array(TITULOS)[rng.integers(0, len(TITULOS), linhas)],
+        "Data Vencimento": venc.strftime("%d/%m/%Y"),
+        "Data Base": base.strftime("%d/%m/%Y"),
+        "Taxa Compra Manha": taxa.round(2), "Taxa Venda Manha": (taxa + 0.12).round(2),
+        "PU Compra Manha": pu.round(2), "PU Venda Manha": (pu - 3).round(2), "PU Base Manha": (pu - 3.2).round(2),
+    })
+    # O arquivo do Tesouro não vem ordenado por data
+    return df.to_csv(sep=";", decimal=",", index=False).encode("latin-1")
+
+
+# ---------------------------------------------------------------------------
+# Execução
+# ---------------------------------------------------------------------------
+
+def _cronometrar(fn, repeticoes: int):
+    melhor, saida = math.inf, None
+    for _ in range(repeticoes):
+        t = time.perf_counter()
+        saida = fn()
+        melhor = min(melhor, time.perf_counter() - t)
+    return melhor, saida
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--csv", help="PrecoTaxaTesouroDireto.csv já baixado")
+    ap.add_argument("--linhas", type=int, default=150_000)
+    ap.add_argument("--repeticoes", type=int, default=5)
+    args = ap.parse_args()
+
+    conteudo = open(args.csv, "rb").read() if args.csv else gerar_csv(args.linhas)
+    print(f"CSV de {len(conteudo) / 2**20:.1f} MB")
+
+    t_leg, ref = _cronometrar(lambda: carregar_legado(conteudo), args.repeticoes)
+    t_csv, novo = _cronometrar(lambda: ler_csv_tesouro(BytesIO(conteudo)), args.repeticoes)
+    with tempfile.TemporaryDirectory() as pasta:
+        caminho = os.path.join(pasta, "base.parquet")
+        novo.to_parquet(caminho, index=False)
+        t_pq, base = _cronometrar(lambda: _indexar(pd.read_parquet(caminho)), args.repeticoes)
+    pd.testing.assert_frame_equal(base, novo)
+    ordem = ["Data Base", "Tipo Titulo", "Data Vencimento"]
+    ref = ref.dropna(subset=["Data Base"]).sort_values(ordem, kind="stable").reset_index(drop=True)
+    pd.testing.assert_frame_equal(novo.reset_index(drop=True).astype({"Tipo Titulo": object}), ref, check_dtype=False)
+
+    print(f"Carga ({len(novo)} linhas):")
+    print(f"  text + dayfirst:      {t_leg * 1000:9.1f} ms")
+    print(f"  CSV tipado (refresh): {t_csv * 1000:9.1f} ms   ({t_leg / t_csv:.1f}×)")
+    print(f"  Parquet local:        {t_pq * 1000:9.1f} ms   ({t_leg / t_pq:.1f}×)")
+
+    datas = pd.DatetimeIndex(novo["Data Base"].unique())
+    alvos = datas[np.linspace(0, len(datas) - 1, 50).astype(int)]
+    t_masc, _ = _cronometrar(lambda: [novo[novo["Data Base"] == d] for d in alvos], args.repeticoes)
+    t_bin, _ = _cronometrar(lambda: [filtrar_data_base(novo, d) for d in alvos], args.repeticoes)
+    for d in alvos[:5]:
+        pd.testing.assert_frame_equal(filtrar_data_base(novo, d), novo[novo["Data Base"] == d])
+    print(f"Filtro por Data Base ({len(alvos)} datas):")
+    print(f"  máscara:              {t_masc * 1000:9.1f} ms")
+    print(f"  busca binária:        {t_bin * 1000:9.1f} ms   ({t_masc / t_bin:.1f}×)")
+
+
+if __name__ == "__main__":
+    main()
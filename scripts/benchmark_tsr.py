@@ -0,0 +1,246 @@
+"""
+Benchmark do núcleo de TSR (src/tsr) contra a implementação anterior.
+
+Compara, sobre dados sintéticos no formato das APIs B3/Yahoo:
+  1. calcular_tsr: laço com iterrows + multiplicador evento a evento (versão
+     anterior do engine/página TSR) × src.tsr.calcular_tsr (vetorizado)
+  2. preços: recorte do DataFrame por ticker + VWAP/média/fechamento ×
+     src.tsr.IndicePrecos (somas acumuladas)
+  3. screener do universo (src.tsr.universo.screener) com as bases já locais:
+     laço de calcular_tsr por ticker × uma passada de calcular_tsr_lote
+
+Confere os resultados antes de reportar os tempos: TSR idêntico bit a bit,
+preços com diferença relativa ≤ 1e-9 (subtração de somas acumuladas).
+
+Uso:
+    python scripts/benchmark_tsr.py [--tickers 400] [--divs 40] [--eventos 6] [--repeticoes 3]
+"""
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import argparse
+import math
+import time
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+from src import b3_engine
+from src.tsr import (
+    TIPOS, IndicePrecos, calcular_preco, calcular_tsr, normalizar_dividendos_lote, normalizar_eventos_lote,
+)
+from src.tsr.universo import screener
+
+T0 = pd.Timestamp("2022-12-30")
+T1 = pd.Timestamp("2025-12-30")
+LABELS = ["BONIFICACAO", "DESDOBRAMENTO", "GRUPAMENTO", "RESG TOTAL RV", "SPLIT_YF"]
+
+
+# ---------------------------------------------------------------------------
+# Implementação anterior (referência)
+# ---------------------------------------------------------------------------
+
+def _parse_float_legado(val) -> float:
+    try:
+        s = str(val).strip()
+        if "," in s:
+            s = s.replace(".", "").replace(",", ".")
+        return float(s)
+    except Exception:
+        return math.nan
+
+
+def calcular_tsr_legado(ticker, p0, p_final, df_divs, df_bonif, t0, t1) -> dict:
+    eventos = []
+    if not df_bonif.empty and "lastDatePrior" in df_bonif.columns:
+        for _, row in df_bonif.iterrows():
+            dt = pd.to_datetime(row.get("lastDatePrior", ""), format="%d/%m/%Y", errors="coerce")
+            fac = _parse_float_legado(row.get("factor", 0))
+            label = str(row.get("label", "")).upper()
+            if pd.notna(dt) and pd.notna(fac) and fac != 0 and t0 < dt <= t1:
+                if label in ("RESG TOTAL RV", "RESGATE TOTAL RV"):
+                    continue
+                mult = fac if label in ("GRUPAMENTO", "SPLIT_YF") else 1.0 + fac / 100.0
+                eventos.append({"date": dt, "mult": round(mult, 8), "factor": fac, "label": row.get("label", "")})
+    eventos.sort(key=lambda x: x["date"])
+
+    def mult_ate(data):
+        m = 1.0
+        for ev in eventos:
+            if ev["date"] <= data:
+                m *= ev["mult"]
+        return m
+
+    mult_final = mult_ate(t1)
+    mult_yf = 1.0
+    for ev in eventos:
+        if str(ev["label"]).upper() in {"DESDOBRAMENTO", "GRUPAMENTO", "SPLIT_YF"}:
+            mult_yf *= ev["mult"]
+
+    total_divs = 0.0
+    divs_detail = []
+    if not df_divs.empty and "value" in df_divs.columns:
+        for _, row in df_divs.iterrows():
+            dt_ex = pd.to_datetime(row.get("lastDatePriorEx", ""), format="%d/%m/%Y", errors="coerce")
+            val = _parse_float_legado(row.get("value", 0))
+            if pd.isna(dt_ex) or pd.isna(val):
+                continue
+            m_div = mult_ate(dt_ex)
+            div_total = m_div * val
+            total_divs += div_total
+            divs_detail.append({
+                "Data Ex": row.get("lastDatePriorEx", ""),
+                "Pagamento": row.get("paymentDate", ""),
+                "Tipo": row.get("label", ""),
+                "Valor/Ação (R$)": round(val, 6),
+                "Multiplicador": round(m_div, 6),
+                "Total Recebido (R$)": round(div_total, 6),
+            })
+
+    p_final_adj = p_final * mult_final
+    ret_preco = (p_final_adj - p0) / p0
+    ret_divs = total_divs / p0
+    return {
+        "Ticker": ticker,
+        "P0 (R$)": round(p0, 4),
+        "P Final (R$)": round(p_final, 4),
+        "Mult. Corporativo": round(mult_final, 6),
+        "P Final Ajustado (R$)": round(p_final_adj, 4),
+        "Dividendos/JCP (R$)": round(total_divs, 4),
+        "Ret. Preço (%)": round(ret_preco * 100, 2),
+        "Ret. Dividendos (%)": round(ret_divs * 100, 2),
+        "TSR Total (%)": round((ret_preco + ret_divs) * 100, 2),
+        "_divs_detail": divs_detail,
+        "_eventos": eventos,
+        "_mult_yf": round(mult_yf, 6),
+    }
+
+
+def preco_legado(cotacoes: pd.DataFrame, ticker: str, ini: date, fim: date, tipo: str):
+    m = (cotacoes["Ticker"] == ticker) & (cotacoes["Date"] >= pd.Timestamp(ini)) & (cotacoes["Date"] <= pd.Timestamp(fim))
+    return calcular_preco(cotacoes[m].sort_values("Date"), tipo)
+
+
+# ---------------------------------------------------------------------------
+# Dados sintéticos
+# ---------------------------------------------------------------------------
+
+def _br(x: float) -> str:
+    """Número no formato da API B3: '7.900,00000000000'."""
+    return f"{x:,.11f}".replace(",", "_").replace(".", ",").replace("_", ".")
+
+
+def gerar_proventos(n_tickers: int, n_divs: int, n_eventos: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    dias = pd.date_range("2022-06-01", "2026-03-31", freq="D")
+    dados = []
+    for i in range(n_tickers):
+        ex = rng.choice(dias, n_divs)
+        divs = pd.DataFrame({
+            "lastDatePriorEx": pd.DatetimeIndex(ex).strftime("%d/%m/%Y"),
+            "paymentDate": "",
+            "label": rng.choice(["DIVIDENDO", "JRS CAP PROPRIO"], n_divs),
+            "value": [_br(v) for v in rng.uniform(0.01, 2.0, n_divs)],
+        })
+        labels = rng.choice(LABELS, n_eventos)
+        fatores = [
+            {"GRUPAMENTO": 0.1, "SPLIT_YF": 2.0}.get(l, float(rng.choice([1.0, 10.0, 100.0, 7900.0])))
+            for l in labels
+        ]
+        bonif = pd.DataFrame({
+            "lastDatePrior": pd.DatetimeIndex(rng.choice(dias, n_eventos)).strftime("%d/%m/%Y"),
+            "label": labels,
+            "factor": [_br(f) for f in fatores],
+        })
+        dados.append((f"T{i:03d}3", float(rng.uniform(5, 50)), float(rng.uniform(5, 50)), divs, bonif))
+    return dados
+
+
+def gerar_cotacoes(tickers: list[str], ini: date, fim: date, seed: int = 1) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    dias = pd.to_datetime(b3_engine.listar_dias_uteis(ini, fim))
+    n = len(dias)
+    return pd.concat([
+        pd.DataFrame({
+            "Ticker": t, "Date": dias,
+            "Average": 20 + rng.normal(0, 0.5, n).cumsum(),
+            "Close": 20 + rng.normal(0, 0.5, n).cumsum(),
+            "Quantity": rng.integers(0, 10_000, n).astype(float),
+        })
+        for t in tickers
+    ], ignore_index=True)
+
+
+# ---------------------------------------------------------------------------
+# Execução
+# ---------------------------------------------------------------------------
+
+def _cronometrar(fn, repeticoes: int):
+    melhor, saida = math.inf, None
+    for _ in range(repeticoes):
+        t = time.perf_counter()
+        saida = fn()
+        melhor = min(melhor, time.perf_counter() - t)
+    return melhor, saida
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--tickers", type=int, default=400)
+    ap.add_argument("--divs", type=int, default=40)
+    ap.add_argument("--eventos", type=int, default=6)
+    ap.add_argument("--repeticoes", type=int, default=3)
+    args = ap.parse_args()
+
+    dados = gerar_proventos(args.tickers, args.divs, args.eventos)
+    print(f"TSR: {args.tickers} tickers × {args.divs} dividendos × {args.eventos} eventos")
+    t_leg, ref = _cronometrar(lambda: [calcular_tsr_legado(*d, T0, T1) for d in dados], args.repeticoes)
+    t_novo, novo = _cronometrar(lambda: [calcular_tsr(*d, T0, T1) for d in dados], args.repeticoes)
+    assert novo == ref, "src.tsr.calcular_tsr divergiu da implementação anterior"
+    print(f"  anterior:  {t_leg * 1000:9.1f} ms")
+    print(f"  src.tsr:   {t_novo * 1000:9.1f} ms   ({t_leg / t_novo:.1f}×)")
+
+    tickers = [d[0] for d in dados]
+    ini, fim = date(2025, 1, 1), date(2025, 6, 30)
+    cot = gerar_cotacoes(tickers, ini, fim)
+    janela = (date(2025, 3, 1), date(2025, 3, 31))
+    print(f"Preços: {len(tickers)} tickers × {len(cot) // len(tickers)} pregões, janela {janela[0]} → {janela[1]}")
+    for tipo in TIPOS:
+        t_leg, ref = _cronometrar(lambda: [preco_legado(cot, t, *janela, tipo) for t in tickers], args.repeticoes)
+        t_novo, novo = _cronometrar(lambda: IndicePrecos(cot).precos(tickers, *janela, tipo), args.repeticoes)
+        np.testing.assert_allclose(list(novo.values()), ref, rtol=1e-9)
+        print(f"  {tipo:<10} anterior: {t_leg * 1000:8.1f} ms | src.tsr (índice + consultas): "
+              f"{t_novo * 1000:7.1f} ms ({t_leg / t_novo:.1f}×)")
+
+    # Screener: cotações das duas janelas e proventos já nas bases locais
+    janela_p0 = (date(2022, 12, 1), T0.date())
+    janela_pf = (date(2025, 12, 1), T1.date())
+    cot_p0 = gerar_cotacoes(tickers, *janela_p0, seed=2)
+    cot_pf = gerar_cotacoes(tickers, *janela_pf, seed=3)
+    divs = pd.concat([d.assign(Ticker=t) for t, _, _, d, _ in dados], ignore_index=True)
+    bonif = pd.concat([b.assign(Ticker=t) for t, _, _, _, b in dados], ignore_index=True)
+    eventos, dividendos = normalizar_eventos_lote(bonif), normalizar_dividendos_lote(divs)
+    print(f"Screener: {len(tickers)} tickers, {len(cot_p0) + len(cot_pf)} cotações, "
+          f"{len(eventos)} eventos, {len(dividendos)} dividendos")
+
+    def _laco():
+        i0, i1 = IndicePrecos(cot_p0), IndicePrecos(cot_pf)
+        return [
+            calcular_tsr(t, i0.vwap(t, *janela_p0), i1.vwap(t, *janela_pf),
+                         d[pd.to_datetime(d["lastDatePriorEx"], format="%d/%m/%Y").between(T0, T1)], b, T0, T1)
+            for t, _, _, d, b in dados
+        ]
+
+    t_leg, ref = _cronometrar(_laco, args.repeticoes)
+    t_novo, df = _cronometrar(lambda: screener(cot_p0, cot_pf, eventos, dividendos, janela_p0, janela_pf),
+                              args.repeticoes)
+    ref_tsr = pd.Series({r["Ticker"]: r["TSR Total (%)"] for r in ref})
+    np.testing.assert_allclose(df.set_index("Ticker")["TSR Total (%)"].reindex(ref_tsr.index), ref_tsr, atol=0.011)
+    print(f"  calcular_tsr por ticker: {t_leg * 1000:8.1f} ms")
+    print(f"  screener (lote):         {t_novo * 1000:8.1f} ms   ({t_leg / t_novo:.1f}×)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,268 @@
+"""
+Benchmark do engine de volatilidade (src/volatility) contra o laço da página.
+
+Compara, sobre um download sintético no formato do yfinance (colunas
+(campo, ticker), calendário comum com feriados diferentes por ticker):
+  1. rolling: xs + dropna + rolling(janela) do pandas por ticker e método
+     (versão anterior da aba Rolling) × src.volatility.vol_rolling
+  2. todas as janelas do seletor do gráfico (21, 42, 63, 126): rolling do
+     pandas por ticker, método e janela × vol_rolling_janelas (momentos
+     acumulados montados uma vez, uma subtração por janela)
+  3. tabela por janela: recortes df.iloc[-n:] por ticker, janela e método
+     (versão anterior da aba Volatilidade por Janela) × vol_janelas
+  4. GARCH(1,1) da tabela (--garch N tickers): arch_model().fit() a frio,
+     em série, por ticker e janela × garch.vol_garch_janelas (pool de
+     processos + warm start entre janelas) e a mesma chamada com o cache quente
+  5. correlação: log_rets.corr() do pandas (versão anterior da aba
+     Correlação) × covariancia.correlacao (blocos float32), e o custo de um
+     dia novo — corr() refeito com o histórico inteiro × Covariancia.adicionar
+
+Confere os resultados antes de reportar os tempos: estimadores com diferença
+relativa ≤ 1e-9; GARCH ≤ 1e-3 (tolerância do otimizador, ver garch.py);
+correlações com diferença absoluta ≤ 1e-6 (produtos em float32).
+
+Uso:
+    python scripts/benchmark_volatilidade.py [--tickers 100] [--anos 10] [--janela 63] [--repeticoes 3]
+                                             [--garch 20]
+"""
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import argparse
+import math
+import tempfile
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from src.volatility import (
+    FA,
+    Covariancia,
+    JANELAS_ROLLING,
+    Painel,
+    correlacao,
+    janelas_padrao,
+    log_retornos,
+    vol_janelas,
+    vol_rolling,
+    vol_rolling_janelas,
+)
+
+METODOS = ["Histórica (C-C)", "Parkinson", "Garman-Klass", "Rogers-Satchell", "Yang-Zhang", "EWMA"]
+LAM = 0.94
+
+
+# ---------------------------------------------------------------------------
+# Implementação anterior (referência — funções da página)
+# ---------------------------------------------------------------------------
+
+def _rs(df):
+    return (np.log(df["High"] / df["Open"]) * np.log(df["High"] / df["Close"])
+            + np.log(df["Low"] / df["Open"]) * np.log(df["Low"] / df["Close"]))
+
+
+def roll_legado(df, met, janela, lam=LAM, k=0.34):
+    lr = np.log(df["Close"] / df["Close"].shift(1))
+    hl2 = np.log(df["High"] / df["Low"]) ** 2
+    if met == "Histórica (C-C)":
+        return lr.rolling(janela).std() * np.sqrt(FA)
+    if met == "Parkinson":
+        return np.sqrt(hl2.rolling(janela).mean() / (4 * np.log(2)) * FA)
+    if met == "Garman-Klass":
+        gk = 0.5 * hl2 - (2 * np.log(2) - 1) * np.log(df["Close"] / df["Open"]) ** 2
+        return np.sqrt(gk.rolling(janela).mean() * FA)
+    if met == "Rogers-Satchell":
+        return np.sqrt(_rs(df).rolling(janela).mean() * FA)
+    if met == "Yang-Zhang":
+        v_n = np.log(df["Open"] / df["Close"].shift(1)).rolling(janela).var()
+        v_d = np.log(df["Close"] / df["Open"]).rolling(janela).var()
+        k_adj = k / (1 + k + (janela + 1) / (janela - 1))
+        return np.sqrt((v_n + k_adj * v_d + (1 - k_adj) * _rs(df).rolling(janela).mean()) * FA)
+    return np.sqrt((lr ** 2).ewm(alpha=1 - lam, adjust=False).mean() * FA)
+
+
+def periodo_legado(df_periodo, met, n, lam=LAM, k=0.34):
+    df = df_periodo.iloc[-n:]
+    if met == "Yang-Zhang":
+        df = df_periodo.iloc[max(0, len(df_periodo) - n - 1):]
+        log_oc = np.log(df["Open"] / df["Close"].shift(1)).dropna()
+        log_co = np.log(df["Close"] / df["Open"]).dropna()
+        rs = _rs(df).dropna()
+        if len(rs) < 5:
+            return np.nan
+        k_adj = k / (1 + k + (len(rs) + 1) / (len(rs) - 1))
+        return np.sqrt((log_oc.var() + k_adj * log_co.var() + (1 - k_adj) * rs.mean()) * FA)
+    lr = np.log(df["Close"] / df["Close"].shift(1)).dropna()
+    if met == "Histórica (C-C)":
+        return lr.std() * np.sqrt(FA)
+    if met == "EWMA":
+        return float(np.sqrt((lr ** 2).ewm(alpha=1 - lam, adjust=False).mean().iloc[-1] * FA))
+    if met == "Parkinson":
+        return np.sqrt((np.log(df["High"] / df["Low"]) ** 2).dropna().mean() / (4 * np.log(2)) * FA)
+    if met == "Garman-Klass":
+        gk = 0.5 * np.log(df["High"] / df["Low"]) ** 2 - (2 * np.log(2) - 1) * np.log(df["Close"] / df["Open"]) ** 2
+        return np.sqrt(gk.dropna().mean() * FA)
+    return np.sqrt(_rs(df).dropna().mean() * FA)
+
+
+def garch_legado(df):
+    from arch import arch_model
+
+    lr = np.log(df["Close"] / df["Close"].shift(1)).dropna() * 100
+    if len(lr) < 60:
+        return np.nan
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        res = arch_model(lr, vol="Garch", p=1, q=1, dist="normal", rescale=False).fit(disp="off")
+    return float(res.conditional_volatility.iloc[-1] / 100 * np.sqrt(FA))
+
+
+def rolling_pagina(dados, tickers, janela):
+    saida = {}
+    for t in tickers:
+        df_full = dados.xs(t, axis=1, level=1).dropna(how="all")
+        saida[t] = {met: roll_legado(df_full, met, janela) for met in METODOS}
+    return saida
+
+
+def tabela_pagina(dados, tickers):
+    linhas = []
+    for t in tickers:
+        df_periodo = dados.xs(t, axis=1, level=1).dropna(how="all")
+        for n, rotulo in janelas_padrao(len(df_periodo)):
+            linha = {"Ticker": t, "Janela": rotulo, "Dias Úteis": n}
+            for met in METODOS:
+                linha[met] = periodo_legado(df_periodo, met, n)
+            linhas.append(linha)
+    return pd.DataFrame(linhas)
+
+
+# ---------------------------------------------------------------------------
+# Dados sintéticos
+# ---------------------------------------------------------------------------
+
+def _retornos_garch(rng, forma, omega=2e-5, alpha=0.08, beta=0.9) -> np.ndarray:
+    """Retornos diários com clustering de volatilidade (GARCH(1,1) identificável)."""
+    r = np.empty(forma)
+    var = np.full(forma[1], omega / (1 - alpha - beta))
+    for t in range(forma[0]):
+        r[t] = np.sqrt(var) * rng.standard_normal(forma[1])
+        var = omega + alpha * r[t] ** 2 + beta * var
+    return r
+
+
+def gerar_download(n_tickers: int, anos: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    datas = pd.bdate_range(end="2025-12-31", periods=anos * FA)
+    n = len(datas)
+    forma = (n, n_tickers)
+    close = 30 * np.exp(_retornos_garch(rng, forma).cumsum(axis=0))
+    open_ = close * np.exp(rng.normal(0, 0.01, forma))
+    high = np.maximum(open_, close) * np.exp(np.abs(rng.normal(0, 0.01, forma)))
+    low = np.minimum(open_, close) * np.exp(-np.abs(rng.normal(0, 0.01, forma)))
+    volume = rng.uniform(1e5, 1e6, forma)
+    feriado = rng.random(forma) < 0.03
+    tickers = [f"T{i:03d}3.SA" for i in range(n_tickers)]
+    campos = {}
+    for nome, m in (("Close", close), ("High", high), ("Low", low), ("Open", open_), ("Volume", volume)):
+        m = m.copy()
+        m[feriado] = np.nan
+        campos[nome] = pd.DataFrame(m, index=datas, columns=tickers)
+    return pd.concat(campos, axis=1)
+
+
+# ---------------------------------------------------------------------------
+# Execução
+# ---------------------------------------------------------------------------
+
+def _cronometrar(fn, repeticoes: int):
+    melhor, saida = math.inf, None
+    for _ in range(repeticoes):
+        t = time.perf_counter()
+        saida = fn()
+        melhor = min(melhor, time.perf_counter() - t)
+    return melhor, saida
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--tickers", type=int, default=100)
+    ap.add_argument("--anos", type=int, default=10)
+    ap.add_argument("--janela", type=int, default=63)
+    ap.add_argument("--repeticoes", type=int, default=3)
+    ap.add_argument("--garch", type=int, default=20, help="tickers no teste de GARCH (0 = pula)")
+    args = ap.parse_args()
+    # Cache de ajustes GARCH em pasta descartável: a 1ª rodada é sempre a frio
+    os.environ.setdefault("SRC_CACHE_DIR", tempfile.mkdtemp(prefix="bench_vol_"))
+
+    dados = gerar_download(args.tickers, args.anos)
+    tickers = list(dados["Close"].columns)
+    print(f"Painel: {args.tickers} tickers × {len(dados)} pregões ({args.anos} anos), {len(METODOS)} métodos")
+
+    t_leg, ref = _cronometrar(lambda: rolling_pagina(dados, tickers, args.janela), args.repeticoes)
+    t_novo, novo = _cronometrar(
+        lambda: vol_rolling(Painel.de_yfinance(dados), METODOS, args.janela, LAM), args.repeticoes)
+    for t in tickers:
+        for met in METODOS:
+            r = ref[t][met].dropna()
+            np.testing.assert_allclose(novo[met][t].dropna().to_numpy(), r.to_numpy(), rtol=1e-9)
+    print(f"Rolling (janela {args.janela}d):")
+    print(f"  página (por ticker): {t_leg * 1000:9.1f} ms")
+    print(f"  src.volatility:      {t_novo * 1000:9.1f} ms   ({t_leg / t_novo:.1f}×)")
+
+    t_leg, ref = _cronometrar(
+        lambda: {j: rolling_pagina(dados, tickers, j) for j in JANELAS_ROLLING}, args.repeticoes)
+    t_novo, novo = _cronometrar(
+        lambda: vol_rolling_janelas(Painel.de_yfinance(dados), METODOS, JANELAS_ROLLING, LAM), args.repeticoes)
+    for j in JANELAS_ROLLING:
+        for t in tickers:
+            for met in METODOS:
+                r = ref[j][t][met].dropna()
+                np.testing.assert_allclose(novo[j][met][t].dropna().to_numpy(), r.to_numpy(), rtol=1e-9)
+    print(f"Rolling (janelas {', '.join(map(str, JANELAS_ROLLING))}):")
+    print(f"  página (por ticker): {t_leg * 1000:9.1f} ms")
+    print(f"  src.volatility:      {t_novo * 1000:9.1f} ms   ({t_leg / t_novo:.1f}×)")
+
+    t_leg, ref = _cronometrar(lambda: tabela_pagina(dados, tickers), args.repeticoes)
+    t_novo, novo = _cronometrar(lambda: vol_janelas(Painel.de_yfinance(dados), METODOS, LAM), args.repeticoes)
+    assert list(novo["Janela"]) == list(ref["Janela"])
+    np.testing.assert_allclose(novo[METODOS].to_numpy(), ref[METODOS].to_numpy(), rtol=1e-9)
+    print(f"Tabela por janela ({len(ref)} linhas):")
+    print(f"  página (por ticker): {t_leg * 1000:9.1f} ms")
+    print(f"  src.volatility:      {t_novo * 1000:9.1f} ms   ({t_leg / t_novo:.1f}×)")
+
+    rets = log_retornos(Painel.de_yfinance(dados))
+    t_leg, ref = _cronometrar(lambda: rets.corr(), args.repeticoes)
+    t_novo, novo = _cronometrar(lambda: correlacao(rets), args.repeticoes)
+    np.testing.assert_allclose(novo.to_numpy(), ref.to_numpy(), atol=1e-6)
+    x = rets.to_numpy()
+    estado = Covariancia(x.shape[1]).adicionar(x[:-1])
+    t_dia, _ = _cronometrar(lambda: Covariancia.adicionar(estado, x[-1]), 1)
+    np.testing.assert_allclose(estado.correlacao(), ref.to_numpy(), atol=1e-6)
+    print(f"Correlação ({len(tickers)} × {len(tickers)}):")
+    print(f"  página (corr do pandas): {t_leg * 1000:9.1f} ms")
+    print(f"  blocos float32:          {t_novo * 1000:9.1f} ms   ({t_leg / t_novo:.1f}×)")
+    print(f"  +1 dia, incremental:     {t_dia * 1000:9.1f} ms   ({t_leg / t_dia:.1f}× o corr refeito)")
+
+    if args.garch:
+        from src.volatility import garch
+
+        series = {t: dados.xs(t, axis=1, level=1).dropna(how="all") for t in tickers[:args.garch]}
+        comprimentos = {t: [n for n, _ in janelas_padrao(len(df))] for t, df in series.items()}
+        n_fits = sum(map(len, comprimentos.values()))
+        print(f"GARCH(1,1): {len(series)} tickers, {n_fits} janelas")
+        t_leg, ref = _cronometrar(lambda: {(t, n): garch_legado(series[t].iloc[-n:])
+                                           for t, ns in comprimentos.items() for n in ns}, 1)
+        t_frio, novo = _cronometrar(lambda: garch.vol_garch_janelas(series, comprimentos), 1)
+        t_quente, _ = _cronometrar(lambda: garch.vol_garch_janelas(series, comprimentos), args.repeticoes)
+        np.testing.assert_allclose([novo[k] for k in ref], list(ref.values()), rtol=1e-3)
+        print(f"  página (a frio, em série):      {t_leg * 1000:9.1f} ms")
+        print(f"  pool + warm start (cache frio): {t_frio * 1000:9.1f} ms   ({t_leg / t_frio:.1f}×)")
+        print(f"  cache quente:                   {t_quente * 1000:9.1f} ms   ({t_leg / t_quente:.1f}×)")
+
+
+if __name__ == "__main__":
+    main()
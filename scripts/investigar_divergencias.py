@@ -16,12 +16,8 @@ import yfinance as yf
 from datetime import date
 
 from src.lti.config import OUTORGAS
-from src.lti.engine import (
-    _fetch_dividendos_b3,
-    _fetch_bonificacoes_b3,
-    calcular_tsr,
-    _parse_float,
-)
+from src.lti.engine import calcular_tsr, _parse_float
+from src.tsr.dados import buscar_bonificacoes_b3, buscar_dividendos_b3
 from src import ticker_service
 
 # ---------------------------------------------------------------------------
@@ -107,8 +103,8 @@ def main():
         print(f"{'='*70}")
 
         # ── B3 dividendos + eventos ─────────────────────────────────────────
-        df_divs_b3   = _fetch_dividendos_b3(ticker_ef, df_empresas, DT_INI, DT_FIM)
-        df_bonif     = _fetch_bonificacoes_b3(ticker_ef, df_empresas, DT_INI, DT_FIM)
+        df_divs_b3   = buscar_dividendos_b3(ticker_ef, df_empresas, DT_INI, DT_FIM)
+        df_bonif     = buscar_bonificacoes_b3(ticker_ef, df_empresas, DT_INI, DT_FIM)
 
         if df_divs_b3.empty:
             print("  B3 dividendos: VAZIO")
@@ -56,38 +56,122 @@ def listar_dias_uteis(inicio, fim):
         curr += datetime.timedelta(days=1)
     return dias
 
-def baixar_e_parsear_dia(data_pregao, tickers_b3, session):
+class FalhaDownload(Exception):
+    """Arquivo COTAHIST de um pregão que não pôde ser baixado ou lido (timeout, HTTP, ZIP)."""
+
+
+def _ler_arquivo_dia(data_pregao, session):
+    """
+    Linhas do COTAHIST do pregão (coluna 'raw', sem header/trailer). None se o
+    arquivo não existe (404: feriado, pregão ainda não publicado); FalhaDownload
+    se o download ou a leitura falharem — o pregão existe e precisa ser pedido de novo.
+    """
     url = f'https://bvmf.bmfbovespa.com.br/InstDados/SerHist/COTAHIST_D{data_pregao.strftime("%d%m%Y")}.ZIP'
     try:
         r = session.get(url, verify=False, timeout=10)
-        if r.status_code == 404: return None
+        if r.status_code == 404:
+            return None
         with zipfile.ZipFile(io.BytesIO(r.content)) as z:
             dados = z.read(z.namelist()[0])
         df = pl.read_csv(io.BytesIO(dados), has_header=False, new_columns=['raw'], encoding='latin1', separator='|')
-        df_filtered = df.slice(1, -1).filter(pl.col('raw').str.slice(12, 12).str.strip_chars().is_in(tickers_b3))
-        if df_filtered.is_empty(): return None
-        slices = []
-        start = 0
-        for col, width in FIELD_SIZES.items():
-            slices.append(pl.col('raw').str.slice(start, width).str.strip_chars().alias(col))
-            start += width
-        df_parsed = df_filtered.with_columns(slices).drop('raw').with_columns([
-            pl.col('FATOR_DE_COTACAO').cast(pl.Float64).alias('_FATCOT'),
-        ])
-        # Preços são (13)V99 → ÷100; depois ÷FATCOT para corrigir cotações históricas (ex: FATCOT=1000 pré-2010)
-        return df_parsed.with_columns([
+    except Exception as e:
+        raise FalhaDownload(f"COTAHIST {data_pregao}: {e}") from e
+    return df.slice(1, -1)
+
+
+def ler_cotacoes_dia(data_pregao, tickers_b3, session):
+    """
+    Cotações dos tickers num pregão, no formato de baixar_e_parsear_dia, sem
+    juntar os casos que lá viram None: None = não há arquivo; DataFrame vazio =
+    arquivo sem nenhum dos tickers; FalhaDownload = download/leitura falhou.
+    """
+    df = _ler_arquivo_dia(data_pregao, session)
+    if df is None:
+        return None
+    df_filtered = df.filter(pl.col('raw').str.slice(12, 12).str.strip_chars().is_in(tickers_b3))
+    slices = []
+    start = 0
+    for col, width in FIELD_SIZES.items():
+        slices.append(pl.col('raw').str.slice(start, width).str.strip_chars().alias(col))
+        start += width
+    df_parsed = df_filtered.with_columns(slices).drop('raw').with_columns([
+        pl.col('FATOR_DE_COTACAO').cast(pl.Float64).alias('_FATCOT'),
+    ])
+    # Preços são (13)V99 → ÷100; depois ÷FATCOT para corrigir cotações históricas (ex: FATCOT=1000 pré-2010)
+    return df_parsed.with_columns([
+        pl.col('DATA_DO_PREGAO').str.to_date('%Y%m%d').alias('Date'),
+        pl.col('CODIGO_DE_NEGOCIACAO').alias('Ticker'),
+        (pl.col('PRECO_DE_ABERTURA').cast(pl.Float64) / 100 / pl.col('_FATCOT')).alias('Open'),
+        (pl.col('PRECO_MAXIMO').cast(pl.Float64) / 100 / pl.col('_FATCOT')).alias('High'),
+        (pl.col('PRECO_MINIMO').cast(pl.Float64) / 100 / pl.col('_FATCOT')).alias('Low'),
+        (pl.col('PRECO_ULTIMO_NEGOCIO').cast(pl.Float64) / 100 / pl.col('_FATCOT')).alias('Close'),
+        (pl.col('PRECO_MEDIO').cast(pl.Float64) / 100 / pl.col('_FATCOT')).alias('Average'),
+        # VOLTOT é (16)V99 → ÷100
+        pl.col('VOLUME_TOTAL_NEGOCIADO').cast(pl.Float64).truediv(100).alias('Volume'),
+        pl.col('QUANTIDADE_NEGOCIADA').cast(pl.Int64).alias('Quantity'),
+    ]).select(['Ticker', 'Date', 'Open', 'High', 'Low', 'Close', 'Average', 'Volume', 'Quantity']).to_pandas()
+
+
+def baixar_e_parsear_dia(data_pregao, tickers_b3, session):
+    """Cotações dos tickers no pregão; None sem arquivo, sem os tickers ou em erro (ver ler_cotacoes_dia)."""
+    try:
+        df = ler_cotacoes_dia(data_pregao, tickers_b3, session)
+    except Exception:
+        return None
+    return None if df is None or df.empty else df
+
+
+def _acoes_a_vista(data_pregao: datetime.date, session) -> pl.DataFrame | None:
+    """
+    Registros de ações à vista do pregão (TIPO_DE_REGISTRO 01, BDI 02 ou 12,
+    TIPO_DE_MERCADO 010) com os campos de FIELD_SIZES fatiados. None se o
+    arquivo não existe; FalhaDownload se o download falhar.
+    """
+    df = _ler_arquivo_dia(data_pregao, session)
+    if df is None:
+        return None
+    slices = []
+    start = 0
+    for col, width in FIELD_SIZES.items():
+        slices.append(pl.col('raw').str.slice(start, width).str.strip_chars().alias(col))
+        start += width
+    return df.with_columns(slices).drop('raw').filter(
+        (pl.col('TIPO_DE_REGISTRO') == '01') &
+        (pl.col('CODIGO_BDI').is_in(['2', '02', '12'])) &
+        (pl.col('TIPO_DE_MERCADO') == '010')
+    )
+
+
+def baixar_acoes_dia(data_pregao: datetime.date, session):
+    """
+    Cotações de todas as ações à vista de um pregão (BDI 02 ou 12, TIPO_DE_MERCADO
+    010) no formato de baixar_e_parsear_dia, mais ISIN, nome da empresa e BDI.
+    Base do screener de TSR sobre o universo B3 (src/tsr/universo.py).
+
+    Returns pandas DataFrame ou None (pregão inexistente/erro de download).
+    """
+    try:
+        df_acoes = _acoes_a_vista(data_pregao, session)
+        if df_acoes is None or df_acoes.is_empty():
+            return None
+        fatcot = pl.col('FATOR_DE_COTACAO').cast(pl.Float64)
+        return df_acoes.with_columns([
             pl.col('DATA_DO_PREGAO').str.to_date('%Y%m%d').alias('Date'),
             pl.col('CODIGO_DE_NEGOCIACAO').alias('Ticker'),
-            (pl.col('PRECO_DE_ABERTURA').cast(pl.Float64) / 100 / pl.col('_FATCOT')).alias('Open'),
-            (pl.col('PRECO_MAXIMO').cast(pl.Float64) / 100 / pl.col('_FATCOT')).alias('High'),
-            (pl.col('PRECO_MINIMO').cast(pl.Float64) / 100 / pl.col('_FATCOT')).alias('Low'),
-            (pl.col('PRECO_ULTIMO_NEGOCIO').cast(pl.Float64) / 100 / pl.col('_FATCOT')).alias('Close'),
-            (pl.col('PRECO_MEDIO').cast(pl.Float64) / 100 / pl.col('_FATCOT')).alias('Average'),
-            # VOLTOT é (16)V99 → ÷100
+            (pl.col('PRECO_DE_ABERTURA').cast(pl.Float64) / 100 / fatcot).alias('Open'),
+            (pl.col('PRECO_MAXIMO').cast(pl.Float64) / 100 / fatcot).alias('High'),
+            (pl.col('PRECO_MINIMO').cast(pl.Float64) / 100 / fatcot).alias('Low'),
+            (pl.col('PRECO_ULTIMO_NEGOCIO').cast(pl.Float64) / 100 / fatcot).alias('Close'),
+            (pl.col('PRECO_MEDIO').cast(pl.Float64) / 100 / fatcot).alias('Average'),
             pl.col('VOLUME_TOTAL_NEGOCIADO').cast(pl.Float64).truediv(100).alias('Volume'),
             pl.col('QUANTIDADE_NEGOCIADA').cast(pl.Int64).alias('Quantity'),
-        ]).select(['Ticker', 'Date', 'Open', 'High', 'Low', 'Close', 'Average', 'Volume', 'Quantity']).to_pandas()
-    except: return None
+            pl.col('CODIGO_ISIN').alias('ISIN'),
+            pl.col('NOME_DA_EMPRESA').alias('Empresa'),
+            pl.col('CODIGO_BDI').str.zfill(2).alias('BDI'),
+        ]).select(['Ticker', 'Date', 'Open', 'High', 'Low', 'Close', 'Average', 'Volume', 'Quantity',
+                   'ISIN', 'Empresa', 'BDI']).to_pandas()
+    except Exception:
+        return None
 
 
 def parsear_acoes_dia(data_pregao: datetime.date, session) -> pl.DataFrame | None:
@@ -98,40 +182,17 @@ def parsear_acoes_dia(data_pregao: datetime.date, session) -> pl.DataFrame | Non
 
     Returns DataFrame com colunas [ticker, isin, nome] ou None em caso de erro.
     """
-    url = f'https://bvmf.bmfbovespa.com.br/InstDados/SerHist/COTAHIST_D{data_pregao.strftime("%d%m%Y")}.ZIP'
     try:
-        r = session.get(url, verify=False, timeout=10)
-        if r.status_code == 404:
-            return None
-        with zipfile.ZipFile(io.BytesIO(r.content)) as z:
-            dados = z.read(z.namelist()[0])
-        df = pl.read_csv(
-            io.BytesIO(dados),
-            has_header=False,
-            new_columns=['raw'],
-            encoding='latin1',
-            separator='|',
-        )
-        # Slice off header/trailer rows (first and last)
-        df = df.slice(1, -1)
-        slices = []
-        start = 0
-        for col, width in FIELD_SIZES.items():
-            slices.append(pl.col('raw').str.slice(start, width).str.strip_chars().alias(col))
-            start += width
-        df_parsed = df.with_columns(slices).drop('raw')
-        df_acoes = df_parsed.filter(
-            (pl.col('TIPO_DE_REGISTRO') == '01') &
-            (pl.col('CODIGO_BDI').is_in(['2', '02', '12'])) &
-            (pl.col('TIPO_DE_MERCADO') == '010')
-        ).select([
-            pl.col('CODIGO_DE_NEGOCIACAO').alias('ticker'),
-            pl.col('CODIGO_ISIN').alias('isin'),
-            pl.col('NOME_DA_EMPRESA').alias('nome'),
-        ])
-        return df_acoes
-    except:
+        df_acoes = _acoes_a_vista(data_pregao, session)
+    except Exception:
+        return None
+    if df_acoes is None:
         return None
+    return df_acoes.select([
+        pl.col('CODIGO_DE_NEGOCIACAO').alias('ticker'),
+        pl.col('CODIGO_ISIN').alias('isin'),
+        pl.col('NOME_DA_EMPRESA').alias('nome'),
+    ])
 
 
 def detectar_substituicoes_cotahist(
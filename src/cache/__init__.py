@@ -0,0 +1,28 @@
+"""
+Cache compartilhado pelos serviços (B3, Tesouro, IBGE) e pelo engine LTI.
+
+    from src.cache import memoizar
+
+    @memoizar(ttl=3600, disco=True)
+    def carregar_algo(data_ref, _session=None): ...
+
+Ver src/cache/memoizar.py para a semântica completa.
+"""
+from src.cache.hashing import ArgumentoNaoHashavel, hash_estavel
+from src.cache.shared_store import SharedStore, store
+from src.cache.memoizar import (
+    EstatisticasCache, estatisticas, limpar_tudo, memoizar, nao_vazio, pasta_cache,
+)
+
+__all__ = [
+    "ArgumentoNaoHashavel",
+    "EstatisticasCache",
+    "estatisticas",
+    "hash_estavel",
+    "limpar_tudo",
+    "memoizar",
+    "nao_vazio",
+    "pasta_cache",
+    "SharedStore",
+    "store",
+]
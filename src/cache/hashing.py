@@ -0,0 +1,78 @@
+# src/cache/hashing.py
+"""
+Hash estável de argumentos para chaves de cache.
+
+Estável = mesmo valor lógico → mesmo hash em qualquer processo/execução
+(nada de id() ou hash() randomizado do Python). Cobre os tipos que os
+serviços recebem: escalares, datas, DataFrame/Series, arrays numpy,
+coleções e arquivos de upload do Streamlit (qualquer objeto com getvalue()).
+"""
+from __future__ import annotations
+
+import hashlib
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+
+import numpy as np
+import pandas as pd
+
+
+class ArgumentoNaoHashavel(TypeError):
+    """Argumento sem representação estável — renomeie o parâmetro com `_` ou use `ignorar=`."""
+
+
+def _alimentar(h, obj) -> None:
+    """Escreve em `h` uma codificação canônica de obj, prefixada pelo tipo."""
+    if obj is None or isinstance(obj, (bool, int, float, str, Decimal)):
+        h.update(f"{type(obj).__name__}:{obj!r};".encode("utf-8"))
+    elif isinstance(obj, bytes):
+        h.update(b"bytes:" + obj + b";")
+    elif isinstance(obj, pd.Timestamp):
+        h.update(f"ts:{obj.isoformat()};".encode("utf-8"))
+    elif isinstance(obj, (datetime, date, time)):
+        h.update(f"{type(obj).__name__}:{obj.isoformat()};".encode("utf-8"))
+    elif isinstance(obj, timedelta):
+        h.update(f"td:{obj.total_seconds()!r};".encode("utf-8"))
+    elif isinstance(obj, pd.DataFrame):
+        h.update(b"df:")
+        _alimentar(h, [str(c) for c in obj.columns])
+        _alimentar(h, [str(t) for t in obj.dtypes])
+        h.update(pd.util.hash_pandas_object(obj, index=True).to_numpy().tobytes())
+    elif isinstance(obj, pd.Series):
+        h.update(b"s:")
+        _alimentar(h, [str(obj.name), str(obj.dtype)])
+        h.update(pd.util.hash_pandas_object(obj, index=True).to_numpy().tobytes())
+    elif isinstance(obj, np.ndarray):
+        h.update(f"nd:{obj.dtype.str}:{obj.shape};".encode("utf-8"))
+        h.update(np.ascontiguousarray(obj).tobytes())
+    elif isinstance(obj, np.generic):
+        _alimentar(h, obj.item())
+    elif isinstance(obj, (list, tuple)):
+        h.update(f"{type(obj).__name__}[{len(obj)}]:".encode("utf-8"))
+        for item in obj:
+            _alimentar(h, item)
+    elif isinstance(obj, dict):
+        h.update(f"dict[{len(obj)}]:".encode("utf-8"))
+        for k, v in sorted(obj.items(), key=lambda kv: hash_estavel(kv[0])):
+            _alimentar(h, k)
+            _alimentar(h, v)
+    elif isinstance(obj, (set, frozenset)):
+        h.update(f"set[{len(obj)}]:".encode("utf-8"))
+        for item_hash in sorted(hash_estavel(item) for item in obj):
+            h.update(item_hash.encode("ascii"))
+    elif hasattr(obj, "getvalue"):
+        # Uploads (st.file_uploader), BytesIO/StringIO: conteúdo + nome se houver
+        conteudo = obj.getvalue()
+        _alimentar(h, [getattr(obj, "name", None), conteudo])
+    else:
+        raise ArgumentoNaoHashavel(
+            f"Tipo {type(obj).__name__} não tem hash estável para cache."
+        )
+
+
+def hash_estavel(*objs) -> str:
+    """SHA-256 hexadecimal da codificação canônica de objs."""
+    h = hashlib.sha256()
+    for obj in objs:
+        _alimentar(h, obj)
+    return h.hexdigest()
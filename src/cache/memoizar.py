@@ -0,0 +1,375 @@
+# src/cache/memoizar.py
+"""
+Decorator de cache em dois níveis: LRU em memória + disco opcional.
+
+Mesmo comportamento em Streamlit, CLI, pytest e Azure Functions — não depende
+do runtime do Streamlit. Semântica próxima de st.cache_data:
+  - chave = função + hash estável dos argumentos (src.cache.hashing)
+  - parâmetros começando com "_" não entram na chave (ex: _session)
+  - DataFrame/Series saem como cópia — também dentro de dicts, listas e tuplas —
+    e o chamador pode alterar sem sujar o cache (ou, com compartilhar=True,
+    DataFrames no topo saem como visão sem cópia de uma tabela Arrow única)
+
+Disco: um arquivo pickle por chave em <SRC_CACHE_DIR ou tmp>/memo/<função>/.
+Sobrevive a reruns do Streamlit, execuções do CLI e instâncias quentes do
+Azure; arquivos vencidos são varridos nas gravações. SRC_CACHE_DISCO=0
+desliga o nível de disco globalmente.
+"""
+from __future__ import annotations
+
+import functools
+import inspect
+import os
+import pickle
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable
+
+import pandas as pd
+
+from src.cache.hashing import hash_estavel
+from src.cache.shared_store import store
+
+_ENV_DIR = "SRC_CACHE_DIR"
+_ENV_DISCO = "SRC_CACHE_DISCO"
+
+_EXPIRADO = object()   # retorno de get() para entrada vencida (já removida)
+
+
+@dataclass
+class EstatisticasCache:
+    hits_memoria: int = 0
+    hits_disco: int = 0
+    misses: int = 0
+    expirados: int = 0
+    descartes: int = 0        # evicções do LRU
+
+    @property
+    def hits(self) -> int:
+        return self.hits_memoria + self.hits_disco
+
+    @property
+    def taxa_acerto(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+def pasta_cache() -> str:
+    return os.environ.get(_ENV_DIR) or os.path.join(tempfile.gettempdir(), "mf2_cache")
+
+
+def _disco_habilitado() -> bool:
+    return os.environ.get(_ENV_DISCO, "1").strip() not in ("0", "false", "off")
+
+
+def nao_vazio(valor) -> bool:
+    """Predicado para cachear_se: descarta None e DataFrame/Series vazios."""
+    if valor is None:
+        return False
+    if isinstance(valor, (pd.DataFrame, pd.Series)):
+        return not valor.empty
+    return True
+
+
+def _copiar(valor):
+    """Cópia de DataFrame/Series, inclusive dentro de dict/list/tuple; o resto sai como está."""
+    if isinstance(valor, (pd.DataFrame, pd.Series)):
+        return valor.copy()
+    if isinstance(valor, dict):
+        return {k: _copiar(v) for k, v in valor.items()}
+    if isinstance(valor, list):
+        return [_copiar(v) for v in valor]
+    if isinstance(valor, tuple):
+        itens = [_copiar(v) for v in valor]
+        return valor._make(itens) if hasattr(valor, "_make") else tuple(itens)
+    return valor
+
+
+# ---------------------------------------------------------------------------
+# Níveis de armazenamento
+# ---------------------------------------------------------------------------
+
+class _MemoriaLRU:
+    """OrderedDict limitado a max_itens; cada item guarda (expira_em, valor)."""
+
+    def __init__(self, max_itens: int):
+        self.max_itens = max_itens
+        self._itens: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+
+    def get(self, chave: str, agora: float):
+        """(expira_em, valor), None se ausente ou _EXPIRADO."""
+        item = self._itens.get(chave)
+        if item is None:
+            return None
+        if item[0] < agora:
+            del self._itens[chave]
+            return _EXPIRADO
+        self._itens.move_to_end(chave)
+        return item
+
+    def put(self, chave: str, expira_em: float, valor) -> int:
+        """Grava e retorna quantos itens foram descartados pelo limite."""
+        self._itens[chave] = (expira_em, valor)
+        self._itens.move_to_end(chave)
+        descartados = 0
+        while len(self._itens) > self.max_itens:
+            self._itens.popitem(last=False)
+            descartados += 1
+        return descartados
+
+    def limpar(self) -> None:
+        self._itens.clear()
+
+
+class _Disco:
+    """
+    Um arquivo pickle (expira_em, valor) por chave, escrita atômica.
+
+    get() só remove a entrada vencida que é lida de novo; chaves que nunca
+    voltam (janela nova, outra lista de tickers) são apagadas pela varredura
+    de put(): no máximo a cada VARREDURA segundos, os arquivos com mtime + ttl
+    no passado saem sem abrir o pickle.
+    """
+    VARREDURA = 600.0
+
+    def __init__(self, nome: str, ttl: float | None = None):
+        self.nome = nome
+        self.ttl = ttl
+        self._varrido_em = float("-inf")
+
+    @property
+    def pasta(self) -> str:
+        # Resolvida a cada acesso: SRC_CACHE_DIR pode mudar (ex: testes)
+        return os.path.join(pasta_cache(), "memo", self.nome)
+
+    def get(self, chave: str, agora: float):
+        """(expira_em, valor), None se ausente/ilegível ou _EXPIRADO."""
+        caminho = os.path.join(self.pasta, chave + ".pkl")
+        try:
+            with open(caminho, "rb") as f:
+                item = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError, ValueError, AttributeError, ImportError):
+            # ImportError: pickle antigo de classe que mudou de módulo — vira miss e é regravado
+            return None
+        if item[0] < agora:
+            try:
+                os.remove(caminho)
+            except OSError:
+                pass
+            return _EXPIRADO
+        return item
+
+    def put(self, chave: str, expira_em: float, valor) -> None:
+        pasta = self.pasta
+        try:
+            os.makedirs(pasta, exist_ok=True)
+            self._varrer(pasta)
+            fd, tmp = tempfile.mkstemp(dir=pasta, suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump((expira_em, valor), f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, os.path.join(pasta, chave + ".pkl"))
+        except (OSError, pickle.PicklingError, TypeError, AttributeError):
+            # Disco é best-effort: falha de escrita/serialização só perde o nível 2
+            pass
+
+    def _varrer(self, pasta: str) -> None:
+        """Apaga os arquivos vencidos (sem ttl nada vence; ver docstring da classe)."""
+        agora = time.time()
+        if self.ttl is None or agora - self._varrido_em < self.VARREDURA:
+            return
+        self._varrido_em = agora
+        try:
+            entradas = list(os.scandir(pasta))
+        except OSError:
+            return
+        for entrada in entradas:
+            try:
+                if entrada.name.endswith(".pkl") and entrada.stat().st_mtime + self.ttl < agora:
+                    os.remove(entrada.path)
+            except OSError:
+                pass
+
+    def limpar(self) -> None:
+        pasta = self.pasta
+        if not os.path.isdir(pasta):
+            return
+        for nome in os.listdir(pasta):
+            try:
+                os.remove(os.path.join(pasta, nome))
+            except OSError:
+                pass
+
+
+# ---------------------------------------------------------------------------
+# Decorator
+# ---------------------------------------------------------------------------
+
+# Todas as funções decoradas — para estatisticas()/limpar_tudo()
+_REGISTRO: dict[str, "_FuncaoMemoizada"] = {}
+
+
+class _FuncaoMemoizada:
+    def __init__(
+        self,
+        func: Callable,
+        ttl: float | None,
+        max_itens: int,
+        disco: bool,
+        ignorar: tuple[str, ...],
+        cachear_se: Callable[[Any], bool] | None,
+        compartilhar: bool = False,
+    ):
+        self.func = func
+        self.nome = f"{func.__module__}.{func.__qualname__}"
+        self.ttl = ttl
+        self.ignorar = set(ignorar)
+        self.cachear_se = cachear_se
+        self.compartilhar = compartilhar
+        self.estatisticas = EstatisticasCache()
+        self._assinatura = inspect.signature(func)
+        self._memoria = _MemoriaLRU(max_itens)
+        self._disco = _Disco(self.nome, ttl) if disco else None
+        self._lock = threading.Lock()
+        functools.update_wrapper(self, func)
+
+    def _chave(self, args, kwargs) -> str:
+        ligados = self._assinatura.bind(*args, **kwargs)
+        ligados.apply_defaults()
+        partes = [
+            (nome, valor) for nome, valor in ligados.arguments.items()
+            if not nome.startswith("_") and nome not in self.ignorar
+        ]
+        return hash_estavel(self.nome, partes)
+
+    def __call__(self, *args, **kwargs):
+        chave = self._chave(args, kwargs)
+        agora = time.time()
+        achou, valor = self._buscar(chave, agora)
+        if achou:
+            return self._saida(valor)
+
+        with self._lock:
+            self.estatisticas.misses += 1
+        valor = self.func(*args, **kwargs)
+        if not self._cacheavel(valor):
+            return valor
+        return self._saida(self._gravar(chave, agora, valor))
+
+    def em_cache(self, *args, **kwargs) -> tuple[bool, Any]:
+        """
+        (True, valor) se a chamada já está no cache, (False, None) se não — sem
+        executar a função. Com gravar(), permite que o chamador calcule as
+        faltas em lote (ex: um pool de processos) e só depois as guarde.
+        """
+        achou, valor = self._buscar(self._chave(args, kwargs), time.time())
+        if not achou:
+            with self._lock:
+                self.estatisticas.misses += 1
+            return False, None
+        return True, self._saida(valor)
+
+    def gravar(self, valor, *args, **kwargs) -> None:
+        """Guarda `valor` como o resultado da chamada (respeita cachear_se)."""
+        if self._cacheavel(valor):
+            self._gravar(self._chave(args, kwargs), time.time(), valor)
+
+    def _buscar(self, chave: str, agora: float) -> tuple[bool, Any]:
+        with self._lock:
+            item = self._memoria.get(chave, agora)
+            if item is _EXPIRADO:
+                self.estatisticas.expirados += 1
+            elif item is not None:
+                self.estatisticas.hits_memoria += 1
+                return True, item[1]
+
+        disco = self._disco_ativo()
+        if disco is not None:
+            item = disco.get(chave, agora)
+            with self._lock:
+                if item is _EXPIRADO:
+                    self.estatisticas.expirados += 1
+                elif item is not None:
+                    self.estatisticas.hits_disco += 1
+                    expira_em, valor = item
+                    if self.compartilhar and isinstance(valor, pd.DataFrame):
+                        valor = store.publicar(valor)
+                    # Promove ao nível de memória mantendo a validade gravada em disco
+                    self.estatisticas.descartes += self._memoria.put(chave, expira_em, valor)
+                    return True, valor
+        return False, None
+
+    def _cacheavel(self, valor) -> bool:
+        return self.cachear_se is None or self.cachear_se(valor)
+
+    def _gravar(self, chave: str, agora: float, valor):
+        """Grava nos dois níveis e devolve o valor guardado (publicado, se compartilhar)."""
+        if self.compartilhar and isinstance(valor, pd.DataFrame):
+            valor = store.publicar(valor)
+
+        expira_em = agora + self.ttl if self.ttl is not None else float("inf")
+        with self._lock:
+            self.estatisticas.descartes += self._memoria.put(chave, expira_em, valor)
+        disco = self._disco_ativo()
+        if disco is not None:
+            disco.put(chave, expira_em, valor)
+        return valor
+
+    def _disco_ativo(self) -> _Disco | None:
+        return self._disco if self._disco is not None and _disco_habilitado() else None
+
+    def _saida(self, valor):
+        """Valor entregue ao chamador: visão Arrow (compartilhar) ou cópia de pandas."""
+        if self.compartilhar and isinstance(valor, pd.DataFrame):
+            return store.visao(valor)
+        return _copiar(valor)
+
+    def limpar(self) -> None:
+        """Esvazia memória e disco desta função e zera as estatísticas."""
+        with self._lock:
+            self._memoria.limpar()
+            self.estatisticas = EstatisticasCache()
+        if self._disco is not None:
+            self._disco.limpar()
+
+
+def memoizar(
+    ttl: float | None = None,
+    max_itens: int = 128,
+    disco: bool = False,
+    ignorar: tuple[str, ...] = (),
+    cachear_se: Callable[[Any], bool] | None = None,
+    compartilhar: bool = False,
+):
+    """
+    Cacheia o retorno da função por `ttl` segundos (None = sem expiração).
+
+    max_itens:  limite do LRU em memória
+    disco:      grava também em disco (valor precisa ser picklável)
+    ignorar:    nomes de parâmetros fora da chave (além dos prefixados com "_")
+    cachear_se: predicado sobre o retorno; False → não grava (ex: DataFrame vazio
+                por falha de rede não deve ficar preso no cache)
+    compartilhar: DataFrames ficam como base Arrow única no SharedStore e cada
+                chamada recebe uma visão sem cópia (dados de referência lidos por
+                todas as sessões Streamlit — ver src/cache/shared_store.py)
+
+    A função decorada ganha .limpar(), .estatisticas e .em_cache()/.gravar()
+    (consulta e gravação sem executar a função — cálculo das faltas em lote).
+    """
+    def decorator(func: Callable) -> _FuncaoMemoizada:
+        memo = _FuncaoMemoizada(func, ttl, max_itens, disco, ignorar, cachear_se, compartilhar)
+        _REGISTRO[memo.nome] = memo
+        return memo
+    return decorator
+
+
+def estatisticas() -> dict[str, EstatisticasCache]:
+    """Estatísticas de hit/miss de todas as funções memoizadas, por nome."""
+    return {nome: memo.estatisticas for nome, memo in _REGISTRO.items()}
+
+
+def limpar_tudo() -> None:
+    for memo in _REGISTRO.values():
+        memo.limpar()
@@ -0,0 +1,144 @@
+# src/cache/shared_store.py
+"""
+Armazém de dados compartilhado por todas as sessões do processo.
+
+O Streamlit roda todas as sessões de navegador no mesmo processo; guardar
+DataFrames em st.session_state (ou devolver cópias do cache) faz a memória
+crescer com o número de usuários. Aqui os dados de referência (IPCA, Tesouro,
+empresas B3...) ficam uma única vez como tabelas Arrow imutáveis, e cada
+chamada recebe uma *visão*: um DataFrame pandas comum que aponta para os
+buffers Arrow sem copiar. Com copy-on-write (pandas 3) a sessão que altera a
+visão ganha sua própria cópia só das colunas alteradas — a tabela original
+nunca muda. Sem copy-on-write cada visão é uma cópia completa (mais memória,
+mesma garantia).
+
+O copy-on-write só copia enquanto outro DataFrame aponta para os mesmos
+blocos; a última visão viva escreve no lugar — e os buffers Arrow são somente
+leitura. Por isso a base que sai do LRU com visões ainda vivas fica
+"aposentada" (sem ocupar memória extra: os dados são os mesmos) até a última
+delas sumir.
+
+Tabelas idênticas (mesmo hash de conteúdo) são deduplicadas. Objetos que não
+são tabelas (ex: ApuracaoResult da página LTI) podem ser registrados por
+chave num LRU limitado, para que sessões guardem só a chave.
+"""
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+import pyarrow as pa
+
+from src.cache.hashing import hash_estavel
+
+
+def _tem_visoes(base: pd.DataFrame) -> bool:
+    """Algum outro DataFrame (visão ou derivado dela) ainda compartilha os blocos da base."""
+    try:
+        return any(blk.refs.has_reference() for blk in base._mgr.blocks)
+    except AttributeError:  # internals do pandas mudaram: na dúvida, mantém
+        return True
+
+
+def _copy_on_write() -> bool:
+    """Copy-on-write ativo: sempre no pandas 3, opcional (mode.copy_on_write) no 2."""
+    if int(pd.__version__.split(".")[0]) >= 3:
+        return True
+    return pd.options.mode.copy_on_write is True
+
+
+class SharedStore:
+    def __init__(self, max_tabelas: int = 32, max_objetos: int = 16):
+        self.max_tabelas = max_tabelas
+        self.max_objetos = max_objetos
+        # hash do conteúdo → DataFrame base (somente leitura, sobre buffers Arrow).
+        # A base fica viva enquanto estiver no LRU: é a referência extra que faz o
+        # copy-on-write copiar — e não falhar — quando uma visão é alterada.
+        self._tabelas: OrderedDict[str, pd.DataFrame] = OrderedDict()
+        # Bases fora do LRU com visões vivas (ver docstring do módulo)
+        self._aposentadas: list[pd.DataFrame] = []
+        self._objetos: OrderedDict[str, object] = OrderedDict()
+        self._lock = threading.Lock()
+
+    # ── Tabelas ──────────────────────────────────────────────────────────────
+
+    def publicar(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Converte df para Arrow e devolve a base compartilhada (ou a já publicada
+        com o mesmo conteúdo). A base não deve ser entregue a quem vai alterá-la —
+        use visao().
+        """
+        try:
+            h = hash_estavel(df)
+        except TypeError:
+            h = f"id:{id(df)}"  # células não hasheáveis (ex: dicts): sem deduplicação
+        with self._lock:
+            self._aposentadas = [b for b in self._aposentadas if _tem_visoes(b)]
+            base = self._tabelas.get(h)
+            if base is None:
+                try:
+                    # split_blocks evita consolidar colunas em blocos 2D (o que copiaria):
+                    # colunas numéricas/datas viram views dos buffers Arrow, texto fica
+                    # no dtype str do pandas, também sobre Arrow.
+                    base = pa.Table.from_pandas(df).to_pandas(split_blocks=True)
+                except (pa.ArrowException, TypeError, ValueError):
+                    base = df  # colunas sem tipo Arrow: compartilha o próprio DataFrame
+                self._tabelas[h] = base
+                while len(self._tabelas) > self.max_tabelas:
+                    _, saiu = self._tabelas.popitem(last=False)
+                    if _copy_on_write() and _tem_visoes(saiu):
+                        self._aposentadas.append(saiu)
+            else:
+                self._tabelas.move_to_end(h)
+        return base
+
+    @staticmethod
+    def visao(base: pd.DataFrame, colunas: list[str] | None = None) -> pd.DataFrame:
+        """
+        Visão por sessão: cópia rasa — sem copiar dados; escrita copia só o que muda.
+        Sem copy-on-write (pandas < 3 com o modo desligado) a cópia rasa
+        compartilharia a escrita com a base: aí a sessão recebe cópia de verdade.
+        """
+        if not _copy_on_write():
+            return (base if colunas is None else base[colunas]).copy(deep=True)
+        if colunas is not None:
+            return base[colunas]
+        return base.copy(deep=False)
+
+    # ── Objetos ──────────────────────────────────────────────────────────────
+
+    def guardar_objeto(self, chave: str, obj) -> str:
+        with self._lock:
+            self._objetos[chave] = obj
+            self._objetos.move_to_end(chave)
+            while len(self._objetos) > self.max_objetos:
+                self._objetos.popitem(last=False)
+        return chave
+
+    def obter_objeto(self, chave: str):
+        """Objeto registrado sob a chave, ou None se nunca registrado/descartado."""
+        with self._lock:
+            obj = self._objetos.get(chave)
+            if obj is not None:
+                self._objetos.move_to_end(chave)
+            return obj
+
+    # ── Métricas ─────────────────────────────────────────────────────────────
+
+    def resumo(self) -> dict:
+        with self._lock:
+            self._aposentadas = [b for b in self._aposentadas if _tem_visoes(b)]
+            bases = list(self._tabelas.values())
+            n_aposentadas = len(self._aposentadas)
+            n_objetos = len(self._objetos)
+        return {
+            "tabelas": len(bases),
+            "bytes_tabelas": int(sum(b.memory_usage(index=True).sum() for b in bases)),
+            "aposentadas": n_aposentadas,
+            "objetos": n_objetos,
+        }
+
+
+# Instância única do processo (compartilhada entre sessões Streamlit)
+store = SharedStore()
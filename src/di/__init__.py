@@ -0,0 +1,38 @@
+"""
+Curva DI1: painel de taxas datas × contratos e interpolação flat-forward 252.
+
+    from src.di import MotorCurvaDI, carregar_painel
+
+    painel, err = carregar_painel(datas, ["DI1F26", "DI1F27", "DI1F29"])
+    motor = MotorCurvaDI(painel)
+    motor.taxas([21, 252, 504])                      # datas × vértices
+    motor.curva(data).fator_desconto_datas([vcto])   # desconto até uma data
+
+  - src/di/painel.py: PainelDI (taxas e DU por data e contrato), calendário B3,
+                      contrato → vencimento (também usados por di_service)
+  - src/di/curva.py:  flat-forward vetorizado, CurvaDI e MotorCurvaDI
+
+Download e histórico ADVFN continuam em src/di_service.py.
+"""
+from src.di.curva import (
+    DU_ANO,
+    CurvaDI,
+    MotorCurvaDI,
+    interpolar_flat_forward,
+    log_fator_flat_forward,
+)
+from src.di.painel import PainelDI, calendario_b3, carregar_painel, dias_uteis, vencimento, vencimentos
+
+__all__ = [
+    "DU_ANO",
+    "CurvaDI",
+    "MotorCurvaDI",
+    "PainelDI",
+    "calendario_b3",
+    "carregar_painel",
+    "dias_uteis",
+    "interpolar_flat_forward",
+    "log_fator_flat_forward",
+    "vencimento",
+    "vencimentos",
+]
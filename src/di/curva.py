@@ -0,0 +1,157 @@
+# src/di/curva.py
+"""
+Interpolação flat-forward 252 da curva DI1 e fatores de desconto.
+
+Convenção B3: o fator de desconto até um vértice de `du` dias úteis é
+
+    P(du) = (1 + taxa)^(−du/252)
+
+e entre dois vértices a taxa a termo é constante — ln P é linear em du.
+A origem (du = 0, P = 1) entra como vértice: antes do 1º contrato vale a
+taxa dele; depois do último, a taxa a termo do último trecho.
+
+interpolar_flat_forward faz isso para todas as datas de uma vez: cada linha
+tem os seus vértices (contratos com taxa), compactados à esquerda, e o
+trecho de cada du pedido sai de uma contagem vetorizada, sem laço por data.
+MotorCurvaDI guarda o painel; cada curva montada fica num memo por (data,
+contratos, taxas), compartilhado entre motores — a página monta um motor
+novo a cada consulta.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+from src.cache import memoizar
+from src.di.painel import PainelDI, calendario_b3, dias_uteis
+
+DU_ANO = 252
+
+
+# ---------------------------------------------------------------------------
+# Núcleo vetorizado
+# ---------------------------------------------------------------------------
+
+def _log_fator(taxas: np.ndarray, du: np.ndarray) -> np.ndarray:
+    """ln P = −du/252 · ln(1 + taxa%)."""
+    return -du / DU_ANO * np.log1p(taxas / 100.0)
+
+
+def _taxa(log_p: np.ndarray, du: np.ndarray) -> np.ndarray:
+    """Taxa (% a.a.) equivalente a ln P em du dias úteis; NaN em du = 0."""
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(du > 0, np.expm1(-log_p * DU_ANO / du) * 100.0, np.nan)
+
+
+def log_fator_flat_forward(du_vert: np.ndarray, taxas_vert: np.ndarray, du_alvo: np.ndarray) -> np.ndarray:
+    """
+    ln P flat-forward por linha.
+
+    du_vert, taxas_vert: T × C (NaN = vértice ausente naquela linha)
+    du_alvo:             Q ou T × Q dias úteis pedidos
+    Retorna T × Q; NaN nas linhas sem nenhum vértice.
+    """
+    du_vert = np.atleast_2d(np.asarray(du_vert, dtype=float))
+    taxas_vert = np.atleast_2d(np.asarray(taxas_vert, dtype=float))
+    T = du_vert.shape[0]
+    alvo = np.broadcast_to(np.asarray(du_alvo, dtype=float), (T,) + np.shape(du_alvo)[-1:])
+
+    valido = np.isfinite(du_vert) & np.isfinite(taxas_vert) & (du_vert > 0)
+    # Vértices válidos de cada linha à esquerda, em ordem de du, com a origem na frente
+    chave = np.where(valido, du_vert, np.inf)
+    ordem = np.argsort(chave, axis=1, kind="stable")
+    x = np.take_along_axis(chave, ordem, axis=1)
+    y = np.take_along_axis(np.where(valido, _log_fator(taxas_vert, du_vert), 0.0), ordem, axis=1)
+    x = np.concatenate([np.zeros((T, 1)), x], axis=1)
+    y = np.concatenate([np.zeros((T, 1)), y], axis=1)
+    n = valido.sum(axis=1) + 1                         # pontos por linha, origem incluída
+
+    # Trecho [lo, lo+1] de cada alvo: vértices com du ≤ alvo, limitado ao último trecho
+    k = (x[:, None, :] <= alvo[:, :, None]).sum(axis=2)
+    lo = np.clip(k - 1, 0, np.maximum(n - 2, 0)[:, None])
+    hi = lo + 1
+    x0, x1 = np.take_along_axis(x, lo, axis=1), np.take_along_axis(x, np.minimum(hi, x.shape[1] - 1), axis=1)
+    y0, y1 = np.take_along_axis(y, lo, axis=1), np.take_along_axis(y, np.minimum(hi, x.shape[1] - 1), axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        log_p = y0 + (y1 - y0) * (alvo - x0) / (x1 - x0)
+    return np.where((n > 1)[:, None], log_p, np.nan)
+
+
+def interpolar_flat_forward(du_vert: np.ndarray, taxas_vert: np.ndarray, du_alvo: np.ndarray) -> np.ndarray:
+    """Taxas (% a.a., 252) flat-forward nos du pedidos — T × Q (ver log_fator_flat_forward)."""
+    alvo = np.asarray(du_alvo, dtype=float)
+    return _taxa(log_fator_flat_forward(du_vert, taxas_vert, alvo), alvo)
+
+
+# ---------------------------------------------------------------------------
+# Curva de uma data
+# ---------------------------------------------------------------------------
+
+@dataclass(frozen=True)
+class CurvaDI:
+    """Vértices (du, taxa % a.a.) de uma data, em ordem de du."""
+    data: date
+    du: np.ndarray
+    taxas: np.ndarray
+
+    def taxa(self, du) -> np.ndarray:
+        """Taxa flat-forward (% a.a.) em du dias úteis."""
+        return interpolar_flat_forward(self.du, self.taxas, np.atleast_1d(du))[0]
+
+    def fator_desconto(self, du) -> np.ndarray:
+        """P(du) = (1 + taxa)^(−du/252); 1 em du = 0."""
+        return np.exp(log_fator_flat_forward(self.du, self.taxas, np.atleast_1d(du))[0])
+
+    def fator_desconto_datas(self, datas) -> np.ndarray:
+        """Fatores de desconto até datas de calendário (DU pelo calendário B3)."""
+        alvo = pd.to_datetime(list(datas)).to_numpy().astype("datetime64[D]")
+        fim = pd.Timestamp(alvo.max()).date() if len(alvo) else self.data
+        cal = calendario_b3(self.data, max(fim, self.data) + timedelta(days=1))
+        return self.fator_desconto(dias_uteis(np.datetime64(self.data, "D"), alvo, cal))
+
+
+@memoizar(max_itens=512)
+def _curva_di(data: date, contratos: tuple[str, ...], taxas: np.ndarray, _du: np.ndarray) -> CurvaDI:
+    """Curva dos vértices da data; o DU sai de (data, contratos) e fica fora da chave."""
+    du, taxas = _du.copy(), taxas.copy()
+    du.flags.writeable = taxas.flags.writeable = False  # a mesma curva vai para todos os motores
+    return CurvaDI(data, du, taxas)
+
+
+# ---------------------------------------------------------------------------
+# Motor: painel + curvas em cache
+# ---------------------------------------------------------------------------
+
+class MotorCurvaDI:
+    """
+    Curvas DI1 de todas as datas de um PainelDI.
+
+    taxas()/fatores_desconto(): vértices pedidos × todas as datas, numa passada
+    curva(data): CurvaDI de uma data, montada uma vez por (data, contratos, taxas)
+    """
+
+    def __init__(self, painel: PainelDI):
+        self.painel = painel
+
+    def curva(self, data) -> CurvaDI:
+        chave = pd.Timestamp(data).date()
+        i = self.painel.linha(chave)
+        ok = np.isfinite(self.painel.taxas[i]) & np.isfinite(self.painel.du[i])
+        contratos = tuple(c for c, v in zip(self.painel.contratos, ok) if v)
+        return _curva_di(chave, contratos, self.painel.taxas[i, ok], self.painel.du[i, ok])
+
+    def _log_fatores(self, du_alvo) -> np.ndarray:
+        return log_fator_flat_forward(self.painel.du, self.painel.taxas, np.atleast_1d(du_alvo))
+
+    def taxas(self, du_alvo) -> pd.DataFrame:
+        """Taxas flat-forward (% a.a.), datas × du pedidos."""
+        alvo = np.atleast_1d(du_alvo)
+        return self.painel.para_dataframe(_taxa(self._log_fatores(alvo), alvo.astype(float)), list(alvo))
+
+    def fatores_desconto(self, du_alvo) -> pd.DataFrame:
+        """Fatores de desconto P(du), datas × du pedidos."""
+        alvo = np.atleast_1d(du_alvo)
+        return self.painel.para_dataframe(np.exp(self._log_fatores(alvo)), list(alvo))
@@ -0,0 +1,142 @@
+# src/di/painel.py
+"""
+Painel de taxas DI1 datas × contratos, com os dias úteis até cada vencimento.
+
+A consulta do ADVFN devolve pontos soltos (data, contrato, DU, taxa). Para
+montar curvas de muitas datas de uma vez o engine precisa das matrizes:
+
+  taxas[t, c]  taxa de fechamento (% a.a.) do contrato c na data t (NaN sem pregão)
+  du[t, c]     dias úteis B3 de datas[t] até o vencimento de c (NaN se vencido)
+
+Contratos ficam ordenados por vencimento — em cada linha o DU cresce da
+esquerda para a direita. Dias úteis saem de um calendário B3 montado uma
+vez por intervalo (calendario_b3) e de searchsorted.
+
+Código do contrato → mês, vencimento e contagem de DU moram só aqui; o
+di_service (ADVFN, curl_cffi) importa deste módulo, não o contrário.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import date, timedelta
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from src import b3_engine
+
+# Mapeamento oficial de meses da B3 para contratos futuros
+CODIGOS_MES_DI = {
+    1: 'F', 2: 'G', 3: 'H', 4: 'J', 5: 'K', 6: 'M',
+    7: 'N', 8: 'Q', 9: 'U', 10: 'V', 11: 'X', 12: 'Z'
+}
+
+MESES_DI_INV = {v: k for k, v in CODIGOS_MES_DI.items()}
+
+
+@lru_cache(maxsize=8)
+def _calendario(ini: date, fim: date) -> np.ndarray:
+    return np.array(b3_engine.listar_dias_uteis(ini, fim), dtype="datetime64[D]")
+
+
+def calendario_b3(ini: date, fim: date) -> np.ndarray:
+    """Dias úteis B3 em [ini, fim] (datetime64[D]), por anos inteiros para reaproveitar o cache."""
+    return _calendario(date(ini.year, 1, 1), date(fim.year, 12, 31))
+
+
+def dias_uteis(ref, alvo, calendario: np.ndarray) -> np.ndarray:
+    """
+    Dias úteis de ref até alvo (arrays datetime64[D] que se propagam):
+    len(listar_dias_uteis(ref, alvo)) − 1, 0 quando alvo ≤ ref.
+    """
+    ref = np.asarray(ref, dtype="datetime64[D]")
+    alvo = np.asarray(alvo, dtype="datetime64[D]")
+    du = np.searchsorted(calendario, alvo, side="right") - np.searchsorted(calendario, ref, side="left") - 1
+    return np.where(alvo > ref, np.maximum(du, 0), 0)
+
+
+def vencimento(contrato: str) -> date:
+    """Mês/ano do vencimento (DI1F27 → 2027-01-01); o vencimento é o 1º dia útil desse mês."""
+    return date(int("20" + contrato[4:6]), MESES_DI_INV[contrato[3]], 1)
+
+
+def vencimentos(contratos, calendario: np.ndarray) -> np.ndarray:
+    """Data de vencimento (1º dia útil do mês) de cada contrato, datetime64[D]; o calendário precisa cobri-las."""
+    primeiros = np.array([vencimento(c) for c in contratos], dtype="datetime64[D]")
+    return calendario[np.searchsorted(calendario, primeiros, side="left")]
+
+
+@dataclass
+class PainelDI:
+    """
+    Taxas DI1 de vários contratos sobre um índice de datas comum.
+
+    taxas: float64 (T × C), % a.a.; NaN onde o contrato não teve fechamento
+    du:    float64 (T × C), dias úteis até o vencimento; NaN se vencido (e,
+           vindo de de_lote, onde não houve fechamento)
+    """
+    datas: pd.DatetimeIndex
+    contratos: list[str]
+    taxas: np.ndarray
+    du: np.ndarray
+
+    @classmethod
+    def de_pontos(cls, datas, contratos, taxas, du=None) -> "PainelDI":
+        """
+        Painel a partir de pontos (data, contrato, taxa[, du]) em arrays
+        paralelos; contratos ordenados por vencimento. Sem `du`, os dias úteis
+        saem do calendário B3.
+        """
+        pontos = pd.DataFrame({"data": pd.to_datetime(datas), "contrato": list(contratos), "taxa": taxas})
+        tabela = pontos.pivot_table(index="data", columns="contrato", values="taxa", aggfunc="first")
+        ordem = sorted(tabela.columns, key=vencimento)
+        tabela = tabela[ordem]
+        idx = pd.DatetimeIndex(tabela.index)
+        if len(idx) == 0:
+            return cls(idx, ordem, np.empty((0, len(ordem))), np.empty((0, len(ordem))))
+
+        if du is None:
+            cal = calendario_b3(idx[0].date(), max(vencimento(c) for c in ordem) + timedelta(days=31))
+            du = dias_uteis(idx.to_numpy().astype("datetime64[D]")[:, None], vencimentos(ordem, cal)[None, :], cal)
+            du = du.astype(float)
+        else:
+            du = (pontos.assign(du=np.asarray(du, dtype=float))
+                  .pivot_table(index="data", columns="contrato", values="du", aggfunc="first")
+                  .reindex(index=tabela.index, columns=ordem)
+                  .to_numpy(dtype=float, copy=True))
+        du[du <= 0] = np.nan
+        taxas = tabela.to_numpy(dtype=float, copy=True)
+        taxas[np.isnan(du)] = np.nan
+        return cls(idx, ordem, taxas, du)
+
+    @classmethod
+    def de_lote(cls, df: pd.DataFrame) -> "PainelDI":
+        """Painel a partir da saída de di_service.consultar_taxas_di_lote (DU da própria consulta)."""
+        return cls.de_pontos(df["DATA_REF"], df["VENCIMENTO"], df["TAXA (%)"].to_numpy(dtype=float),
+                             df["DIAS_UTEIS"].to_numpy(dtype=float))
+
+    @property
+    def shape(self) -> tuple[int, int]:
+        return self.taxas.shape
+
+    def linha(self, data) -> int:
+        """Posição da data no painel (KeyError se ausente)."""
+        return self.datas.get_loc(pd.Timestamp(data))
+
+    def para_dataframe(self, valores: np.ndarray, colunas=None) -> pd.DataFrame:
+        """Matriz T × K → DataFrame datas × colunas (contratos por padrão)."""
+        return pd.DataFrame(valores, index=self.datas, columns=list(self.contratos if colunas is None else colunas))
+
+
+def carregar_painel(datas, contratos, max_workers: int = 8) -> tuple[PainelDI | None, str | None]:
+    """
+    (PainelDI, erro) das datas × contratos pedidos: um histórico ADVFN por
+    contrato, do cache de di_service.historico_di quando já baixado.
+    """
+    from src.di_service import consultar_taxas_di_lote  # curl_cffi: só ao baixar
+
+    df, err = consultar_taxas_di_lote(datas, contratos, max_workers=max_workers)
+    if df is None:
+        return None, err
+    return PainelDI.de_lote(df), err
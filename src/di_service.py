@@ -2,23 +2,22 @@ import sys
 import os
 import base64
 import json
+import re
+import numpy as np
 import pandas as pd
-from bs4 import BeautifulSoup
-from datetime import date, datetime, timedelta
+from datetime import datetime, timedelta
 from concurrent.futures import ThreadPoolExecutor
 from curl_cffi import requests as curl_requests
 
-# Garante a importação do motor da B3 que já existe no seu projeto
+# Garante a importação do calendário B3 (src/di) e do cache que já existem no seu projeto
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
-from src import b3_engine
+from src.cache import memoizar
+from src.di.painel import CODIGOS_MES_DI, calendario_b3, dias_uteis, vencimento, vencimentos
 
-# Mapeamento oficial de meses da B3 para contratos futuros
-CODIGOS_MES_DI = {
-    1: 'F', 2: 'G', 3: 'H', 4: 'J', 5: 'K', 6: 'M',
-    7: 'N', 8: 'Q', 9: 'U', 10: 'V', 11: 'X', 12: 'Z'
-}
-
-MESES_DI_INV = {v: k for k, v in CODIGOS_MES_DI.items()}
+try:  # parser JSON em C, se instalado
+    from orjson import loads as _json_loads
+except ImportError:
+    _json_loads = json.loads
 
 def gerar_opcoes_tickers(data_ref, meses_curtos=12, anos_longos=10):
     """
@@ -56,33 +55,70 @@ def gerar_opcoes_tickers(data_ref, meses_curtos=12, anos_longos=10):
 def calcular_dias_uteis_di(ticker, data_ref):
     """
     Calcula os dias úteis entre a data de referência e o vencimento do DI,
-    utilizando as regras de feriados do b3_engine.
+    utilizando as regras de feriados do b3_engine (calendário de src/di/painel.py).
+    O vencimento do DI é sempre o 1º dia útil do mês; vencido → 0.
     """
     if isinstance(data_ref, datetime):
         data_ref = data_ref.date()
-        
-    letra_mes = ticker[3]
-    ano_venc = int("20" + ticker[4:6])
-    mes_venc = MESES_DI_INV[letra_mes]
-    
-    # O Vencimento do DI é sempre no 1º dia útil do mês de vencimento
-    dia_teste = date(ano_venc, mes_venc, 1)
-    
-    # Encontra o 1º dia útil usando a lógica do b3_engine
-    while not b3_engine.listar_dias_uteis(dia_teste, dia_teste):
-        dia_teste += timedelta(days=1)
-        
-    data_vencimento = dia_teste
-    
-    # Se o vencimento já passou em relação à data solicitada, retorna 0
-    if data_vencimento <= data_ref:
-        return 0
-        
-    # Conta os dias úteis entre a data de referência e o vencimento
-    lista_dias = b3_engine.listar_dias_uteis(data_ref, data_vencimento)
-    dias_uteis = max(0, len(lista_dias) - 1) # Desconta o dia de hoje
-    
-    return dias_uteis
+    mes_venc = vencimento(ticker)
+    cal = calendario_b3(min(data_ref, mes_venc), mes_venc + timedelta(days=31))
+    return int(dias_uteis(data_ref, vencimentos([ticker], cal)[0], cal))
+
+# ---------------------------------------------------------------------------
+# Extração do histórico ADVFN
+# ---------------------------------------------------------------------------
+
+_ID_TABELA = b'table_more_historical'
+_RE_OPCOES = re.compile(rb'data-options\s*=\s*(["\'])')
+
+
+def _opcoes_advfn(html):
+    """
+    Valor bruto (base64) do data-options da div#table_more_historical, lido
+    direto dos bytes: localiza o id e recorta só a tag de abertura em volta
+    dele — sem montar a árvore do documento inteiro.
+    """
+    pos = html.find(b'"' + _ID_TABELA + b'"')
+    if pos < 0:
+        pos = html.find(b"'" + _ID_TABELA + b"'")
+    if pos < 0:
+        return None, "Div de histórico não encontrada no HTML."
+    ini = html.rfind(b'<', 0, pos)
+    fim = html.find(b'>', pos)
+    fim = len(html) if fim < 0 else fim
+    m = _RE_OPCOES.search(html, ini, fim)
+    if m:
+        # base64 não tem aspas: o valor vai até a próxima aspa igual
+        fecha = html.find(m.group(1), m.end(), fim)
+        if fecha > m.end():
+            return html[m.end():fecha], None
+    return None, "Atributo data-options ausente no HTML."
+
+
+def _datas_sao_paulo(epochs):
+    """Epoch (s) → data civil em São Paulo, vetorizado (horário de verão incluído)."""
+    local = pd.DatetimeIndex(epochs.astype("datetime64[s]"), tz="UTC").tz_convert("America/Sao_Paulo")
+    return local.tz_localize(None).to_numpy().astype("datetime64[D]")
+
+
+def extrair_historico_advfn(html):
+    """
+    (DataFrame DATA_DT, TAXA, erro) a partir do HTML (bytes) da página de
+    histórico do ADVFN. DATA_DT sai como datetime.date, como antes.
+    """
+    b64, err = _opcoes_advfn(html)
+    if err:
+        return None, err
+    records = _json_loads(base64.b64decode(b64)).get('data', [])
+    if not records:
+        return None, "A lista de dados retornou vazia."
+
+    # Colunas direto das listas de registros, sem DataFrame intermediário
+    n = len(records)
+    epochs = np.fromiter(map(int, [r['Date'] for r in records]), dtype=np.int64, count=n)
+    taxas = np.fromiter(map(float, [r['ClosePrice'] for r in records]), dtype=float, count=n)
+    return pd.DataFrame({'DATA_DT': _datas_sao_paulo(epochs).astype(object), 'TAXA': taxas}), None
+
 
 def consultar_taxas_di_advfn(ticker):
     """
@@ -95,45 +131,30 @@ def consultar_taxas_di_advfn(ticker):
     try:
         response = session.get(url, timeout=15)
         response.raise_for_status()
-        
-        soup = BeautifulSoup(response.text, 'html.parser')
-        
-        # Encontra a div que contém o payload com os dados da tabela
-        table_div = soup.find('div', id='table_more_historical')
-        if not table_div:
-            return None, "Div de histórico não encontrada no HTML."
-            
-        data_options_b64 = table_div.get('data-options')
-        if not data_options_b64:
-            return None, "Atributo data-options ausente no HTML."
-            
-        # Decodifica Base64 para String JSON e transforma em dicionário
-        json_str = base64.b64decode(data_options_b64).decode('utf-8')
-        data_json = json.loads(json_str)
-        
-        records = data_json.get('data', [])
-        if not records:
-            return None, "A lista de dados retornou vazia."
-            
-        df = pd.DataFrame(records)
-        
-        # O Timestamp vem em segundos ("Date": "1774044000"). Convertendo para data local:
-        df['DATA_DT'] = pd.to_datetime(df['Date'].astype(int), unit='s')
-        df['DATA_DT'] = df['DATA_DT'].dt.tz_localize('UTC').dt.tz_convert('America/Sao_Paulo').dt.date
-        
-        # Extrai apenas a taxa de fechamento como float real
-        df['TAXA'] = df['ClosePrice'].astype(float)
-        
-        return df[['DATA_DT', 'TAXA']], None
+        return extrair_historico_advfn(response.content)
 
     except Exception as e:
         return None, f"Falha na extração: {str(e)}"
 
+def _sem_erro(valor):
+    return valor[1] is None
+
+
+@memoizar(ttl=3600, disco=True, cachear_se=_sem_erro)
+def historico_di(ticker):
+    """
+    Histórico completo (DATA_DT, TAXA) do contrato no ADVFN, com cache de 1h:
+    consultas de várias datas leem a mesma página uma vez só. Falhas não
+    entram no cache. Somente leitura.
+    """
+    return consultar_taxas_di_advfn(ticker)
+
+
 def _processar_ticker_unico(ticker, data_ref):
     """
     Worker paralelo que procura o JSON, filtra a data e calcula dias úteis.
     """
-    df_hist, err = consultar_taxas_di_advfn(ticker)
+    df_hist, err = historico_di(ticker)
     
     if df_hist is not None and not df_hist.empty:
         # Garante que data_ref é um objeto do tipo date para a comparação
@@ -192,3 +213,53 @@ def consultar_taxas_di_por_tickers(data_ref, tickers_selecionados):
     df_final = df_final.sort_values(by='DIAS_UTEIS').reset_index(drop=True)
     
     return df_final, None
+
+
+# ---------------------------------------------------------------------------
+# Lote: várias datas × vários vencimentos
+# ---------------------------------------------------------------------------
+
+def consultar_taxas_di_lote(datas, tickers_selecionados, max_workers=8):
+    """
+    Taxas de todos os pares (data, vencimento) de uma vez: o histórico de cada
+    contrato é baixado uma vez (historico_di, em paralelo) e os pares saem de
+    um único merge. Mesmas regras de consultar_taxas_di_por_tickers — DU
+    pelo calendário B3, pares vencidos ou sem pregão na data ficam de fora.
+
+    Retorna (DataFrame DATA_REF, VENCIMENTO, DIAS_UTEIS, TAXA (%) ordenado por
+    data e DU, erro); DataFrame None quando nenhum par foi encontrado.
+    """
+    if not tickers_selecionados:
+        return None, "Nenhum ticker selecionado."
+    datas = sorted({d.date() if isinstance(d, datetime) else d for d in datas})
+    if not datas:
+        return None, "Nenhuma data selecionada."
+    tickers = list(dict.fromkeys(tickers_selecionados))
+
+    with ThreadPoolExecutor(max_workers=min(len(tickers), max_workers)) as executor:
+        historicos = list(executor.map(historico_di, tickers))
+
+    erros = [f"{t}: {err}" for t, (df, err) in zip(tickers, historicos) if df is None]
+    partes = [df.assign(VENCIMENTO=t) for t, (df, _) in zip(tickers, historicos) if df is not None and not df.empty]
+    if not partes:
+        return None, "; ".join(erros) or "Nenhum dado encontrado."
+    hist = pd.concat(partes, ignore_index=True).drop_duplicates(["VENCIMENTO", "DATA_DT"], keep="first")
+
+    pares = pd.MultiIndex.from_product([datas, tickers], names=["DATA_DT", "VENCIMENTO"]).to_frame(index=False)
+    df = pares.merge(hist, on=["DATA_DT", "VENCIMENTO"], how="inner")
+    if df.empty:
+        return None, "Nenhum dado encontrado para os tickers nas datas solicitadas (verifique feriados/fins de semana)."
+
+    # DU em bloco: um calendário B3 do 1º dia pedido ao último vencimento
+    cal = calendario_b3(datas[0], max(vencimento(t) for t in tickers) + timedelta(days=31))
+    venc = dict(zip(tickers, vencimentos(tickers, cal)))
+    ref = df["DATA_DT"].to_numpy(dtype="datetime64[D]")
+    df["DIAS_UTEIS"] = dias_uteis(ref, df["VENCIMENTO"].map(venc).to_numpy(dtype="datetime64[D]"), cal)
+    df = df[df["DIAS_UTEIS"] > 0]
+
+    df = (df.rename(columns={"DATA_DT": "DATA_REF", "TAXA": "TAXA (%)"})
+            [["DATA_REF", "VENCIMENTO", "DIAS_UTEIS", "TAXA (%)"]]
+            .sort_values(["DATA_REF", "DIAS_UTEIS"]).reset_index(drop=True))
+    if df.empty:
+        return None, "Nenhum vencimento em aberto nas datas solicitadas."
+    return df, "; ".join(erros) or None
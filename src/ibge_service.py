@@ -1,11 +1,12 @@
 # Arquivo: src/ibge_service.py
 import requests
 import pandas as pd
-import streamlit as st # Necessário para o cache
 from datetime import datetime, timedelta
 
+from src.cache import memoizar, nao_vazio
+
 # O cache evita baixar de novo ao trocar de página
-@st.cache_data(ttl=86400, show_spinner=False)
+@memoizar(ttl=86400, disco=True, cachear_se=nao_vazio, compartilhar=True)
 def carregar_dados_ipca():
     """Baixa a série histórica do IPCA diretamente do SIDRA/IBGE (Cacheado)."""
     url = "https://apisidra.ibge.gov.br/values/t/1737/n1/all/v/all/p/all/d/v63%202,v69%202,v2266%2013,v2263%202,v2264%202,v2265%202?formato=json"
@@ -0,0 +1,325 @@
+# src/lti/cenarios.py
+"""
+Sensibilidade do ranking LTI a perturbações da apuração.
+
+Perguntas do comitê do tipo "e se P0 fosse o VWAP de abril?" ou "e se AXIA3
+fosse excluída?" não precisam de um novo calcular_outorga: dividendos e
+eventos corporativos da janela de proventos não mudam, só os preços e o
+conjunto de participantes. A partir de uma apuração base:
+
+    TSR = (Pf × mult + Σdiv_ajustado) / P0 − 1        (mesma fórmula de calcular_tsr)
+
+é avaliado para todos os cenários de uma vez, como operações sobre uma
+matriz tickers × cenários — preços via IndicePrecos (somas acumuladas),
+ranking por argsort por coluna e grupos pela mesma regra de _calcular_grupos.
+
+Cada Cenario define janela de P0, janela de Pf, base de preço (vwap | media |
+fechamento) e tickers excluídos. grade_cenarios() monta o produto cartesiano
+de deslocamentos de janela (em pregões), bases e conjuntos de exclusão.
+
+Tickers fora do ranking na apuração base (excluídos forçados, sem dados)
+continuam fora em todos os cenários — não há proventos calculados para eles.
+"""
+from __future__ import annotations
+
+import itertools
+import warnings
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from typing import Callable
+
+import numpy as np
+import pandas as pd
+
+from src import b3_engine
+from src.lti.engine import ApuracaoResult, buscar_cotacoes_periodo
+from src.tsr.precos import TIPOS, IndicePrecos
+
+N_GRUPOS = 6
+
+
+@dataclass(frozen=True)
+class Cenario:
+    p0_ini: date
+    p0_fim: date
+    pf_ini: date
+    pf_fim: date
+    base_preco: str = "vwap"
+    excluidos: frozenset[str] = field(default_factory=frozenset)
+
+    def descricao(self) -> str:
+        partes = [
+            f"P0 {self.p0_ini:%d/%m/%Y}–{self.p0_fim:%d/%m/%Y}",
+            f"Pf {self.pf_ini:%d/%m/%Y}–{self.pf_fim:%d/%m/%Y}",
+            self.base_preco,
+        ]
+        if self.excluidos:
+            partes.append("sem " + ",".join(sorted(self.excluidos)))
+        return " | ".join(partes)
+
+
+def cenario_base(resultado: ApuracaoResult) -> Cenario:
+    cfg = resultado.outorga
+    return Cenario(cfg.dt_p0_ini, cfg.dt_p0_fim, cfg.dt_pf_ini, cfg.dt_pf_fim)
+
+
+# ---------------------------------------------------------------------------
+# Grade de cenários
+# ---------------------------------------------------------------------------
+
+def _deslocar_janela(ini: date, fim: date, pregoes: int) -> tuple[date, date]:
+    """Desloca a janela [ini, fim] em `pregoes` dias úteis B3 (negativo = antes)."""
+    if pregoes == 0:
+        return ini, fim
+    folga = timedelta(days=2 * abs(pregoes) + 10)
+    dias = b3_engine.listar_dias_uteis(ini - folga, fim + folga)
+    i = next(k for k, d in enumerate(dias) if d >= ini)
+    f = max(k for k, d in enumerate(dias) if d <= fim)
+    return dias[i + pregoes], dias[f + pregoes]
+
+
+def grade_cenarios(
+    resultado: ApuracaoResult,
+    deslocamentos_p0=(0,),
+    deslocamentos_pf=(0,),
+    bases=("vwap",),
+    exclusoes=((),),
+) -> list[Cenario]:
+    """
+    Produto cartesiano das perturbações em torno da apuração base.
+
+    deslocamentos_p0/pf: deslocamento das janelas em pregões (ex: range(-10, 11))
+    bases:               bases de preço (ver src.tsr.precos.TIPOS)
+    exclusoes:           conjuntos de tickers excluídos (original ou efetivo)
+    """
+    cfg = resultado.outorga
+    janelas_p0 = [_deslocar_janela(cfg.dt_p0_ini, cfg.dt_p0_fim, k) for k in deslocamentos_p0]
+    janelas_pf = [_deslocar_janela(cfg.dt_pf_ini, cfg.dt_pf_fim, k) for k in deslocamentos_pf]
+    return [
+        Cenario(p0[0], p0[1], pf[0], pf[1], base, frozenset(excl))
+        for p0, pf, base, excl in itertools.product(janelas_p0, janelas_pf, bases, exclusoes)
+    ]
+
+
+def indices_para_cenarios(
+    resultado: ApuracaoResult,
+    folga_dias: int = 62,
+    logger: Callable[[str], None] = print,
+) -> tuple[IndicePrecos, IndicePrecos]:
+    """
+    Índices de preço P0 e Pf cobrindo as janelas da outorga ± folga_dias —
+    suficiente para deslocamentos de até ~40 pregões. Usa buscar_cotacoes_periodo
+    (memoizado), então recálculos reaproveitam o download.
+    """
+    cfg = resultado.outorga
+    participantes = [t for t in resultado.tickers if t.status == "INCLUIDO"]
+    folga = timedelta(days=folga_dias)
+
+    def _indice(tickers: list[str], ini: date, fim: date) -> IndicePrecos:
+        fim = min(fim + folga, date.today())
+        return IndicePrecos(buscar_cotacoes_periodo(sorted(set(tickers)), ini - folga, fim, logger).tabela)
+
+    return (
+        _indice([t.ticker_original for t in participantes], cfg.dt_p0_ini, cfg.dt_p0_fim),
+        _indice([t.ticker for t in participantes], cfg.dt_pf_ini, cfg.dt_pf_fim),
+    )
+
+
+# ---------------------------------------------------------------------------
+# Avaliação vetorizada
+# ---------------------------------------------------------------------------
+
+@dataclass
+class ResultadoCenarios:
+    tickers: list[str]              # ticker_original, na ordem da outorga
+    cenarios: list[Cenario]
+    tsr: np.ndarray                 # tickers × cenários, decimal; NaN = fora do ranking
+    rank: np.ndarray                # tickers × cenários; 0 = fora do ranking
+    grupo: np.ndarray               # tickers × cenários; 0 = fora do ranking
+
+    def _linha(self, ticker: str) -> int:
+        try:
+            return self.tickers.index(ticker)
+        except ValueError:
+            raise KeyError(f"Ticker {ticker} não pertence à outorga.") from None
+
+    def distribuicao_grupos(self) -> pd.DataFrame:
+        """Fração dos cenários em cada grupo (colunas 1..6 e 0 = fora), por ticker."""
+        contagens = np.stack(
+            [(self.grupo == g).sum(axis=1) for g in range(N_GRUPOS + 1)], axis=1,
+        )
+        df = pd.DataFrame(
+            contagens / max(len(self.cenarios), 1),
+            index=pd.Index(self.tickers, name="Ticker"),
+            columns=list(range(N_GRUPOS + 1)),
+        )
+        return df[[*range(1, N_GRUPOS + 1), 0]]
+
+    def distribuicao_rank(self, ticker: str = "TIMS3") -> pd.Series:
+        """Número de cenários por posição no ranking (0 = fora)."""
+        ranks = self.rank[self._linha(ticker)]
+        return pd.Series(ranks).value_counts().sort_index().rename(ticker)
+
+    def resumo(self) -> pd.DataFrame:
+        """Por ticker: faixa de rank, grupo mais frequente e dispersão do TSR."""
+        rank = np.where(self.rank > 0, self.rank, np.nan).astype(float)
+        with warnings.catch_warnings():
+            # Ticker fora do ranking em todos os cenários → linha toda NaN
+            warnings.simplefilter("ignore", RuntimeWarning)
+            df = pd.DataFrame({
+                "Rank Mín": np.nanmin(rank, axis=1),
+                "Rank Mediano": np.nanmedian(rank, axis=1),
+                "Rank Máx": np.nanmax(rank, axis=1),
+                "TSR Mín": np.nanmin(self.tsr, axis=1),
+                "TSR Máx": np.nanmax(self.tsr, axis=1),
+            }, index=pd.Index(self.tickers, name="Ticker"))
+        dist = self.distribuicao_grupos()
+        df["Grupo Modal"] = dist.idxmax(axis=1)
+        df["% Grupo Modal"] = dist.max(axis=1)
+        return df.sort_values("Rank Mediano")
+
+    def por_cenario(self, ticker: str = "TIMS3") -> pd.DataFrame:
+        """Uma linha por cenário com TSR, rank e grupo do ticker."""
+        i = self._linha(ticker)
+        return pd.DataFrame({
+            "Cenário": [c.descricao() for c in self.cenarios],
+            "TSR": self.tsr[i],
+            "Rank": self.rank[i],
+            "Grupo": self.grupo[i],
+        })
+
+
+def _codificar(chaves: list) -> tuple[list, np.ndarray]:
+    """Chaves únicas (ordem de aparição) e o código de cada posição."""
+    unicos: dict = {}
+    codigos = np.fromiter((unicos.setdefault(k, len(unicos)) for k in chaves), dtype=np.intp, count=len(chaves))
+    return list(unicos), codigos
+
+
+def _grupos_por_posicao(pos: np.ndarray, n: np.ndarray) -> np.ndarray:
+    """
+    Grupo (1..6) da posição `pos` (0-based) num ranking de `n` participantes —
+    mesma regra de _calcular_grupos: q = n // 6, os r = n % 6 primeiros grupos têm q+1.
+    """
+    q, r = np.divmod(n, N_GRUPOS)
+    corte = r * (q + 1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        g = np.where(
+            pos < corte,
+            pos // np.maximum(q + 1, 1),
+            r + (pos - corte) // np.maximum(q, 1),
+        )
+    return g + 1
+
+
+def tsr_matriz(p0: np.ndarray, pf: np.ndarray, mult: np.ndarray, divs: np.ndarray) -> np.ndarray:
+    """
+    TSR (decimal) com a mesma aritmética e arredondamento (% com 2 casas) de
+    calcular_tsr, elemento a elemento. Preço ausente → NaN.
+    """
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ret_preco = (pf * mult - p0) / p0
+        ret_divs = divs / p0
+        tsr = np.round((ret_preco + ret_divs) * 100, 2) / 100
+    return np.where(np.isfinite(tsr), tsr, np.nan)
+
+
+def ranquear(tsr: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Rank e grupo por coluna de uma matriz tickers × colunas de TSR (NaN = fora).
+    Retorna (rank, grupo), com 0 para quem está fora do ranking.
+    """
+    n = tsr.shape[0]
+    # Ordenação de calcular_outorga: sorted(key=tsr or -999, reverse=True), estável
+    # na ordem da outorga — TSR exatamente 0 vai para o fim, como lá
+    chave = np.where(tsr == 0, -999.0, tsr)
+    chave = np.where(np.isnan(tsr), np.inf, -chave)
+    ordem = np.argsort(chave, axis=0, kind="stable")
+    pos = np.empty_like(ordem)
+    np.put_along_axis(pos, ordem, np.broadcast_to(np.arange(n)[:, None], ordem.shape), axis=0)
+
+    validos = ~np.isnan(tsr)
+    n_validos = validos.sum(axis=0)
+    rank = np.where(validos, pos + 1, 0)
+    grupo = np.where(validos, _grupos_por_posicao(pos, n_validos[None, :]), 0)
+    return rank, grupo
+
+
+def avaliar_cenarios(
+    resultado: ApuracaoResult,
+    cenarios: list[Cenario],
+    indice_p0: IndicePrecos | None = None,
+    indice_pf: IndicePrecos | None = None,
+) -> ResultadoCenarios:
+    """
+    Avalia todos os cenários sobre a apuração base.
+
+    Sem índices, só são aceitos cenários com as janelas e a base (vwap) da
+    apuração — ex: variações de exclusão. Para deslocar janelas ou trocar a
+    base de preço, passe os índices de indices_para_cenarios().
+    """
+    tickers = resultado.tickers
+    n = len(tickers)
+    base = cenario_base(resultado)
+
+    participa = np.array([t.status == "INCLUIDO" for t in tickers])
+    # mult final = produto dos multiplicadores dos eventos na janela (como mult_ate(t1))
+    mult = np.array([
+        float(np.prod([ev["mult"] for ev in t.eventos_corporativos])) if t.eventos_corporativos
+        else (t.mult_corporativo or 1.0)
+        for t in tickers
+    ])
+    divs = np.array([
+        sum(d["Total Recebido (R$)"] for d in t.divs_ajustados) if t.divs_ajustados
+        else t.dividendos_total
+        for t in tickers
+    ])
+
+    def _matriz_precos(janelas: list[tuple], indice, janela_base: tuple, atributo: str,
+                       nomes: list[str]) -> np.ndarray:
+        m = np.full((n, len(janelas)), np.nan)
+        for ini, fim, tipo in janelas:
+            if tipo not in TIPOS:
+                raise ValueError(f"Base de preço inválida: {tipo}. Válidas: {list(TIPOS)}")
+            if indice is None and (ini, fim, tipo) != janela_base:
+                raise ValueError(
+                    f"Cenário com janela {ini}–{fim} ({tipo}) exige índice de preços "
+                    "(ver indices_para_cenarios)."
+                )
+        if indice is None:
+            # Só a janela da apuração: reaproveita o VWAP já calculado
+            m[:] = np.array([getattr(t, atributo) if ok else np.nan
+                             for t, ok in zip(tickers, participa)], dtype=float)[:, None]
+            return m
+        for tipo in {k[2] for k in janelas}:
+            cols = [j for j, k in enumerate(janelas) if k[2] == tipo]
+            inicios = [janelas[j][0] for j in cols]
+            fins = [janelas[j][1] for j in cols]
+            for i, nome in enumerate(nomes):
+                if participa[i]:
+                    m[i, cols] = indice.precos_janelas(nome, inicios, fins, tipo)
+        return m
+
+    janelas_p0, cod_p0 = _codificar([(c.p0_ini, c.p0_fim, c.base_preco) for c in cenarios])
+    janelas_pf, cod_pf = _codificar([(c.pf_ini, c.pf_fim, c.base_preco) for c in cenarios])
+    excls, cod_ex = _codificar([c.excluidos for c in cenarios])
+
+    p0 = _matriz_precos(janelas_p0, indice_p0, (base.p0_ini, base.p0_fim, "vwap"), "vwap_p0",
+                        [t.ticker_original for t in tickers])[:, cod_p0]
+    pf = _matriz_precos(janelas_pf, indice_pf, (base.pf_ini, base.pf_fim, "vwap"), "vwap_pf",
+                        [t.ticker for t in tickers])[:, cod_pf]
+    ativos = np.stack([
+        participa & ~np.array([t.ticker in ex or t.ticker_original in ex for t in tickers])
+        for ex in excls
+    ], axis=1)[:, cod_ex]
+
+    tsr = np.where(ativos, tsr_matriz(p0, pf, mult[:, None], divs[:, None]), np.nan)
+    rank, grupo = ranquear(tsr)
+
+    return ResultadoCenarios(
+        tickers=[t.ticker_original for t in tickers],
+        cenarios=list(cenarios),
+        tsr=tsr,
+        rank=rank,
+        grupo=grupo,
+    )
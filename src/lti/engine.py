@@ -1,10 +1,6 @@
 # src/lti/engine.py
 from __future__ import annotations
 
-import math
-import json
-import time
-from base64 import b64encode
 from dataclasses import dataclass, field
 from datetime import date, datetime
 from typing import Callable
@@ -12,18 +8,18 @@ from typing import Callable
 import numpy as np
 import pandas as pd
 import requests
-import yfinance as yf
-from concurrent.futures import ThreadPoolExecutor
-from curl_cffi import requests as curl_requests
 
-from src import b3_engine, ticker_service
+from src import b3_engine
 from src.lti.config import OutorgaConfig, OUTORGAS
+from src.tsr.dados import buscar_bonificacoes_b3, buscar_cotacoes_b3, buscar_dividendos_b3
+from src.tsr.calculo import calcular_tsr, parse_float as _parse_float  # noqa: F401 (API do engine)
+from src.tsr.precos import IndicePrecos, calcular_vwap as _calcular_vwap  # noqa: F401
 
 # ---------------------------------------------------------------------------
 # Result dataclasses
 # ---------------------------------------------------------------------------
 
-@dataclass
+@dataclass(slots=True)
 class TickerResult:
     ticker: str                          # ticker efetivo usado no cálculo
     ticker_original: str                 # ticker da lista IBrX-50
@@ -39,10 +35,28 @@ class TickerResult:
     status: str = "INCLUIDO"             # INCLUIDO | EXCLUIDO_FORCADO | SEM_DADOS
     motivo_exclusao: str = ""
     divergencia_yf: str | None = None
-    df_cotacoes_p0: pd.DataFrame = field(default_factory=pd.DataFrame)
-    df_cotacoes_pf: pd.DataFrame = field(default_factory=pd.DataFrame)
-    df_dividendos: pd.DataFrame = field(default_factory=pd.DataFrame)
-    df_bonificacoes: pd.DataFrame = field(default_factory=pd.DataFrame)
+    # Ver _QuadroPreguicoso: guardam só uma fatia de uma tabela compartilhada
+    # (cotações: a tabela COTAHIST do período; demais: compactar_quadros());
+    # aceitam DataFrame ou _Fatia e a leitura devolve um DataFrame normal.
+    df_cotacoes_p0: pd.DataFrame = field(default_factory=pd.DataFrame, repr=False)
+    df_cotacoes_pf: pd.DataFrame = field(default_factory=pd.DataFrame, repr=False)
+    df_dividendos: pd.DataFrame = field(default_factory=pd.DataFrame, repr=False)
+    df_bonificacoes: pd.DataFrame = field(default_factory=pd.DataFrame, repr=False)
+
+    def __getstate__(self) -> dict:
+        # Pickle leva os quadros na forma compacta: a tabela da outorga vai uma vez só
+        estado = {}
+        for nome in self.__slots__:
+            descritor = type(self).__dict__[nome]
+            if isinstance(descritor, _QuadroPreguicoso):
+                estado[nome] = descritor.bruto(self)
+            else:
+                estado[nome] = getattr(self, nome)
+        return estado
+
+    def __setstate__(self, estado: dict) -> None:
+        for nome, valor in estado.items():
+            setattr(self, nome, valor)
 
 
 @dataclass
@@ -55,369 +69,176 @@ class ApuracaoResult:
     n_excluidos: int = 0
     timestamp: datetime = field(default_factory=datetime.now)
 
+    def __post_init__(self) -> None:
+        compactar_quadros(self.tickers)
+
 
 # ---------------------------------------------------------------------------
-# TSR core (extracted and adapted from pages/06_📈_TSR.py)
+# Armazenamento compacto dos DataFrames por ticker
 # ---------------------------------------------------------------------------
+#
+# Cada TickerResult carregava 4 DataFrames pequenos (~57 tickers → ~230 objetos
+# pandas por outorga, cada um com índice, blocos e manager próprios). As
+# cotações já chegam como _Fatia (tabela, início, fim) da tabela COTAHIST do
+# período — a mesma que o cache de buscar_cotacoes_b3 guarda, sem cópia.
+# Dividendos e bonificações, baixados ticker a ticker, são empilhados por
+# compactar_quadros() numa tabela por outorga e trocados por fatias dela.
+# A leitura do atributo materializa o DataFrame uma vez (guardado na _Fatia) e
+# devolve uma cópia rasa — mesmo conteúdo, colunas, dtypes e índice; com
+# copy-on-write nem o slice nem a cópia rasa copiam dados, e quem altera o
+# quadro devolvido não altera o guardado.
 
-def _parse_float(val) -> float:
-    """
-    Converte valor numérico retornado pela API B3 para float.
-    A B3 retorna fatores como strings no formato brasileiro:
-      vírgula = separador decimal, ponto = separador de milhar.
-    Exemplos: "9.900,00000000000" → 9900.0 | "0,02500000000" → 0.025 | "100" → 100.0
-    """
-    try:
-        s = str(val).strip()
-        if "," in s:
-            # Formato brasileiro: remove separador de milhar (ponto) e normaliza decimal
-            s = s.replace(".", "").replace(",", ".")
-        return float(s)
-    except Exception:
-        return math.nan
+_QUADROS = ("df_cotacoes_p0", "df_cotacoes_pf", "df_dividendos", "df_bonificacoes")
 
 
-def _calcular_vwap(df: pd.DataFrame) -> float | None:
-    """VWAP = Σ(Average × Quantity) / Σ(Quantity). Fallback: média simples."""
-    if df.empty:
-        return None
-    qty = df["Quantity"].replace(0, np.nan)
-    avg = df["Average"]
-    denom = qty.sum()
-    if pd.isna(denom) or denom == 0:
-        return float(avg.mean())
-    return float((qty * avg).sum() / denom)
+class _Fatia:
+    """Linhas [inicio, fim) de `tabela`; reiniciar_indice: índice 0..n-1 no quadro."""
+    __slots__ = ("tabela", "inicio", "fim", "reiniciar_indice", "_quadro")
 
+    def __init__(self, tabela: pd.DataFrame, inicio: int, fim: int, reiniciar_indice: bool = False):
+        self.tabela = tabela
+        self.inicio = inicio
+        self.fim = fim
+        self.reiniciar_indice = reiniciar_indice
+        self._quadro: pd.DataFrame | None = None
 
+    def materializar(self) -> pd.DataFrame:
+        if self._quadro is None:
+            quadro = self.tabela.iloc[self.inicio:self.fim]
+            self._quadro = quadro.reset_index(drop=True) if self.reiniciar_indice else quadro
+        return self._quadro.copy(deep=False)
 
-def calcular_tsr(
-    ticker: str,
-    p0: float,
-    p_final: float,
-    df_divs: pd.DataFrame,
-    df_bonif: pd.DataFrame,
-    t0: pd.Timestamp,
-    t1: pd.Timestamp,
-) -> dict:
-    """
-    TSR para 1 ação adquirida ao preço P0 em t0.
+    def __getstate__(self):
+        # O quadro materializado não vai no pickle: refeito sob demanda
+        return self.tabela, self.inicio, self.fim, self.reiniciar_indice
 
-    Eventos corporativos (bonificações/splits/grupamentos) são tratados como
-    multiplicadores da quantidade de ações:
-        mult = ∏ (1 + factor_i/100)  para label != 'SPLIT_YF'
-        mult = factor_i              para label == 'SPLIT_YF' (Yahoo ratio direto)
+    def __setstate__(self, estado) -> None:
+        self.tabela, self.inicio, self.fim, *resto = estado
+        self.reiniciar_indice = bool(resto and resto[0])
+        self._quadro = None
 
-    TSR = (P_final × mult_final − P0 + Σ div_j × mult_em_j) / P0
-    """
-    # --- Eventos corporativos ordenados por data ---
-    # Regras de multiplicador por tipo de evento:
-    #   BONIFICACAO / DESDOBRAMENTO: factor é percentual → mult = 1 + factor/100
-    #     ex: BBAS3 DESDOBRAMENTO factor=100 → mult=2.0 (2:1 split)
-    #         VIVT3 DESDOBRAMENTO factor=7900 → mult=80 (80:1 desdobramento)
-    #         TIMS3 DESDOBRAMENTO factor=9900 → mult=100 (100:1 desdobramento)
-    #     Nota: B3 retorna fatores em formato brasileiro ("7.900,00" = 7900); _parse_float
-    #           trata o separador de milhar antes de converter.
-    #   GRUPAMENTO: factor é ratio direto → mult = factor
-    #     ex: VIVT3 GRUPAMENTO factor=0.025 → mult=0.025 (40:1 grupamento)
-    #         TIMS3 GRUPAMENTO factor=0.01  → mult=0.01  (100:1 grupamento)
-    #         MGLU3 GRUPAMENTO factor=0.10  → mult=0.10  (10:1 grupamento)
-    #   RESG TOTAL RV: resgate de instrumento — sem efeito na quantidade de ações → ignorar
-    #   SPLIT_YF: ratio direto (fonte Yahoo Finance)
-    #
-    # Para pares DESDOBRAMENTO+GRUPAMENTO na mesma data, a matemática resolve naturalmente:
-    #   TIMS3: 100 × 0.01 = 1.0 (limpeza de base, neutro)
-    #   VIVT3: 80 × 0.025 = 2.0 (desdobramento 2:1 real)
-    eventos: list[dict] = []
-    if not df_bonif.empty and "lastDatePrior" in df_bonif.columns:
-        for _, row in df_bonif.iterrows():
-            dt = pd.to_datetime(row.get("lastDatePrior", ""), format="%d/%m/%Y", errors="coerce")
-            fac = _parse_float(row.get("factor", 0))
-            label = str(row.get("label", "")).upper()
-            if pd.notna(dt) and pd.notna(fac) and fac != 0 and t0 < dt <= t1:
-                if label in ("RESG TOTAL RV", "RESGATE TOTAL RV"):
-                    continue
-                if label in ("GRUPAMENTO", "SPLIT_YF"):
-                    mult = fac
-                else:  # BONIFICACAO, DESDOBRAMENTO
-                    mult = 1.0 + fac / 100.0
-                eventos.append({"date": dt, "mult": round(mult, 8), "factor": fac, "label": row.get("label", "")})
-    eventos.sort(key=lambda x: x["date"])
-
-    def mult_ate(data: pd.Timestamp) -> float:
-        m = 1.0
-        for ev in eventos:
-            if ev["date"] <= data:
-                m *= ev["mult"]
-        return m
-
-    mult_final = mult_ate(t1)
-
-    # mult_yf: apenas eventos do tipo split/desdobramento/grupamento — o YF ajusta dividendos
-    # históricos retroativamente para esses eventos mas NÃO para bonificações em ações.
-    # Usado exclusivamente no check de divergência com o YF (não no cálculo do TSR).
-    _LABELS_SPLIT = {"DESDOBRAMENTO", "GRUPAMENTO", "SPLIT_YF"}
-    mult_yf = 1.0
-    for ev in eventos:
-        if str(ev["label"]).upper() in _LABELS_SPLIT:
-            mult_yf *= ev["mult"]
-
-    # --- Dividendos ---
-    total_divs = 0.0
-    divs_detail: list[dict] = []
-    if not df_divs.empty and "value" in df_divs.columns:
-        for _, row in df_divs.iterrows():
-            dt_ex = pd.to_datetime(row.get("lastDatePriorEx", ""), format="%d/%m/%Y", errors="coerce")
-            val = _parse_float(row.get("value", 0))
-            if pd.isna(dt_ex) or pd.isna(val):
-                continue
-            m_div = mult_ate(dt_ex)
-            div_total = m_div * val
-            total_divs += div_total
-            divs_detail.append({
-                "Data Ex": row.get("lastDatePriorEx", ""),
-                "Pagamento": row.get("paymentDate", ""),
-                "Tipo": row.get("label", ""),
-                "Valor/Ação (R$)": round(val, 6),
-                "Multiplicador": round(m_div, 6),
-                "Total Recebido (R$)": round(div_total, 6),
-            })
-
-    p_final_adj = p_final * mult_final
-    ret_preco = (p_final_adj - p0) / p0
-    ret_divs = total_divs / p0
-    tsr_total = ret_preco + ret_divs
-
-    return {
-        "Ticker": ticker,
-        "P0 (R$)": round(p0, 4),
-        "P Final (R$)": round(p_final, 4),
-        "Mult. Corporativo": round(mult_final, 6),
-        "P Final Ajustado (R$)": round(p_final_adj, 4),
-        "Dividendos/JCP (R$)": round(total_divs, 4),
-        "Ret. Preço (%)": round(ret_preco * 100, 2),
-        "Ret. Dividendos (%)": round(ret_divs * 100, 2),
-        "TSR Total (%)": round(tsr_total * 100, 2),
-        "_divs_detail": divs_detail,
-        "_eventos": eventos,
-        "_mult_yf": round(mult_yf, 6),
-    }
 
+class _QuadroPreguicoso:
+    """Descriptor sobre o slot do dataclass: aceita DataFrame, devolve DataFrame."""
 
-# ---------------------------------------------------------------------------
-# VWAP fetcher
-# ---------------------------------------------------------------------------
+    def __init__(self, slot):
+        self._slot = slot
 
-def buscar_vwap_mes(
-    tickers: list[str],
-    dt_ini: date,
-    dt_fim: date,
-    logger: Callable[[str], None] = print,
-) -> dict[str, tuple[float | None, pd.DataFrame]]:
-    """
-    Baixa COTAHIST para todos os tickers no período e retorna VWAP mensal.
+    def __get__(self, obj, tipo=None):
+        if obj is None:
+            return self
+        valor = self._slot.__get__(obj, tipo)
+        return valor.materializar() if isinstance(valor, _Fatia) else valor
 
-    Returns:
-        {ticker: (vwap_ou_None, df_cotacoes_diarias)}
+    def __set__(self, obj, valor) -> None:
+        self._slot.__set__(obj, valor)
+
+    def bruto(self, obj):
+        """Conteúdo do slot sem materializar (DataFrame, _Fatia ou None)."""
+        return self._slot.__get__(obj, type(obj))
+
+
+for _nome in _QUADROS:
+    setattr(TickerResult, _nome, _QuadroPreguicoso(TickerResult.__dict__[_nome]))
+
+
+def _esquema(df: pd.DataFrame) -> tuple:
+    return (tuple(df.columns), tuple(str(t) for t in df.dtypes), type(df.index).__name__)
+
+
+def compactar_quadros(tickers: list[TickerResult]) -> None:
     """
-    logger(f"  Baixando COTAHIST {dt_ini} → {dt_fim} para {len(tickers)} tickers...")
-    dias = b3_engine.listar_dias_uteis(dt_ini, dt_fim)
-    frames: list[pd.DataFrame] = []
-
-    with requests.Session() as session:
-        with ThreadPoolExecutor(max_workers=5) as ex:
-            futs = [ex.submit(b3_engine.baixar_e_parsear_dia, d, tickers, session) for d in dias]
-            for fut in futs:
-                r = fut.result()
-                if r is not None:
-                    frames.append(r)
-
-    result: dict[str, tuple[float | None, pd.DataFrame]] = {t: (None, pd.DataFrame()) for t in tickers}
-
-    if not frames:
-        logger("  Aviso: nenhum dado COTAHIST retornado para o período.")
-        return result
-
-    df_all = pd.concat(frames, ignore_index=True)
-    df_all["Date"] = pd.to_datetime(df_all["Date"])
-
-    for ticker in tickers:
-        df_t = df_all[df_all["Ticker"] == ticker].copy()
-        if df_t.empty:
-            result[ticker] = (None, pd.DataFrame())
-        else:
-            df_t = df_t.sort_values("Date").reset_index(drop=True)
-            vwap = _calcular_vwap(df_t)
-            result[ticker] = (vwap, df_t)
+    Empilha os DataFrames de mesmo esquema de todos os tickers numa tabela só
+    e substitui cada um por uma fatia dela. Frames vazios sem colunas, None e
+    fatias (já compactados ou cotações do período) ficam como estão. Idempotente.
+    """
+    for nome in _QUADROS:
+        descritor: _QuadroPreguicoso = getattr(TickerResult, nome)
+        grupos: dict[tuple, list[tuple[TickerResult, pd.DataFrame]]] = {}
+        for t in tickers:
+            df = descritor.bruto(t)
+            if not isinstance(df, pd.DataFrame) or (df.empty and len(df.columns) == 0):
+                continue
+            grupos.setdefault(_esquema(df), []).append((t, df))
 
-    return result
+        for membros in grupos.values():
+            frames = [df for _, df in membros]
+            tabela = pd.concat(frames) if len(frames) > 1 else frames[0]
+            inicio = 0
+            for t, df in membros:
+                fim = inicio + len(df)
+                descritor.__set__(t, _Fatia(tabela, inicio, fim))
+                inicio = fim
 
 
 # ---------------------------------------------------------------------------
-# B3 proventos fetchers — pure Python (sem Streamlit)
+# VWAP fetcher
 # ---------------------------------------------------------------------------
 
-_TIPO_ACAO = {"3": "ON", "4": "PN", "5": "PN", "6": "PN", "11": "UNT"}
+@dataclass
+class CotacoesPeriodo:
+    """
+    Cotações de um período: a tabela de buscar_cotacoes_b3, as linhas
+    [início, fim) de cada ticker nela e o VWAP de cada ticker pedido.
+    pregoes_falhos: pregões cujo download falhou (fora da tabela e do cache).
+    """
+    tabela: pd.DataFrame
+    limites: dict[str, tuple[int, int]]
+    vwaps: dict[str, float | None]
+    pregoes_falhos: list[date] = field(default_factory=list)
+
+    def fatia(self, ticker: str) -> _Fatia | pd.DataFrame:
+        """Cotações do ticker como _Fatia da tabela (DataFrame vazio se não há)."""
+        inicio, fim = self.limites.get(ticker, (0, 0))
+        if fim == inicio:
+            return pd.DataFrame()
+        return _Fatia(self.tabela, inicio, fim, reiniciar_indice=True)
 
+    def cotacoes(self, ticker: str) -> pd.DataFrame:
+        """Cotações diárias do ticker (índice 0..n-1; vazio se não há)."""
+        fatia = self.fatia(ticker)
+        return fatia.materializar() if isinstance(fatia, _Fatia) else fatia
 
-def _fetch_dividendos_b3(
-    ticker: str,
-    df_empresas: pd.DataFrame,
+
+def buscar_cotacoes_periodo(
+    tickers: list[str],
     dt_ini: date,
     dt_fim: date,
     logger: Callable[[str], None] = print,
-) -> pd.DataFrame:
-    """
-    Busca dividendos/JCP na B3 para um ticker, filtrando por typeStock e período.
-    Não depende de Streamlit — usa logger para output.
-    """
-    info = ticker_service.get_ticker_info(ticker, df_empresas)
-    if not info:
-        logger(f"  Aviso: {ticker} não encontrado em df_empresas — sem dividendos.")
-        return pd.DataFrame()
-
-    trading_name = info["trading_name"]
-    tipo_acao = info["type_stock"]
-    if not trading_name or not tipo_acao:
-        return pd.DataFrame()
-
-    all_results: list[dict] = []
-    current_page = 1
-    total_pages = 1
-
-    session = curl_requests.Session(impersonate="chrome120")
-    session.headers.update({
-        "Accept": "application/json, text/plain, */*",
-        "Referer": "https://www.b3.com.br/",
-        "Origin": "https://www.b3.com.br",
-    })
-    try:
-        while current_page <= total_pages:
-            try:
-                params = {
-                    "language": "pt-br",
-                    "pageNumber": current_page,
-                    "pageSize": 60,
-                    "tradingName": trading_name,
-                }
-                encoded = b64encode(json.dumps(params, separators=(",", ":")).encode()).decode()
-                url = f"https://sistemaswebb3-listados.b3.com.br/listedCompaniesProxy/CompanyCall/GetListedCashDividends/{encoded}"
-                resp = session.get(url, timeout=30)
-                resp.raise_for_status()
-                data = resp.json()
-                if current_page == 1:
-                    total_pages = int(data.get("page", {}).get("totalPages", 1))
-                all_results.extend(data.get("results", []))
-                if total_pages > 1:
-                    time.sleep(0.2)
-                current_page += 1
-            except Exception as e:
-                logger(f"  Erro ao buscar dividendos B3 para {ticker} (pág {current_page}): {e}")
-                break
-    finally:
-        session.close()
-
-    if not all_results:
-        return pd.DataFrame()
-
-    df = pd.DataFrame(all_results)
-
-    # Normaliza nomes de colunas: API B3 usa 'valueCash', 'corporateAction', 'dateApproval'
-    # mas calcular_tsr espera 'value', 'label', 'paymentDate'
-    df = df.rename(columns={
-        "valueCash": "value",
-        "corporateAction": "label",
-        "dateApproval": "paymentDate",
-    })
-
-    if "typeStock" in df.columns:
-        df["typeStock"] = df["typeStock"].str.strip().str.upper()
-        # Ações PN podem ter variantes na API B3: "PN", "PNB" (classe B), "PNC" (classe C), etc.
-        # Para tickers sufixo 4/5/6 usamos prefixo "PN"; ON e UNT permanecem com match exato.
-        if tipo_acao.startswith("PN"):
-            df = df[df["typeStock"].str.startswith("PN")].copy()
-        else:
-            df = df[df["typeStock"] == tipo_acao].copy()
-    if df.empty:
-        return pd.DataFrame()
-
-    df["Ticker"] = ticker
-    if "lastDatePriorEx" in df.columns:
-        df["_dt"] = pd.to_datetime(df["lastDatePriorEx"], format="%d/%m/%Y", errors="coerce")
-        df = df.dropna(subset=["_dt"])
-        df = df[(df["_dt"] >= pd.Timestamp(dt_ini)) & (df["_dt"] <= pd.Timestamp(dt_fim))]
-        df = df.drop(columns=["_dt"])
-    else:
-        logger(f"  Aviso: coluna 'lastDatePriorEx' ausente para {ticker} — retornando vazio.")
-        return pd.DataFrame()
-    return df.reset_index(drop=True)
-
-
-def _fetch_bonificacoes_b3(
-    ticker: str,
-    df_empresas: pd.DataFrame,
+) -> CotacoesPeriodo:
+    """Baixa (ou lê do cache) o COTAHIST do período e calcula o VWAP de cada ticker."""
+    # Tupla ordenada: mesma chave de cache para qualquer ordem da lista
+    tabela = buscar_cotacoes_b3(tuple(sorted(set(tickers))), dt_ini, dt_fim, logger)
+    falhos = list(tabela.attrs.get("pregoes_falhos", []))
+    if tabela.empty:
+        return CotacoesPeriodo(tabela, {}, {t: None for t in tickers}, falhos)
+
+    # Tabela ordenada por ticker: os limites saem das trocas de ticker e o
+    # índice responde o VWAP de cada um por somas acumuladas
+    nomes = tabela["Ticker"].to_numpy()
+    trocas = np.flatnonzero(nomes[1:] != nomes[:-1]) + 1
+    inicios = np.concatenate([[0], trocas])
+    fins = np.concatenate([trocas, [len(nomes)]])
+    limites = {str(nomes[a]): (int(a), int(b)) for a, b in zip(inicios, fins)}
+    indice = IndicePrecos(tabela)
+    vwaps = {t: indice.vwap(t, dt_ini, dt_fim) if t in limites else None for t in tickers}
+    return CotacoesPeriodo(tabela, limites, vwaps, falhos)
+
+
+def buscar_vwap_mes(
+    tickers: list[str],
     dt_ini: date,
     dt_fim: date,
     logger: Callable[[str], None] = print,
-) -> pd.DataFrame:
-    """
-    Busca eventos de bonificação/desdobramento/grupamento na B3.
-    Não depende de Streamlit.
+) -> dict[str, tuple[float | None, pd.DataFrame]]:
     """
-    info = ticker_service.get_ticker_info(ticker, df_empresas)
-    if not info or not info.get("code"):
-        logger(f"  Aviso: CODE não encontrado para {ticker} — sem bonificações.")
-        return pd.DataFrame()
-
-    code = info["code"]
-    session = curl_requests.Session(impersonate="chrome120")
-    session.headers.update({
-        "Accept": "application/json, text/plain, */*",
-        "Referer": "https://www.b3.com.br/",
-        "Origin": "https://www.b3.com.br",
-    })
-
-    try:
-        params = {"issuingCompany": code, "language": "pt-br"}
-        encoded = b64encode(json.dumps(params).encode()).decode()
-        url = f"https://sistemaswebb3-listados.b3.com.br/listedCompaniesProxy/CompanyCall/GetListedSupplementCompany/{encoded}"
-        resp = session.get(url, timeout=30)
-        resp.raise_for_status()
-
-        if not resp.content or not resp.text.strip():
-            return pd.DataFrame()
-
-        data = resp.json()
-        if not isinstance(data, list) or not data or "stockDividends" not in data[0]:
-            return pd.DataFrame()
-
-        df = pd.DataFrame(data[0]["stockDividends"])
-        if df.empty:
-            return pd.DataFrame()
-
-        dedup_cols = [c for c in ["lastDatePrior", "label"] if c in df.columns]
-        if dedup_cols:
-            df = df.drop_duplicates(subset=dedup_cols)
-
-        df["Ticker"] = ticker
-        if "lastDatePrior" in df.columns:
-            df["_dt"] = pd.to_datetime(df["lastDatePrior"], format="%d/%m/%Y", errors="coerce")
-            df = df.dropna(subset=["_dt"])
-            df = df[
-                (df["_dt"] >= pd.Timestamp(dt_ini)) & (df["_dt"] <= pd.Timestamp(dt_fim))
-            ].drop(columns=["_dt"])
-        else:
-            logger(f"  Aviso: coluna 'lastDatePrior' ausente para {ticker} — retornando vazio.")
-            return pd.DataFrame()
-
-        cols = ["Ticker", "label", "lastDatePrior", "factor", "approvedIn", "isinCode"]
-        existing = [c for c in cols if c in df.columns]
-        return df[existing].reset_index(drop=True)
+    Baixa COTAHIST para todos os tickers no período e retorna VWAP mensal.
 
-    except Exception as e:
-        logger(f"  Erro ao buscar bonificações B3 para {ticker}: {e}")
-        return pd.DataFrame()
-    finally:
-        session.close()
+    Returns:
+        {ticker: (vwap_ou_None, df_cotacoes_diarias)}
+    """
+    periodo = buscar_cotacoes_periodo(tickers, dt_ini, dt_fim, logger)
+    return {t: (periodo.vwaps[t], periodo.cotacoes(t)) for t in tickers}
 
 
 # ---------------------------------------------------------------------------
@@ -430,6 +251,8 @@ def _fetch_total_proventos_yf(
     t1: pd.Timestamp,
 ) -> float:
     """Soma total de dividendos no período via Yahoo Finance."""
+    import yfinance as yf  # adiado: pesado e só usado no double-check
+
     try:
         yf_ticker = f"{ticker}.SA"
         obj = yf.Ticker(yf_ticker)
@@ -508,10 +331,23 @@ def calcular_outorga(
     config: OutorgaConfig,
     df_empresas: pd.DataFrame,
     logger: Callable[[str], None] = print,
+    progresso: Callable[[dict], None] | None = None,
 ) -> ApuracaoResult:
     """
     Calcula TSR batch para todos os tickers da outorga seguindo o Book de Regras.
+
+    progresso (opcional) recebe eventos estruturados
+    {"outorga", "etapa", "atual", "total", "ticker"} — etapa ∈ inicio | vwap | ticker | fim,
+    com atual/total contando tickers já processados.
     """
+    n_tickers = len(config.tickers)
+
+    def _evento(etapa: str, atual: int, ticker: str | None = None) -> None:
+        if progresso is not None:
+            progresso({"outorga": config.ano, "etapa": etapa,
+                       "atual": atual, "total": n_tickers, "ticker": ticker})
+
+    _evento("inicio", 0)
     logger(f"\n{'='*60}")
     logger(f"Outorga {config.ano} | {len(config.tickers)} tickers | "
            f"P0: {config.dt_p0_ini}–{config.dt_p0_fim} | "
@@ -554,11 +390,13 @@ def calcular_outorga(
     tickers_pf = [substituicoes_efetivas.get(t, t) for t in config.tickers]
 
     # Batch VWAP download
+    _evento("vwap", 0)
     logger("Baixando VWAP P0...")
-    vwap_p0_map = buscar_vwap_mes(tickers_p0, config.dt_p0_ini, config.dt_p0_fim, logger)
+    cot_p0 = buscar_cotacoes_periodo(tickers_p0, config.dt_p0_ini, config.dt_p0_fim, logger)
     logger("Baixando VWAP P_final...")
-    vwap_pf_map = buscar_vwap_mes(
-        list(set(tickers_pf)), config.dt_pf_ini, config.dt_pf_fim, logger
+    # Lista ordenada: a chave do cache em disco não pode depender da ordem do set
+    cot_pf = buscar_cotacoes_periodo(
+        sorted(set(tickers_pf)), config.dt_pf_ini, config.dt_pf_fim, logger
     )
 
     t0 = pd.Timestamp(config.dt_divs_ini)
@@ -566,7 +404,8 @@ def calcular_outorga(
 
     resultados: list[TickerResult] = []
 
-    for ticker_orig in config.tickers:
+    for i, ticker_orig in enumerate(config.tickers):
+        _evento("ticker", i, ticker_orig)
         ticker_ef = substituicoes_efetivas.get(ticker_orig, ticker_orig)
         logger(f"\n  [{ticker_orig}→{ticker_ef}]" if ticker_ef != ticker_orig else f"\n  [{ticker_orig}]")
 
@@ -580,8 +419,9 @@ def calcular_outorga(
             ))
             continue
 
-        vwap_p0, df_cot_p0 = vwap_p0_map.get(ticker_orig, (None, pd.DataFrame()))
-        vwap_pf, df_cot_pf = vwap_pf_map.get(ticker_ef, (None, pd.DataFrame()))
+        # Fatias da tabela do período: nenhum DataFrame por ticker
+        vwap_p0, df_cot_p0 = cot_p0.vwaps.get(ticker_orig), cot_p0.fatia(ticker_orig)
+        vwap_pf, df_cot_pf = cot_pf.vwaps.get(ticker_ef), cot_pf.fatia(ticker_ef)
 
         if vwap_p0 is None or vwap_pf is None:
             motivo = []
@@ -601,8 +441,8 @@ def calcular_outorga(
         logger(f"    VWAP P0={vwap_p0:.4f}  VWAP Pf={vwap_pf:.4f}")
 
         # Proventos B3
-        df_divs = _fetch_dividendos_b3(ticker_ef, df_empresas, config.dt_divs_ini, config.dt_divs_fim, logger)
-        df_bonif = _fetch_bonificacoes_b3(ticker_ef, df_empresas, config.dt_divs_ini, config.dt_divs_fim, logger)
+        df_divs = buscar_dividendos_b3(ticker_ef, df_empresas, config.dt_divs_ini, config.dt_divs_fim, logger)
+        df_bonif = buscar_bonificacoes_b3(ticker_ef, df_empresas, config.dt_divs_ini, config.dt_divs_fim, logger)
 
         n_divs = len(df_divs) if not df_divs.empty else 0
         n_bonif = len(df_bonif) if not df_bonif.empty else 0
@@ -649,6 +489,7 @@ def calcular_outorga(
         reverse=True,
     )
     grupos = _calcular_grupos(incluidos)
+    _evento("fim", n_tickers)
 
     return ApuracaoResult(
         outorga=config,
@@ -665,12 +506,23 @@ def calcular_todas_outorgas(
     anos: list[int],
     df_empresas: pd.DataFrame,
     logger: Callable[[str], None] = print,
+    progresso: Callable[[dict], None] | None = None,
 ) -> dict[int, ApuracaoResult]:
-    """Calcula múltiplas outorgas e retorna dict {ano: ApuracaoResult}."""
+    """
+    Calcula múltiplas outorgas e retorna dict {ano: ApuracaoResult}.
+    Eventos de progresso ganham "indice_outorga" e "n_outorgas".
+    """
+    validos = [a for a in anos if a in OUTORGAS]
     result = {}
     for ano in anos:
         if ano not in OUTORGAS:
             logger(f"Aviso: outorga {ano} não configurada em OUTORGAS — ignorando.")
             continue
-        result[ano] = calcular_outorga(OUTORGAS[ano], df_empresas, logger)
+        prog_ano = None
+        if progresso is not None:
+            idx = len(result)
+            prog_ano = lambda ev, idx=idx: progresso(
+                {**ev, "indice_outorga": idx, "n_outorgas": len(validos)}
+            )
+        result[ano] = calcular_outorga(OUTORGAS[ano], df_empresas, logger, prog_ano)
     return result
@@ -1,11 +1,16 @@
 # src/lti/excel_builder.py
 from __future__ import annotations
 
+import os
+import tempfile
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from datetime import datetime
 from io import BytesIO
+from typing import Callable
 
+import numpy as np
 import pandas as pd
-import xlsxwriter
 
 from src.lti.engine import ApuracaoResult, TickerResult
 
@@ -55,17 +60,105 @@ def _fmt(wb, base: dict, extra: dict | None = None):
     return wb.add_format(d)
 
 
+def _valores_coluna(serie: pd.Series) -> list:
+    """
+    Converte uma coluna em lista de escalares Python prontos para o xlsxwriter.
+    NaN (float) vira "" — mesma regra da escrita célula a célula, mas com a
+    máscara de ausentes calculada de forma vetorial.
+    """
+    valores = serie.tolist()
+    kind = serie.dtype.kind
+    if kind in "iub":
+        return valores
+    ausentes = np.flatnonzero(serie.isna().to_numpy())
+    if kind == "f":
+        for i in ausentes:
+            valores[i] = ""
+    else:
+        # Colunas object/str: só NaN float vira "" (None/NaT seguem para o xlsxwriter)
+        for i in ausentes:
+            if isinstance(valores[i], float):
+                valores[i] = ""
+    return valores
+
+
+def _escritor_coluna(ws, valores: list):
+    """
+    Escolhe uma vez por coluna o método de escrita do xlsxwriter. Colunas
+    homogêneas vão direto para write_number/write_string; o resto usa write(),
+    que decide célula a célula (None, "", fórmulas, URLs, datas...).
+    """
+    tipos = set(map(type, valores))
+    if tipos and tipos <= {int, float}:
+        return ws.write_number
+    if tipos == {str} and all(v and v[0] not in "={" and ":" not in v for v in valores):
+        return ws.write_string
+    return ws.write
+
+
+def _uniao_colunas(frames: list[pd.DataFrame], extras: tuple[str, ...] = ()) -> list:
+    """Colunas na ordem em que pd.concat(frames) as produziria (ordem de aparição)."""
+    colunas: dict = {}
+    for df in frames:
+        for c in (*df.columns, *extras):
+            colunas.setdefault(c, None)
+    return list(colunas)
+
+
+def _write_frames(
+    ws,
+    frames: list[pd.DataFrame],
+    workbook,
+    row_offset: int = 1,
+    constantes: list[dict] | None = None,
+    conversores: dict[str, Callable[[pd.Series], pd.Series]] | None = None,
+) -> int:
+    """
+    Escreve vários DataFrames empilhados, como se fossem pd.concat(frames), sem
+    concatenar nem copiar. Cada frame é convertido coluna a coluna, com o método
+    de escrita decidido por coluna, e gravado linha a linha (ordem compatível
+    com constant_memory).
+
+    constantes: por frame, colunas com valor fixo (ex: Ticker_Original).
+    conversores: por coluna, transformação vetorial aplicada antes da escrita.
+    Retorna a próxima linha livre (0-based).
+    """
+    constantes = constantes or [{} for _ in frames]
+    conversores = conversores or {}
+    extras = tuple(dict.fromkeys(c for const in constantes for c in const))
+    colunas = _uniao_colunas(frames, extras)
+
+    ws.write_row(row_offset - 1, 0, colunas, workbook.add_format(_HDR))
+
+    r = row_offset
+    for df, const in zip(frames, constantes):
+        n = len(df)
+        valores_cols = []
+        for c in colunas:
+            if c in const:
+                valores_cols.append([const[c]] * n)
+            elif c in df.columns:
+                serie = df[c]
+                if c in conversores:
+                    serie = conversores[c](serie)
+                valores_cols.append(_valores_coluna(serie))
+            else:
+                valores_cols.append([""] * n)
+        escritores = list(enumerate(_escritor_coluna(ws, v) for v in valores_cols))
+        for linha in zip(*valores_cols):
+            for c_idx, escrever in escritores:
+                escrever(r, c_idx, linha[c_idx])
+            r += 1
+    return r
+
+
 def _write_df(ws, df: pd.DataFrame, workbook, row_offset: int = 1) -> None:
     """Escreve um DataFrame na aba a partir de row_offset (1-based)."""
-    fmt_hdr = workbook.add_format(_HDR)
-    for col_idx, col_name in enumerate(df.columns):
-        ws.write(row_offset - 1, col_idx, col_name, fmt_hdr)
-    for r_idx, row in enumerate(df.itertuples(index=False), start=row_offset):
-        for c_idx, val in enumerate(row):
-            if isinstance(val, float) and pd.isna(val):
-                ws.write(r_idx, c_idx, "")
-            else:
-                ws.write(r_idx, c_idx, val)
+    _write_frames(ws, [df], workbook, row_offset)
+
+
+def _data_br(serie: pd.Series) -> pd.Series:
+    return pd.to_datetime(serie).dt.strftime("%d/%m/%Y")
 
 
 # ---------------------------------------------------------------------------
@@ -101,12 +194,18 @@ def _sheet_resultado(wb, ws, resultado: ApuracaoResult) -> None:
         ws.write(0, c, h, fmt_hdr)
     ws.set_column(0, len(headers) - 1, 20)
 
+    # Formatos pré-computados por tipo de linha (normal / TIMS3)
+    fmts = {
+        is_tim: (
+            wb.add_format({**bg, "num_format": "0.0000"}),
+            wb.add_format({**bg, "num_format": "0.00"}),
+            wb.add_format(bg),
+        )
+        for is_tim, bg in ((False, {}), (True, _TIM_BG))
+    }
+
     for r_idx, t in enumerate(resultado.ranking, start=1):
-        is_tim = t.ticker == "TIMS3"
-        bg = {"bg_color": "#FFFACD"} if is_tim else {}
-        f_num = wb.add_format({**bg, "num_format": "0.0000"})
-        f_pct = wb.add_format({**bg, "num_format": "0.00"})
-        f_txt = wb.add_format(bg)
+        f_num, f_pct, f_txt = fmts[t.ticker == "TIMS3"]
 
         vwap_p0 = t.vwap_p0 or 0.0
         vwap_pf = t.vwap_pf or 0.0
@@ -145,6 +244,7 @@ def _sheet_grupos(wb, ws, resultado: ApuracaoResult) -> None:
     ws.write(0, 6, "TIM no grupo?", fmt_hdr)
     ws.set_column(0, 6, 18)
 
+    fmts = {False: wb.add_format({}), True: wb.add_format(_TIM_BG)}
     row_num = 1
     for g, members in sorted(resultado.grupos.items()):
         if not members:
@@ -152,7 +252,7 @@ def _sheet_grupos(wb, ws, resultado: ApuracaoResult) -> None:
         tsrs   = [m.tsr * 100 for m in members if m.tsr is not None]
         tim_   = any(m.ticker == "TIMS3" for m in members)
         ranks  = [m.rank for m in members if m.rank is not None]
-        fmt    = wb.add_format({**({"bg_color": "#FFFACD"} if tim_ else {})})
+        fmt    = fmts[tim_]
         ws.write(row_num, 0, g, fmt)
         ws.write(row_num, 1, min(ranks) if ranks else "", fmt)
         ws.write(row_num, 2, max(ranks) if ranks else "", fmt)
@@ -172,7 +272,10 @@ def _sheet_composicao(wb, ws, resultado: ApuracaoResult) -> None:
     fmt_hdr  = wb.add_format(_HDR)
     fmt_warn = wb.add_format({**_WARN})
     fmt_norm = wb.add_format({})
-    fmt_pct  = wb.add_format({"num_format": "0.00"})
+    fmt_pct  = {
+        False: wb.add_format({"num_format": "0.00"}),
+        True:  wb.add_format({**_WARN, "num_format": "0.00"}),
+    }
 
     headers = [
         "Nº", "Ticker IBrX-50", "Ticker Efetivo", "Substituição",
@@ -220,7 +323,7 @@ def _sheet_composicao(wb, ws, resultado: ApuracaoResult) -> None:
         ws.write(i, 5,  motivo, fmt_row)
         ws.write(i, 6,  rank_val, fmt_row)
         if isinstance(tsr_pct, float):
-            ws.write(i, 7, tsr_pct, wb.add_format({**({**_WARN} if tem_incerteza else {}), "num_format": "0.00"}))
+            ws.write(i, 7, tsr_pct, fmt_pct[tem_incerteza])
         else:
             ws.write(i, 7, tsr_pct, fmt_row)
         ws.write(i, 8,  mult_corp, fmt_row)
@@ -448,18 +551,14 @@ def _sheet_metodologia(wb, ws, resultado: ApuracaoResult) -> None:
 # ---------------------------------------------------------------------------
 
 def _sheet_cotacoes(wb, ws, resultado: ApuracaoResult, periodo: str) -> None:
-    frames = []
+    frames, constantes = [], []
     for t in resultado.tickers:
         df = t.df_cotacoes_p0 if periodo == "p0" else t.df_cotacoes_pf
         if df is not None and not df.empty:
-            df2 = df.copy()
-            df2["Ticker_Original"] = t.ticker_original
-            frames.append(df2)
+            frames.append(df)
+            constantes.append({"Ticker_Original": t.ticker_original})
     if frames:
-        df_all = pd.concat(frames, ignore_index=True)
-        if "Date" in df_all.columns:
-            df_all["Date"] = pd.to_datetime(df_all["Date"]).dt.strftime("%d/%m/%Y")
-        _write_df(ws, df_all, wb)
+        _write_frames(ws, frames, wb, constantes=constantes, conversores={"Date": _data_br})
     ws.set_column(0, 10, 16)
 
 
@@ -468,12 +567,12 @@ def _sheet_cotacoes(wb, ws, resultado: ApuracaoResult, periodo: str) -> None:
 # ---------------------------------------------------------------------------
 
 def _sheet_dividendos(wb, ws, resultado: ApuracaoResult) -> None:
-    frames = []
-    for t in resultado.tickers:
-        if t.df_dividendos is not None and not t.df_dividendos.empty:
-            frames.append(t.df_dividendos.copy())
+    frames = [
+        df for df in (t.df_dividendos for t in resultado.tickers)
+        if df is not None and not df.empty
+    ]
     if frames:
-        _write_df(ws, pd.concat(frames, ignore_index=True), wb)
+        _write_frames(ws, frames, wb)
     ws.set_column(0, 10, 18)
 
 
@@ -753,7 +852,11 @@ def _sheet_config(wb, ws, resultado: ApuracaoResult) -> None:
 # ---------------------------------------------------------------------------
 
 def _escrever_excel(resultado: ApuracaoResult, buffer) -> None:
-    with xlsxwriter.Workbook(buffer, {"in_memory": True}) as wb:
+    import xlsxwriter  # adiado: só quem renderiza workbook paga o import
+
+    # constant_memory: cada linha é descarregada em arquivo temporário assim que a
+    # próxima começa — todas as abas abaixo escrevem estritamente em ordem de linha.
+    with xlsxwriter.Workbook(buffer, {"constant_memory": True}) as wb:
         # Ordem pensada para um auditor: resultado → composição → detalhe → dados brutos → config
         _sheet_resultado(wb,      wb.add_worksheet("Resultado"),      resultado)
         _sheet_grupos(wb,         wb.add_worksheet("Grupos"),          resultado)
@@ -778,8 +881,65 @@ def gerar_excel_bytes(resultado: ApuracaoResult) -> bytes:
 
 def salvar_excel(resultado: ApuracaoResult, path: str) -> None:
     """Grava o Excel auditável em disco (para CLI)."""
-    with open(path, "wb") as f:
-        f.write(gerar_excel_bytes(resultado))
+    _escrever_excel(resultado, path)
+
+
+def gerar_excel_tabelas(tabelas: dict[str, pd.DataFrame], largura: int = 16) -> bytes:
+    """
+    Workbook simples (uma aba por tabela) pelo mesmo escritor em streaming das
+    abas de apuração: escrita tipada por coluna e constant_memory.
+    """
+    import xlsxwriter
+
+    buf = BytesIO()
+    with xlsxwriter.Workbook(buf, {"constant_memory": True}) as wb:
+        for nome, df in tabelas.items():
+            ws = wb.add_worksheet(nome[:31])
+            ws.set_column(0, max(len(df.columns) - 1, 0), largura)
+            _write_df(ws, df, wb)
+    return buf.getvalue()
+
+
+def _renderizar_em_pasta(resultado: ApuracaoResult, pasta: str) -> tuple[str, str]:
+    """Worker do pool: grava o .xlsx da outorga em `pasta` e retorna (nome, caminho)."""
+    nome = nome_arquivo(resultado)
+    caminho = os.path.join(pasta, nome)
+    salvar_excel(resultado, caminho)
+    return nome, caminho
+
+
+def _renderizar_todos(resultados: list[ApuracaoResult], pasta: str, n_workers: int):
+    """Gera (nome, caminho) de cada .xlsx na ordem em que ficam prontos."""
+    if n_workers <= 1:
+        for r in resultados:
+            yield _renderizar_em_pasta(r, pasta)
+        return
+    with ProcessPoolExecutor(max_workers=n_workers) as ex:
+        futs = [ex.submit(_renderizar_em_pasta, r, pasta) for r in resultados]
+        for fut in as_completed(futs):
+            yield fut.result()
+
+
+def escrever_zip(
+    resultados: list[ApuracaoResult],
+    destino,
+    max_workers: int | None = None,
+) -> None:
+    """
+    Grava em `destino` (caminho ou arquivo binário) um .zip com um .xlsx por outorga.
+
+    Cada workbook é renderizado em um processo separado direto para disco e
+    entra no ZIP assim que fica pronto — a latência total tende ao workbook mais
+    lento (não à soma) e o processo principal nunca segura os bytes de mais de
+    um arquivo. max_workers=1 renderiza em série, sem pool.
+    """
+    resultados = list(resultados)
+    n_workers = min(len(resultados), max_workers or os.cpu_count() or 1)
+    with tempfile.TemporaryDirectory() as pasta, \
+            zipfile.ZipFile(destino, mode="w", compression=zipfile.ZIP_DEFLATED) as zf:
+        for nome, caminho in _renderizar_todos(resultados, pasta, n_workers):
+            zf.write(caminho, nome)
+            os.remove(caminho)
 
 
 def nome_arquivo(resultado: ApuracaoResult) -> str:
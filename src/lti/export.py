@@ -0,0 +1,223 @@
+# src/lti/export.py
+"""
+Exportação da apuração LTI em formatos de máquina (JSON e Parquet).
+
+O Excel de excel_builder é o artefato de auditoria; aqui ficam apenas os dados
+— ranking, grupos, componentes do TSR, dividendos ajustados e eventos
+corporativos — para consumo por sistemas downstream sem renderizar workbook.
+
+As mesmas linhas alimentam os dois formatos:
+  - JSON:    um objeto por outorga, ticker a ticker, com datas em ISO-8601
+  - Parquet: uma tabela por tipo de dado, empilhando as outorgas pela coluna `outorga`
+"""
+from __future__ import annotations
+
+import json
+import math
+import os
+import zipfile
+from datetime import date, datetime
+from io import BytesIO
+
+import pandas as pd
+
+from src.lti.engine import ApuracaoResult, TickerResult
+
+FORMATOS = ("xlsx", "json", "parquet")
+
+# Esquema das tabelas geradas por outorga (nome → colunas, sem `outorga`)
+_COLUNAS: dict[str, tuple[str, ...]] = {
+    "tickers": (
+        "ticker", "ticker_original", "status", "motivo_exclusao", "rank", "grupo",
+        "vwap_p0", "vwap_pf", "mult_corporativo", "p_final_ajustado",
+        "dividendos_total", "ret_preco", "ret_divs", "tsr", "divergencia_yf",
+    ),
+    "grupos": ("grupo", "rank", "ticker"),
+    "divs_ajustados": (
+        "ticker", "data_ex", "pagamento", "tipo", "valor_acao", "multiplicador", "total_recebido",
+    ),
+    "eventos": ("ticker", "data", "label", "factor", "mult"),
+}
+TABELAS = tuple(_COLUNAS)
+
+# Colunas de data (texto ISO nas linhas) convertidas para date no Parquet
+_COLUNAS_DATA = {
+    "divs_ajustados": ("data_ex", "pagamento"),
+    "eventos": ("data",),
+}
+
+
+# ---------------------------------------------------------------------------
+# Normalização de valores
+# ---------------------------------------------------------------------------
+
+def _valor(v):
+    """Escalar Python serializável: NaN/None → None, datas → ISO, numpy → nativo."""
+    if v is None:
+        return None
+    if hasattr(v, "item") and not isinstance(v, (str, bytes)):
+        v = v.item()  # numpy escalar → Python
+    if isinstance(v, float) and math.isnan(v):
+        return None
+    if isinstance(v, (pd.Timestamp, datetime)):
+        return None if pd.isna(v) else v.date().isoformat()
+    if isinstance(v, date):
+        return v.isoformat()
+    return v
+
+
+def _data_iso(texto) -> str | None:
+    """'15/06/2023' (formato da API B3) → '2023-06-15'. Vazio/inválido → None."""
+    dt = pd.to_datetime(texto, format="%d/%m/%Y", errors="coerce")
+    return None if pd.isna(dt) else dt.date().isoformat()
+
+
+# ---------------------------------------------------------------------------
+# Linhas por tipo de dado
+# ---------------------------------------------------------------------------
+
+def _linha_ticker(t: TickerResult) -> dict:
+    """Componentes do TSR de um ticker — mesma decomposição de engine.calcular_tsr."""
+    p_final_adj = ret_preco = ret_divs = None
+    if t.vwap_p0 and t.vwap_pf is not None and t.mult_corporativo is not None:
+        p_final_adj = t.vwap_pf * t.mult_corporativo
+        ret_preco = (p_final_adj - t.vwap_p0) / t.vwap_p0
+        ret_divs = t.dividendos_total / t.vwap_p0
+    return {
+        "ticker": t.ticker,
+        "ticker_original": t.ticker_original,
+        "status": t.status,
+        "motivo_exclusao": t.motivo_exclusao,
+        "rank": t.rank,
+        "grupo": t.grupo,
+        "vwap_p0": _valor(t.vwap_p0),
+        "vwap_pf": _valor(t.vwap_pf),
+        "mult_corporativo": _valor(t.mult_corporativo),
+        "p_final_ajustado": _valor(p_final_adj),
+        "dividendos_total": _valor(t.dividendos_total),
+        "ret_preco": _valor(ret_preco),
+        "ret_divs": _valor(ret_divs),
+        "tsr": _valor(t.tsr),
+        "divergencia_yf": t.divergencia_yf,
+    }
+
+
+def _linhas_divs(t: TickerResult) -> list[dict]:
+    return [
+        {
+            "ticker": t.ticker,
+            "data_ex": _data_iso(d.get("Data Ex")),
+            "pagamento": _data_iso(d.get("Pagamento")),
+            "tipo": _valor(d.get("Tipo")),
+            "valor_acao": _valor(d.get("Valor/Ação (R$)")),
+            "multiplicador": _valor(d.get("Multiplicador")),
+            "total_recebido": _valor(d.get("Total Recebido (R$)")),
+        }
+        for d in t.divs_ajustados
+    ]
+
+
+def _linhas_eventos(t: TickerResult) -> list[dict]:
+    return [
+        {
+            "ticker": t.ticker,
+            "data": _valor(ev.get("date")),
+            "label": _valor(ev.get("label")),
+            "factor": _valor(ev.get("factor")),
+            "mult": _valor(ev.get("mult")),
+        }
+        for ev in t.eventos_corporativos
+    ]
+
+
+def linhas_resultado(resultado: ApuracaoResult) -> dict[str, list[dict]]:
+    """
+    Quebra a apuração em listas de dicts (uma por tabela de TABELAS).
+    Valores já normalizados para JSON: sem NaN, datas como texto ISO.
+    """
+    linhas: dict[str, list[dict]] = {nome: [] for nome in TABELAS}
+    for t in resultado.tickers:
+        linhas["tickers"].append(_linha_ticker(t))
+        linhas["divs_ajustados"].extend(_linhas_divs(t))
+        linhas["eventos"].extend(_linhas_eventos(t))
+    for g, membros in sorted(resultado.grupos.items()):
+        for t in membros:
+            linhas["grupos"].append({"grupo": g, "rank": t.rank, "ticker": t.ticker})
+    return linhas
+
+
+# ---------------------------------------------------------------------------
+# JSON
+# ---------------------------------------------------------------------------
+
+def resultado_para_dict(resultado: ApuracaoResult) -> dict:
+    """Representação JSON de uma outorga: config + ranking + grupos + detalhes por ticker."""
+    cfg = resultado.outorga
+    linhas = linhas_resultado(resultado)
+    grupos: dict[str, list[str]] = {}
+    for g in linhas["grupos"]:
+        grupos.setdefault(str(g["grupo"]), []).append(g["ticker"])
+    return {
+        "outorga": cfg.ano,
+        "timestamp": resultado.timestamp.isoformat(timespec="seconds"),
+        "periodos": {
+            "p0": [cfg.dt_p0_ini.isoformat(), cfg.dt_p0_fim.isoformat()],
+            "pf": [cfg.dt_pf_ini.isoformat(), cfg.dt_pf_fim.isoformat()],
+            "dividendos": [cfg.dt_divs_ini.isoformat(), cfg.dt_divs_fim.isoformat()],
+        },
+        "n_incluidos": resultado.n_incluidos,
+        "n_excluidos": resultado.n_excluidos,
+        "ranking": [t.ticker for t in resultado.ranking],
+        "grupos": grupos,
+        "tickers": linhas["tickers"],
+        "divs_ajustados": linhas["divs_ajustados"],
+        "eventos": linhas["eventos"],
+    }
+
+
+def gerar_json_bytes(resultados: list[ApuracaoResult]) -> bytes:
+    """JSON compacto (UTF-8, sem espaços) com a lista de outorgas em `outorgas`."""
+    payload = {"outorgas": [resultado_para_dict(r) for r in resultados]}
+    return json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+# ---------------------------------------------------------------------------
+# Parquet
+# ---------------------------------------------------------------------------
+
+def tabelas_resultado(resultados: list[ApuracaoResult]) -> dict[str, pd.DataFrame]:
+    """Uma DataFrame por tabela de TABELAS, com as outorgas empilhadas (coluna `outorga`)."""
+    acumulado: dict[str, list[dict]] = {nome: [] for nome in TABELAS}
+    for r in resultados:
+        for nome, linhas in linhas_resultado(r).items():
+            acumulado[nome].extend({"outorga": r.outorga.ano, **l} for l in linhas)
+
+    tabelas: dict[str, pd.DataFrame] = {}
+    for nome, linhas in acumulado.items():
+        df = pd.DataFrame(linhas, columns=["outorga", *_COLUNAS[nome]])
+        for col in _COLUNAS_DATA.get(nome, ()):
+            df[col] = pd.to_datetime(df[col], errors="coerce").dt.date
+        for col in ("rank", "grupo"):
+            if col in df.columns:
+                df[col] = df[col].astype("Int64")
+        tabelas[nome] = df
+    return tabelas
+
+
+def escrever_parquet_zip(resultados: list[ApuracaoResult], destino) -> None:
+    """Grava em `destino` (caminho ou arquivo binário) um .zip com um .parquet por tabela."""
+    with zipfile.ZipFile(destino, mode="w", compression=zipfile.ZIP_STORED) as zf:
+        for nome, df in tabelas_resultado(resultados).items():
+            buf = BytesIO()
+            df.to_parquet(buf, index=False)
+            zf.writestr(f"{nome}.parquet", buf.getvalue())
+
+
+def salvar_parquet(resultados: list[ApuracaoResult], pasta: str, prefixo: str) -> list[str]:
+    """Grava `<prefixo>_<tabela>.parquet` em `pasta` (para CLI). Retorna os caminhos."""
+    caminhos = []
+    for nome, df in tabelas_resultado(resultados).items():
+        caminho = os.path.join(pasta, f"{prefixo}_{nome}.parquet")
+        df.to_parquet(caminho, index=False)
+        caminhos.append(caminho)
+    return caminhos
@@ -0,0 +1,223 @@
+# src/lti/jobs.py
+"""
+Modo assíncrono da apuração: submeter → acompanhar → baixar.
+
+Uma apuração multi-outorga pode passar do timeout do HTTP trigger. Aqui o
+pedido vira um Job executado em segundo plano; o cliente consulta o status
+(com progresso alimentado pelos eventos estruturados do engine) e baixa o
+artefato quando pronto.
+
+Peças:
+  - JobQueue:      onde o trabalho roda. LocalJobQueue (threads) é o stand-in
+                   local/testes; em produção a mesma interface pode publicar
+                   numa fila e ser consumida por um queue trigger.
+  - JobManager:    registro dos jobs, coalescência e publicação do artefato.
+                   Submissões idênticas (mesma chave de result_cache) enquanto
+                   um job está pendente/em execução/concluído devolvem o mesmo job.
+                   Jobs terminados saem do registro após `ttl` segundos, e os
+                   mais antigos antes disso se passarem de `max_jobs`.
+  - Artefatos:     gravados no CacheBackend de result_cache sob a chave do job
+                   (o mesmo que o endpoint síncrono consulta) e servidos de lá.
+                   O Job só guarda os bytes se o cache não os guardou (backend
+                   desligado ou falha de gravação).
+"""
+from __future__ import annotations
+
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable
+
+from src.lti.config import OUTORGAS
+from src.lti.result_cache import CacheBackend, CacheEntry, chave_resultado
+
+PENDENTE = "PENDENTE"
+EXECUTANDO = "EXECUTANDO"
+CONCLUIDO = "CONCLUIDO"
+ERRO = "ERRO"
+_TERMINADOS = (CONCLUIDO, ERRO)
+
+JOB_TTL = 3600          # segundos que um job terminado continua consultável
+MAX_JOBS = 256
+
+# Função que produz o artefato: (anos, formato, progresso) → (corpo, headers HTTP)
+Executor = Callable[[list[int], str, Callable[[dict], None]], tuple[bytes, dict[str, str]]]
+
+
+@dataclass
+class Job:
+    id: str
+    chave: str
+    anos: list[int]
+    formato: str
+    status: str = PENDENTE
+    progresso: float = 0.0               # 0..1
+    etapa: str = ""
+    erro: str = ""
+    criado_em: float = field(default_factory=time.time)
+    atualizado_em: float = field(default_factory=time.time)
+    artefato: CacheEntry | None = field(default=None, repr=False)  # só sem cache (ver JobManager)
+
+    def as_dict(self) -> dict:
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "outorgas": self.anos,
+            "format": self.formato,
+            "progresso": round(self.progresso, 4),
+            "etapa": self.etapa,
+            "erro": self.erro,
+            "criado_em": self.criado_em,
+            "atualizado_em": self.atualizado_em,
+        }
+
+
+def fracao_progresso(evento: dict) -> float:
+    """Fração global concluída a partir de um evento de calcular_todas_outorgas."""
+    total = evento.get("total") or 1
+    n_outorgas = evento.get("n_outorgas") or 1
+    idx = evento.get("indice_outorga", 0)
+    return min(1.0, (idx + evento.get("atual", 0) / total) / n_outorgas)
+
+
+def descrever_evento(evento: dict) -> str:
+    etapa = evento.get("etapa", "")
+    base = f"Outorga {evento.get('outorga')}: {etapa}"
+    if etapa == "ticker":
+        return f"{base} {evento.get('ticker')} ({evento.get('atual', 0) + 1}/{evento.get('total')})"
+    return base
+
+
+# ---------------------------------------------------------------------------
+# Filas
+# ---------------------------------------------------------------------------
+
+class JobQueue(ABC):
+    """Interface mínima de fila: enfileira uma chamada sem argumentos."""
+
+    @abstractmethod
+    def enqueue(self, tarefa: Callable[[], None]) -> None:
+        """Agenda a tarefa para execução (sem esperar por ela)."""
+
+
+class LocalJobQueue(JobQueue):
+    """Stand-in local: pool de threads no próprio processo."""
+
+    def __init__(self, max_workers: int = 1):
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="lti-job")
+
+    def enqueue(self, tarefa: Callable[[], None]) -> None:
+        self._pool.submit(tarefa)
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._pool.shutdown(wait=wait)
+
+
+# ---------------------------------------------------------------------------
+# Manager
+# ---------------------------------------------------------------------------
+
+class JobManager:
+    def __init__(self, executar: Executor, queue: JobQueue, cache: CacheBackend,
+                 ttl: float = JOB_TTL, max_jobs: int = MAX_JOBS):
+        self._executar = executar
+        self._queue = queue
+        self._cache = cache
+        self._ttl = ttl
+        self._max_jobs = max_jobs
+        self._lock = threading.Lock()
+        self._jobs: dict[str, Job] = {}
+        self._por_chave: dict[str, str] = {}
+        self._eventos_fim: dict[str, threading.Event] = {}
+
+    def submeter(self, anos: list[int], formato: str) -> Job:
+        """Cria (ou reaproveita) o job para (anos, formato)."""
+        chave = chave_resultado([OUTORGAS[a] for a in anos], formato)
+        with self._lock:
+            self._podar()
+            existente = self._jobs.get(self._por_chave.get(chave, ""))
+            if existente is not None and existente.status != ERRO:
+                # Pendente/em execução, ou concluído com o artefato ainda disponível
+                if existente.status != CONCLUIDO or self._entrada(existente) is not None:
+                    return existente
+
+            job = Job(id=uuid.uuid4().hex, chave=chave, anos=list(anos), formato=formato)
+            fim = threading.Event()
+            self._jobs[job.id] = job
+            self._por_chave[chave] = job.id
+            self._eventos_fim[job.id] = fim
+
+            if self._cache.get(chave) is not None:
+                # Artefato já pronto (ex: gerado pelo endpoint síncrono)
+                job.status, job.progresso, job.etapa = CONCLUIDO, 1.0, "cache"
+                fim.set()
+                return job
+
+        self._queue.enqueue(lambda: self._rodar(job))
+        return job
+
+    def obter(self, job_id: str) -> Job | None:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def artefato(self, job_id: str) -> CacheEntry | None:
+        """Artefato de um job concluído (None se inexistente, não pronto ou expirado no cache)."""
+        job = self.obter(job_id)
+        if job is None or job.status != CONCLUIDO:
+            return None
+        return self._entrada(job)
+
+    def aguardar(self, job_id: str, timeout: float | None = None) -> Job | None:
+        fim = self._eventos_fim.get(job_id)
+        if fim is not None:
+            fim.wait(timeout)
+        return self.obter(job_id)
+
+    def _entrada(self, job: Job) -> CacheEntry | None:
+        return job.artefato if job.artefato is not None else self._cache.get(job.chave)
+
+    def _podar(self) -> None:
+        """Tira do registro os jobs terminados há mais de ttl e, acima de max_jobs, os mais antigos."""
+        limite = time.time() - self._ttl
+        terminados = sorted((j for j in self._jobs.values() if j.status in _TERMINADOS),
+                            key=lambda j: j.atualizado_em)
+        excesso = len(self._jobs) - self._max_jobs
+        for i, job in enumerate(terminados):
+            if job.atualizado_em >= limite and i >= excesso:
+                break
+            del self._jobs[job.id]
+            self._eventos_fim.pop(job.id, None)
+            if self._por_chave.get(job.chave) == job.id:
+                del self._por_chave[job.chave]
+
+    def _atualizar(self, job: Job, **campos) -> None:
+        with self._lock:
+            for k, v in campos.items():
+                setattr(job, k, v)
+            job.atualizado_em = time.time()
+
+    def _rodar(self, job: Job) -> None:
+        fim = self._eventos_fim[job.id]
+        self._atualizar(job, status=EXECUTANDO, etapa="iniciando")
+
+        def progresso(evento: dict) -> None:
+            self._atualizar(job, progresso=fracao_progresso(evento), etapa=descrever_evento(evento))
+
+        try:
+            body, headers = self._executar(job.anos, job.formato, progresso)
+            entry = CacheEntry(body=body, etag=job.chave, headers=headers)
+            try:
+                self._cache.put(job.chave, entry)
+                guardado = self._cache.persistente
+            except OSError:
+                guardado = False
+            # Download sai do cache; os bytes só ficam no job se o cache não os tem
+            self._atualizar(job, artefato=None if guardado else entry,
+                            status=CONCLUIDO, progresso=1.0, etapa="concluido")
+        except Exception as exc:
+            self._atualizar(job, status=ERRO, erro=str(exc))
+        finally:
+            fim.set()
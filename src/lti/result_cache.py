@@ -0,0 +1,194 @@
+# src/lti/result_cache.py
+"""
+Cache dos artefatos de apuração servidos pelo endpoint HTTP.
+
+A chave combina tudo que determina o conteúdo do arquivo:
+  - conjunto de outorgas e formato de saída
+  - hash das OutorgaConfig envolvidas (tickers, datas, exclusões, substituições...)
+  - versão dos dados de entrada (por padrão o dia corrente em São Paulo —
+    cotações e proventos da B3 só mudam de um pregão para o outro)
+
+A própria chave serve de ETag: se o artefato está no cache, um cliente que
+manda `If-None-Match` com o mesmo valor recebe 304 sem nenhum cálculo.
+
+O armazenamento é plugável (CacheBackend). Aqui há a implementação em sistema
+de arquivos local — suficiente para testes e para uma instância única; em
+produção com várias instâncias basta outro backend com a mesma interface.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import tempfile
+import time
+from abc import ABC, abstractmethod
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+from src.lti.config import OutorgaConfig
+
+_TZ_SP = ZoneInfo("America/Sao_Paulo")
+
+# Variáveis de ambiente (Application Settings no Azure)
+_ENV_BACKEND = "LTI_CACHE_BACKEND"     # local | off
+_ENV_DIR = "LTI_CACHE_DIR"
+_ENV_TTL = "LTI_CACHE_TTL"             # segundos
+_ENV_DATA_VERSION = "LTI_DATA_VERSION"  # força uma versão (ex: após reprocessar a B3)
+
+TTL_PADRAO = 6 * 3600
+
+
+@dataclass
+class CacheEntry:
+    body: bytes
+    etag: str
+    headers: dict[str, str] = field(default_factory=dict)
+    criado_em: float = field(default_factory=time.time)
+
+
+# ---------------------------------------------------------------------------
+# Chave / ETag
+# ---------------------------------------------------------------------------
+
+def hash_config(cfg: OutorgaConfig) -> str:
+    """Hash estável de uma OutorgaConfig (datas em ISO, chaves ordenadas)."""
+    texto = json.dumps(asdict(cfg), sort_keys=True, default=str)
+    return hashlib.sha256(texto.encode("utf-8")).hexdigest()
+
+
+def versao_dados() -> str:
+    """Versão dos dados de entrada: LTI_DATA_VERSION ou a data corrente em São Paulo."""
+    return os.environ.get(_ENV_DATA_VERSION) or datetime.now(_TZ_SP).date().isoformat()
+
+
+def chave_resultado(
+    configs: list[OutorgaConfig],
+    formato: str,
+    versao: str | None = None,
+) -> str:
+    """Chave do artefato — também usada como ETag (sem aspas)."""
+    partes = {
+        "outorgas": sorted(c.ano for c in configs),
+        "configs": sorted(hash_config(c) for c in configs),
+        "formato": formato,
+        "versao_dados": versao if versao is not None else versao_dados(),
+    }
+    texto = json.dumps(partes, sort_keys=True)
+    return hashlib.sha256(texto.encode("utf-8")).hexdigest()[:32]
+
+
+def etag_confere(if_none_match: str | None, etag: str) -> bool:
+    """True se o cabeçalho If-None-Match contém o ETag (ou `*`)."""
+    if not if_none_match:
+        return False
+    for item in if_none_match.split(","):
+        item = item.strip()
+        if item.startswith("W/"):
+            item = item[2:]
+        if item == "*" or item.strip('"') == etag:
+            return True
+    return False
+
+
+# ---------------------------------------------------------------------------
+# Backends
+# ---------------------------------------------------------------------------
+
+class CacheBackend(ABC):
+    """Interface de armazenamento: get/put por chave, com expiração por TTL."""
+
+    # False quando put não guarda nada (quem gravou precisa manter a própria cópia)
+    persistente: bool = True
+
+    @abstractmethod
+    def get(self, chave: str) -> CacheEntry | None:
+        """Entrada da chave, ou None se ausente/expirada."""
+
+    @abstractmethod
+    def put(self, chave: str, entry: CacheEntry) -> None:
+        """Grava (ou substitui) a entrada da chave."""
+
+
+class NullCacheBackend(CacheBackend):
+    """Cache desligado: nunca encontra nada, descarta o que recebe."""
+
+    persistente = False
+
+    def get(self, chave: str) -> CacheEntry | None:
+        return None
+
+    def put(self, chave: str, entry: CacheEntry) -> None:
+        pass
+
+
+class LocalFileCacheBackend(CacheBackend):
+    """
+    Um par de arquivos por chave em `pasta`: <chave>.bin (corpo) e <chave>.json
+    (ETag, headers, criação). Escrita atômica via os.replace — leitores
+    concorrentes nunca veem um artefato pela metade.
+    """
+
+    def __init__(self, pasta: str, ttl: float = TTL_PADRAO):
+        self.pasta = pasta
+        self.ttl = ttl
+        os.makedirs(pasta, exist_ok=True)
+
+    def _caminhos(self, chave: str) -> tuple[str, str]:
+        base = os.path.join(self.pasta, chave)
+        return base + ".bin", base + ".json"
+
+    def get(self, chave: str) -> CacheEntry | None:
+        p_body, p_meta = self._caminhos(chave)
+        try:
+            with open(p_meta, encoding="utf-8") as f:
+                meta = json.load(f)
+            if time.time() - meta["criado_em"] > self.ttl:
+                return None
+            with open(p_body, "rb") as f:
+                body = f.read()
+        except (OSError, ValueError, KeyError):
+            return None
+        return CacheEntry(body=body, etag=meta["etag"], headers=meta.get("headers", {}),
+                          criado_em=meta["criado_em"])
+
+    def put(self, chave: str, entry: CacheEntry) -> None:
+        p_body, p_meta = self._caminhos(chave)
+        meta = {"etag": entry.etag, "headers": entry.headers, "criado_em": entry.criado_em}
+        # Corpo antes dos metadados: get() só considera a entrada quando o .json existe
+        self._gravar_atomico(p_body, entry.body)
+        self._gravar_atomico(p_meta, json.dumps(meta).encode("utf-8"))
+
+    def _gravar_atomico(self, caminho: str, dados: bytes) -> None:
+        fd, tmp = tempfile.mkstemp(dir=self.pasta, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(dados)
+            os.replace(tmp, caminho)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+
+
+def pasta_padrao() -> str:
+    """Pasta do backend local: LTI_CACHE_DIR ou lti_cache no tmp."""
+    return os.environ.get(_ENV_DIR) or os.path.join(tempfile.gettempdir(), "lti_cache")
+
+
+def criar_backend() -> CacheBackend:
+    """
+    Backend configurado pelas variáveis LTI_CACHE_* (default: arquivos locais no tmp).
+    ValueError se LTI_CACHE_BACKEND ou LTI_CACHE_TTL forem inválidos.
+    """
+    tipo = os.environ.get(_ENV_BACKEND, "local").strip().lower()
+    if tipo == "off":
+        return NullCacheBackend()
+    if tipo != "local":
+        raise ValueError(f"{_ENV_BACKEND} inválido: {tipo!r}. Use 'local' ou 'off'.")
+    try:
+        ttl = float(os.environ.get(_ENV_TTL, TTL_PADRAO))
+    except ValueError:
+        raise ValueError(f"{_ENV_TTL} inválido: {os.environ.get(_ENV_TTL)!r}. Use segundos.") from None
+    return LocalFileCacheBackend(pasta_padrao(), ttl=ttl)
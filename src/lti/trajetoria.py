@@ -0,0 +1,272 @@
+# src/lti/trajetoria.py
+"""
+Trajetória diária (mark-to-market) do TSR de cada ticker durante o vesting.
+
+Para acompanhar a evolução do ranking entre P0 e Pf sem rodar calcular_outorga
+dia a dia, o TSR "como se a apuração fosse hoje" é calculado para cada pregão d:
+
+    Pf(d)   = VWAP dos últimos L pregões até d (L = pregões da janela Pf da outorga)
+    mult(d) = ∏ multiplicadores dos eventos corporativos com data ≤ d
+    div(d)  = Σ dividendos ajustados (× mult na data ex) com data ex ≤ d
+    TSR(d)  = (Pf(d) × mult(d) − P0 + div(d)) / P0        (P0 fixo da apuração)
+
+O estado guarda somas acumuladas por ticker (Σavg·qty, Σqty, Σavg, nº de
+médias) numa matriz tickers × pregões. Cada atualizar() anexa só os pregões
+novos e calcula suas colunas em O(novos pregões): o VWAP móvel é a diferença
+de duas colunas acumuladas; mult/div são buscas binárias nas datas dos eventos.
+
+Eventos, dividendos e P0 vêm da apuração base (ApuracaoResult) — só tickers
+INCLUIDO têm trajetória. Ranking e grupos diários seguem cenarios.ranquear.
+"""
+from __future__ import annotations
+
+from datetime import date, timedelta
+from typing import Callable
+
+import numpy as np
+import pandas as pd
+
+from src import b3_engine
+from src.lti.cenarios import ranquear, tsr_matriz
+from src.lti.engine import ApuracaoResult, buscar_cotacoes_periodo
+
+
+class _Colunas:
+    """Matriz n × k que cresce por colunas com capacidade dobrada (anexar amortizado O(novos))."""
+
+    def __init__(self, n_linhas: int, dtype=float, capacidade: int = 256):
+        self._dados = np.zeros((n_linhas, capacidade), dtype=dtype)
+        self.tamanho = 0
+
+    def anexar(self, bloco: np.ndarray) -> None:
+        k = bloco.shape[1]
+        if self.tamanho + k > self._dados.shape[1]:
+            nova = max(2 * self._dados.shape[1], self.tamanho + k)
+            dados = np.zeros((self._dados.shape[0], nova), dtype=self._dados.dtype)
+            dados[:, :self.tamanho] = self._dados[:, :self.tamanho]
+            self._dados = dados
+        self._dados[:, self.tamanho:self.tamanho + k] = bloco
+        self.tamanho += k
+
+    @property
+    def valores(self) -> np.ndarray:
+        return self._dados[:, :self.tamanho]
+
+    def copiar(self) -> "_Colunas":
+        copia = _Colunas.__new__(_Colunas)
+        copia._dados = self._dados.copy()
+        copia.tamanho = self.tamanho
+        return copia
+
+
+def _data_br(valor) -> pd.Timestamp:
+    return pd.to_datetime(valor, format="%d/%m/%Y", errors="coerce")
+
+
+def _caminho_acumulado(datas: list, valores: list, acumular) -> tuple[np.ndarray, np.ndarray]:
+    """Datas ordenadas (datetime64[D]) e valor acumulado até cada uma, com o neutro na frente."""
+    pares = sorted((np.datetime64(d.date(), "D"), v) for d, v in zip(datas, valores) if pd.notna(d))
+    ds = np.array([d for d, _ in pares], dtype="datetime64[D]")
+    acum = acumular(np.array([v for _, v in pares], dtype=float))
+    return ds, acum
+
+
+class TrajetoriaTSR:
+    """Matriz tickers × pregões de TSR, rank e grupo, atualizável incrementalmente."""
+
+    def __init__(self, resultado: ApuracaoResult, janela_pregoes: int | None = None):
+        cfg = resultado.outorga
+        self.outorga = cfg.ano
+        tickers = resultado.tickers
+        n = len(tickers)
+        self.tickers = [t.ticker_original for t in tickers]
+        self.janela = janela_pregoes or max(1, len(b3_engine.listar_dias_uteis(cfg.dt_pf_ini, cfg.dt_pf_fim)))
+
+        self._participa = np.array([t.status == "INCLUIDO" for t in tickers])
+        self._p0 = np.array([t.vwap_p0 if ok else np.nan for t, ok in zip(tickers, self._participa)], dtype=float)
+
+        # Nome no COTAHIST → (linha, prioridade). O ticker efetivo (pós-renomeação)
+        # prevalece; o original cobre os pregões anteriores à troca de código.
+        self._linhas: dict[str, tuple[int, int]] = {}
+        for i, t in enumerate(tickers):
+            if self._participa[i]:
+                self._linhas.setdefault(t.ticker_original, (i, 1))
+                self._linhas[t.ticker] = (i, 0)
+
+        # Caminhos de eventos (produto) e dividendos (soma) por ticker
+        self._eventos = [
+            _caminho_acumulado([ev["date"] for ev in t.eventos_corporativos],
+                               [ev["mult"] for ev in t.eventos_corporativos], np.cumprod)
+            for t in tickers
+        ]
+        self._divs = [
+            _caminho_acumulado([_data_br(d["Data Ex"]) for d in t.divs_ajustados],
+                               [d["Total Recebido (R$)"] for d in t.divs_ajustados], np.cumsum)
+            for t in tickers
+        ]
+
+        self._datas: list[np.datetime64] = []
+        # Somas acumuladas com coluna zero inicial: soma dos pregões [i, j) = S[:, j] − S[:, i]
+        self._s_pq, self._s_q, self._s_avg, self._n_avg = (_Colunas(n) for _ in range(4))
+        for s in (self._s_pq, self._s_q, self._s_avg, self._n_avg):
+            s.anexar(np.zeros((n, 1)))
+        self._tsr = _Colunas(n)
+        self._rank = _Colunas(n, dtype=np.int64)
+        self._grupo = _Colunas(n, dtype=np.int64)
+
+    # ── Atualização ──────────────────────────────────────────────────────────
+
+    @property
+    def ultima_data(self) -> date | None:
+        return pd.Timestamp(self._datas[-1]).date() if self._datas else None
+
+    @property
+    def tickers_cotahist(self) -> list[str]:
+        """Códigos a baixar do COTAHIST (efetivos e originais dos participantes)."""
+        return sorted(self._linhas)
+
+    def atualizar(self, cotacoes: pd.DataFrame) -> int:
+        """
+        Anexa os pregões de `cotacoes` (formato baixar_e_parsear_dia) posteriores
+        ao último já processado. Retorna quantos pregões novos entraram.
+        """
+        if cotacoes.empty:
+            return 0
+        df = pd.DataFrame({
+            "Ticker": cotacoes["Ticker"].astype(str),
+            "Date": pd.to_datetime(cotacoes["Date"]).to_numpy().astype("datetime64[D]"),
+            "Average": cotacoes["Average"].to_numpy(dtype=float),
+            "Quantity": cotacoes["Quantity"].to_numpy(dtype=float),
+        })
+        linhas = df["Ticker"].map(lambda t: self._linhas.get(t, (-1, 9)))
+        df["linha"] = [l for l, _ in linhas]
+        df["prio"] = [p for _, p in linhas]
+        df = df[df["linha"] >= 0]
+        if self._datas:
+            df = df[df["Date"] > self._datas[-1]]
+        if df.empty:
+            return 0
+        df = df.sort_values("prio", kind="stable").drop_duplicates(["linha", "Date"])
+
+        novas = np.unique(df["Date"].to_numpy())
+        n, k = len(self.tickers), len(novas)
+        col = np.searchsorted(novas, df["Date"].to_numpy())
+        lin = df["linha"].to_numpy()
+        avg = np.full((n, k), np.nan)
+        qty = np.zeros((n, k))
+        avg[lin, col] = df["Average"].to_numpy()
+        qty[lin, col] = np.nan_to_num(df["Quantity"].to_numpy(), nan=0.0)
+
+        # Mesmo tratamento de _calcular_vwap / IndicePrecos
+        for acum, bloco in (
+            (self._s_pq, np.nan_to_num(qty * avg, nan=0.0)),
+            (self._s_q, qty),
+            (self._s_avg, np.nan_to_num(avg, nan=0.0)),
+            (self._n_avg, (~np.isnan(avg)).astype(float)),
+        ):
+            acum.anexar(acum.valores[:, -1:] + np.cumsum(bloco, axis=1))
+
+        # VWAP móvel dos últimos L pregões para cada pregão novo
+        total = len(self._datas) + k
+        j = np.arange(total - k + 1, total + 1)
+        i = np.maximum(j - self.janela, 0)
+        s_pq, s_q, s_avg, n_avg = (a.valores for a in (self._s_pq, self._s_q, self._s_avg, self._n_avg))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            den = s_q[:, j] - s_q[:, i]
+            media = (s_avg[:, j] - s_avg[:, i]) / (n_avg[:, j] - n_avg[:, i])
+            pf = np.where(den != 0, (s_pq[:, j] - s_pq[:, i]) / den, media)
+
+        mult = np.ones((n, k))
+        divs = np.zeros((n, k))
+        for r in range(n):
+            ds, acum = self._eventos[r]
+            if len(ds):
+                pos = np.searchsorted(ds, novas, side="right")
+                mult[r] = np.concatenate(([1.0], acum))[pos]
+            ds, acum = self._divs[r]
+            if len(ds):
+                pos = np.searchsorted(ds, novas, side="right")
+                divs[r] = np.concatenate(([0.0], acum))[pos]
+
+        tsr = tsr_matriz(self._p0[:, None], pf, mult, divs)
+        tsr = np.where(self._participa[:, None], tsr, np.nan)
+        rank, grupo = ranquear(tsr)
+
+        self._tsr.anexar(tsr)
+        self._rank.anexar(rank)
+        self._grupo.anexar(grupo)
+        self._datas.extend(novas)
+        return k
+
+    def copiar(self) -> "TrajetoriaTSR":
+        """
+        Cópia independente para estender: as matrizes e as datas são copiadas;
+        P0, linhas, eventos e dividendos (fixos desde o __init__) são compartilhados.
+        """
+        copia = object.__new__(TrajetoriaTSR)
+        copia.__dict__.update(self.__dict__)
+        for nome in ("_s_pq", "_s_q", "_s_avg", "_n_avg", "_tsr", "_rank", "_grupo"):
+            setattr(copia, nome, getattr(self, nome).copiar())
+        copia._datas = list(self._datas)
+        return copia
+
+    # ── Saída ────────────────────────────────────────────────────────────────
+
+    @property
+    def datas(self) -> pd.DatetimeIndex:
+        return pd.DatetimeIndex(np.array(self._datas, dtype="datetime64[D]"), name="Data")
+
+    def tabela(self, campo: str = "tsr") -> pd.DataFrame:
+        """Matriz tickers × pregões de "tsr" (decimal), "rank" ou "grupo" (0 = fora)."""
+        valores = {"tsr": self._tsr, "rank": self._rank, "grupo": self._grupo}[campo].valores
+        return pd.DataFrame(valores.copy(), index=pd.Index(self.tickers, name="Ticker"), columns=self.datas)
+
+
+# ---------------------------------------------------------------------------
+# Carga a partir do COTAHIST
+# ---------------------------------------------------------------------------
+
+def _meses(ini: date, fim: date) -> list[tuple[date, date]]:
+    """Fatias mensais de [ini, fim] — cada mês fechado vira uma entrada estável no cache."""
+    fatias = []
+    atual = ini
+    while atual <= fim:
+        prox = (atual.replace(day=1) + timedelta(days=32)).replace(day=1)
+        fatias.append((atual, min(fim, prox - timedelta(days=1))))
+        atual = prox
+    return fatias
+
+
+def carregar_trajetoria(
+    resultado: ApuracaoResult,
+    ate: date | None = None,
+    trajetoria: TrajetoriaTSR | None = None,
+    logger: Callable[[str], None] = print,
+) -> TrajetoriaTSR:
+    """
+    Cria (ou estende) a trajetória da outorga até `ate` (default: hoje, limitado
+    ao fim da janela Pf). Só os meses posteriores ao último pregão processado
+    são baixados, via buscar_cotacoes_periodo (memoizado). Um pregão que falhou
+    no download interrompe a extensão logo antes dele.
+
+    `trajetoria` não é alterada — pode estar publicada no SharedStore e sendo
+    lida por outras sessões: a extensão é feita numa cópia, que é devolvida.
+    """
+    cfg = resultado.outorga
+    traj = trajetoria.copiar() if trajetoria is not None else TrajetoriaTSR(resultado)
+    ate = min(ate or date.today(), cfg.dt_pf_fim)
+    ini = traj.ultima_data + timedelta(days=1) if traj.ultima_data else cfg.dt_p0_ini
+
+    for mes_ini, mes_fim in _meses(ini, ate):
+        periodo = buscar_cotacoes_periodo(traj.tickers_cotahist, mes_ini, mes_fim, logger)
+        cotacoes = periodo.tabela
+        if periodo.pregoes_falhos and not cotacoes.empty:
+            # A trajetória só avança sem buracos: para antes do primeiro pregão que
+            # falhou, e a próxima carga recomeça dele
+            cotacoes = cotacoes[cotacoes["Date"] < pd.Timestamp(min(periodo.pregoes_falhos))]
+        if not cotacoes.empty:
+            novos = traj.atualizar(cotacoes)
+            logger(f"  Trajetória {cfg.ano}: +{novos} pregões ({mes_ini:%m/%Y})")
+        if periodo.pregoes_falhos:
+            break
+    return traj
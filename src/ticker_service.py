@@ -1,25 +1,13 @@
 import pandas as pd
-import yfinance as yf
-import requests
 import json
 from base64 import b64encode
 from datetime import datetime, timedelta
-from concurrent.futures import ThreadPoolExecutor
 from curl_cffi import requests as curl_requests
 import time
 
-# Importa o motor de baixo nível
-from src import b3_engine
+from src.cache import memoizar, nao_vazio
 
-# Cache condicional: usa st.cache_data quando rodando no Streamlit,
-# caso contrário aplica no-op (Azure Functions, CLI, testes).
-try:
-    import streamlit as st
-    _cache = st.cache_data(ttl=86400)
-except Exception:
-    _cache = lambda f: f  # no-op fora do Streamlit
-
-@_cache
+@memoizar(ttl=86400, disco=True, cachear_se=nao_vazio, compartilhar=True)
 def carregar_empresas(arquivo_upload=None):
     """
     Carrega a base de empresas da B3 via scraping direto (sem Excel).
@@ -123,6 +111,7 @@ def buscar_dividendos_b3(ticker, empresas_df, data_inicio, data_fim):
     e filtrando pelo typeStock correto (ON, PN, UNT).
     Retorna um DataFrame com os dividendos filtrados ou DataFrame vazio.
     """
+    import streamlit as st  # funções de UI — só usadas pelas páginas
     if not any(char.isdigit() for char in ticker):
         return pd.DataFrame()
 
@@ -237,6 +226,7 @@ def buscar_dividendos_b3(ticker, empresas_df, data_inicio, data_fim):
 
 def buscar_bonificacoes_b3(ticker, empresas_df, data_inicio, data_fim):
     """Busca eventos de bonificação (stock dividends) na B3 de forma robusta."""
+    import streamlit as st  # funções de UI — só usadas pelas páginas
     if not any(char.isdigit() for char in ticker):
         return pd.DataFrame()
 
@@ -314,10 +304,14 @@ def buscar_bonificacoes_b3(ticker, empresas_df, data_inicio, data_fim):
         st.error(f"Erro inesperado ao buscar bonificações para {ticker} (Código: {code}): {e}")
         return pd.DataFrame()
 
+_COLS_B3 = ['Ticker', 'Date', 'Open', 'High', 'Low', 'Close', 'Average', 'Adj Close', 'Volume', 'Quantity']
+
+
 def buscar_dados_hibrido(tickers_input, dt_ini_str, dt_fim_str, empresas_df):
     """
-    Lógica Híbrida: B3 (Engine) + Yahoo.
+    Lógica Híbrida: B3 (COTAHIST ajustado, src/tsr/ajuste.py) + Yahoo (internacionais).
     """
+    import yfinance as yf  # adiado: ~0,25 s de import, só usado aqui
     tickers_list = [t.strip().upper() for t in tickers_input.split(',') if t.strip()]
     d_ini = datetime.strptime(dt_ini_str, "%d/%m/%Y").date()
     d_fim = datetime.strptime(dt_fim_str, "%d/%m/%Y").date()
@@ -333,63 +327,42 @@ def buscar_dados_hibrido(tickers_input, dt_ini_str, dt_fim_str, empresas_df):
     resultados = {}
     erros = []
 
-    # 1. B3 (Engine + Yahoo Adj Close)
+    # 1. B3 (COTAHIST + ajuste por proventos B3 — sem Yahoo)
     if list_b3:
-        dias_uteis = b3_engine.listar_dias_uteis(d_ini, d_fim)
-        frames_b3 = []
-        with requests.Session() as session:
-            with ThreadPoolExecutor(max_workers=5) as executor:
-                futures = [executor.submit(b3_engine.baixar_e_parsear_dia, d, list_b3, session) for d in dias_uteis]
-                for f in futures:
-                    res = f.result()
-                    if res is not None: frames_b3.append(res)
-        
-        if frames_b3:
-            df_b3_total = pd.concat(frames_b3)
-            
-            # Yahoo Adj Close
-            sa_tickers = [f"{t}.SA" for t in list_b3]
-            adj_data = pd.DataFrame()
-            try:
-                yf_res = yf.download(sa_tickers, start=d_ini, end=d_fim + timedelta(days=5), progress=False)
-                if not yf_res.empty:
-                    # Tenta pegar Adj Close, se não tiver, pega Close
-                    if 'Adj Close' in yf_res.columns:
-                        adj_data = yf_res['Adj Close']
-                    elif 'Close' in yf_res.columns:
-                        adj_data = yf_res['Close']
-            except Exception as e:
-                erros.append(f"Aviso Yahoo (Adj): {e}")
-
-            for t in list_b3:
-                df_t = df_b3_total[df_b3_total['Ticker'] == t].copy()
-                if not df_t.empty:
-                    # --- CORREÇÃO DO ERRO RESET_INDEX ---
-                    # 1. Converte para datetime
-                    df_t['Date'] = pd.to_datetime(df_t['Date'])
-                    # 2. Move para o índice (remove da coluna, evitando duplicação)
-                    df_t = df_t.set_index('Date')
-                    
-                    ticker_sa = f"{t}.SA"
-                    col_adj = None
-                    
-                    if not adj_data.empty:
-                        if isinstance(adj_data, pd.Series): 
-                            col_adj = adj_data
-                        elif ticker_sa in adj_data.columns:
-                            col_adj = adj_data[ticker_sa]
-                    
-                    # 3. Reindexa e atribui Adj Close
-                    df_t['Adj Close'] = col_adj.reindex(df_t.index) if col_adj is not None else float('nan')
-                    
-                    # 4. Reseta índice (traz Date de volta como coluna sem conflito)
-                    df_t = df_t.reset_index()
-                    df_t['Date'] = df_t['Date'].dt.strftime('%d/%m/%Y')
-                    
-                    cols = ['Ticker', 'Date', 'Open', 'High', 'Low', 'Close', 'Average', 'Adj Close', 'Volume', 'Quantity']
-                    cols_existentes = [c for c in cols if c in df_t.columns]
-                    resultados[t] = df_t[cols_existentes]
-        else:
+        from src.tsr.ajuste import series_ajustadas
+
+        series = series_ajustadas(list_b3, d_ini, d_fim, empresas_df, logger=lambda _m: None)
+        for t in list_b3:
+            s = series.get(t)
+            df_t = s.cotacoes if s is not None else pd.DataFrame()
+            if df_t.empty:
+                continue
+            df_t = df_t.assign(Ticker=t, Date=pd.to_datetime(df_t['Date']))
+            # Adj Close = fechamento ajustado por eventos e dividendos/JCP (src/tsr/ajuste.py)
+            df_t['Adj Close'] = s.ajustada()['Close'].to_numpy()
+            df_t = df_t[(df_t['Date'] >= pd.Timestamp(d_ini)) & (df_t['Date'] <= pd.Timestamp(d_fim))]
+            if df_t.empty:
+                continue
+            df_t['Date'] = df_t['Date'].dt.strftime('%d/%m/%Y')
+            resultados[t] = df_t[_COLS_B3].reset_index(drop=True)
+
+        # A base ajustada só guarda ações à vista (BDI 02/12, mercado 010): ETFs
+        # (BDI 14, ex: BOVA11), empresas em recuperação judicial (BDI 08) etc. vêm
+        # do COTAHIST bruto, sem ajuste por proventos (Adj Close = Close).
+        fora_base = [t for t in list_b3 if t not in resultados]
+        if fora_base:
+            from src.tsr.dados import buscar_cotacoes_b3
+
+            brutas = buscar_cotacoes_b3(tuple(sorted(fora_base)), d_ini, d_fim, logger=lambda _m: None)
+            sem_ajuste = []
+            for t, df_t in (brutas.groupby('Ticker', sort=False) if not brutas.empty else []):
+                df_t = df_t.assign(Date=df_t['Date'].dt.strftime('%d/%m/%Y'), **{'Adj Close': df_t['Close']})
+                resultados[t] = df_t[_COLS_B3].reset_index(drop=True)
+                sem_ajuste.append(t)
+            if sem_ajuste:
+                erros.append(f"B3: {', '.join(sem_ajuste)} fora do mercado à vista (BDI 02/12) — "
+                             "Adj Close sem ajuste por proventos (= Close).")
+        if not resultados:
             erros.append("B3: Sem dados oficiais (feriado ou falha no download do ZIP).")
 
     # 2. Yahoo (Internacional)
@@ -1,47 +1,184 @@
+import hashlib
+import json
+import os
+import tempfile
+import time
 import requests
 import pandas as pd
-import streamlit as st
-from io import StringIO
+from io import BytesIO
 from scipy.spatial import cKDTree
 
+from src.cache import memoizar, nao_vazio, pasta_cache
+
 # URL oficial
 CSV_TESOURO_URL = "https://www.tesourotransparente.gov.br/ckan/dataset/df56aa42-484a-4a59-8184-7676580c81e3/resource/796d2059-14e9-44e3-80c9-2d9e30b405c1/download/PrecoTaxaTesouroDireto.csv"
 
-@st.cache_data(ttl=3600, show_spinner=False)
-def carregar_dados_tesouro(arquivo_manual=None):
+# Base local: o CSV (todo o histórico) já tipado em Parquet, ordenado por Data Base,
+# e ao lado os metadados da última versão baixada (ETag, Last-Modified, sha256)
+ARQUIVO_BASE = "PrecoTaxaTesouroDireto.parquet"
+ARQUIVO_META = "PrecoTaxaTesouroDireto.json"
+IDADE_MAXIMA = 3600  # segundos entre consultas ao Tesouro
+
+COLUNAS_DATA = ["Data Base", "Data Vencimento"]
+
+_HEADERS = {
+    # Configuração para evitar bloqueio do site .gov.br
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+}
+
+
+def _datas(coluna):
+    """dd/mm/aaaa → datetime64; poucas datas distintas em muitas linhas: converte só as distintas."""
+    codigos, distintas = pd.factorize(coluna)
+    datas = pd.DatetimeIndex(pd.to_datetime(distintas, format="%d/%m/%Y", errors="coerce"))
+    return datas.take(codigos, allow_fill=True, fill_value=pd.NaT)
+
+
+def _indexar(df):
+    """Índice = Data Base (DatetimeIndex sem nome, para não colidir com a coluna)."""
+    return df.set_axis(pd.DatetimeIndex(df["Data Base"]).rename(None), axis=0)
+
+
+def ler_csv_tesouro(fonte):
     """
-    Baixa dados do Tesouro (Lógica Clássica Pandas + Requests).
+    CSV do Tesouro → DataFrame tipado: datas com formato fixo (sem a inferência
+    do dayfirst), Tipo Titulo categórico e linhas ordenadas por Data Base, que
+    também é o índice (ver filtrar_data_base).
     """
+    df = pd.read_csv(fonte, sep=';', decimal=',', dtype={"Tipo Titulo": "category"})
+    for col in COLUNAS_DATA:
+        df[col] = _datas(df[col])
+    df = df.dropna(subset=["Data Base"])
+    return _indexar(df.sort_values(["Data Base", "Tipo Titulo", "Data Vencimento"], kind="stable"))
+
+
+def filtrar_data_base(df, inicio, fim=None):
+    """
+    Linhas com Data Base em [inicio, fim] (fim=None: só `inicio`). Com o índice
+    de ler_csv_tesouro, duas buscas binárias: o índice guarda se é crescente
+    (verificado uma vez, compartilhado pelas visões do cache), sem varrer a
+    coluna a cada chamada. Outros DataFrames: máscara comum.
+    """
+    fim = inicio if fim is None else fim
+    indice = df.index
+    if isinstance(indice, pd.DatetimeIndex) and indice.is_monotonic_increasing:
+        i0 = indice.searchsorted(pd.Timestamp(inicio), side="left")
+        i1 = indice.searchsorted(pd.Timestamp(fim), side="right")
+        return df.iloc[i0:i1]
+    datas = df["Data Base"]
+    return df[(datas >= inicio) & (datas <= fim)]
+
+
+# ---------------------------------------------------------------------------
+# Base local com atualização condicional
+# ---------------------------------------------------------------------------
+
+def _pasta_base():
+    return os.path.join(pasta_cache(), "tesouro")
+
+
+def _ler_base():
+    """(DataFrame, metadados) da base local; (None, {}) se ausente ou ilegível."""
+    pasta = _pasta_base()
     try:
-        if arquivo_manual:
-            return pd.read_csv(
-                arquivo_manual, 
-                sep=';', 
-                decimal=',', 
-                parse_dates=['Data Base', 'Data Vencimento'], 
-                dayfirst=True
-            )
-        else:
-            # Configuração para evitar bloqueio do site .gov.br
-            headers = {
-                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
-            }
-            # verify=False é necessário pois o certificado do Tesouro as vezes falha
-            response = requests.get(CSV_TESOURO_URL, headers=headers, verify=False, timeout=45)
-            response.raise_for_status()
-            
-            # Leitura direta com Pandas (StringIO simula um arquivo na memória)
-            return pd.read_csv(
-                StringIO(response.text), 
-                sep=';', 
-                decimal=',', 
-                parse_dates=['Data Base', 'Data Vencimento'], 
-                dayfirst=True
-            )
+        with open(os.path.join(pasta, ARQUIVO_META), encoding="utf-8") as f:
+            meta = json.load(f)
+        return _indexar(pd.read_parquet(os.path.join(pasta, ARQUIVO_BASE))), meta
+    except (OSError, ValueError):
+        return None, {}
+
 
+def _gravar_atomico(caminho, escrever):
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(caminho), suffix=".tmp")
+    os.close(fd)
+    try:
+        escrever(tmp)
+        os.replace(tmp, caminho)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+def _gravar_base(df, meta):
+    """Grava Parquet e metadados (os metadados por último: só valem com a base nova no lugar)."""
+    pasta = _pasta_base()
+    try:
+        os.makedirs(pasta, exist_ok=True)
+        if df is not None:
+            _gravar_atomico(os.path.join(pasta, ARQUIVO_BASE), lambda tmp: df.to_parquet(tmp, index=False))
+
+        def _meta(tmp):
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(meta, f)
+        _gravar_atomico(os.path.join(pasta, ARQUIVO_META), _meta)
+    except OSError as e:
+        # Base local é best-effort: sem disco, só perde o reaproveitamento
+        print(f"Erro ao gravar a base local do Tesouro: {e}")
+
+
+def atualizar_base_tesouro(forcar=False):
+    """
+    DataFrame do Tesouro a partir da base local, consultando o site no máximo
+    a cada IDADE_MAXIMA segundos (forcar=True: sempre). A consulta é
+    condicional (If-None-Match / If-Modified-Since): 304 ou o mesmo conteúdo
+    (sha256) mantém a base sem reprocessar o CSV. Falha no download com base
+    local devolve a base; sem base, DataFrame vazio.
+    """
+    df, meta = _ler_base()
+    agora = time.time()
+    if df is not None and not forcar and agora - meta.get("verificado_em", 0) < IDADE_MAXIMA:
+        return df
+
+    headers = dict(_HEADERS)
+    if df is not None:
+        if meta.get("etag"):
+            headers["If-None-Match"] = meta["etag"]
+        if meta.get("last_modified"):
+            headers["If-Modified-Since"] = meta["last_modified"]
+    try:
+        # verify=False é necessário pois o certificado do Tesouro as vezes falha
+        response = requests.get(CSV_TESOURO_URL, headers=headers, verify=False, timeout=45)
+        if response.status_code == 304 and df is not None:
+            _gravar_base(None, {**meta, "verificado_em": agora})
+            return df
+        response.raise_for_status()
     except Exception as e:
         print(f"Erro no download do Tesouro: {e}")
-        return pd.DataFrame()
+        return df if df is not None else pd.DataFrame()
+
+    meta_nova = {
+        "etag": response.headers.get("ETag"),
+        "last_modified": response.headers.get("Last-Modified"),
+        "sha256": hashlib.sha256(response.content).hexdigest(),
+        "verificado_em": agora,
+    }
+    if df is not None and meta.get("sha256") == meta_nova["sha256"]:
+        _gravar_base(None, meta_nova)
+        return df
+    try:
+        # Bytes direto para o parser: sem response.text (detecção de charset e decodificação)
+        df = ler_csv_tesouro(BytesIO(response.content))
+    except Exception as e:
+        print(f"Erro ao ler o CSV do Tesouro: {e}")
+        return df if df is not None else pd.DataFrame()
+    _gravar_base(df, meta_nova)
+    return df
+
+
+@memoizar(ttl=IDADE_MAXIMA, cachear_se=nao_vazio, compartilhar=True)
+def carregar_dados_tesouro(arquivo_manual=None):
+    """
+    Dados do Tesouro tipados e ordenados por Data Base (ver ler_csv_tesouro):
+    da base local em Parquet, atualizada sob condição (atualizar_base_tesouro),
+    ou do CSV enviado manualmente.
+    """
+    if arquivo_manual:
+        try:
+            return ler_csv_tesouro(arquivo_manual)
+        except Exception as e:
+            print(f"Erro ao ler o CSV do Tesouro: {e}")
+            return pd.DataFrame()
+    return atualizar_base_tesouro()
 
 def calcular_inflacao_implicita(df_raw, data_base_ref):
     """
@@ -49,8 +186,8 @@ def calcular_inflacao_implicita(df_raw, data_base_ref):
     """
     if df_raw.empty: return pd.DataFrame(), "DataFrame vazio recebido."
 
-    # 1. Filtra pela Data Base
-    df_dia = df_raw[df_raw["Data Base"] == data_base_ref].copy()
+    # 1. Filtra pela Data Base (busca binária: a base vem ordenada)
+    df_dia = filtrar_data_base(df_raw, data_base_ref).copy()
     if df_dia.empty: return pd.DataFrame(), "Sem dados para esta data."
 
     # 2. Separa Títulos
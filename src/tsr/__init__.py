@@ -0,0 +1,66 @@
+"""
+Acesso a dados e cálculo de TSR para a página TSR (pages/06) e o engine LTI.
+
+    from src.tsr import buscar_cotacoes_lote, calcular_tsr, IndicePrecos
+
+  - src/tsr/dados.py:  cotações e proventos buscados em lote para toda a lista
+                       de tickers (cada pregão do COTAHIST baixado uma vez por
+                       janela) e os fetchers da API de proventos da B3
+  - src/tsr/precos.py: bases de preço (VWAP, média dos fechamentos, fechamento)
+  - src/tsr/calculo.py: normalização de eventos B3/Yahoo e cálculo do TSR
+  - src/tsr/universo.py: screener sobre todas as ações da B3 (import explícito)
+  - src/tsr/ajuste.py:  OHLC ajustado por proventos a partir do COTAHIST, base
+                        local por ticker (import explícito)
+"""
+from src.tsr.calculo import (
+    calcular_tsr,
+    calcular_tsr_lote,
+    multiplicador_em,
+    normalizar_dividendos,
+    normalizar_dividendos_lote,
+    normalizar_eventos,
+    normalizar_eventos_lote,
+    parse_float,
+    parse_float_serie,
+)
+from src.tsr.dados import (
+    buscar_bonificacoes_b3,
+    buscar_cotacoes_b3,
+    buscar_cotacoes_lote,
+    buscar_cotacoes_yf,
+    buscar_dividendos_b3,
+    buscar_dividendos_yf,
+    buscar_proventos_lote,
+    buscar_splits_yf,
+    consultar_bonificacoes_b3,
+    consultar_dividendos_b3,
+    simbolo_yf,
+)
+from src.tsr.precos import TIPOS, IndicePrecos, calcular_preco, calcular_vwap
+
+__all__ = [
+    "TIPOS",
+    "IndicePrecos",
+    "buscar_bonificacoes_b3",
+    "buscar_cotacoes_b3",
+    "buscar_cotacoes_lote",
+    "buscar_cotacoes_yf",
+    "buscar_dividendos_b3",
+    "buscar_dividendos_yf",
+    "buscar_proventos_lote",
+    "buscar_splits_yf",
+    "calcular_preco",
+    "calcular_tsr",
+    "calcular_tsr_lote",
+    "calcular_vwap",
+    "consultar_bonificacoes_b3",
+    "consultar_dividendos_b3",
+    "multiplicador_em",
+    "normalizar_dividendos",
+    "normalizar_dividendos_lote",
+    "normalizar_eventos",
+    "normalizar_eventos_lote",
+    "parse_float",
+    "parse_float_serie",
+    "simbolo_yf",
+]
@@ -0,0 +1,320 @@
+# src/tsr/ajuste.py
+"""
+Séries OHLC ajustadas por proventos a partir do COTAHIST, sem Yahoo Finance.
+
+A página Volatilidade usava o download auto_adjust do Yahoo e a Busca Ativos
+colava o Adj Close do Yahoo nas cotações oficiais da B3 — duas fontes na
+mesma tabela. Aqui o ajuste sai das mesmas bases do screener de TSR:
+
+  - cotações brutas: universo.cotacoes_acoes_dia (COTAHIST, disco sem expiração)
+  - eventos e dividendos: universo.proventos_universo (API de proventos da B3,
+    normalizados como no calcular_tsr)
+
+Ajuste retroativo (back-adjustment): o preço de cada pregão é multiplicado por
+
+    F(t) = ∏ 1/mult  dos eventos com data ≥ t     (bonificação, desdobramento, grupamento)
+         × ∏ (1 − D/C) dos dividendos com data ex ≥ t
+
+onde a data do evento/dividendo é o último pregão "com" (lastDatePrior /
+lastDatePriorEx) e C é o fechamento bruto desse pregão. Sem ajustes depois do
+último pregão, o último preço fica igual ao bruto; Quantity é multiplicada
+por ∏ mult (mesma base de ações); Volume (R$) não muda. F sai de um produto acumulado de trás para frente sobre
+os ajustes ordenados e de uma busca binária por pregão.
+
+Cada ticker tem uma SerieAjustada salva em disco (base_ajustada). Uma nova
+consulta só baixa os pregões fora da cobertura já salva, e estender() só
+aplica aos pregões antigos os ajustes novos — um evento novo multiplica o
+prefixo da série; dias novos recebem o fator de todos os ajustes. Um ajuste
+que sumiu ou mudou (correção na fonte) refaz os fatores do zero.
+"""
+from __future__ import annotations
+
+from collections import Counter
+from dataclasses import dataclass, replace
+from datetime import date
+from typing import Callable, Iterable
+
+import numpy as np
+import pandas as pd
+
+from src import b3_engine
+from src.cache import memoizar, nao_vazio
+
+COLUNAS = ["Date", "Open", "High", "Low", "Close", "Average", "Volume", "Quantity"]
+PRECOS = ("Open", "High", "Low", "Close", "Average")
+
+
+def _dias(valores) -> np.ndarray:
+    return pd.to_datetime(pd.Index(valores)).to_numpy().astype("datetime64[D]").astype(np.int64)
+
+
+def _fator_ate(dias: np.ndarray, dias_ajuste: np.ndarray, fatores: np.ndarray) -> np.ndarray:
+    """∏ fatores dos ajustes com data ≥ cada dia (um ticker)."""
+    if not len(dias_ajuste):
+        return np.ones(len(dias))
+    ordem = np.argsort(dias_ajuste, kind="stable")
+    d, f = dias_ajuste[ordem], fatores[ordem]
+    sufixo = np.ones(len(f) + 1)
+    sufixo[:-1] = np.cumprod(f[::-1])[::-1]
+    return sufixo[np.searchsorted(d, dias, side="left")]
+
+
+def _ajustes(cotacoes: pd.DataFrame, eventos: pd.DataFrame, dividendos: pd.DataFrame) -> pd.DataFrame:
+    """
+    Ajustes aplicáveis a um ticker: colunas tipo ('evento'/'provento'), dia,
+    valor (mult ou R$/ação) e fator. Dividendo só entra com o pregão "com"
+    dentro da série (precisa do fechamento) e fator em (0, 1).
+    """
+    dias = _dias(cotacoes["Date"])
+    mult = eventos["mult"].to_numpy(dtype=float)
+    ev = pd.DataFrame({"tipo": "evento", "dia": _dias(eventos["date"]), "valor": mult, "fator": 1.0 / mult})
+
+    dia_dv = _dias(dividendos["data_ex"])
+    valor = dividendos["valor"].to_numpy(dtype=float)
+    pos = np.searchsorted(dias, dia_dv, side="right") - 1
+    ok = (pos >= 0) & (dia_dv <= (dias[-1] if len(dias) else np.iinfo(np.int64).min))
+    close = cotacoes["Close"].to_numpy(dtype=float)[np.where(ok, pos, 0)] if len(dias) else np.full(len(pos), np.nan)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        fator = 1.0 - valor / close
+    ok &= np.isfinite(fator) & (fator > 0) & (fator < 1)
+    dv = pd.DataFrame({"tipo": "provento", "dia": dia_dv[ok], "valor": valor[ok], "fator": fator[ok]})
+    if not len(ev) or not len(dv):
+        return dv if len(dv) else ev
+    return pd.concat([ev, dv], ignore_index=True)
+
+
+def _chaves(ajustes: pd.DataFrame) -> Counter:
+    return Counter(zip(ajustes["tipo"], ajustes["dia"].tolist(), ajustes["valor"].tolist(), ajustes["fator"].tolist()))
+
+
+# ---------------------------------------------------------------------------
+# Série de um ticker
+# ---------------------------------------------------------------------------
+
+@dataclass(frozen=True)
+class SerieAjustada:
+    """
+    Cotações brutas de um ticker e os fatores de ajuste de cada pregão.
+    Somente leitura — estender() devolve uma nova série.
+
+    cotacoes:  COLUNAS, Date crescente, um pregão por linha
+    cobertura: (início, fim) dos pregões já consultados no COTAHIST — dias sem
+               linha dentro dela são dias sem negócio, não faltas
+    aplicados: ajustes (tipo, dia, valor, fator) já embutidos nos fatores
+    """
+    ticker: str
+    cotacoes: pd.DataFrame
+    fator_eventos: np.ndarray
+    fator_proventos: np.ndarray
+    cobertura: tuple[date, date] | None = None
+    aplicados: tuple = ()
+
+    @classmethod
+    def vazia(cls, ticker: str) -> "SerieAjustada":
+        return cls(ticker, pd.DataFrame(columns=COLUNAS), np.ones(0), np.ones(0))
+
+    def __len__(self) -> int:
+        return len(self.cotacoes)
+
+    def cobre(self, dt_ini: date, dt_fim: date) -> bool:
+        return self.cobertura is not None and self.cobertura[0] <= dt_ini and dt_fim <= self.cobertura[1]
+
+    def estender(
+        self,
+        novas: pd.DataFrame,
+        eventos: pd.DataFrame,
+        dividendos: pd.DataFrame,
+        cobertura: tuple[date, date] | None = None,
+    ) -> "SerieAjustada":
+        """
+        Junta as cotações `novas` (pregões ainda ausentes) e atualiza os fatores
+        para os eventos/dividendos do ticker (normalizar_*_lote, histórico todo).
+        """
+        velhas = self.cotacoes.assign(_nova=False)
+        if len(novas):
+            novas = novas.loc[~np.isin(_dias(novas["Date"]), _dias(velhas["Date"])), COLUNAS].assign(_nova=True)
+            velhas = pd.concat([velhas, novas], ignore_index=True) if len(velhas) else novas
+        cotacoes = velhas.sort_values("Date", kind="stable", ignore_index=True)
+        nova = cotacoes.pop("_nova").to_numpy(dtype=bool, copy=True)
+        dias = _dias(cotacoes["Date"])
+
+        ajustes = _ajustes(cotacoes, eventos, dividendos)
+        chaves = _chaves(ajustes)
+        antigos = Counter(self.aplicados)
+        if antigos - chaves:
+            # Ajuste removido ou corrigido na fonte: refaz tudo
+            nova[:] = True
+            antigos = Counter()
+        delta = chaves - antigos
+        d_ajustes = pd.DataFrame(list(delta.elements()), columns=["tipo", "dia", "valor", "fator"])
+
+        fatores = []
+        for tipo, atual in (("evento", self.fator_eventos), ("provento", self.fator_proventos)):
+            todos = ajustes[ajustes["tipo"] == tipo]
+            novos = d_ajustes[d_ajustes["tipo"] == tipo]
+            f = np.empty(len(cotacoes))
+            f[nova] = _fator_ate(dias[nova], todos["dia"].to_numpy(np.int64), todos["fator"].to_numpy(float))
+            if (~nova).any():
+                f[~nova] = atual * _fator_ate(dias[~nova], novos["dia"].to_numpy(np.int64),
+                                              novos["fator"].to_numpy(float))
+            fatores.append(f)
+
+        if cobertura is not None and self.cobertura is not None:
+            cobertura = (min(cobertura[0], self.cobertura[0]), max(cobertura[1], self.cobertura[1]))
+        return replace(
+            self, cotacoes=cotacoes, fator_eventos=fatores[0], fator_proventos=fatores[1],
+            cobertura=cobertura or self.cobertura, aplicados=tuple(sorted(chaves.elements())),
+        )
+
+    def ajustada(self, proventos: bool = True, dt_ini: date | None = None, dt_fim: date | None = None) -> pd.DataFrame:
+        """
+        OHLC ajustado indexado por Date. proventos=False ajusta só eventos
+        (série de preço); True ajusta também dividendos/JCP (retorno total,
+        como o auto_adjust do Yahoo).
+        """
+        fator = self.fator_eventos * self.fator_proventos if proventos else self.fator_eventos
+        df = self.cotacoes.set_index("Date")
+        df = df.assign(
+            **{c: df[c].to_numpy(dtype=float) * fator for c in PRECOS},
+            Quantity=df["Quantity"].to_numpy(dtype=float) / self.fator_eventos,
+        )
+        df.index = pd.DatetimeIndex(df.index)
+        if dt_ini is not None or dt_fim is not None:
+            df = df.loc[pd.Timestamp(dt_ini) if dt_ini else None:pd.Timestamp(dt_fim) if dt_fim else None]
+        return df
+
+
+# ---------------------------------------------------------------------------
+# Base local por ticker
+# ---------------------------------------------------------------------------
+
+@memoizar(ttl=None, max_itens=512, disco=True, cachear_se=nao_vazio)
+def base_ajustada(ticker: str) -> SerieAjustada | None:
+    """Série salva do ticker (None se não houver). Gravada por series_ajustadas via .gravar()."""
+    return None
+
+
+def _cobertura(dias: list[date], ok: list[bool], ini: date, fim: date,
+               atual: tuple[date, date] | None) -> tuple[date, date] | None:
+    """
+    Cobertura contínua depois de uma consulta: o trecho de pregões `ok` (já
+    cobertos ou com arquivo baixado) que contém a cobertura atual — ou, sem
+    ela, o trecho mais longo. Um pregão cujo download falhou nunca fica
+    dentro, e volta a ser pedido na próxima consulta. Nas pontas, o trecho
+    que chega ao início/fim dos `dias` vai até `ini`/`fim`.
+    """
+    trechos, inicio = [], None
+    for i, bom in enumerate(ok):
+        if bom and inicio is None:
+            inicio = i
+        if not bom and inicio is not None:
+            trechos.append((inicio, i - 1))
+            inicio = None
+    if inicio is not None:
+        trechos.append((inicio, len(ok) - 1))
+    if not trechos:
+        return None
+
+    escolhido = None
+    if atual is not None:
+        escolhido = next((tr for tr in trechos if any(atual[0] <= d <= atual[1] for d in dias[tr[0]:tr[1] + 1])),
+                         None)
+    if escolhido is None:
+        escolhido = max(trechos, key=lambda tr: (tr[1] - tr[0], tr[0]))
+    i0, i1 = escolhido
+    return (ini if i0 == 0 else dias[i0], fim if i1 == len(dias) - 1 else dias[i1])
+
+
+def series_ajustadas(
+    tickers: Iterable[str],
+    dt_ini: date,
+    dt_fim: date,
+    df_empresas: pd.DataFrame,
+    max_workers: int = 5,
+    logger: Callable[[str], None] = print,
+) -> dict[str, SerieAjustada]:
+    """
+    SerieAjustada de cada ticker B3 cobrindo ao menos [dt_ini, dt_fim].
+
+    Baixa (uma vez para todos os tickers) só os pregões fora da cobertura já
+    salva de cada um, atualiza os fatores com os proventos do dia e grava a
+    base. Pregões cujo download falhou ficam fora da cobertura (ver
+    _cobertura) e são pedidos de novo na consulta seguinte. Tickers sem
+    nenhuma cotação ficam de fora, e também os sem base salva cujos
+    proventos não puderam ser consultados (com base, ela volta sem mudança).
+    """
+    from src.tsr.universo import cotacoes_dias, proventos_universo
+
+    tickers = list(dict.fromkeys(tickers))
+    salvas = {t: base_ajustada.em_cache(t)[1] or SerieAjustada.vazia(t) for t in tickers}
+
+    # Cobertura contínua: o que faltar entre a base salva e a consulta também entra
+    pedidos: dict[str, tuple[date, date, list[date]]] = {}
+    faltam: set[date] = set()
+    for t, s in salvas.items():
+        ini, fim = dt_ini, dt_fim
+        if s.cobertura is not None:
+            ini, fim = min(ini, s.cobertura[0]), max(fim, s.cobertura[1])
+        dias = b3_engine.listar_dias_uteis(ini, fim)
+        falta = [d for d in dias if not s.cobre(d, d)]
+        if falta:
+            pedidos[t] = (ini, fim, dias)
+            faltam.update(falta)
+    novas = cotacoes_dias(sorted(faltam), max_workers)
+    # Pregões com arquivo baixado (o arquivo traz todas as ações). Falha de
+    # download, timeout ou pregão ainda não publicado volta vazio: não cobre
+    recebidos = set(pd.DatetimeIndex(novas["Date"].unique()).date) if not novas.empty else set()
+    if not novas.empty:
+        novas = novas[novas["Ticker"].isin(list(pedidos))]
+    por_ticker = dict(tuple(novas.groupby("Ticker", sort=False))) if not novas.empty else {}
+
+    eventos, dividendos, falhos = proventos_universo(tuple(sorted(tickers)), df_empresas, logger=logger)
+    ev_por = dict(tuple(eventos.groupby("Ticker", sort=False)))
+    dv_por = dict(tuple(dividendos.groupby("Ticker", sort=False)))
+
+    saida = {}
+    for t, s in salvas.items():
+        if t in falhos:
+            # Sem proventos não há como ajustar: fica a série salva (ajustes da
+            # última consulta boa), nada é gravado
+            logger(f"Aviso: proventos de {t} indisponíveis — série ajustada não atualizada.")
+            if len(s):
+                saida[t] = s
+            continue
+        cobertura = None
+        if t in pedidos:
+            ini, fim, dias = pedidos[t]
+            cobertura = _cobertura(dias, [s.cobre(d, d) or d in recebidos for d in dias], ini, fim, s.cobertura)
+        s = s.estender(
+            por_ticker.get(t, pd.DataFrame(columns=COLUNAS)),
+            ev_por.get(t, eventos.iloc[:0]),
+            dv_por.get(t, dividendos.iloc[:0]),
+            cobertura,
+        )
+        if len(s):
+            base_ajustada.gravar(s, t)
+            saida[t] = s
+    logger(f"Séries ajustadas: {len(saida)} tickers, {len(faltam)} pregões baixados")
+    return saida
+
+
+def painel_ajustado(
+    tickers: Iterable[str],
+    dt_ini: date,
+    dt_fim: date,
+    df_empresas: pd.DataFrame,
+    proventos: bool = True,
+    max_workers: int = 5,
+    logger: Callable[[str], None] = print,
+) -> pd.DataFrame:
+    """
+    OHLC ajustado de [dt_ini, dt_fim] no formato do yf.download: colunas
+    (campo, ticker), uma linha por data — entrada de volatility.Painel.de_yfinance.
+    """
+    series = series_ajustadas(tickers, dt_ini, dt_fim, df_empresas, max_workers, logger)
+    campos = ["Open", "High", "Low", "Close", "Volume"]
+    frames = {t: s.ajustada(proventos, dt_ini, dt_fim)[campos] for t, s in series.items()}
+    frames = {t: df for t, df in frames.items() if not df.empty}
+    if not frames:
+        return pd.DataFrame()
+    return pd.concat(frames, axis=1).swaplevel(axis=1).sort_index(axis=1, level=0, sort_remaining=False)
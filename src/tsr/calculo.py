@@ -0,0 +1,382 @@
+# src/tsr/calculo.py
+"""
+Núcleo do cálculo de TSR, compartilhado pela página TSR (pages/06) e pelo
+engine LTI.
+
+    TSR = (P_final × mult_final − P0 + Σ div_j × mult_em_j) / P0
+
+  - parse_float / parse_float_serie: números da API B3 (formato brasileiro)
+  - normalizar_eventos:    bonificações/desdobramentos/grupamentos (B3) e
+                           splits (Yahoo, label SPLIT_YF) → multiplicadores
+  - normalizar_dividendos: dividendos/JCP (B3 ou Yahoo) → datas ex e valores
+  - calcular_tsr:          decomposição completa de um ticker
+
+As versões anteriores (engine e página, duplicadas) percorriam os DataFrames
+com iterrows, convertiam cada data com pd.to_datetime e recalculavam o
+multiplicador acumulado evento a evento para cada dividendo (O(divs × eventos)).
+Aqui as colunas são lidas uma vez, datas "dd/mm/aaaa" passam por um cache (as
+datas ex se repetem entre tickers e recálculos), o multiplicador acumulado sai
+de um cumprod e o de cada data ex de uma busca binária. Produtos e somas são
+sequenciais (cumprod/cumsum), na mesma ordem do laço antigo — o resultado é
+idêntico bit a bit.
+
+parse_float_serie é a versão por coluna de parse_float, para tabelas grandes
+(ex: proventos de todo o mercado).
+"""
+from __future__ import annotations
+
+import math
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+# Eventos cujo factor já é o ratio direto (demais B3: novas ações por 100 → 1 + factor/100)
+_LABELS_RATIO = frozenset({"GRUPAMENTO", "SPLIT_YF"})
+# Resgate de instrumento: sem efeito na quantidade de ações
+_LABELS_IGNORADOS = frozenset({"RESG TOTAL RV", "RESGATE TOTAL RV"})
+# Eventos que o Yahoo Finance aplica retroativamente aos dividendos (ver _mult_yf)
+_LABELS_SPLIT = frozenset({"DESDOBRAMENTO", "GRUPAMENTO", "SPLIT_YF"})
+
+
+# ---------------------------------------------------------------------------
+# Números e datas
+# ---------------------------------------------------------------------------
+
+def parse_float(val) -> float:
+    """
+    Converte valor numérico retornado pela API B3 para float.
+    A B3 retorna fatores como strings no formato brasileiro:
+      vírgula = separador decimal, ponto = separador de milhar.
+    Exemplos: "9.900,00000000000" → 9900.0 | "0,02500000000" → 0.025 | "100" → 100.0
+    """
+    try:
+        s = str(val).strip()
+        if "," in s:
+            # Formato brasileiro: remove separador de milhar (ponto) e normaliza decimal
+            s = s.replace(".", "").replace(",", ".")
+        return float(s)
+    except Exception:
+        return math.nan
+
+
+def parse_float_serie(valores: pd.Series) -> np.ndarray:
+    """parse_float aplicado à coluna inteira de uma vez (NaN onde não converte)."""
+    if pd.api.types.is_float_dtype(valores) or pd.api.types.is_integer_dtype(valores):
+        return valores.to_numpy(dtype=float, na_value=np.nan)
+    s = valores.astype(str).str.strip()
+    br = s.str.contains(",", regex=False, na=False)
+    s = s.where(~br, s.str.replace(".", "", regex=False).str.replace(",", ".", regex=False))
+    return pd.to_numeric(s, errors="coerce").to_numpy(dtype=float, na_value=np.nan)
+
+
+def _valores(df: pd.DataFrame, nome: str, padrao) -> list:
+    """Coluna `nome` como lista, ou `padrao` repetido (equivale a row.get(nome, padrao))."""
+    return df[nome].tolist() if nome in df.columns else [padrao] * len(df)
+
+
+@lru_cache(maxsize=65_536)
+def _data_br_cache(valor) -> pd.Timestamp:
+    return pd.to_datetime(valor, format="%d/%m/%Y", errors="coerce")
+
+
+def data_br(valor) -> pd.Timestamp:
+    """Data "dd/mm/aaaa" das APIs B3 (NaT se inválida). Memoizada: datas ex se repetem muito."""
+    try:
+        return _data_br_cache(valor)
+    except TypeError:  # não hasheável
+        return pd.to_datetime(valor, format="%d/%m/%Y", errors="coerce")
+
+
+# ---------------------------------------------------------------------------
+# Normalização de eventos e dividendos (B3 e Yahoo Finance)
+# ---------------------------------------------------------------------------
+
+def _eventos(df_bonif: pd.DataFrame, t0: pd.Timestamp, t1: pd.Timestamp) -> list[dict]:
+    """Eventos em (t0, t1] como dicts {date, mult, factor, label}, ordenados por data (estável)."""
+    if df_bonif.empty or "lastDatePrior" not in df_bonif.columns:
+        return []
+    eventos = []
+    for bruto, fac_bruto, rotulo in zip(
+        df_bonif["lastDatePrior"].tolist(),
+        _valores(df_bonif, "factor", 0),
+        _valores(df_bonif, "label", ""),
+    ):
+        dt = data_br(bruto)
+        fac = parse_float(fac_bruto)
+        if pd.isna(dt) or math.isnan(fac) or fac == 0 or not (t0 < dt <= t1):
+            continue
+        label = str(rotulo).upper()
+        if label in _LABELS_IGNORADOS:
+            continue
+        mult = fac if label in _LABELS_RATIO else 1.0 + fac / 100.0
+        eventos.append({"date": dt, "mult": round(mult, 8), "factor": fac, "label": rotulo})
+    eventos.sort(key=lambda ev: ev["date"])
+    return eventos
+
+
+def normalizar_eventos(df_bonif: pd.DataFrame, t0: pd.Timestamp, t1: pd.Timestamp) -> pd.DataFrame:
+    """
+    Eventos corporativos em (t0, t1] como multiplicadores da quantidade de ações,
+    ordenados por data (estável). Colunas: date, mult, factor, label.
+
+    Regras de multiplicador por tipo de evento:
+      BONIFICACAO / DESDOBRAMENTO: factor é percentual → mult = 1 + factor/100
+        ex: BBAS3 DESDOBRAMENTO factor=100  → mult=2.0  (2:1)
+            TIMS3 DESDOBRAMENTO factor=9900 → mult=100  (100:1)
+        (B3 manda fatores em formato brasileiro: "7.900,00" = 7900, ver parse_float)
+      GRUPAMENTO: factor é ratio direto → mult = factor
+        ex: VIVT3 GRUPAMENTO factor=0.025 → mult=0.025 (40:1)
+      SPLIT_YF: ratio direto (fonte Yahoo Finance, ver dados.buscar_splits_yf)
+      RESG TOTAL RV: resgate de instrumento — ignorado
+
+    Pares DESDOBRAMENTO+GRUPAMENTO na mesma data se resolvem pelo produto:
+      TIMS3: 100 × 0.01 = 1.0 (limpeza de base) | VIVT3: 80 × 0.025 = 2.0
+    """
+    return pd.DataFrame(_eventos(df_bonif, t0, t1), columns=["date", "mult", "factor", "label"])
+
+
+def _dividendos(df_divs: pd.DataFrame) -> tuple[list, np.ndarray, list, list, list]:
+    """(datas ex, valores, Data Ex, Pagamento, Tipo) das linhas com data e valor válidos."""
+    if df_divs.empty or "value" not in df_divs.columns:
+        return [], np.empty(0), [], [], []
+    linhas = [
+        (dt, val, bruto, pagamento, tipo)
+        for bruto, val, pagamento, tipo in zip(
+            _valores(df_divs, "lastDatePriorEx", ""),
+            map(parse_float, df_divs["value"].tolist()),
+            _valores(df_divs, "paymentDate", ""),
+            _valores(df_divs, "label", ""),
+        )
+        if not math.isnan(val) and pd.notna(dt := data_br(bruto))
+    ]
+    if not linhas:
+        return [], np.empty(0), [], [], []
+    datas, valores, brutos, pagamentos, tipos = map(list, zip(*linhas))
+    return datas, np.array(valores, dtype=float), brutos, pagamentos, tipos
+
+
+def normalizar_dividendos(df_divs: pd.DataFrame) -> pd.DataFrame:
+    """
+    Dividendos/JCP (B3 ou Yahoo, mesmo formato) com data ex e valor válidos, na
+    ordem original. Colunas: data_ex, valor, Data Ex, Pagamento, Tipo (as três
+    últimas como vieram da fonte).
+    """
+    datas, valores, brutos, pagamentos, tipos = _dividendos(df_divs)
+    return pd.DataFrame({
+        "data_ex": pd.DatetimeIndex(datas), "valor": valores,
+        "Data Ex": brutos, "Pagamento": pagamentos, "Tipo": tipos,
+    })
+
+
+def _multiplicadores(eventos: list[dict], datas) -> np.ndarray:
+    """Multiplicador acumulado (∏ mult dos eventos com data ≤ d) para cada d em `datas`."""
+    if not eventos:
+        return np.ones(len(datas))
+    acum = np.concatenate(([1.0], np.cumprod([ev["mult"] for ev in eventos])))
+    ds = np.array([ev["date"].to_datetime64() for ev in eventos], dtype="datetime64[ns]")
+    alvo = np.array([pd.Timestamp(d).to_datetime64() for d in datas], dtype="datetime64[ns]")
+    return acum[np.searchsorted(ds, alvo, side="right")]
+
+
+def multiplicador_em(eventos: pd.DataFrame, datas) -> np.ndarray:
+    """Multiplicador acumulado em cada data, a partir de normalizar_eventos."""
+    return _multiplicadores(eventos.to_dict("records"), list(datas))
+
+
+# ---------------------------------------------------------------------------
+# TSR
+# ---------------------------------------------------------------------------
+
+def _produto(valores: np.ndarray) -> float:
+    return float(np.cumprod(valores)[-1]) if len(valores) else 1.0
+
+
+def calcular_tsr(
+    ticker: str,
+    p0: float,
+    p_final: float,
+    df_divs: pd.DataFrame,
+    df_bonif: pd.DataFrame,
+    t0: pd.Timestamp,
+    t1: pd.Timestamp,
+) -> dict:
+    """
+    TSR para 1 ação adquirida ao preço P0 em t0.
+
+    Eventos corporativos (ver normalizar_eventos) multiplicam a quantidade de
+    ações; dividendos são creditados pela quantidade vigente na data ex.
+
+    TSR = (P_final × mult_final − P0 + Σ div_j × mult_em_j) / P0
+    """
+    eventos = _eventos(df_bonif, t0, t1)
+    mults = np.array([ev["mult"] for ev in eventos], dtype=float)
+    mult_final = _produto(mults)
+
+    # mult_yf: apenas split/desdobramento/grupamento — o YF ajusta dividendos históricos
+    # retroativamente para esses eventos, mas NÃO para bonificações em ações.
+    # Usado exclusivamente no check de divergência com o YF (não no cálculo do TSR).
+    split = np.array([str(ev["label"]).upper() in _LABELS_SPLIT for ev in eventos], dtype=bool)
+    mult_yf = _produto(mults[split])
+
+    # --- Dividendos: multiplicador na data ex por busca binária ---
+    datas, valores, brutos, pagamentos, tipos = _dividendos(df_divs)
+    m_divs = _multiplicadores(eventos, datas)
+    totais = m_divs * valores
+    total_divs = float(np.cumsum(totais)[-1]) if len(totais) else 0.0
+    divs_detail = [
+        {
+            "Data Ex": bruto,
+            "Pagamento": pagamento,
+            "Tipo": tipo,
+            "Valor/Ação (R$)": round(val, 6),
+            "Multiplicador": round(m, 6),
+            "Total Recebido (R$)": round(total, 6),
+        }
+        for bruto, pagamento, tipo, val, m, total in zip(
+            brutos, pagamentos, tipos, valores.tolist(), m_divs.tolist(), totais.tolist(),
+        )
+    ]
+
+    p_final_adj = p_final * mult_final
+    ret_preco = (p_final_adj - p0) / p0
+    ret_divs = total_divs / p0
+    tsr_total = ret_preco + ret_divs
+
+    return {
+        "Ticker": ticker,
+        "P0 (R$)": round(p0, 4),
+        "P Final (R$)": round(p_final, 4),
+        "Mult. Corporativo": round(mult_final, 6),
+        "P Final Ajustado (R$)": round(p_final_adj, 4),
+        "Dividendos/JCP (R$)": round(total_divs, 4),
+        "Ret. Preço (%)": round(ret_preco * 100, 2),
+        "Ret. Dividendos (%)": round(ret_divs * 100, 2),
+        "TSR Total (%)": round(tsr_total * 100, 2),
+        "_divs_detail": divs_detail,
+        "_eventos": eventos,
+        "_mult_yf": round(mult_yf, 6),
+    }
+
+
+# ---------------------------------------------------------------------------
+# Lote: vários tickers em tabelas longas (screener do universo B3)
+# ---------------------------------------------------------------------------
+
+def normalizar_eventos_lote(df_bonif: pd.DataFrame) -> pd.DataFrame:
+    """
+    normalizar_eventos para uma tabela com vários tickers (coluna Ticker), sem
+    recorte de período. Colunas: Ticker, date, mult, label — ordem original.
+    """
+    colunas = ["Ticker", "date", "mult", "label"]
+    if df_bonif.empty or not {"Ticker", "lastDatePrior"} <= set(df_bonif.columns):
+        return pd.DataFrame(columns=colunas)
+    datas = pd.to_datetime(df_bonif["lastDatePrior"], format="%d/%m/%Y", errors="coerce")
+    fac = parse_float_serie(df_bonif["factor"]) if "factor" in df_bonif.columns else np.zeros(len(df_bonif))
+    rotulos = pd.Series(_valores(df_bonif, "label", ""), index=df_bonif.index, dtype=object)
+    labels = rotulos.astype(str).str.upper()
+    ok = (datas.notna() & ~labels.isin(_LABELS_IGNORADOS)).to_numpy() & ~np.isnan(fac) & (fac != 0)
+    fac = fac[ok]
+    mult = np.where(labels[ok].isin(_LABELS_RATIO).to_numpy(), fac, 1.0 + fac / 100.0)
+    return pd.DataFrame({
+        "Ticker": df_bonif["Ticker"][ok].astype(str).to_numpy(),
+        "date": datas[ok].to_numpy(),
+        "mult": [round(m, 8) for m in mult.tolist()],
+        "label": rotulos[ok].to_numpy(),
+    })
+
+
+def normalizar_dividendos_lote(df_divs: pd.DataFrame) -> pd.DataFrame:
+    """normalizar_dividendos para vários tickers. Colunas: Ticker, data_ex, valor."""
+    colunas = ["Ticker", "data_ex", "valor"]
+    if df_divs.empty or not {"Ticker", "value", "lastDatePriorEx"} <= set(df_divs.columns):
+        return pd.DataFrame(columns=colunas)
+    datas = pd.to_datetime(df_divs["lastDatePriorEx"], format="%d/%m/%Y", errors="coerce")
+    valores = parse_float_serie(df_divs["value"])
+    ok = datas.notna().to_numpy() & ~np.isnan(valores)
+    return pd.DataFrame({
+        "Ticker": df_divs["Ticker"][ok].astype(str).to_numpy(),
+        "data_ex": datas[ok].to_numpy(),
+        "valor": valores[ok],
+    })
+
+
+def _dias(valores) -> np.ndarray:
+    return pd.to_datetime(pd.Index(valores)).to_numpy().astype("datetime64[D]").astype(np.int64)
+
+
+def calcular_tsr_lote(
+    precos: pd.DataFrame,
+    eventos: pd.DataFrame,
+    dividendos: pd.DataFrame,
+    t0: pd.Timestamp,
+    t1: pd.Timestamp,
+) -> pd.DataFrame:
+    """
+    calcular_tsr para todos os tickers de uma vez.
+
+    precos:     index Ticker, colunas p0 e pf
+    eventos:    normalizar_eventos_lote (usados os de (t0, t1])
+    dividendos: normalizar_dividendos_lote (usados os com data ex em [t0, t1],
+                mesmo recorte dos fetchers de proventos)
+
+    O multiplicador acumulado por ticker sai de um cumprod agrupado; o de cada
+    data ex, de uma busca binária na chave (ticker, data) dos eventos. As somas de
+    dividendos por ticker (bincount) podem diferir de calcular_tsr no último bit.
+    Colunas e arredondamentos iguais aos de calcular_tsr, mais o nº de eventos e
+    de dividendos considerados.
+    """
+    tickers = pd.Index(precos.index.astype(str), name="Ticker")
+    n = len(tickers)
+    d0, d1 = _dias([t0])[0], _dias([t1])[0]
+
+    # --- Eventos: ordenados por (ticker, data), multiplicador acumulado por ticker ---
+    cod_ev = tickers.get_indexer(eventos["Ticker"].astype(str))
+    dia_ev = _dias(eventos["date"])
+    ok = (cod_ev >= 0) & (dia_ev > d0) & (dia_ev <= d1)
+    cod_ev, dia_ev = cod_ev[ok], dia_ev[ok]
+    mult_ev = eventos["mult"].to_numpy(dtype=float)[ok]
+    ordem = np.lexsort((dia_ev, cod_ev))  # estável: empates mantêm a ordem de entrada
+    cod_ev, dia_ev, mult_ev = cod_ev[ordem], dia_ev[ordem], mult_ev[ordem]
+    acum = pd.Series(mult_ev).groupby(cod_ev).cumprod().to_numpy()
+
+    mult_final = np.ones(n)
+    if len(cod_ev):
+        ultimo = np.flatnonzero(np.r_[cod_ev[1:] != cod_ev[:-1], True])
+        mult_final[cod_ev[ultimo]] = acum[ultimo]
+    n_eventos = np.bincount(cod_ev, minlength=n)
+
+    # --- Dividendos: multiplicador vigente na data ex ---
+    cod_dv = tickers.get_indexer(dividendos["Ticker"].astype(str))
+    dia_dv = _dias(dividendos["data_ex"])
+    ok = (cod_dv >= 0) & (dia_dv >= d0) & (dia_dv <= d1)
+    cod_dv, dia_dv = cod_dv[ok], dia_dv[ok]
+    valor_dv = dividendos["valor"].to_numpy(dtype=float)[ok]
+    chave_ev = (cod_ev.astype(np.int64) << 32) + dia_ev
+    pos = np.searchsorted(chave_ev, (cod_dv.astype(np.int64) << 32) + dia_dv, side="right") - 1
+    # Último evento com chave ≤ (ticker, data ex) — vale só se for do mesmo ticker
+    acum1 = np.concatenate((acum, [1.0]))
+    cod1 = np.concatenate((cod_ev, [-1]))
+    m_div = np.where((pos >= 0) & (cod1[pos] == cod_dv), acum1[pos], 1.0)
+    total_divs = np.bincount(cod_dv, weights=m_div * valor_dv, minlength=n)
+    n_divs = np.bincount(cod_dv, minlength=n)
+
+    # --- Decomposição (mesma de calcular_tsr) ---
+    p0 = precos["p0"].to_numpy(dtype=float)
+    pf = precos["pf"].to_numpy(dtype=float)
+    pf_adj = pf * mult_final
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ret_preco = (pf_adj - p0) / p0
+        ret_divs = total_divs / p0
+    return pd.DataFrame({
+        "P0 (R$)": np.round(p0, 4),
+        "P Final (R$)": np.round(pf, 4),
+        "Mult. Corporativo": np.round(mult_final, 6),
+        "P Final Ajustado (R$)": np.round(pf_adj, 4),
+        "Dividendos/JCP (R$)": np.round(total_divs, 4),
+        "Ret. Preço (%)": np.round(ret_preco * 100, 2),
+        "Ret. Dividendos (%)": np.round(ret_divs * 100, 2),
+        "TSR Total (%)": np.round((ret_preco + ret_divs) * 100, 2),
+        "Eventos": n_eventos,
+        "Dividendos": n_divs,
+    }, index=tickers)
@@ -0,0 +1,446 @@
+# src/tsr/dados.py
+"""
+Camada de dados em lote para o TSR (página TSR, screener e engine LTI).
+
+A página TSR baixava o COTAHIST ticker a ticker: cada chamada repetia o
+download de todos os ZIPs diários da janela (20 tickers × 2 janelas de um mês
+≈ 800 downloads dos mesmos ~40 arquivos). Aqui cada janela é buscada uma vez
+para a lista inteira — o parser de b3_engine já filtra vários tickers por
+arquivo — e proventos/eventos de todos os tickers saem em paralelo.
+
+  - buscar_cotacoes_b3:    COTAHIST de uma janela para N tickers (memoizado,
+                           o mesmo cache para a página TSR e o engine LTI)
+  - buscar_cotacoes_lote:  B3 + Yahoo Finance num único DataFrame
+  - buscar_dividendos_b3 / buscar_bonificacoes_b3: API de proventos da B3
+    (consultar_*: o mesmo com um ok explícito, False se a consulta falhou)
+  - buscar_proventos_lote: dividendos e eventos corporativos de N tickers em paralelo
+
+Funções puras (sem Streamlit): mensagens vão para `logger`, chamado também
+das threads de trabalho — use um logger que só acumule (ex: list.append).
+"""
+from __future__ import annotations
+
+import json
+import time
+from base64 import b64encode
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from typing import Callable
+
+import pandas as pd
+import requests
+from curl_cffi import requests as curl_requests
+
+from src import b3_engine, ticker_service
+from src.cache import memoizar, nao_vazio
+
+_COLUNAS_COTACOES = ["Ticker", "Date", "Open", "High", "Low", "Close", "Average", "Volume", "Quantity"]
+
+
+def _parece_b3(ticker: str) -> bool:
+    """True se o ticker tiver padrão B3: 4 letras + número (3,4,5,6,11)."""
+    base = "".join(c for c in ticker if not c.isdigit())
+    num = "".join(c for c in ticker if c.isdigit())
+    return len(base) == 4 and num in {"3", "4", "5", "6", "11"}
+
+
+def simbolo_yf(ticker: str) -> str:
+    """Símbolo Yahoo Finance: VALE3 → VALE3.SA, AAPL → AAPL."""
+    return f"{ticker}.SA" if _parece_b3(ticker) else ticker
+
+
+# ---------------------------------------------------------------------------
+# Cotações
+# ---------------------------------------------------------------------------
+
+_FALHOU = object()   # pregão cujo download falhou (≠ None: não há arquivo)
+
+
+def _janela_completa(df: pd.DataFrame) -> bool:
+    """cachear_se: tabela com dados e sem pregão que falhou no download."""
+    return nao_vazio(df) and not df.attrs.get("pregoes_falhos")
+
+
+# COTAHIST de pregões passados não muda: janelas repetidas (Pf de outorgas com o
+# mesmo período, recálculos, a mesma janela na página TSR) reaproveitam o
+# download. Janela vazia ou com pregão que falhou não é cacheada. A tabela fica
+# uma vez só no SharedStore (compartilhar=True) e cada chamada recebe uma visão sem cópia.
+@memoizar(ttl=12 * 3600, max_itens=32, disco=True, ignorar=("logger",), cachear_se=_janela_completa,
+          compartilhar=True)
+def buscar_cotacoes_b3(
+    tickers: tuple[str, ...],
+    dt_ini: date,
+    dt_fim: date,
+    logger: Callable[[str], None] = print,
+) -> pd.DataFrame:
+    """
+    COTAHIST de [dt_ini, dt_fim] para todos os tickers numa tabela só: cada
+    pregão é baixado uma vez e filtrado para a lista inteira. Ordenada por
+    (Ticker, Date), índice 0..n-1; vazia se nenhum pregão veio.
+
+    Pregões sem arquivo (404) só não têm linhas. Pregões cujo download falhou
+    (mesmo após uma nova tentativa) ficam em attrs["pregoes_falhos"] e a
+    tabela não entra no cache — a próxima chamada baixa a janela de novo.
+
+    A chave do cache é a tupla como veio: passe tuple(sorted(set(...))).
+    """
+    tickers = sorted(set(tickers))
+    if not tickers:
+        return pd.DataFrame()
+    logger(f"  Baixando COTAHIST {dt_ini} → {dt_fim} para {len(tickers)} tickers...")
+    dias = b3_engine.listar_dias_uteis(dt_ini, dt_fim)
+
+    def _dia(d: date, session):
+        for _ in range(2):  # falha pontual (timeout, ZIP truncado): tenta de novo uma vez
+            try:
+                return b3_engine.ler_cotacoes_dia(d, tickers, session)
+            except Exception:
+                pass
+        return _FALHOU
+
+    with requests.Session() as session:
+        with ThreadPoolExecutor(max_workers=5) as ex:
+            resultados = list(ex.map(lambda d: _dia(d, session), dias))
+    falhos = [d for d, r in zip(dias, resultados) if r is _FALHOU]
+    frames = [r for r in resultados if r is not _FALHOU and r is not None and not r.empty]
+    if falhos:
+        logger(f"  Aviso: COTAHIST falhou em {len(falhos)} pregão(ões) "
+               f"({', '.join(f'{d:%d/%m/%Y}' for d in falhos)}) — janela fora do cache.")
+    if not frames:
+        logger("  Aviso: nenhum dado COTAHIST retornado para o período.")
+        df = pd.DataFrame()
+    else:
+        df = pd.concat(frames, ignore_index=True)
+        df["Date"] = pd.to_datetime(df["Date"])
+        df = df.sort_values(["Ticker", "Date"], kind="stable", ignore_index=True)
+    df.attrs["pregoes_falhos"] = falhos
+    return df
+
+
+def buscar_cotacoes_yf(ticker: str, dt_ini: date, dt_fim: date) -> pd.DataFrame:
+    """Cotações via Yahoo Finance, no mesmo formato do COTAHIST (Average = HLC/3)."""
+    import yfinance as yf  # pesado: só quando há ticker internacional
+
+    try:
+        df = yf.download(simbolo_yf(ticker), start=dt_ini, end=dt_fim + timedelta(days=1),
+                         auto_adjust=False, progress=False)
+        if df.empty:
+            return pd.DataFrame()
+        if isinstance(df.columns, pd.MultiIndex):
+            df.columns = df.columns.get_level_values(0)
+        df = df.reset_index()
+        df["Ticker"] = ticker
+        df["Date"] = pd.to_datetime(df["Date"]).dt.tz_localize(None)
+        # Average como HLC/3; Quantity = Volume (ações negociadas)
+        df["Average"] = (df["High"] + df["Low"] + df["Close"]) / 3
+        df["Quantity"] = df["Volume"].astype("Int64")
+        return df[_COLUNAS_COTACOES].sort_values("Date")
+    except Exception:
+        return pd.DataFrame()
+
+
+def buscar_cotacoes_lote(
+    tickers_b3: list[str],
+    tickers_yf: list[str],
+    dt_ini: date,
+    dt_fim: date,
+    max_workers: int = 8,
+) -> pd.DataFrame:
+    """Cotações de todos os tickers na janela: um download por pregão B3, Yahoo em paralelo."""
+    frames = []
+    with ThreadPoolExecutor(max_workers=max_workers) as ex:
+        futs_yf = [ex.submit(buscar_cotacoes_yf, t, dt_ini, dt_fim) for t in tickers_yf]
+        if tickers_b3:
+            frames.append(buscar_cotacoes_b3(tuple(sorted(set(tickers_b3))), dt_ini, dt_fim))
+        frames.extend(f.result() for f in futs_yf)
+    frames = [f for f in frames if not f.empty]
+    if not frames:
+        return pd.DataFrame()
+    return pd.concat(frames, ignore_index=True)
+
+
+# ---------------------------------------------------------------------------
+# Proventos e eventos corporativos
+# ---------------------------------------------------------------------------
+
+def buscar_dividendos_yf(ticker: str, t0: pd.Timestamp, t1: pd.Timestamp) -> pd.DataFrame:
+    """Dividendos via Yahoo Finance no período [t0, t1], no formato da API B3."""
+    import yfinance as yf
+
+    try:
+        divs = yf.Ticker(simbolo_yf(ticker)).dividends
+        if divs.empty:
+            return pd.DataFrame()
+        divs = divs.reset_index()
+        divs.columns = ["Date", "value"]
+        divs["Date"] = pd.to_datetime(divs["Date"]).dt.tz_localize(None)
+        divs = divs[(divs["Date"] >= t0) & (divs["Date"] <= t1)].copy()
+        if divs.empty:
+            return pd.DataFrame()
+        divs["Ticker"] = ticker
+        divs["lastDatePriorEx"] = divs["Date"].dt.strftime("%d/%m/%Y")
+        divs["paymentDate"] = ""
+        divs["label"] = "Dividendo"
+        divs["typeStock"] = ""
+        return divs[["Ticker", "lastDatePriorEx", "paymentDate", "label", "value"]]
+    except Exception:
+        return pd.DataFrame()
+
+
+def buscar_splits_yf(ticker: str, t0: pd.Timestamp, t1: pd.Timestamp) -> pd.DataFrame:
+    """
+    Splits/reverse splits via Yahoo Finance no período [t0, t1].
+    O campo 'factor' é o ratio direto (ex: 2.0 para split 2:1); label 'SPLIT_YF'
+    sinaliza que mult = factor (não aplica fórmula B3).
+    """
+    import yfinance as yf
+
+    try:
+        splits = yf.Ticker(simbolo_yf(ticker)).splits
+        if splits.empty:
+            return pd.DataFrame()
+        splits = splits.reset_index()
+        splits.columns = ["Date", "factor"]
+        splits["Date"] = pd.to_datetime(splits["Date"]).dt.tz_localize(None)
+        splits = splits[(splits["Date"] >= t0) & (splits["Date"] <= t1)].copy()
+        if splits.empty:
+            return pd.DataFrame()
+        splits["Ticker"] = ticker
+        splits["lastDatePrior"] = splits["Date"].dt.strftime("%d/%m/%Y")
+        splits["label"] = "SPLIT_YF"
+        return splits[["Ticker", "lastDatePrior", "label", "factor"]]
+    except Exception:
+        return pd.DataFrame()
+
+
+_TIPO_ACAO = {"3": "ON", "4": "PN", "5": "PN", "6": "PN", "11": "UNT"}
+
+
+def consultar_dividendos_b3(
+    ticker: str,
+    df_empresas: pd.DataFrame,
+    dt_ini: date,
+    dt_fim: date,
+    logger: Callable[[str], None] = print,
+) -> tuple[pd.DataFrame, bool]:
+    """
+    (dividendos, ok) — ver buscar_dividendos_b3. ok=False quando o ticker não
+    foi resolvido em df_empresas ou alguma página da API falhou: o DataFrame
+    não representa "sem dividendos" e não deve ser guardado como tal.
+    """
+    info = ticker_service.get_ticker_info(ticker, df_empresas)
+    if not info:
+        logger(f"  Aviso: {ticker} não encontrado em df_empresas — sem dividendos.")
+        return pd.DataFrame(), False
+
+    trading_name = info["trading_name"]
+    tipo_acao = info["type_stock"]
+    if not trading_name or not tipo_acao:
+        return pd.DataFrame(), False
+
+    all_results: list[dict] = []
+    current_page = 1
+    total_pages = 1
+    ok = True
+
+    session = curl_requests.Session(impersonate="chrome120")
+    session.headers.update({
+        "Accept": "application/json, text/plain, */*",
+        "Referer": "https://www.b3.com.br/",
+        "Origin": "https://www.b3.com.br",
+    })
+    try:
+        while current_page <= total_pages:
+            try:
+                params = {
+                    "language": "pt-br",
+                    "pageNumber": current_page,
+                    "pageSize": 60,
+                    "tradingName": trading_name,
+                }
+                encoded = b64encode(json.dumps(params, separators=(",", ":")).encode()).decode()
+                url = f"https://sistemaswebb3-listados.b3.com.br/listedCompaniesProxy/CompanyCall/GetListedCashDividends/{encoded}"
+                resp = session.get(url, timeout=30)
+                resp.raise_for_status()
+                data = resp.json()
+                if current_page == 1:
+                    total_pages = int(data.get("page", {}).get("totalPages", 1))
+                all_results.extend(data.get("results", []))
+                if total_pages > 1:
+                    time.sleep(0.2)
+                current_page += 1
+            except Exception as e:
+                logger(f"  Erro ao buscar dividendos B3 para {ticker} (pág {current_page}): {e}")
+                ok = False
+                break
+    finally:
+        session.close()
+
+    if not all_results:
+        return pd.DataFrame(), ok
+
+    df = pd.DataFrame(all_results)
+
+    # Normaliza nomes de colunas: API B3 usa 'valueCash', 'corporateAction', 'dateApproval'
+    # mas calcular_tsr espera 'value', 'label', 'paymentDate'
+    df = df.rename(columns={
+        "valueCash": "value",
+        "corporateAction": "label",
+        "dateApproval": "paymentDate",
+    })
+
+    if "typeStock" in df.columns:
+        df["typeStock"] = df["typeStock"].str.strip().str.upper()
+        # Ações PN podem ter variantes na API B3: "PN", "PNB" (classe B), "PNC" (classe C), etc.
+        # Para tickers sufixo 4/5/6 usamos prefixo "PN"; ON e UNT permanecem com match exato.
+        if tipo_acao.startswith("PN"):
+            df = df[df["typeStock"].str.startswith("PN")].copy()
+        else:
+            df = df[df["typeStock"] == tipo_acao].copy()
+    if df.empty:
+        return pd.DataFrame(), ok
+
+    df["Ticker"] = ticker
+    if "lastDatePriorEx" in df.columns:
+        df["_dt"] = pd.to_datetime(df["lastDatePriorEx"], format="%d/%m/%Y", errors="coerce")
+        df = df.dropna(subset=["_dt"])
+        df = df[(df["_dt"] >= pd.Timestamp(dt_ini)) & (df["_dt"] <= pd.Timestamp(dt_fim))]
+        df = df.drop(columns=["_dt"])
+    else:
+        logger(f"  Aviso: coluna 'lastDatePriorEx' ausente para {ticker} — retornando vazio.")
+        return pd.DataFrame(), ok
+    return df.reset_index(drop=True), ok
+
+
+def buscar_dividendos_b3(
+    ticker: str,
+    df_empresas: pd.DataFrame,
+    dt_ini: date,
+    dt_fim: date,
+    logger: Callable[[str], None] = print,
+) -> pd.DataFrame:
+    """
+    Busca dividendos/JCP na B3 para um ticker, filtrando por typeStock e período.
+    Não depende de Streamlit — usa logger para output.
+    """
+    return consultar_dividendos_b3(ticker, df_empresas, dt_ini, dt_fim, logger)[0]
+
+
+def consultar_bonificacoes_b3(
+    ticker: str,
+    df_empresas: pd.DataFrame,
+    dt_ini: date,
+    dt_fim: date,
+    logger: Callable[[str], None] = print,
+) -> tuple[pd.DataFrame, bool]:
+    """
+    (eventos, ok) — ver buscar_bonificacoes_b3. ok=False quando o ticker não
+    foi resolvido em df_empresas ou a chamada à API falhou.
+    """
+    info = ticker_service.get_ticker_info(ticker, df_empresas)
+    if not info or not info.get("code"):
+        logger(f"  Aviso: CODE não encontrado para {ticker} — sem bonificações.")
+        return pd.DataFrame(), False
+
+    code = info["code"]
+    session = curl_requests.Session(impersonate="chrome120")
+    session.headers.update({
+        "Accept": "application/json, text/plain, */*",
+        "Referer": "https://www.b3.com.br/",
+        "Origin": "https://www.b3.com.br",
+    })
+
+    try:
+        params = {"issuingCompany": code, "language": "pt-br"}
+        encoded = b64encode(json.dumps(params).encode()).decode()
+        url = f"https://sistemaswebb3-listados.b3.com.br/listedCompaniesProxy/CompanyCall/GetListedSupplementCompany/{encoded}"
+        resp = session.get(url, timeout=30)
+        resp.raise_for_status()
+
+        if not resp.content or not resp.text.strip():
+            return pd.DataFrame(), True
+
+        data = resp.json()
+        if not isinstance(data, list) or not data or "stockDividends" not in data[0]:
+            return pd.DataFrame(), True
+
+        df = pd.DataFrame(data[0]["stockDividends"])
+        if df.empty:
+            return pd.DataFrame(), True
+
+        dedup_cols = [c for c in ["lastDatePrior", "label"] if c in df.columns]
+        if dedup_cols:
+            df = df.drop_duplicates(subset=dedup_cols)
+
+        df["Ticker"] = ticker
+        if "lastDatePrior" in df.columns:
+            df["_dt"] = pd.to_datetime(df["lastDatePrior"], format="%d/%m/%Y", errors="coerce")
+            df = df.dropna(subset=["_dt"])
+            df = df[
+                (df["_dt"] >= pd.Timestamp(dt_ini)) & (df["_dt"] <= pd.Timestamp(dt_fim))
+            ].drop(columns=["_dt"])
+        else:
+            logger(f"  Aviso: coluna 'lastDatePrior' ausente para {ticker} — retornando vazio.")
+            return pd.DataFrame(), True
+
+        cols = ["Ticker", "label", "lastDatePrior", "factor", "approvedIn", "isinCode"]
+        existing = [c for c in cols if c in df.columns]
+        return df[existing].reset_index(drop=True), True
+
+    except Exception as e:
+        logger(f"  Erro ao buscar bonificações B3 para {ticker}: {e}")
+        return pd.DataFrame(), False
+    finally:
+        session.close()
+
+
+def buscar_bonificacoes_b3(
+    ticker: str,
+    df_empresas: pd.DataFrame,
+    dt_ini: date,
+    dt_fim: date,
+    logger: Callable[[str], None] = print,
+) -> pd.DataFrame:
+    """
+    Busca eventos de bonificação/desdobramento/grupamento na B3.
+    Não depende de Streamlit.
+    """
+    return consultar_bonificacoes_b3(ticker, df_empresas, dt_ini, dt_fim, logger)[0]
+
+
+def _proventos_ticker(
+    ticker: str,
+    is_b3: bool,
+    df_empresas: pd.DataFrame,
+    t0: pd.Timestamp,
+    t1: pd.Timestamp,
+    logger: Callable[[str], None],
+) -> tuple[pd.DataFrame, pd.DataFrame]:
+    if not is_b3:
+        return buscar_dividendos_yf(ticker, t0, t1), buscar_splits_yf(ticker, t0, t1)
+    return (
+        buscar_dividendos_b3(ticker, df_empresas, t0.date(), t1.date(), logger),
+        buscar_bonificacoes_b3(ticker, df_empresas, t0.date(), t1.date(), logger),
+    )
+
+
+def buscar_proventos_lote(
+    tickers: dict[str, bool],
+    df_empresas: pd.DataFrame,
+    t0: pd.Timestamp,
+    t1: pd.Timestamp,
+    max_workers: int = 8,
+    logger: Callable[[str], None] = print,
+) -> dict[str, tuple[pd.DataFrame, pd.DataFrame]]:
+    """
+    Dividendos/JCP e eventos corporativos de todos os tickers em paralelo.
+
+    tickers: {ticker: is_b3} — B3 via API de proventos, demais via Yahoo Finance.
+    Returns: {ticker: (df_divs, df_bonif)}
+    """
+    with ThreadPoolExecutor(max_workers=max_workers) as ex:
+        futs = {
+            t: ex.submit(_proventos_ticker, t, is_b3, df_empresas, t0, t1, logger)
+            for t, is_b3 in tickers.items()
+        }
+        return {t: f.result() for t, f in futs.items()}
@@ -0,0 +1,240 @@
+# src/tsr/precos.py
+"""
+Bases de preço do TSR: VWAP, média simples dos fechamentos e último fechamento.
+
+  - calcular_vwap / calcular_preco: uma janela já recortada (DataFrame)
+  - IndicePrecos: consultas por intervalo sobre cotações de muitos tickers
+
+calcular_vwap percorre o DataFrame da janela a cada chamada. IndicePrecos
+ordena as cotações uma vez por (ticker, data) e guarda somas acumuladas de
+Σ(Average·Quantity), ΣQuantity, ΣAverage e ΣClose. Qualquer janela
+[ini, fim] de um ticker vira duas buscas binárias nas datas e uma
+subtração — O(log n) independente do tamanho da janela.
+
+Serve para varrer milhares de janelas (ex: sensibilidade do ranking à
+escolha da janela de P0) e para recalcular preços sem baixar de novo.
+
+Semântica idêntica nas duas formas:
+  - vwap:       Σ(avg·qty)/Σqty; sem quantidade → média simples de Average
+  - media:      média simples dos fechamentos ("Média Simples (closes)" da página TSR)
+  - fechamento: Close do último pregão da janela
+Janela sem pregões → None (ou NaN nas versões vetorizadas).
+"""
+from __future__ import annotations
+
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+TIPOS = ("vwap", "media", "fechamento")
+
+
+def calcular_vwap(df: pd.DataFrame) -> float | None:
+    """VWAP = Σ(Average × Quantity) / Σ(Quantity). Fallback: média simples."""
+    if df.empty:
+        return None
+    qty = df["Quantity"].replace(0, np.nan)
+    avg = df["Average"]
+    denom = qty.sum()
+    if pd.isna(denom) or denom == 0:
+        return float(avg.mean())
+    return float((qty * avg).sum() / denom)
+
+
+def calcular_preco(df: pd.DataFrame, tipo: str = "vwap") -> float | None:
+    """Preço da janela `df` (cotações de um ticker) na base `tipo` (ver TIPOS)."""
+    if tipo not in TIPOS:
+        raise ValueError(f"Tipo de preço inválido: {tipo}. Válidos: {list(TIPOS)}")
+    if df.empty:
+        return None
+    if tipo == "vwap":
+        return calcular_vwap(df)
+    col = "Close" if "Close" in df.columns else "Average"
+    if tipo == "media":
+        return float(df[col].mean())
+    return float(df.sort_values("Date", kind="stable")[col].iloc[-1])
+
+
+def _dia(valor) -> np.datetime64:
+    return np.datetime64(pd.Timestamp(valor).date(), "D")
+
+
+def _dias(valores) -> np.ndarray:
+    return pd.to_datetime(pd.Index(valores)).to_numpy().astype("datetime64[D]")
+
+
+def _acumular(valores: np.ndarray) -> np.ndarray:
+    """Soma acumulada com zero à esquerda: soma de [i, j) = s[j] - s[i]."""
+    s = np.empty(len(valores) + 1)
+    s[0] = 0.0
+    np.cumsum(valores, out=s[1:])
+    return s
+
+
+class IndicePrecos:
+    """
+    Somas acumuladas por ticker sobre cotações diárias.
+
+    cotacoes: colunas Ticker, Date, Average, Quantity e (opcional) Close — o
+    formato de b3_engine.baixar_e_parsear_dia. Sem Close, media/fechamento
+    usam Average.
+    """
+
+    def __init__(self, cotacoes: pd.DataFrame):
+        if cotacoes.empty:
+            df = pd.DataFrame({"Ticker": [], "Date": [], "Average": [], "Quantity": []})
+        else:
+            df = cotacoes.sort_values(["Ticker", "Date"], kind="stable")
+
+        tickers = df["Ticker"].astype(str).to_numpy(dtype=object)
+        self._datas = _dias(df["Date"])
+        # na_value: Quantity do Yahoo Finance vem como Int64 com <NA>
+        avg = df["Average"].to_numpy(dtype=float, na_value=np.nan)
+        qty = df["Quantity"].to_numpy(dtype=float, na_value=np.nan)
+        close = df["Close"].to_numpy(dtype=float, na_value=np.nan) if "Close" in df.columns else avg
+
+        # Mesmo tratamento de NaN do pandas em calcular_vwap (sum ignora NaN)
+        qty = np.nan_to_num(qty, nan=0.0)
+        self._s_pq = _acumular(np.nan_to_num(qty * avg, nan=0.0))
+        self._s_q = _acumular(qty)
+        self._s_avg = _acumular(np.nan_to_num(avg, nan=0.0))
+        self._n_avg = _acumular(~np.isnan(avg))
+        self._s_close = _acumular(np.nan_to_num(close, nan=0.0))
+        self._n_close = _acumular(~np.isnan(close))
+        self._close = close
+
+        # ticker → [início, fim) nas arrays globais
+        self._faixas: dict[str, tuple[int, int]] = {}
+        codigos = np.zeros(len(tickers), dtype=np.int64)
+        if len(tickers):
+            quebras = np.flatnonzero(tickers[1:] != tickers[:-1]) + 1
+            inicios = np.concatenate(([0], quebras))
+            fins = np.concatenate((quebras, [len(tickers)]))
+            for a, b in zip(inicios.tolist(), fins.tolist()):
+                self._faixas[tickers[a]] = (a, b)
+            codigos[quebras] = 1
+            codigos = np.cumsum(codigos)
+        # Chave (código do ticker, dia) crescente: uma busca binária acha a janela
+        # de todos os tickers de uma vez (consultas de universo)
+        self._chave = (codigos << 32) + self._datas.astype(np.int64)
+
+    @property
+    def tickers(self) -> list[str]:
+        return list(self._faixas)
+
+    def __contains__(self, ticker: str) -> bool:
+        return ticker in self._faixas
+
+    def __len__(self) -> int:
+        return len(self._datas)
+
+    # ── Consultas escalares ──────────────────────────────────────────────────
+
+    def _posicoes(self, ticker: str, ini, fim) -> tuple[int, int]:
+        """Posições globais [i, j) dos pregões do ticker com ini <= data <= fim."""
+        faixa = self._faixas.get(ticker)
+        if faixa is None:
+            return 0, 0
+        a, b = faixa
+        datas = self._datas[a:b]
+        i = a + int(np.searchsorted(datas, _dia(ini), side="left"))
+        j = a + int(np.searchsorted(datas, _dia(fim), side="right"))
+        return i, max(i, j)
+
+    def n_pregoes(self, ticker: str, ini: date, fim: date) -> int:
+        i, j = self._posicoes(ticker, ini, fim)
+        return j - i
+
+    def vwap(self, ticker: str, ini: date, fim: date) -> float | None:
+        i, j = self._posicoes(ticker, ini, fim)
+        if i == j:
+            return None
+        denom = self._s_q[j] - self._s_q[i]
+        if denom == 0:
+            n = self._n_avg[j] - self._n_avg[i]
+            return float((self._s_avg[j] - self._s_avg[i]) / n) if n else float("nan")
+        return float((self._s_pq[j] - self._s_pq[i]) / denom)
+
+    def media(self, ticker: str, ini: date, fim: date) -> float | None:
+        i, j = self._posicoes(ticker, ini, fim)
+        if i == j:
+            return None
+        n = self._n_close[j] - self._n_close[i]
+        return float((self._s_close[j] - self._s_close[i]) / n) if n else float("nan")
+
+    def fechamento(self, ticker: str, ini: date, fim: date) -> float | None:
+        i, j = self._posicoes(ticker, ini, fim)
+        return float(self._close[j - 1]) if j > i else None
+
+    def preco(self, ticker: str, ini: date, fim: date, tipo: str = "vwap") -> float | None:
+        if tipo not in TIPOS:
+            raise ValueError(f"Tipo de preço inválido: {tipo}. Válidos: {list(TIPOS)}")
+        return getattr(self, tipo)(ticker, ini, fim)
+
+    def precos(self, tickers: list[str], ini: date, fim: date, tipo: str = "vwap") -> dict[str, float | None]:
+        return {t: self.preco(t, ini, fim, tipo) for t in tickers}
+
+    # ── Consultas vetorizadas (muitas janelas de um ticker) ──────────────────
+
+    def _posicoes_vet(self, ticker: str, inicios, fins) -> tuple[np.ndarray, np.ndarray]:
+        inicios, fins = _dias(inicios), _dias(fins)
+        if len(inicios) != len(fins):
+            raise ValueError("inicios e fins devem ter o mesmo tamanho.")
+        a, b = self._faixas.get(ticker, (0, 0))
+        datas = self._datas[a:b]
+        i = a + np.searchsorted(datas, inicios, side="left")
+        j = a + np.searchsorted(datas, fins, side="right")
+        return i, np.maximum(i, j)
+
+    @staticmethod
+    def _razao(num: np.ndarray, den: np.ndarray) -> np.ndarray:
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.where(den != 0, num / np.where(den != 0, den, 1.0), np.nan)
+
+    def _vwap_pos(self, i: np.ndarray, j: np.ndarray) -> np.ndarray:
+        denom = self._s_q[j] - self._s_q[i]
+        vwap = self._razao(self._s_pq[j] - self._s_pq[i], denom)
+        media_avg = self._razao(self._s_avg[j] - self._s_avg[i], self._n_avg[j] - self._n_avg[i])
+        return np.where(j > i, np.where(denom != 0, vwap, media_avg), np.nan)
+
+    def _media_pos(self, i: np.ndarray, j: np.ndarray) -> np.ndarray:
+        media = self._razao(self._s_close[j] - self._s_close[i], self._n_close[j] - self._n_close[i])
+        return np.where(j > i, media, np.nan)
+
+    def _fechamento_pos(self, i: np.ndarray, j: np.ndarray) -> np.ndarray:
+        if not len(self._close):
+            return np.full(len(i), np.nan)
+        return np.where(j > i, self._close[np.maximum(j - 1, 0)], np.nan)
+
+    def vwap_janelas(self, ticker: str, inicios, fins) -> np.ndarray:
+        """VWAP de cada janela [inicios[k], fins[k]]; NaN onde não há pregões."""
+        return self._vwap_pos(*self._posicoes_vet(ticker, inicios, fins))
+
+    def media_janelas(self, ticker: str, inicios, fins) -> np.ndarray:
+        return self._media_pos(*self._posicoes_vet(ticker, inicios, fins))
+
+    def fechamento_janelas(self, ticker: str, inicios, fins) -> np.ndarray:
+        return self._fechamento_pos(*self._posicoes_vet(ticker, inicios, fins))
+
+    def precos_janelas(self, ticker: str, inicios, fins, tipo: str = "vwap") -> np.ndarray:
+        if tipo not in TIPOS:
+            raise ValueError(f"Tipo de preço inválido: {tipo}. Válidos: {list(TIPOS)}")
+        return getattr(self, f"{tipo}_janelas")(ticker, inicios, fins)
+
+    # ── Consulta vetorizada (uma janela, todos os tickers) ───────────────────
+
+    def precos_universo(self, ini: date, fim: date, tipo: str = "vwap") -> pd.DataFrame:
+        """
+        Preço na base `tipo` e nº de pregões em [ini, fim] para todos os tickers do
+        índice, em duas buscas binárias vetorizadas. Index Ticker; preço NaN sem pregões.
+        """
+        if tipo not in TIPOS:
+            raise ValueError(f"Tipo de preço inválido: {tipo}. Válidos: {list(TIPOS)}")
+        k = np.arange(len(self._faixas), dtype=np.int64) << 32
+        i = np.searchsorted(self._chave, k + _dia(ini).astype(np.int64), side="left")
+        j = np.maximum(i, np.searchsorted(self._chave, k + _dia(fim).astype(np.int64), side="right"))
+        return pd.DataFrame(
+            {"preco": getattr(self, f"_{tipo}_pos")(i, j), "pregoes": j - i},
+            index=pd.Index(list(self._faixas), name="Ticker"),
+        )
@@ -0,0 +1,212 @@
+# src/tsr/universo.py
+"""
+Screener de TSR sobre todas as ações à vista da B3 (BDI 02/12, ~400 tickers).
+
+A página TSR calcula uma lista digitada, ticker a ticker. Para estudos de
+peer group o cálculo precisa cobrir o universo listado inteiro, e cada nova
+janela não pode custar 400 downloads. Os dados ficam em duas bases locais:
+
+  - cotacoes_acoes_dia:  COTAHIST de um pregão com todas as ações (memoizado em
+                         disco sem expiração — pregão passado não muda)
+  - historico_proventos: histórico completo de dividendos/JCP e eventos de um
+                         ticker (disco, 24h); qualquer janela é só um recorte
+
+Com as bases aquecidas, screener() resolve uma janela em uma passada vetorizada:
+preços de todos os tickers por IndicePrecos.precos_universo, eventos e
+dividendos de todos por calculo.calcular_tsr_lote.
+
+Funções puras (sem Streamlit): mensagens vão para `logger`, chamado também
+das threads de trabalho — use um logger que só acumule (ex: list.append).
+"""
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from typing import Callable, Iterable
+
+import pandas as pd
+import requests
+
+from src import b3_engine
+from src.cache import memoizar, nao_vazio
+from src.tsr.dados import consultar_bonificacoes_b3, consultar_dividendos_b3
+from src.tsr.calculo import calcular_tsr_lote, normalizar_dividendos_lote, normalizar_eventos_lote
+from src.tsr.precos import IndicePrecos
+
+# Início do histórico de proventos guardado por ticker
+_INICIO_HISTORICO = date(2000, 1, 1)
+
+COLUNAS_SCREENER = [
+    "Ticker", "Empresa", "Segmento", "P0 (R$)", "P Final (R$)", "Mult. Corporativo",
+    "P Final Ajustado (R$)", "Dividendos/JCP (R$)", "Ret. Preço (%)", "Ret. Dividendos (%)",
+    "TSR Total (%)", "Percentil", "Pregões P0", "Pregões Pf", "Eventos", "Dividendos",
+]
+
+
+# ---------------------------------------------------------------------------
+# Base local de cotações (COTAHIST, todas as ações)
+# ---------------------------------------------------------------------------
+
+@memoizar(ttl=None, max_itens=600, disco=True, cachear_se=nao_vazio)
+def cotacoes_acoes_dia(data_pregao: date, _session=None) -> pd.DataFrame:
+    """Todas as ações à vista de um pregão (ver b3_engine.baixar_acoes_dia)."""
+    if _session is None:
+        with requests.Session() as session:
+            df = b3_engine.baixar_acoes_dia(data_pregao, session)
+    else:
+        df = b3_engine.baixar_acoes_dia(data_pregao, _session)
+    if df is None:
+        return pd.DataFrame()
+    df["Date"] = pd.to_datetime(df["Date"])
+    return df
+
+
+def cotacoes_universo(dt_ini: date, dt_fim: date, max_workers: int = 5) -> pd.DataFrame:
+    """Cotações de todas as ações em [dt_ini, dt_fim]; só pregões fora da base são baixados."""
+    return cotacoes_dias(b3_engine.listar_dias_uteis(dt_ini, dt_fim), max_workers)
+
+
+def cotacoes_dias(dias: Iterable[date], max_workers: int = 5) -> pd.DataFrame:
+    """Cotações de todas as ações nos pregões `dias` (mesma base de cotacoes_universo)."""
+    dias = list(dias)
+    if not dias:
+        return pd.DataFrame()
+    with requests.Session() as session:
+        with ThreadPoolExecutor(max_workers=max_workers) as ex:
+            frames = list(ex.map(lambda d: cotacoes_acoes_dia(d, session), dias))
+    frames = [f for f in frames if not f.empty]
+    if not frames:
+        return pd.DataFrame()
+    return pd.concat(frames, ignore_index=True)
+
+
+# ---------------------------------------------------------------------------
+# Base local de proventos (histórico completo por ticker)
+# ---------------------------------------------------------------------------
+
+def _sem_erro(valor) -> bool:
+    return valor[2]
+
+
+def _sem_falhas(valor) -> bool:
+    return not valor[2]
+
+
+@memoizar(ttl=24 * 3600, max_itens=1024, disco=True, ignorar=("df_empresas", "logger"), cachear_se=_sem_erro)
+def historico_proventos(
+    ticker: str,
+    df_empresas: pd.DataFrame,
+    logger: Callable[[str], None] = print,
+) -> tuple[pd.DataFrame, pd.DataFrame, bool]:
+    """
+    (dividendos, eventos, ok) de toda a história do ticker na API de proventos da
+    B3. ok=False quando o ticker não foi resolvido em df_empresas (ex: lista de
+    empresas vazia) ou alguma chamada falhou — o resultado não entra na base.
+    """
+    hoje = date.today()
+    divs, ok_divs = consultar_dividendos_b3(ticker, df_empresas, _INICIO_HISTORICO, hoje, logger)
+    bonif, ok_bonif = consultar_bonificacoes_b3(ticker, df_empresas, _INICIO_HISTORICO, hoje, logger)
+    return divs, bonif, ok_divs and ok_bonif
+
+
+@memoizar(ttl=24 * 3600, max_itens=4, ignorar=("df_empresas", "logger"), cachear_se=_sem_falhas)
+def proventos_universo(
+    tickers: tuple[str, ...],
+    df_empresas: pd.DataFrame,
+    max_workers: int = 8,
+    logger: Callable[[str], None] = print,
+) -> tuple[pd.DataFrame, pd.DataFrame, tuple[str, ...]]:
+    """
+    (eventos, dividendos, falhos): eventos e dividendos normalizados de todos os
+    tickers, em tabelas longas (normalizar_eventos_lote /
+    normalizar_dividendos_lote), e os tickers cujo histórico não pôde ser
+    consultado (sem proventos nas tabelas; com algum, nada fica em cache).
+    Somente leitura.
+    """
+    with ThreadPoolExecutor(max_workers=max_workers) as ex:
+        triplas = list(ex.map(lambda t: historico_proventos(t, df_empresas, logger), tickers))
+    divs = [d for d, _, _ in triplas if not d.empty]
+    bonif = [b for _, b, _ in triplas if not b.empty]
+    falhos = tuple(t for t, (_, _, ok) in zip(tickers, triplas) if not ok)
+    return (
+        normalizar_eventos_lote(pd.concat(bonif, ignore_index=True) if bonif else pd.DataFrame()),
+        normalizar_dividendos_lote(pd.concat(divs, ignore_index=True) if divs else pd.DataFrame()),
+        falhos,
+    )
+
+
+# ---------------------------------------------------------------------------
+# Screener
+# ---------------------------------------------------------------------------
+
+def classificacao_empresas(df_empresas: pd.DataFrame) -> pd.DataFrame:
+    """CODE (4 letras do ticker) → Empresa e Segmento (segmento de listagem B3)."""
+    if df_empresas.empty or "CODE" not in df_empresas.columns:
+        return pd.DataFrame(columns=["Empresa", "Segmento"], index=pd.Index([], name="CODE"))
+    nome = next((c for c in ("companyName", "Nome do Pregão") if c in df_empresas.columns), None)
+    df = pd.DataFrame({
+        "Empresa": df_empresas[nome].to_numpy() if nome else "",
+        "Segmento": df_empresas["segment"].to_numpy() if "segment" in df_empresas.columns else "",
+    }, index=pd.Index(df_empresas["CODE"].to_numpy(), name="CODE"))
+    return df[~df.index.duplicated()]
+
+
+def screener(
+    cot_p0: pd.DataFrame,
+    cot_pf: pd.DataFrame,
+    eventos: pd.DataFrame,
+    dividendos: pd.DataFrame,
+    janela_p0: tuple[date, date],
+    janela_pf: tuple[date, date],
+    tipo_p0: str = "vwap",
+    tipo_pf: str = "vwap",
+    classificacao: pd.DataFrame | None = None,
+    tickers: Iterable[str] | None = None,
+    segmentos: Iterable[str] | None = None,
+) -> pd.DataFrame:
+    """
+    TSR de todos os tickers com preço nas duas janelas, de janela_p0[1] (t0) a
+    janela_pf[1] (t1) — mesma convenção da página TSR.
+
+    cot_p0/cot_pf: cotações das janelas (cotacoes_universo)
+    eventos/dividendos: proventos_universo
+    tickers:   restringe o universo a uma lista (ex: composição de um índice)
+    segmentos: restringe aos segmentos de `classificacao`
+
+    Ordenado por TSR (maior primeiro); Percentil = % do grupo filtrado com TSR
+    menor ou igual (100 = melhor).
+    """
+    t0, t1 = pd.Timestamp(janela_p0[1]), pd.Timestamp(janela_pf[1])
+    p0 = IndicePrecos(cot_p0).precos_universo(*janela_p0, tipo_p0)
+    pf = IndicePrecos(cot_pf).precos_universo(*janela_pf, tipo_pf)
+    precos = p0.join(pf, how="inner", lsuffix="_p0", rsuffix="_pf")
+    precos = precos[(precos["preco_p0"] > 0) & precos["preco_pf"].notna()]
+    if tickers is not None:
+        precos = precos[precos.index.isin(list(tickers))]
+
+    df = calcular_tsr_lote(
+        precos.rename(columns={"preco_p0": "p0", "preco_pf": "pf"}), eventos, dividendos, t0, t1,
+    )
+    df["Pregões P0"] = precos["pregoes_p0"].to_numpy()
+    df["Pregões Pf"] = precos["pregoes_pf"].to_numpy()
+
+    classificacao = classificacao if classificacao is not None else classificacao_empresas(pd.DataFrame())
+    info = classificacao.reindex(df.index.str[:4])
+    df["Empresa"] = info["Empresa"].fillna("").to_numpy()
+    df["Segmento"] = info["Segmento"].fillna("").to_numpy()
+    if segmentos is not None:
+        df = df[df["Segmento"].isin(list(segmentos))]
+
+    df["Percentil"] = (df["TSR Total (%)"].rank(pct=True, method="max") * 100).round(1)
+    df = df.reset_index().sort_values(["TSR Total (%)", "Ticker"], ascending=[False, True], kind="stable")
+    return df[COLUNAS_SCREENER].reset_index(drop=True)
+
+
+def gerar_excel_screener(df: pd.DataFrame, parametros: dict | None = None) -> bytes:
+    """Excel do screener pelo escritor em streaming do excel_builder (constant_memory)."""
+    from src.lti.excel_builder import gerar_excel_tabelas
+
+    tabelas = {"Screener": df}
+    if parametros:
+        tabelas["Parametros"] = pd.DataFrame({"Parâmetro": list(parametros), "Valor": list(map(str, parametros.values()))})
+    return gerar_excel_tabelas(tabelas)
@@ -0,0 +1,76 @@
+"""
+Engine de volatilidade da página Volatilidade (pages/05), sem Streamlit.
+
+    from src.volatility import Painel, calcular_volatilidade, vol_janelas
+
+    painel = Painel.de_yfinance(dados)            # download yf (campo, ticker)
+    tabela = vol_janelas(painel.recortar(ini, fim), ["historica", "yang_zhang"])
+    res = calcular_volatilidade(("PETR4.SA",), ini, fim, ("Yang-Zhang", "EWMA"))
+
+  - src/volatility/painel.py:      painel OHLC datas × tickers, alinhamento por pregão
+  - src/volatility/momentos.py:    termos diários e seus momentos acumulados
+  - src/volatility/estimadores.py: estimadores rolling e por período em 2-D
+  - src/volatility/covariancia.py: covariância/correlação incrementais (Welford, rolling, EWMA)
+  - src/volatility/garch.py:       GARCH(1,1) por ticker (pacote `arch` opcional)
+  - src/volatility/resultado.py:   download + todas as contas da página, memoizado
+  - src/volatility/exportar.py:    Excel de auditoria a partir do resultado
+"""
+from src.volatility.covariancia import (
+    Covariancia,
+    CovarianciaEWMA,
+    correlacao,
+    correlacao_rolling,
+    covariancia_ewma,
+    log_retornos,
+    matrizes_rolling,
+)
+from src.volatility.estimadores import (
+    FA,
+    K_YANG_ZHANG,
+    LAMBDA_EWMA,
+    METODO_POR_ROTULO,
+    METODOS,
+    janelas_padrao,
+    vol_janelas,
+    vol_periodo,
+    vol_rolling,
+    vol_rolling_janelas,
+)
+from src.volatility.exportar import gerar_excel_volatilidade
+from src.volatility.painel import Painel
+from src.volatility.resultado import (
+    FONTES,
+    JANELAS_ROLLING,
+    ResultadoVolatilidade,
+    baixar_ohlc,
+    baixar_ohlc_b3,
+    calcular_volatilidade,
+)
+
+__all__ = [
+    "Covariancia",
+    "CovarianciaEWMA",
+    "FA",
+    "FONTES",
+    "JANELAS_ROLLING",
+    "K_YANG_ZHANG",
+    "LAMBDA_EWMA",
+    "METODO_POR_ROTULO",
+    "METODOS",
+    "Painel",
+    "ResultadoVolatilidade",
+    "baixar_ohlc",
+    "baixar_ohlc_b3",
+    "calcular_volatilidade",
+    "correlacao",
+    "correlacao_rolling",
+    "covariancia_ewma",
+    "gerar_excel_volatilidade",
+    "janelas_padrao",
+    "log_retornos",
+    "matrizes_rolling",
+    "vol_janelas",
+    "vol_periodo",
+    "vol_rolling",
+    "vol_rolling_janelas",
+]
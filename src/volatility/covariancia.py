@@ -0,0 +1,264 @@
+# src/volatility/covariancia.py
+"""
+Covariância e correlação incrementais entre N séries de retornos.
+
+A aba Correlação montava o DataFrame inteiro de fechamentos e chamava
+log_rets.corr() — ok para 5 tickers, não para as ~400 ações da B3 em 10 anos
+atualizadas todo dia. Aqui o estado é só um punhado de matrizes N × N:
+
+  - Covariancia: média e co-momentos pareados (Welford/Chan). adicionar()
+    funde um bloco de linhas (ou um dia) em O(linhas·N²); remover() é a
+    mesma fusão com peso negativo — a janela rolling anda sem recomputar
+    (matrizes_rolling).
+  - CovarianciaEWMA: Σ_t = λ·Σ_{t−1} + (1 − λ)·r_t·r_tᵀ (RiskMetrics, média
+    zero), O(N²) por dia. A diagonal é a ewma_variancia(r², λ, ignorar_na=True).
+
+NaN (ticker sem pregão, ainda não listado) é tratado par a par, como o
+DataFrame.corr(): cada par (i, j) usa os dias em que os dois têm retorno.
+Os produtos de cada bloco rodam em float32 (metade da memória e da banda),
+com as colunas deslocadas pela média corrente para não perder precisão; a
+fusão dos blocos e o estado ficam em float64. A memória é
+O(bloco·N + N²), independente do número de dias.
+
+Para o gráfico, correlacao_rolling calcula só os pares pedidos, com somas
+acumuladas por par como em momentos.py — sem passar pelas matrizes N × N.
+"""
+from __future__ import annotations
+
+from typing import Iterable, Iterator
+
+import numpy as np
+import pandas as pd
+
+from src.volatility.estimadores import LAMBDA_EWMA
+from src.volatility.momentos import _acumular, _movel, alfa_ewm
+from src.volatility.painel import Painel
+
+BLOCO = 256  # linhas por produto matricial
+
+
+def log_retornos(painel: Painel) -> pd.DataFrame:
+    """
+    ln(C/C₋₁) no calendário comum do painel (datas × tickers) — o
+    np.log(closes / closes.shift(1)) da aba Correlação; NaN onde faltou pregão.
+    """
+    close = painel.close
+    r = np.full(close.shape, np.nan)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        r[1:] = np.log(close[1:] / close[:-1])
+    return painel.para_dataframe(r)
+
+
+def _blocos(x: np.ndarray, bloco: int) -> Iterator[np.ndarray]:
+    for i in range(0, x.shape[0], bloco):
+        yield x[i:i + bloco]
+
+
+# ---------------------------------------------------------------------------
+# Estatísticas pareadas (Welford/Chan)
+# ---------------------------------------------------------------------------
+
+class Covariancia:
+    """
+    Estado pareado de N séries. Para cada par (i, j), sobre os dias em que
+    as duas têm valor:
+
+      n[i, j]      nº de dias
+      media[i, j]  média da série i
+      comom[i, j]  Σ (x_i − média_i)(x_j − média_j)
+      quad[i, j]   Σ (x_i − média_i)²
+    """
+
+    def __init__(self, n_series: int, dtype=np.float32):
+        self.dtype = np.dtype(dtype)
+        forma = (n_series, n_series)
+        self.n = np.zeros(forma)
+        self.media = np.zeros(forma)
+        self.comom = np.zeros(forma)
+        self.quad = np.zeros(forma)
+
+    @property
+    def n_series(self) -> int:
+        return self.n.shape[0]
+
+    def _estatisticas(self, x: np.ndarray):
+        """(n, média, co-momento, quadrado) pareados de um bloco de linhas."""
+        x = np.atleast_2d(np.asarray(x, dtype=float))
+        valido = np.isfinite(x)
+        # Deslocamento pela média corrente: produtos em float32 sem cancelamento
+        centro = np.diagonal(self.media)
+        m = valido.astype(self.dtype)
+        xc = np.where(valido, x - centro, 0.0).astype(self.dtype)
+        n = (m.T @ m).astype(float)
+        s = (xc.T @ m).astype(float)                 # s[i, j] = Σ x_i nos dias com i e j
+        with np.errstate(invalid="ignore", divide="ignore"):
+            media = np.where(n > 0, s / n, 0.0)
+        comom = (xc.T @ xc).astype(float) - s * media.T
+        quad = ((xc * xc).T @ m).astype(float) - s * media
+        return n, media + centro[:, None], comom, quad
+
+    def _fundir(self, n_b, media_b, comom_b, quad_b, sinal: float) -> None:
+        n_a = self.n
+        n = n_a + sinal * n_b
+        with np.errstate(invalid="ignore", divide="ignore"):
+            peso = np.where(n > 0, sinal * n_b / n, 0.0)
+        d = np.where(n_b > 0, media_b - self.media, 0.0)
+        fator = n_a * peso
+        self.media = np.where(n > 0, self.media + d * peso, 0.0)
+        self.comom = np.where(n > 0, self.comom + sinal * comom_b + d * d.T * fator, 0.0)
+        self.quad = np.where(n > 0, self.quad + sinal * quad_b + d * d * fator, 0.0)
+        self.n = n
+
+    def adicionar(self, x: np.ndarray) -> "Covariancia":
+        """Funde um dia (N,) ou bloco (linhas × N) de valores, NaN = ausente."""
+        self._fundir(*self._estatisticas(x), 1.0)
+        return self
+
+    def remover(self, x: np.ndarray) -> "Covariancia":
+        """Tira do estado linhas adicionadas antes (fusão com peso negativo)."""
+        self._fundir(*self._estatisticas(x), -1.0)
+        return self
+
+    def covariancia(self, ddof: int = 1) -> np.ndarray:
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(self.n > ddof, self.comom / (self.n - ddof), np.nan)
+
+    def correlacao(self, min_periodos: int = 2) -> np.ndarray:
+        with np.errstate(invalid="ignore", divide="ignore"):
+            corr = self.comom / np.sqrt(self.quad * self.quad.T)
+        corr = np.where(self.n >= max(min_periodos, 2), np.clip(corr, -1.0, 1.0), np.nan)
+        # Diagonal: 1 onde a série tem variância (como o DataFrame.corr)
+        diag = np.diagonal(corr).copy()
+        diag[np.isfinite(diag)] = 1.0
+        np.fill_diagonal(corr, diag)
+        return corr
+
+
+class CovarianciaEWMA:
+    """Covariância EWMA (RiskMetrics) pareada; pares sem os dois valores no dia não mudam."""
+
+    def __init__(self, n_series: int, lam: float = LAMBDA_EWMA):
+        self.alfa = alfa_ewm(lam)
+        self.sigma = np.full((n_series, n_series), np.nan)
+
+    def adicionar(self, r: np.ndarray) -> "CovarianciaEWMA":
+        """Um dia (N,) ou vários (linhas × N), em ordem."""
+        fator = 1.0 - self.alfa
+        for linha in np.atleast_2d(np.asarray(r, dtype=float)):
+            valido = np.isfinite(linha)
+            fora = np.flatnonzero(~valido)
+            x = np.where(valido, linha, 0.0)
+            produto = np.outer(x, x)
+            novo = fator * self.sigma
+            novo += self.alfa * produto
+            novo /= fator + self.alfa
+            vazio = np.isnan(novo)
+            if vazio.any():
+                novo[vazio] = produto[vazio]  # 1ª observação conjunta do par
+            # Tickers sem retorno no dia: linhas e colunas não mudam
+            novo[fora] = self.sigma[fora]
+            novo[:, fora] = self.sigma[:, fora]
+            self.sigma = novo
+        return self
+
+    def covariancia(self) -> np.ndarray:
+        return self.sigma.copy()
+
+    def correlacao(self) -> np.ndarray:
+        desvio = np.sqrt(np.diagonal(self.sigma))
+        with np.errstate(invalid="ignore", divide="ignore"):
+            corr = np.clip(self.sigma / np.outer(desvio, desvio), -1.0, 1.0)
+        diag = np.diagonal(corr).copy()
+        diag[np.isfinite(diag)] = 1.0
+        np.fill_diagonal(corr, diag)
+        return corr
+
+
+# ---------------------------------------------------------------------------
+# Sobre uma tabela de retornos (datas × tickers)
+# ---------------------------------------------------------------------------
+
+def _matriz(valores: np.ndarray, tickers) -> pd.DataFrame:
+    return pd.DataFrame(valores, index=list(tickers), columns=list(tickers))
+
+
+def correlacao(
+    retornos: pd.DataFrame,
+    completas: bool = False,
+    bloco: int = BLOCO,
+    dtype=np.float32,
+) -> pd.DataFrame:
+    """
+    Correlação amostral de todo o período, um bloco de linhas por vez.
+    completas=True usa só os dias com todos os tickers (o dropna().corr() da
+    página); False, par a par (o DataFrame.corr()).
+    """
+    x = retornos.to_numpy(dtype=float)
+    if completas:
+        x = x[np.isfinite(x).all(axis=1)]
+    cov = Covariancia(x.shape[1], dtype)
+    for b in _blocos(x, bloco):
+        cov.adicionar(b)
+    return _matriz(cov.correlacao(), retornos.columns)
+
+
+def covariancia_ewma(retornos: pd.DataFrame, lam: float = LAMBDA_EWMA, correlacao: bool = True) -> pd.DataFrame:
+    """Matriz EWMA no último dia (correlação, ou covariância com correlacao=False)."""
+    ewma = CovarianciaEWMA(retornos.shape[1], lam).adicionar(retornos.to_numpy(dtype=float))
+    return _matriz(ewma.correlacao() if correlacao else ewma.covariancia(), retornos.columns)
+
+
+def matrizes_rolling(
+    retornos: pd.DataFrame, janela: int, dtype=np.float32,
+) -> Iterator[tuple[pd.Timestamp, np.ndarray]]:
+    """
+    (data, matriz de correlação) da janela de `janela` dias terminando em cada
+    data, a partir da 1ª janela completa. Cada dia entra e o que sai da janela
+    é removido — O(N²) por dia, memória O(N²) em vez de T matrizes.
+    """
+    x = retornos.to_numpy(dtype=float)
+    cov = Covariancia(x.shape[1], dtype)
+    for t in range(len(x)):
+        cov.adicionar(x[t])
+        if t >= janela:
+            cov.remover(x[t - janela])
+        if t >= janela - 1:
+            yield retornos.index[t], cov.correlacao(min_periodos=janela)
+
+
+def correlacao_rolling(
+    retornos: pd.DataFrame,
+    janela: int,
+    pares: Iterable[tuple[str, str]] | None = None,
+) -> pd.DataFrame:
+    """
+    Correlação rolling de `janela` dias de cada par (datas × "A × B"), como
+    r[a].rolling(janela).corr(r[b]): NaN sem os dois nos `janela` dias.
+    Sem `pares`, todos os pares. Somas acumuladas por par (momentos._acumular),
+    centradas na média do par — O(T) por par, sem montar as matrizes N × N.
+    """
+    tickers = list(retornos.columns)
+    if pares is None:
+        pares = [(a, b) for i, a in enumerate(tickers) for b in tickers[i + 1:]]
+    pares = list(pares)
+    x = retornos.to_numpy(dtype=float)
+    a = x[:, [tickers.index(p) for p, _ in pares]]
+    b = x[:, [tickers.index(q) for _, q in pares]]
+    valido = np.isfinite(a) & np.isfinite(b)
+    n = np.maximum(valido.sum(axis=0), 1)
+    a = np.where(valido, a, 0.0)
+    b = np.where(valido, b, 0.0)
+    a = np.where(valido, a - a.sum(axis=0) / n, 0.0)
+    b = np.where(valido, b - b.sum(axis=0) / n, 0.0)
+
+    def _soma(m: np.ndarray) -> np.ndarray:
+        return _movel(_acumular(m), janela)
+
+    sa, sb = _soma(a), _soma(b)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        cov = _soma(a * b) - sa * sb / janela
+        var_a = _soma(a * a) - sa * sa / janela
+        var_b = _soma(b * b) - sb * sb / janela
+        corr = np.clip(cov / np.sqrt(var_a * var_b), -1.0, 1.0)
+    corr[~(_soma(valido.astype(np.int64)) >= janela)] = np.nan
+    return pd.DataFrame(corr, index=retornos.index, columns=[f"{p} × {q}" for p, q in pares])
@@ -0,0 +1,297 @@
+# src/volatility/estimadores.py
+"""
+Estimadores de volatilidade sobre o painel inteiro (todas as colunas de uma vez).
+
+Mesmas fórmulas que a página Volatilidade aplicava ticker a ticker:
+
+  historica        desvio padrão dos log-retornos fechamento-fechamento
+  parkinson        ln(H/L)² / (4·ln 2)
+  garman_klass     0,5·ln(H/L)² − (2·ln 2 − 1)·ln(C/O)²
+  rogers_satchell  ln(H/O)·ln(H/C) + ln(L/O)·ln(L/C)
+  yang_zhang       var(ln O/C₋₁) + k'·var(ln C/O) + (1 − k')·RS,  k' = k/(1 + k + (n+1)/(n−1))
+  ewma             RiskMetrics: σ²_t = λ·σ²_{t−1} + (1 − λ)·r²_t
+  garch            GARCH(1,1) — ajuste por ticker em lote, ver src/volatility/garch.py
+
+Tudo é anualizado por √FA. Duas famílias:
+
+  - vol_rolling / vol_rolling_janelas: séries rolling de janela fixa
+    (gráfico); janela com algum NaN → NaN, como o rolling(janela) do pandas.
+  - vol_periodo: um número por ticker sobre os últimos n pregões (tabela por
+    janela / input de Black-Scholes).
+
+As duas saem dos mesmos momentos acumulados (src/volatility/momentos.py):
+prefixos de cada termo montados uma vez por painel, qualquer janela vira
+diferença de duas linhas.
+
+vol_janelas monta a tabela completa da página: para cada ticker as janelas
+252, 504, ... e o período completo, todos os métodos.
+"""
+from __future__ import annotations
+
+from typing import Iterable
+
+import numpy as np
+import pandas as pd
+
+from src.volatility.momentos import _LN2, Momentos, Termos, alfa_ewm
+from src.volatility.painel import Painel
+
+FA = 252            # dias úteis para anualização
+K_YANG_ZHANG = 0.34
+LAMBDA_EWMA = 0.94
+MIN_YANG_ZHANG = 5  # pregões mínimos no período para o YZ
+
+METODOS = {
+    "historica": "Histórica (C-C)",
+    "parkinson": "Parkinson",
+    "garman_klass": "Garman-Klass",
+    "rogers_satchell": "Rogers-Satchell",
+    "yang_zhang": "Yang-Zhang",
+    "ewma": "EWMA",
+    "garch": "GARCH(1,1)",
+}
+METODO_POR_ROTULO = {v: k for k, v in METODOS.items()}
+
+
+def _codigo(metodo: str) -> str:
+    """Aceita o código (ex: 'yang_zhang') ou o rótulo da página (ex: 'Yang-Zhang')."""
+    codigo = METODO_POR_ROTULO.get(metodo, metodo)
+    if codigo not in METODOS:
+        raise ValueError(f"Método de volatilidade inválido: {metodo}. Válidos: {list(METODOS)}")
+    return codigo
+
+
+def _anualizar(var: np.ndarray) -> np.ndarray:
+    with np.errstate(invalid="ignore"):
+        return np.sqrt(var * FA)
+
+
+def _k_ajustado(k: float, n) -> np.ndarray:
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return k / (1 + k + (n + 1) / (n - 1))
+
+
+# ---------------------------------------------------------------------------
+# Janelas móveis
+# ---------------------------------------------------------------------------
+
+def ewma_variancia(r2: np.ndarray, lam: float = LAMBDA_EWMA, ignorar_na: bool = False) -> np.ndarray:
+    """
+    ewm(alpha=1−λ, adjust=False).mean() coluna a coluna, com as mesmas regras
+    do pandas para NaN: sem ignorar_na, cada linha vazia após o 1º valor decai
+    o peso do passado; com ignorar_na, a linha é pulada (equivale ao dropna).
+    Recorrência sequencial no tempo, vetorizada entre os tickers.
+    """
+    alfa = alfa_ewm(lam)  # mesma conversão do pandas, para bater bit a bit
+    fator = 1.0 - alfa
+    saida = np.full(r2.shape, np.nan)
+    if r2.shape[0] == 0:
+        return saida
+    y = r2[0].copy()
+    peso = np.ones(r2.shape[1:])
+    saida[0] = y
+    for t in range(1, r2.shape[0]):
+        x = r2[t]
+        obs = ~np.isnan(x)
+        iniciado = ~np.isnan(y)
+        avanca = iniciado & (obs | (not ignorar_na))
+        peso = np.where(avanca, peso * fator, peso)
+        muda = iniciado & obs & (y != x)
+        with np.errstate(invalid="ignore"):
+            novo = (peso * y + alfa * x) / (peso + alfa)
+        y = np.where(muda, novo, np.where(~iniciado & obs, x, y))
+        peso = np.where(iniciado & obs, 1.0, peso)
+        saida[t] = y
+    return saida
+
+
+def _rolling_alinhado(m: Momentos, metodo: str, janela: int, k: float) -> np.ndarray:
+    if metodo == "historica":
+        return _anualizar(m.variancia_movel("log_retornos", janela))
+    if metodo == "parkinson":
+        return _anualizar(m.media_movel("log_hl2", janela) / (4 * _LN2))
+    if metodo == "garman_klass":
+        return _anualizar(m.media_movel("garman_klass", janela))
+    if metodo == "rogers_satchell":
+        return _anualizar(m.media_movel("rogers_satchell", janela))
+    if metodo == "yang_zhang":
+        k_adj = _k_ajustado(k, janela)
+        return _anualizar(m.variancia_movel("log_oc", janela) + k_adj * m.variancia_movel("log_co", janela)
+                          + (1 - k_adj) * m.media_movel("rogers_satchell", janela))
+    raise ValueError(f"Método sem versão em painel: {metodo}")
+
+
+def vol_rolling_janelas(
+    painel: Painel,
+    metodos: Iterable[str],
+    janelas: Iterable[int],
+    lam: float = LAMBDA_EWMA,
+    k: float = K_YANG_ZHANG,
+) -> dict[int, dict[str, pd.DataFrame]]:
+    """
+    vol_rolling para várias janelas de uma vez: {janela: {método: DataFrame}}.
+    Os momentos acumulados são montados uma vez; cada janela custa uma
+    subtração por termo. EWMA e GARCH não dependem da janela — calculados
+    uma vez e compartilhados entre as janelas.
+    """
+    janelas = list(dict.fromkeys(int(j) for j in janelas))
+    a = painel.alinhado()
+    momentos = Momentos(Termos(a))
+    saida: dict[int, dict[str, pd.DataFrame]] = {j: {} for j in janelas}
+    for metodo in metodos:
+        codigo = _codigo(metodo)
+        if codigo == "garch":
+            from src.volatility.garch import roll_garch_lote
+            series = roll_garch_lote({t: painel.ticker(t) for t in painel.tickers})
+            valores = np.column_stack([
+                series[t].reindex(painel.datas).to_numpy() for t in painel.tickers
+            ]) if painel.tickers else np.empty(painel.shape)
+            df = painel.para_dataframe(valores)
+        elif codigo == "ewma":
+            df = painel.para_dataframe(a.espalhar(_anualizar(ewma_variancia(momentos.termos.log_retornos ** 2, lam))))
+        else:
+            for j in janelas:
+                saida[j][metodo] = painel.para_dataframe(a.espalhar(_rolling_alinhado(momentos, codigo, j, k)))
+            continue
+        for j in janelas:
+            saida[j][metodo] = df
+    return saida
+
+
+def vol_rolling(
+    painel: Painel,
+    metodos: Iterable[str],
+    janela: int = 21,
+    lam: float = LAMBDA_EWMA,
+    k: float = K_YANG_ZHANG,
+) -> dict[str, pd.DataFrame]:
+    """
+    Volatilidade rolling anualizada de todos os tickers: {método: DataFrame
+    datas × tickers}, NaN fora dos pregões de cada ticker. EWMA ignora
+    `janela`. GARCH é ajustado por ticker (garch.roll_garch).
+    """
+    return vol_rolling_janelas(painel, metodos, [janela], lam, k)[janela]
+
+
+# ---------------------------------------------------------------------------
+# Período (últimos n pregões de cada ticker)
+# ---------------------------------------------------------------------------
+
+def _periodo_alinhado(m: Momentos, metodo: str, n: np.ndarray, lam: float, k: float) -> np.ndarray:
+    """
+    Um valor por ticker sobre as últimas n[j] linhas da matriz alinhada — o
+    df.iloc[-n:] da página. Retornos só dentro do recorte (o 1º pregão não
+    tem anterior); o YZ usa um pregão a mais para o gap overnight do 1º dia.
+    Cada termo é uma diferença de prefixos: O(N) por janela.
+    """
+    inicio = m.T - np.asarray(n, dtype=int)
+    if metodo == "historica":
+        return _anualizar(m.variancia("log_retornos", inicio + 1))
+    if metodo == "parkinson":
+        return _anualizar(m.media("log_hl2", inicio)[0] / (4 * _LN2))
+    if metodo == "garman_klass":
+        return _anualizar(m.media("garman_klass", inicio)[0])
+    if metodo == "rogers_satchell":
+        return _anualizar(m.media("rogers_satchell", inicio)[0])
+    if metodo == "yang_zhang":
+        rs_m, n_rs = m.media("rogers_satchell", inicio - 1)
+        k_adj = _k_ajustado(k, n_rs)
+        yz = (m.variancia("log_oc", inicio) + k_adj * m.variancia("log_co", inicio - 1)
+              + (1 - k_adj) * rs_m)
+        return np.where(n_rs >= MIN_YANG_ZHANG, _anualizar(yz), np.nan)
+    if metodo == "ewma":
+        return _anualizar(m.ewma_final(lam, inicio + 1))
+    raise ValueError(f"Método sem versão em painel: {metodo}")
+
+
+def _n_por_ticker(painel: Painel, n, n_validos: np.ndarray) -> np.ndarray:
+    if n is None:
+        return n_validos.astype(int)
+    return np.broadcast_to(np.asarray(n, dtype=int), n_validos.shape).copy()
+
+
+def vol_periodo(
+    painel: Painel,
+    metodo: str,
+    n=None,
+    lam: float = LAMBDA_EWMA,
+    k: float = K_YANG_ZHANG,
+) -> pd.Series:
+    """
+    Volatilidade realizada anualizada dos últimos `n` pregões de cada ticker
+    (int ou um valor por ticker; None = todos os pregões do painel).
+    Recorte o painel no período antes (Painel.recortar).
+    """
+    codigo = _codigo(metodo)
+    a = painel.alinhado()
+    nn = _n_por_ticker(painel, n, a.n_validos)
+    if codigo == "garch":
+        from src.volatility.garch import vol_garch_janelas
+        vols = vol_garch_janelas({t: painel.ticker(t) for t in painel.tickers},
+                                 {t: [int(nj)] for t, nj in zip(painel.tickers, nn)})
+        valores = [vols[(t, int(nj))] for t, nj in zip(painel.tickers, nn)]
+    else:
+        valores = _periodo_alinhado(Momentos(Termos(a)), codigo, nn, lam, k)
+    return pd.Series(np.asarray(valores, dtype=float), index=list(painel.tickers), name=metodo)
+
+
+def janelas_padrao(n_total: int) -> list[tuple[int, str]]:
+    """252, 504, ... até n_total e o período completo quando não é múltiplo de 252."""
+    janelas = [(i * FA, f"{i} ano{'s' if i > 1 else ''} ({i * FA}d úteis)") for i in range(1, n_total // FA + 1)]
+    if n_total % FA != 0 and n_total > 0:
+        janelas.append((n_total, f"Período completo ({n_total}d úteis)"))
+    return janelas
+
+
+def vol_janelas(
+    painel: Painel,
+    metodos: Iterable[str],
+    lam: float = LAMBDA_EWMA,
+    k: float = K_YANG_ZHANG,
+) -> pd.DataFrame:
+    """
+    Tabela da página: uma linha por (ticker, janela de janelas_padrao), uma
+    coluna por método (nomes como recebidos em `metodos`). O painel já deve
+    estar recortado no período. Cada janela de k anos é uma passada para
+    todos os tickers; o período completo (n diferente por ticker) é outra.
+    """
+    metodos = list(metodos)
+    colunas = ["Ticker", "Janela", "Dias Úteis", *metodos]
+    a = painel.alinhado()
+    momentos = Momentos(Termos(a))
+    n_validos = a.n_validos.astype(int)
+    n_tickers = len(painel.tickers)
+    anos = int(n_validos.max()) // FA if n_tickers else 0
+    # Comprimentos de cada passada: 252·i para todos, e n_validos (período completo)
+    passadas = [np.full(n_tickers, i * FA) for i in range(1, anos + 1)] + [n_validos]
+    if n_tickers == 0 or n_validos.max() == 0:
+        return pd.DataFrame(columns=colunas)
+
+    valores: dict[str, list[np.ndarray]] = {}
+    for metodo in metodos:
+        codigo = _codigo(metodo)
+        if codigo == "garch":
+            from src.volatility.garch import vol_garch_janelas
+            # Só as (ticker, janela) que vão para a tabela; todas num lote só
+            usadas = [n <= n_validos for n in passadas[:-1]] + [(n_validos % FA != 0) & (n_validos > 0)]
+            comprimentos = {
+                t: [int(n[j]) for n, usa in zip(passadas, usadas) if usa[j]]
+                for j, t in enumerate(painel.tickers)
+            }
+            vols = vol_garch_janelas({t: painel.ticker(t) for t in painel.tickers}, comprimentos)
+            valores[metodo] = [
+                np.array([vols.get((t, int(n[j])), np.nan) for j, t in enumerate(painel.tickers)])
+                for n in passadas
+            ]
+        else:
+            valores[metodo] = [_periodo_alinhado(momentos, codigo, n, lam, k) for n in passadas]
+
+    linhas = []
+    for j, t in enumerate(painel.tickers):
+        for nj, rotulo in janelas_padrao(int(n_validos[j])):
+            p = nj // FA - 1 if nj % FA == 0 else len(passadas) - 1
+            linha = {"Ticker": t, "Janela": rotulo, "Dias Úteis": nj}
+            for metodo in metodos:
+                linha[metodo] = float(valores[metodo][p][j])
+            linhas.append(linha)
+    return pd.DataFrame(linhas, columns=colunas)
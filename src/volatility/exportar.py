@@ -0,0 +1,92 @@
+# src/volatility/exportar.py
+"""
+Excel de auditoria da página Volatilidade, gerado a partir do
+ResultadoVolatilidade — nenhum estimador é recalculado aqui.
+
+  - Resumo:           a tabela por janela (uma linha por ticker × janela)
+  - uma aba por ticker: OHLC do período e os termos diários de cada estimador
+  - Correlação / Correlação EWMA: as matrizes da aba Correlação (2+ tickers)
+"""
+from __future__ import annotations
+
+from io import BytesIO
+
+import numpy as np
+import pandas as pd
+
+from src.volatility.estimadores import FA
+from src.volatility.resultado import ResultadoVolatilidade
+
+
+def tabela_auditoria(d: pd.DataFrame, lam: float) -> pd.DataFrame:
+    """Termos diários de todos os estimadores sobre o OHLC `d` de um ticker."""
+    d = d.copy()
+    if getattr(d.index, "tz", None) is not None:
+        d.index = d.index.tz_localize(None)
+    lr = np.log(d["Close"] / d["Close"].shift(1))
+    audit = pd.DataFrame(index=d.index)
+    audit.index.name = "Data"
+    audit["Open"] = d["Open"]
+    audit["High"] = d["High"]
+    audit["Low"] = d["Low"]
+    audit["Close"] = d["Close"]
+    if "Volume" in d.columns:
+        audit["Volume"] = d["Volume"]
+    audit["ln(C/Cprev)"] = lr
+    audit["ln(C/Cprev)²"] = lr ** 2
+    audit["ln(H/L)"] = np.log(d["High"] / d["Low"])
+    audit["ln(H/L)²"] = audit["ln(H/L)"] ** 2
+    audit["Parkinson_term"] = audit["ln(H/L)²"] / (4 * np.log(2))
+    audit["ln(C/O)²"] = np.log(d["Close"] / d["Open"]) ** 2
+    audit["GK_term"] = 0.5 * audit["ln(H/L)²"] - (2 * np.log(2) - 1) * audit["ln(C/O)²"]
+    audit["ln(H/O)"] = np.log(d["High"] / d["Open"])
+    audit["ln(H/C)"] = np.log(d["High"] / d["Close"])
+    audit["ln(L/O)"] = np.log(d["Low"] / d["Open"])
+    audit["ln(L/C)"] = np.log(d["Low"] / d["Close"])
+    audit["RS_term"] = audit["ln(H/O)"] * audit["ln(H/C)"] + audit["ln(L/O)"] * audit["ln(L/C)"]
+    audit["ln(O/Cprev)"] = np.log(d["Open"] / d["Close"].shift(1))
+    audit["ln(C/O)"] = np.log(d["Close"] / d["Open"])
+    ewma_var = (lr ** 2).ewm(alpha=1 - lam, adjust=False).mean()
+    audit["EWMA_var"] = ewma_var
+    audit["EWMA_vol_%aa"] = np.sqrt(ewma_var * FA) * 100
+    return audit
+
+
+def gerar_excel_volatilidade(res: ResultadoVolatilidade, nomes: dict[str, str] | None = None) -> bytes:
+    """
+    Excel de auditoria. `nomes` mapeia símbolo Yahoo → nome exibido
+    (ex: 'PETR4.SA' → 'PETR4'); ausente, usa o próprio símbolo.
+    """
+    nomes = nomes or {}
+    buf = BytesIO()
+    with pd.ExcelWriter(buf, engine="xlsxwriter") as writer:
+        wb = writer.book
+        fmt_pct_xl = wb.add_format({"num_format": "0.00%", "border": 1})
+        fmt_num = wb.add_format({"num_format": "0.000000", "border": 1})
+        fmt_num2 = wb.add_format({"num_format": "0.00", "border": 1})
+
+        for yf_t in res.tickers:
+            sn = nomes.get(yf_t, yf_t)[:31]
+            tabela_auditoria(res.periodo(yf_t), res.lam).reset_index().to_excel(writer, sheet_name=sn, index=False)
+            ws = writer.sheets[sn]
+            ws.set_column("A:A", 12)
+            ws.set_column("B:F", 14, fmt_num2)
+            ws.set_column("G:Z", 14, fmt_num)
+
+        if not res.tabela.empty:
+            df_resumo = res.tabela.assign(Ticker=res.tabela["Ticker"].map(lambda t: nomes.get(t, t)))
+            df_resumo.to_excel(writer, sheet_name="Resumo", index=False)
+            ws = writer.sheets["Resumo"]
+            ws.set_column("A:B", 18)
+            ws.set_column("C:C", 12)
+            for ci in range(3, len(df_resumo.columns)):
+                ws.set_column(ci, ci, 18, fmt_pct_xl)
+
+        if len(res.tickers) >= 2:
+            fmt_corr = wb.add_format({"num_format": "0.0000", "border": 1})
+            for aba, corr in (("Correlação", res.correlacao), ("Correlação EWMA", res.correlacao_ewma)):
+                corr.rename(index=nomes, columns=nomes).to_excel(writer, sheet_name=aba)
+                ws = writer.sheets[aba]
+                ws.set_column(0, 0, 14)
+                ws.set_column(1, len(corr.columns), 12, fmt_corr)
+    return buf.getvalue()
@@ -0,0 +1,232 @@
+# src/volatility/garch.py
+"""
+GARCH(1,1) por ticker (pacote opcional `arch`).
+
+Diferente dos demais estimadores, o GARCH é um ajuste de máxima
+verossimilhança por série — não há forma em painel. O import de `arch` é
+adiado até o primeiro ajuste; sem o pacote (disponivel() False) as funções
+devolvem NaN, como a página fazia.
+
+A tabela por janela ajusta, para cada ticker, as janelas de 252, 504, ...
+pregões e o período completo — todas terminando no mesmo dia, problemas quase
+iguais. O serviço em lote (vol_garch_janelas / roll_garch_lote):
+
+  - consulta antes o cache de ajustes, chave (ticker, último dia, pregões,
+    hash dos retornos): disco sem expiração, os mesmos dados dão o mesmo ajuste;
+  - manda as faltas para um pool de processos, um ticker por tarefa;
+  - dentro do ticker ajusta as janelas da menor para a maior, cada uma
+    partindo dos parâmetros da anterior (warm start). Em séries com
+    clustering de volatilidade o ótimo é o mesmo do ajuste a frio a menos da
+    tolerância do otimizador (vol final com diferença relativa < 1e-3); sem
+    clustering a verossimilhança é plana e o warm start pode parar em outro
+    ponto, de verossimilhança igual ou maior.
+
+Com o resultado no cache, a vol condicional vem de model.fix(parâmetros) —
+sem otimização.
+
+A chave do cache não registra o ponto de partida: o ajuste gravado para uma
+janela é o do primeiro cálculo dela, a frio ou a partir da janela anterior
+conforme quais janelas já estavam no cache. Com a verossimilhança plana o
+valor guardado pode, portanto, diferir (dentro da observação acima) do que
+um ajuste em outra ordem daria — e é esse que fica, sem expiração.
+"""
+from __future__ import annotations
+
+import importlib.util
+import os
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from datetime import date
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from src.cache import hash_estavel, memoizar
+from src.volatility.estimadores import FA
+
+MIN_ROLLING = 100  # retornos mínimos para a série condicional do gráfico
+MIN_PERIODO = 60   # retornos mínimos para a vol condicional de uma janela
+
+
+@lru_cache(maxsize=1)
+def disponivel() -> bool:
+    return importlib.util.find_spec("arch") is not None
+
+
+@dataclass(frozen=True)
+class AjusteGarch:
+    """Parâmetros (mu, omega, alpha[1], beta[1]) e vol condicional do último dia (% diário)."""
+    params: tuple[float, ...]
+    vol_final: float
+
+
+# ---------------------------------------------------------------------------
+# Ajuste de uma série
+# ---------------------------------------------------------------------------
+
+def _modelo(lr_pct: np.ndarray):
+    from arch import arch_model
+
+    return arch_model(lr_pct, vol="Garch", p=1, q=1, dist="normal", rescale=False)
+
+
+def ajustar(lr_pct: np.ndarray, inicial: tuple[float, ...] | None = None) -> AjusteGarch:
+    """Ajusta o GARCH(1,1) aos retornos em % (inicial = warm start do otimizador)."""
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        res = _modelo(lr_pct).fit(
+            disp="off", starting_values=None if inicial is None else np.asarray(inicial),
+        )
+    return AjusteGarch(tuple(float(p) for p in res.params), float(res.conditional_volatility[-1]))
+
+
+def volatilidade_condicional(lr_pct: np.ndarray, ajuste: AjusteGarch) -> np.ndarray:
+    """Série de vol condicional (% diário) dos retornos com parâmetros já ajustados."""
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        return np.asarray(_modelo(lr_pct).fix(np.asarray(ajuste.params)).conditional_volatility)
+
+
+def _ajustar_aninhadas(
+    janelas: list[np.ndarray], inicial: tuple[float, ...] | None = None,
+) -> list[AjusteGarch]:
+    """Worker do pool: janelas de um ticker em ordem crescente, cada uma
+    partindo dos parâmetros da anterior."""
+    ajustes = []
+    for lr in janelas:
+        ajuste = ajustar(lr, inicial)
+        inicial = ajuste.params
+        ajustes.append(ajuste)
+    return ajustes
+
+
+@memoizar(ttl=None, max_itens=4096, disco=True)
+def ajuste_garch(ticker: str, fim: date, n: int, hash_dados: str, _lr=None, _inicial=None) -> AjusteGarch:
+    """
+    Ajuste de uma janela com cache; os retornos (_lr) não entram na chave —
+    hash_dados os identifica. Sem _lr, só responde do cache (ValueError na
+    falta). Em lote, use vol_garch_janelas.
+    """
+    if _lr is None:
+        raise ValueError(
+            f"ajuste_garch({ticker}, {fim}, {n}): ajuste fora do cache e sem _lr para ajustar. "
+            "Passe os retornos da janela em _lr ou use ajuste_garch.em_cache."
+        )
+    return ajustar(_lr, _inicial)
+
+
+# ---------------------------------------------------------------------------
+# Lote: cache + pool de processos
+# ---------------------------------------------------------------------------
+
+def _retornos(df: pd.DataFrame) -> pd.Series:
+    """Log-retornos em % com NaN (1º pregão, fechamento faltando) — como a página."""
+    return np.log(df["Close"] / df["Close"].shift(1)) * 100
+
+
+def _janela(r: pd.Series, n: int) -> pd.Series:
+    """Retornos do recorte df.iloc[-n:]: os n−1 últimos, sem NaN."""
+    return r.iloc[len(r) - n + 1:].dropna() if n > 1 else r.iloc[:0]
+
+
+def _ajustar_lote(pedidos: dict[str, tuple[date, list[tuple[int, np.ndarray]]]],
+                  max_workers: int | None) -> dict[tuple[str, int], AjusteGarch]:
+    """
+    pedidos: ticker → (último dia, [(pregões, retornos da janela)]).
+    Devolve os ajustes de todas as janelas, do cache ou recém-ajustados.
+    """
+    ajustes: dict[tuple[str, int], AjusteGarch] = {}
+    faltas: dict[str, list[tuple[int, np.ndarray, str]]] = {}
+    iniciais: dict[str, tuple[float, ...]] = {}
+    for ticker, (fim, janelas) in pedidos.items():
+        for n, lr in sorted(janelas, key=lambda j: j[0]):
+            h = hash_estavel(lr)
+            achou, ajuste = ajuste_garch.em_cache(ticker, fim, n, h)
+            if achou:
+                ajustes[(ticker, n)] = ajuste
+                iniciais.setdefault(ticker, ajuste.params)
+            else:
+                faltas.setdefault(ticker, []).append((n, lr, h))
+    if not faltas:
+        return ajustes
+
+    tickers = list(faltas)
+    n_workers = min(len(tickers), max_workers or os.cpu_count() or 1)
+    tarefas = [([lr for _, lr, _ in faltas[t]], iniciais.get(t)) for t in tickers]
+    if n_workers <= 1:
+        resultados = [_ajustar_aninhadas(*tarefa) for tarefa in tarefas]
+    else:
+        with ProcessPoolExecutor(max_workers=n_workers) as ex:
+            resultados = list(ex.map(_ajustar_aninhadas, *zip(*tarefas)))
+
+    for ticker, ajustes_t in zip(tickers, resultados):
+        fim = pedidos[ticker][0]
+        for (n, _, h), ajuste in zip(faltas[ticker], ajustes_t):
+            ajuste_garch.gravar(ajuste, ticker, fim, n, h)
+            ajustes[(ticker, n)] = ajuste
+    return ajustes
+
+
+def vol_garch_janelas(
+    series: dict[str, pd.DataFrame],
+    comprimentos: dict[str, list[int]],
+    max_workers: int | None = None,
+) -> dict[tuple[str, int], float]:
+    """
+    Vol condicional final anualizada do GARCH ajustado em df.iloc[-n:] para
+    cada ticker e cada n de comprimentos[ticker] (a vol_periodo_garch de cada
+    recorte). NaN com menos de MIN_PERIODO retornos ou sem `arch`.
+    max_workers=1 ajusta em série, sem pool.
+    """
+    saida = {(t, n): np.nan for t, ns in comprimentos.items() for n in ns}
+    if not disponivel():
+        return saida
+    pedidos = {}
+    for t, ns in comprimentos.items():
+        df = series[t]
+        if df.empty:
+            continue
+        r = _retornos(df)
+        janelas = [(n, _janela(r, n).to_numpy()) for n in sorted(set(ns))]
+        janelas = [(n, lr) for n, lr in janelas if len(lr) >= MIN_PERIODO]
+        if janelas:
+            pedidos[t] = (df.index[-1].date(), janelas)
+    for chave, ajuste in _ajustar_lote(pedidos, max_workers).items():
+        saida[chave] = ajuste.vol_final / 100 * np.sqrt(FA)
+    return saida
+
+
+def roll_garch_lote(
+    series: dict[str, pd.DataFrame],
+    max_workers: int | None = None,
+) -> dict[str, pd.Series]:
+    """Vol condicional anualizada ajustada em toda a série de cada ticker (roll_garch em lote)."""
+    saida = {t: pd.Series(np.nan, index=df.index) for t, df in series.items()}
+    if not disponivel():
+        return saida
+    retornos = {t: _retornos(df).dropna() for t, df in series.items()}
+    pedidos = {
+        t: (series[t].index[-1].date(), [(len(series[t]), r.to_numpy())])
+        for t, r in retornos.items() if len(r) >= MIN_ROLLING
+    }
+    for (t, _), ajuste in _ajustar_lote(pedidos, max_workers).items():
+        r = retornos[t]
+        cond = pd.Series(volatilidade_condicional(r.to_numpy(), ajuste) / 100 * np.sqrt(FA), index=r.index)
+        saida[t] = cond.reindex(series[t].index)
+    return saida
+
+
+# ---------------------------------------------------------------------------
+# Um ticker (mesma interface das funções da página)
+# ---------------------------------------------------------------------------
+
+def roll_garch(df: pd.DataFrame) -> pd.Series:
+    """Volatilidade condicional anualizada, ajustada em todo o período de `df`."""
+    return roll_garch_lote({"": df}, max_workers=1)[""]
+
+
+def vol_periodo_garch(df: pd.DataFrame) -> float:
+    """GARCH(1,1) ajustado sobre o recorte — vol condicional final, anualizada."""
+    return vol_garch_janelas({"": df}, {"": [len(df)]}, max_workers=1)[("", len(df))]
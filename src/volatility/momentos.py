@@ -0,0 +1,230 @@
+# src/volatility/momentos.py
+"""
+Termos diários e momentos acumulados dos estimadores de volatilidade.
+
+Todo estimador "de média" é uma soma de termos diários numa janela:
+
+  historica / YZ   1º e 2º momentos de ln C/C₋₁, ln O/C₋₁ e ln C/O (variâncias)
+  parkinson        Σ ln(H/L)²
+  garman_klass     Σ 0,5·ln(H/L)² − (2·ln 2 − 1)·ln(C/O)²
+  rogers_satchell  Σ ln(H/O)·ln(H/C) + ln(L/O)·ln(L/C)
+
+Momentos guarda, uma vez por painel, as somas acumuladas (prefixos) de cada
+termo, do seu quadrado e da contagem de valores válidos. Qualquer janela vira
+uma subtração de duas linhas:
+
+  - rolling de janela j: P[t+1] − P[t+1−j] para todas as linhas — O(T·N) por j
+  - período dos últimos n pregões: P[T] − P[T−n] — O(N) por janela
+
+Variâncias saem de Σx e Σx² com cada coluna centrada na sua média global
+antes de acumular (evita o cancelamento de Σx² − (Σx)²/n).
+
+O EWMA final de cada janela também sai de uma passada: termina sempre no
+último pregão, então o peso de cada retorno, (1−λ)·λ^(válidos depois dele),
+não depende do início da janela — basta uma soma acumulada de trás para frente.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from functools import cached_property
+
+import numpy as np
+
+from src.volatility.painel import Alinhado
+
+_LN2 = np.log(2)
+
+
+def _log(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.log(a / b)
+
+
+def _defasar(m: np.ndarray) -> np.ndarray:
+    """m.shift(1) na vertical."""
+    d = np.empty_like(m)
+    d[0] = np.nan
+    d[1:] = m[:-1]
+    return d
+
+
+def _acumular(x: np.ndarray) -> np.ndarray:
+    """Soma acumulada vertical com linha de zeros no topo: soma de [i, j) = s[j] − s[i]."""
+    s = np.zeros((x.shape[0] + 1,) + x.shape[1:], dtype=x.dtype)
+    np.cumsum(x, axis=0, out=s[1:])
+    return s
+
+
+def alfa_ewm(lam: float) -> float:
+    """alpha efetivo de ewm(alpha=1−λ): o pandas converte para centro de massa e volta."""
+    alfa = 1.0 - lam
+    com = (1.0 - alfa) / alfa
+    return 1.0 / (1.0 + com)
+
+
+# ---------------------------------------------------------------------------
+# Termos diários (matrizes T × N alinhadas)
+# ---------------------------------------------------------------------------
+
+class Termos:
+    """
+    Termos diários de todos os estimadores sobre a matriz alinhada, calculados
+    na primeira consulta e reaproveitados entre métodos e janelas.
+    """
+
+    def __init__(self, a: Alinhado):
+        self.a = a
+
+    @cached_property
+    def log_retornos(self) -> np.ndarray:
+        return _log(self.a.close, _defasar(self.a.close))
+
+    @cached_property
+    def log_hl2(self) -> np.ndarray:
+        return _log(self.a.high, self.a.low) ** 2
+
+    @cached_property
+    def log_co(self) -> np.ndarray:
+        """Intraday ln C/O."""
+        return _log(self.a.close, self.a.open)
+
+    @cached_property
+    def log_oc(self) -> np.ndarray:
+        """Overnight ln O/C₋₁."""
+        return _log(self.a.open, _defasar(self.a.close))
+
+    @cached_property
+    def garman_klass(self) -> np.ndarray:
+        return 0.5 * self.log_hl2 - (2 * _LN2 - 1) * self.log_co ** 2
+
+    @cached_property
+    def rogers_satchell(self) -> np.ndarray:
+        a = self.a
+        return _log(a.high, a.open) * _log(a.high, a.close) + _log(a.low, a.open) * _log(a.low, a.close)
+
+
+# ---------------------------------------------------------------------------
+# Momentos acumulados
+# ---------------------------------------------------------------------------
+
+@dataclass
+class _Prefixo:
+    s1: np.ndarray             # Σ (x − centro)
+    s2: np.ndarray | None      # Σ (x − centro)²; só termos de variância
+    n: np.ndarray              # contagem de valores válidos
+    centro: np.ndarray         # média global da coluna (0 sem 2º momento)
+
+
+def _movel(p: np.ndarray, janela: int) -> np.ndarray:
+    """Soma da janela de `janela` linhas terminando em cada linha (NaN antes da 1ª completa)."""
+    T = p.shape[0] - 1
+    saida = np.full((T,) + p.shape[1:], np.nan)
+    if 0 < janela <= T:
+        saida[janela - 1:] = p[janela:] - p[:-janela]
+    return saida
+
+
+class Momentos:
+    """
+    Prefixos dos termos de Termos, criados na primeira consulta de cada termo.
+
+    Rolling (*_movel): janela com algum NaN → NaN, como rolling(janela) do
+    pandas. Período (media/variancia/ewma_final): linhas [ini[j], T) de cada
+    coluna, ignorando NaN como Series.mean()/var() após dropna.
+    """
+
+    def __init__(self, termos: Termos):
+        self.termos = termos
+        self.T, self.N = termos.a.close.shape
+        self._prefixos: dict[tuple[str, bool], _Prefixo] = {}
+        self._ewma: dict[float, tuple] = {}
+
+    def _prefixo(self, nome: str, segundo: bool) -> _Prefixo:
+        chave = (nome, segundo)
+        if chave not in self._prefixos:
+            x = getattr(self.termos, nome)
+            finito = np.isfinite(x)
+            n = _acumular(finito.astype(np.int64))
+            x0 = np.where(finito, x, 0.0)
+            if segundo:
+                centro = x0.sum(axis=0) / np.maximum(n[-1], 1)
+                x0 = np.where(finito, x - centro, 0.0)
+            else:
+                centro = np.zeros(self.N)
+            self._prefixos[chave] = _Prefixo(
+                s1=_acumular(x0), s2=_acumular(x0 * x0) if segundo else None, n=n, centro=centro,
+            )
+        return self._prefixos[chave]
+
+    # -----------------------------------------------------------------------
+    # Rolling
+    # -----------------------------------------------------------------------
+
+    def media_movel(self, nome: str, janela: int) -> np.ndarray:
+        p = self._prefixo(nome, False)
+        media = _movel(p.s1, janela) / janela
+        media[~(_movel(p.n, janela) >= janela)] = np.nan
+        return media
+
+    def variancia_movel(self, nome: str, janela: int) -> np.ndarray:
+        """Variância amostral (ddof=1) móvel."""
+        if janela < 2:
+            return np.full((self.T, self.N), np.nan)
+        p = self._prefixo(nome, True)
+        s1 = _movel(p.s1, janela)
+        var = np.maximum((_movel(p.s2, janela) - s1 * s1 / janela) / (janela - 1), 0.0)
+        var[~(_movel(p.n, janela) >= janela)] = np.nan
+        return var
+
+    # -----------------------------------------------------------------------
+    # Período: linhas [ini, T) de cada coluna
+    # -----------------------------------------------------------------------
+
+    def _faixa(self, p: np.ndarray, ini: np.ndarray) -> np.ndarray:
+        colunas = np.arange(self.N)
+        return p[self.T, colunas] - p[np.clip(ini, 0, self.T), colunas]
+
+    def media(self, nome: str, ini: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """(média, contagem) de cada coluna nas linhas [ini, T)."""
+        p = self._prefixo(nome, False)
+        n = self._faixa(p.n, ini)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            media = self._faixa(p.s1, ini) / n
+        return np.where(n > 0, media, np.nan), n
+
+    def variancia(self, nome: str, ini: np.ndarray) -> np.ndarray:
+        """Variância amostral (ddof=1) de cada coluna nas linhas [ini, T)."""
+        p = self._prefixo(nome, True)
+        n = self._faixa(p.n, ini)
+        s1 = self._faixa(p.s1, ini)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            var = (self._faixa(p.s2, ini) - s1 * s1 / n) / (n - 1)
+        return np.where(n > 1, np.maximum(var, 0.0), np.nan)
+
+    def ewma_final(self, lam: float, ini: np.ndarray) -> np.ndarray:
+        """
+        Último valor de ewm(alpha=1−λ, adjust=False).mean() sobre os r² válidos
+        das linhas [ini, T) — o 1º valor pesa λ^(m−1), os demais (1−λ)·λ^(válidos depois).
+        """
+        if lam not in self._ewma:
+            r2 = self.termos.log_retornos ** 2
+            valido = np.isfinite(r2)
+            alfa = alfa_ewm(lam)
+            # válidos depois de cada linha; λ^depois sem depender do início da janela
+            depois = valido.sum(axis=0) - np.cumsum(valido, axis=0)
+            termo = np.where(valido, (1.0 - alfa) ** depois * np.where(valido, r2, 0.0), 0.0)
+            sufixo = np.zeros((self.T + 1, self.N))
+            sufixo[:-1] = np.cumsum(termo[::-1], axis=0)[::-1]
+            # 1º válido a partir de cada linha (T se nenhum)
+            linha = np.where(valido, np.arange(self.T)[:, None], self.T)
+            proximo = np.full((self.T + 1, self.N), self.T)
+            proximo[:-1] = np.minimum.accumulate(linha[::-1], axis=0)[::-1]
+            self._ewma[lam] = (r2, depois, sufixo, proximo, alfa)
+        r2, depois, sufixo, proximo, alfa = self._ewma[lam]
+        colunas = np.arange(self.N)
+        primeiro = proximo[np.clip(ini, 0, self.T), colunas]
+        ok = primeiro < self.T
+        i = np.where(ok, primeiro, 0)
+        with np.errstate(invalid="ignore"):
+            valor = (1.0 - alfa) ** depois[i, colunas] * r2[i, colunas] + alfa * sufixo[i + 1, colunas]
+        return np.where(ok, valor, np.nan)
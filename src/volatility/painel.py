@@ -0,0 +1,168 @@
+# src/volatility/painel.py
+"""
+Painel OHLC datas × tickers para os estimadores de volatilidade.
+
+O download do yfinance chega com colunas MultiIndex (campo, ticker) e um
+calendário único para todos os tickers — um ativo americano ganha linhas
+vazias nos feriados da B3 e vice-versa. A página fazia, por ticker,
+`dados.xs(t, axis=1, level=1).dropna(how='all')`: cada série anda só sobre os
+seus próprios pregões.
+
+Painel guarda as matrizes Open/High/Low/Close (T × N, NaN onde não houve
+pregão) e `alinhado()` reproduz aquele dropna para todos os tickers de uma
+vez: empurra os pregões válidos de cada coluna para o fim da matriz, na
+ordem original. Na matriz alinhada
+
+  - janelas rolling andam só sobre pregões do próprio ticker;
+  - "os últimos N pregões" de todos os tickers são as últimas N linhas.
+
+`espalhar()` devolve um resultado alinhado para as datas originais.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+CAMPOS = ("Open", "High", "Low", "Close")
+
+
+@dataclass
+class Alinhado:
+    """Matrizes com os pregões de cada ticker no fim (NaN no topo)."""
+    open: np.ndarray
+    high: np.ndarray
+    low: np.ndarray
+    close: np.ndarray
+    n_validos: np.ndarray                      # pregões por ticker
+    _origem: tuple = field(repr=False)         # (linhas, colunas) dos pregões no painel
+    _destino: np.ndarray = field(repr=False)   # linha de cada pregão na matriz alinhada
+
+    def espalhar(self, resultado: np.ndarray) -> np.ndarray:
+        """Resultado alinhado (T × N) → linhas das datas originais do painel."""
+        linhas, colunas = self._origem
+        saida = np.full(resultado.shape, np.nan)
+        saida[linhas, colunas] = resultado[self._destino, colunas]
+        return saida
+
+
+@dataclass
+class Painel:
+    """
+    OHLC de vários tickers sobre um índice de datas comum.
+
+    open/high/low/close: float64 (T × N); NaN onde o ticker não negociou
+    volume: opcional — só participa da definição de pregão válido
+    """
+    datas: pd.DatetimeIndex
+    tickers: list[str]
+    open: np.ndarray
+    high: np.ndarray
+    low: np.ndarray
+    close: np.ndarray
+    volume: np.ndarray | None = None
+
+    # -----------------------------------------------------------------------
+    # Construção
+    # -----------------------------------------------------------------------
+
+    @classmethod
+    def de_yfinance(cls, dados: pd.DataFrame, tickers: list[str] | None = None) -> "Painel":
+        """
+        Painel a partir do download do yfinance (colunas (campo, ticker)).
+        `tickers` fixa a ordem e descarta os que não vieram no download.
+        """
+        if not isinstance(dados.columns, pd.MultiIndex):
+            raise ValueError("Esperado DataFrame com colunas MultiIndex (campo, ticker).")
+        disponiveis = list(dict.fromkeys(dados.columns.get_level_values(1)))
+        tickers = [t for t in (tickers or disponiveis) if t in disponiveis]
+
+        def _campo(nome: str) -> np.ndarray | None:
+            if nome not in dados.columns.get_level_values(0):
+                return None
+            return dados[nome].reindex(columns=tickers).to_numpy(dtype=float)
+
+        faltando = [c for c in CAMPOS if _campo(c) is None]
+        if faltando:
+            raise ValueError(f"Campos ausentes no download: {faltando}")
+        return cls(
+            datas=pd.DatetimeIndex(dados.index),
+            tickers=tickers,
+            open=_campo("Open"), high=_campo("High"), low=_campo("Low"), close=_campo("Close"),
+            volume=_campo("Volume"),
+        )
+
+    @classmethod
+    def de_ohlc(cls, df: pd.DataFrame, ticker: str = "") -> "Painel":
+        """Painel de um ticker a partir de um DataFrame com colunas Open/High/Low/Close."""
+        def _col(nome: str) -> np.ndarray:
+            return df[nome].to_numpy(dtype=float).reshape(-1, 1)
+
+        return cls(
+            datas=pd.DatetimeIndex(df.index),
+            tickers=[ticker],
+            open=_col("Open"), high=_col("High"), low=_col("Low"), close=_col("Close"),
+            volume=_col("Volume") if "Volume" in df.columns else None,
+        )
+
+    # -----------------------------------------------------------------------
+    # Consultas
+    # -----------------------------------------------------------------------
+
+    @property
+    def shape(self) -> tuple[int, int]:
+        return self.close.shape
+
+    def valido(self) -> np.ndarray:
+        """Pregão válido = linha não inteiramente NaN (o dropna(how='all') da página)."""
+        campos = [self.open, self.high, self.low, self.close]
+        if self.volume is not None:
+            campos.append(self.volume)
+        v = ~np.isnan(campos[0])
+        for c in campos[1:]:
+            v |= ~np.isnan(c)
+        return v
+
+    def recortar(self, ini=None, fim=None) -> "Painel":
+        """Linhas com data em [ini, fim] (limites inclusivos, como df.loc[ini:fim])."""
+        i0 = 0 if ini is None else self.datas.searchsorted(pd.Timestamp(ini), side="left")
+        i1 = len(self.datas) if fim is None else self.datas.searchsorted(pd.Timestamp(fim), side="right")
+        fatia = slice(i0, i1)
+        return Painel(
+            datas=self.datas[fatia], tickers=list(self.tickers),
+            open=self.open[fatia], high=self.high[fatia], low=self.low[fatia], close=self.close[fatia],
+            volume=None if self.volume is None else self.volume[fatia],
+        )
+
+    def ticker(self, ticker: str) -> pd.DataFrame:
+        """OHLC de um ticker só nos seus pregões (equivale ao xs + dropna da página)."""
+        j = self.tickers.index(ticker)
+        v = self.valido()[:, j]
+        dados = {"Open": self.open[v, j], "High": self.high[v, j], "Low": self.low[v, j], "Close": self.close[v, j]}
+        if self.volume is not None:
+            dados["Volume"] = self.volume[v, j]
+        return pd.DataFrame(dados, index=self.datas[v])
+
+    def alinhado(self) -> Alinhado:
+        """Pregões de cada ticker empurrados para o fim, na ordem original (ver módulo)."""
+        valido = self.valido()
+        T = valido.shape[0]
+        n_validos = valido.sum(axis=0)
+        # Pregão i-ésimo (0-based) do ticker j vai para a linha T − n_j + i
+        linhas, colunas = np.nonzero(valido)
+        destino = (T - n_validos + np.cumsum(valido, axis=0) - 1)[linhas, colunas]
+
+        def _alinhar(m: np.ndarray) -> np.ndarray:
+            a = np.full(m.shape, np.nan)
+            a[destino, colunas] = m[linhas, colunas]
+            return a
+
+        return Alinhado(
+            open=_alinhar(self.open), high=_alinhar(self.high), low=_alinhar(self.low), close=_alinhar(self.close),
+            n_validos=n_validos, _origem=(linhas, colunas), _destino=destino,
+        )
+
+    def para_dataframe(self, valores: np.ndarray) -> pd.DataFrame:
+        """Matriz T × N nas datas originais → DataFrame datas × tickers."""
+        return pd.DataFrame(valores, index=self.datas, columns=list(self.tickers))
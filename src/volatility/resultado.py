@@ -0,0 +1,168 @@
+# src/volatility/resultado.py
+"""
+Resultado único de uma consulta da página Volatilidade.
+
+A página calculava a tabela por janela duas vezes — no Excel e na aba — e o
+GARCH(1,1) era reajustado em cada passada. calcular_volatilidade faz o
+download e todas as contas uma vez, memoizado em (tickers, datas, métodos,
+λ); abas e Excel (exportar.gerar_excel_volatilidade) só renderizam o
+ResultadoVolatilidade. As séries rolling de todas as janelas do seletor saem
+dos mesmos momentos acumulados — trocar a janela do gráfico não recalcula nada.
+As matrizes de correlação (amostral e EWMA) saem do engine incremental de
+covariancia.py, também uma vez por consulta.
+
+fonte="b3" troca o auto_adjust do Yahoo, para os tickers B3, pelo OHLC do
+COTAHIST ajustado por eventos e proventos (src/tsr/ajuste.py); tickers de
+fora da B3 continuam vindo do Yahoo.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import date, timedelta
+
+import pandas as pd
+
+from src.cache import memoizar, nao_vazio
+from src.volatility.covariancia import correlacao, covariancia_ewma, log_retornos
+from src.volatility.estimadores import LAMBDA_EWMA, vol_janelas, vol_rolling_janelas
+from src.volatility.painel import Painel
+
+JANELAS_ROLLING = (21, 42, 63, 126)  # opções do gráfico rolling da página
+FONTES = ("yahoo", "b3")
+
+
+@memoizar(ttl=12 * 3600, max_itens=32, disco=True, cachear_se=nao_vazio)
+def baixar_ohlc(yf_tickers: tuple[str, ...], dt_ini: date, dt_fim: date) -> pd.DataFrame:
+    """
+    OHLC ajustado (auto_adjust) do Yahoo em [dt_ini, dt_fim], colunas
+    (campo, ticker) mesmo com um ticker só. Vazio em caso de falha.
+    """
+    import yfinance as yf  # pesado: só no primeiro download
+
+    try:
+        dados = yf.download(list(yf_tickers), start=dt_ini, end=dt_fim + timedelta(days=1),
+                            progress=False, auto_adjust=True)
+    except Exception:
+        return pd.DataFrame()
+    if dados.empty:
+        return pd.DataFrame()
+    if not isinstance(dados.columns, pd.MultiIndex):
+        dados.columns = pd.MultiIndex.from_tuples([(c, yf_tickers[0]) for c in dados.columns])
+    return dados
+
+
+def baixar_ohlc_b3(
+    yf_tickers: tuple[str, ...], dt_ini: date, dt_fim: date, df_empresas: pd.DataFrame | None = None,
+) -> pd.DataFrame:
+    """
+    Como baixar_ohlc, com os tickers B3 (sufixo .SA) vindos do COTAHIST
+    ajustado (tsr.ajuste.painel_ajustado) e os demais do Yahoo.
+    """
+    from src.tsr.ajuste import painel_ajustado  # COTAHIST/polars: só nesta fonte
+
+    b3 = {t.removesuffix(".SA"): t for t in yf_tickers if t.endswith(".SA")}
+    outros = tuple(t for t in yf_tickers if not t.endswith(".SA"))
+    frames = []
+    if b3:
+        dados = painel_ajustado(list(b3), dt_ini, dt_fim,
+                                df_empresas if df_empresas is not None else pd.DataFrame(),
+                                logger=lambda _m: None)
+        if not dados.empty:
+            frames.append(dados.rename(columns=b3, level=1))
+    if outros:
+        dados = baixar_ohlc(outros, dt_ini, dt_fim)
+        if not dados.empty:
+            frames.append(dados)
+    if not frames:
+        return pd.DataFrame()
+    return pd.concat(frames, axis=1).sort_index()
+
+
+@dataclass(frozen=True)
+class ResultadoVolatilidade:
+    """
+    Tudo o que a página mostra e exporta. Compartilhado pelo cache entre
+    reruns e sessões — somente leitura.
+
+    painel:  OHLC baixado (inclui o aquecimento das janelas rolling antes de dt_ini)
+    tabela:  vol_janelas no período [dt_ini, dt_fim] (coluna Ticker = símbolo Yahoo)
+    rolling: {janela: {método: DataFrame datas × tickers}} já recortado no
+             período, uma entrada por janela de JANELAS_ROLLING
+    correlacao:      correlação dos log-retornos do período, só nos dias com
+                     todos os tickers (o dropna().corr() que a página fazia)
+    correlacao_ewma: correlação EWMA (λ) no último dia, par a par
+    """
+    painel: Painel
+    dt_ini: date
+    dt_fim: date
+    metodos: tuple[str, ...]
+    lam: float
+    tabela: pd.DataFrame
+    rolling: dict[int, dict[str, pd.DataFrame]]
+    correlacao: pd.DataFrame
+    correlacao_ewma: pd.DataFrame
+
+    @property
+    def tickers(self) -> list[str]:
+        return self.painel.tickers
+
+    def periodo(self, ticker: str) -> pd.DataFrame:
+        """OHLC do ticker no período, só nos seus pregões."""
+        return self.painel.ticker(ticker).loc[pd.Timestamp(self.dt_ini):pd.Timestamp(self.dt_fim)]
+
+    def fechamentos(self) -> pd.DataFrame:
+        """Fechamentos do período, datas × tickers (NaN fora dos pregões)."""
+        p = self.painel.recortar(self.dt_ini, self.dt_fim)
+        return p.para_dataframe(p.close)
+
+    def retornos(self) -> pd.DataFrame:
+        """Log-retornos do período, datas × tickers (NaN sem pregão no dia ou no anterior)."""
+        return log_retornos(self.painel.recortar(self.dt_ini, self.dt_fim))
+
+
+@memoizar(ttl=3600, max_itens=16, cachear_se=nao_vazio)
+def calcular_volatilidade(
+    yf_tickers: tuple[str, ...],
+    dt_ini: date,
+    dt_fim: date,
+    metodos: tuple[str, ...],
+    lam: float = LAMBDA_EWMA,
+    fonte: str = "yahoo",
+    _df_empresas: pd.DataFrame | None = None,
+) -> ResultadoVolatilidade | None:
+    """
+    Baixa e calcula tabela por janela, séries rolling (todas as janelas de
+    JANELAS_ROLLING) de todos os tickers e métodos (GARCH incluído, um ajuste
+    por ticker e janela) e as correlações. None quando o download não trouxe nada.
+
+    fonte: "yahoo" (auto_adjust) ou "b3" (COTAHIST ajustado; _df_empresas
+    mapeia ticker → código na API de proventos, ver ticker_service.carregar_empresas)
+    """
+    if fonte not in FONTES:
+        raise ValueError(f"Fonte de preços inválida: {fonte}. Válidas: {list(FONTES)}")
+    # Aquecimento: a série rolling da maior janela já começa cheia em dt_ini
+    dt_ini_dl = dt_ini - timedelta(days=max(JANELAS_ROLLING) * 3)
+    if fonte == "b3":
+        dados = baixar_ohlc_b3(tuple(yf_tickers), dt_ini_dl, dt_fim, _df_empresas)
+    else:
+        dados = baixar_ohlc(tuple(yf_tickers), dt_ini_dl, dt_fim)
+    if dados.empty:
+        return None
+    painel = Painel.de_yfinance(dados, list(yf_tickers))
+    ini, fim = pd.Timestamp(dt_ini), pd.Timestamp(dt_fim)
+    retornos = log_retornos(painel.recortar(dt_ini, dt_fim))
+    rolling = {
+        janela: {met: df.loc[ini:fim] for met, df in por_metodo.items()}
+        for janela, por_metodo in vol_rolling_janelas(painel, metodos, JANELAS_ROLLING, lam).items()
+    }
+    return ResultadoVolatilidade(
+        painel=painel,
+        dt_ini=dt_ini,
+        dt_fim=dt_fim,
+        metodos=tuple(metodos),
+        lam=lam,
+        tabela=vol_janelas(painel.recortar(dt_ini, dt_fim), metodos, lam),
+        rolling=rolling,
+        correlacao=correlacao(retornos, completas=True),
+        correlacao_ewma=covariancia_ewma(retornos, lam),
+    )
@@ -0,0 +1,175 @@
+import io
+import os
+import pickle
+import sys
+import time
+import types
+from datetime import date
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.cache import ArgumentoNaoHashavel, estatisticas, hash_estavel, memoizar, nao_vazio
+
+
+def test_hash_estavel_dataframe_e_datas():
+    df = pd.DataFrame({"a": [1, 2], "b": ["x", "y"]})
+    assert hash_estavel(df) == hash_estavel(df.copy())
+    assert hash_estavel(df) != hash_estavel(df.assign(a=[1, 3]))
+    assert hash_estavel(df) != hash_estavel(df.rename(columns={"b": "c"}))
+    assert hash_estavel(date(2024, 1, 2)) != hash_estavel("2024-01-02")
+    assert hash_estavel({"b": 1, "a": 2}) == hash_estavel({"a": 2, "b": 1})
+    assert hash_estavel(np.arange(3)) != hash_estavel(np.arange(3).astype(float))
+    assert hash_estavel(1) != hash_estavel(1.0) != hash_estavel("1")
+    assert hash_estavel(io.BytesIO(b"abc")) == hash_estavel(io.BytesIO(b"abc"))
+
+
+def test_hash_estavel_rejeita_objeto_opaco():
+    with pytest.raises(ArgumentoNaoHashavel):
+        hash_estavel(object())
+
+
+def test_memoizar_hit_miss_e_copia():
+    chamadas = []
+
+    @memoizar(ttl=60)
+    def carregar(d: date, _session=None):
+        chamadas.append(d)
+        return pd.DataFrame({"v": [1.0]})
+
+    df1 = carregar(date(2024, 1, 2), _session=object())
+    df1.loc[0, "v"] = 99.0  # mutação do chamador não contamina o cache
+    df2 = carregar(date(2024, 1, 2), _session=object())
+    carregar(date(2024, 1, 3))
+
+    assert chamadas == [date(2024, 1, 2), date(2024, 1, 3)]
+    assert df2.loc[0, "v"] == 1.0
+    est = carregar.estatisticas
+    assert (est.hits_memoria, est.misses) == (1, 2)
+    assert estatisticas()[carregar.nome] is est
+
+
+def test_memoizar_copia_dataframes_dentro_de_colecoes():
+    @memoizar(ttl=60)
+    def vwaps():
+        return {"VALE3": (10.0, pd.DataFrame({"v": [1.0]})), "PETR4": [pd.Series([2.0])]}
+
+    saida = vwaps()
+    saida["VALE3"][1].loc[0, "v"] = 99.0
+    saida["PETR4"][0].iloc[0] = 99.0
+    de_novo = vwaps()
+    assert de_novo["VALE3"][0] == 10.0 and de_novo["VALE3"][1].loc[0, "v"] == 1.0
+    assert de_novo["PETR4"][0].iloc[0] == 2.0
+    assert de_novo["VALE3"][1] is not saida["VALE3"][1]
+
+
+def test_memoizar_ttl_expira():
+    chamadas = []
+
+    @memoizar(ttl=10)
+    def f(x):
+        chamadas.append(x)
+        return x
+
+    with patch("src.cache.memoizar.time.time", return_value=1000.0):
+        f(1)
+        f(1)
+    with patch("src.cache.memoizar.time.time", return_value=1011.0):
+        f(1)
+    assert len(chamadas) == 2
+    assert f.estatisticas.expirados == 1
+
+
+def test_memoizar_lru_limitado():
+    @memoizar(max_itens=2)
+    def f(x):
+        return x * 2
+
+    for x in (1, 2, 3):
+        f(x)
+    f(1)  # descartado pelo LRU → miss
+    assert f.estatisticas.descartes == 2
+    assert f.estatisticas.misses == 4
+
+
+def test_memoizar_disco_sobrevive_a_memoria():
+    chamadas = []
+
+    @memoizar(ttl=60, disco=True)
+    def f(x):
+        chamadas.append(x)
+        return {"x": x}
+
+    f(1)
+    f._memoria.limpar()  # simula novo processo
+    assert f(1) == {"x": 1}
+    assert len(chamadas) == 1
+    assert f.estatisticas.hits_disco == 1
+
+
+def test_memoizar_disco_varre_chaves_vencidas_ao_gravar():
+    @memoizar(ttl=60, disco=True)
+    def f(x):
+        return x
+
+    f(1)
+    pasta = f._disco.pasta
+    assert len(os.listdir(pasta)) == 1
+    # A chave 1 nunca mais é lida: a gravação seguinte, já vencida ela, a apaga
+    with patch("src.cache.memoizar.time.time", return_value=time.time() + 700):
+        f(2)
+    assert os.listdir(pasta) == [f._chave((2,), {}) + ".pkl"]
+
+
+def test_memoizar_disco_ignora_pickle_de_modulo_removido():
+    chamadas = []
+
+    @memoizar(ttl=60, disco=True)
+    def f(x):
+        chamadas.append(x)
+        return x
+
+    modulo = types.ModuleType("modulo_que_mudou")
+    classe = type("Antiga", (), {"__module__": "modulo_que_mudou"})
+    modulo.Antiga = classe
+    with patch.dict(sys.modules, {"modulo_que_mudou": modulo}):
+        conteudo = pickle.dumps((time.time() + 60, classe()))
+    os.makedirs(f._disco.pasta, exist_ok=True)
+    with open(os.path.join(f._disco.pasta, f._chave((1,), {}) + ".pkl"), "wb") as arq:
+        arq.write(conteudo)
+
+    assert f(1) == 1 and chamadas == [1]
+
+
+def test_memoizar_cachear_se_ignora_falha():
+    chamadas = []
+
+    @memoizar(cachear_se=nao_vazio)
+    def f():
+        chamadas.append(1)
+        return pd.DataFrame()
+
+    f()
+    f()
+    assert len(chamadas) == 2
+
+
+def test_memoizar_em_cache_e_gravar_sem_executar():
+    chamadas = []
+
+    @memoizar(disco=True, cachear_se=lambda v: v is not None)
+    def ajuste(chave: str, n: int, _inicial=None):
+        chamadas.append((chave, n))
+        return {"n": n}
+
+    assert ajuste.em_cache("A", 1) == (False, None)
+    ajuste.gravar({"n": 10}, "A", 1, _inicial=object())
+    ajuste.gravar(None, "B", 1)                       # cachear_se recusa
+    assert ajuste.em_cache("A", 1) == (True, {"n": 10})
+    assert ajuste.em_cache("B", 1) == (False, None)
+    assert ajuste("A", 1) == {"n": 10} and chamadas == []
+
+    ajuste._memoria.limpar()                          # segue valendo pelo disco
+    assert ajuste.em_cache("A", 1) == (True, {"n": 10})
@@ -0,0 +1,92 @@
+import gc
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+
+from src.cache import SharedStore, memoizar
+
+
+def _df():
+    return pd.DataFrame({"data": pd.date_range("2020-01-01", periods=4, freq="MS"),
+                         "valor": [1.0, 2.0, 3.0, 4.0],
+                         "serie": ["a", "b", "c", "d"]})
+
+
+def test_publicar_deduplica_conteudo_igual():
+    s = SharedStore()
+    t1 = s.publicar(_df())
+    t2 = s.publicar(_df())
+    assert t1 is t2
+    assert s.resumo()["tabelas"] == 1
+
+
+def test_visoes_sem_copia_e_isoladas():
+    s = SharedStore()
+    base = s.publicar(_df())
+    v1, v2 = s.visao(base), s.visao(base)
+    assert np.shares_memory(v1["valor"].to_numpy(), v2["valor"].to_numpy())
+
+    v1.loc[0, "valor"] = 99.0  # copy-on-write: só v1 muda
+    assert v2.loc[0, "valor"] == 1.0
+    assert s.visao(base).loc[0, "valor"] == 1.0
+    pd.testing.assert_frame_equal(v2, _df())
+
+
+def test_visao_sem_copy_on_write_copia_de_verdade():
+    s = SharedStore()
+    base = s.publicar(_df())
+    with patch("src.cache.shared_store._copy_on_write", return_value=False):
+        v = s.visao(base)
+        so_valor = s.visao(base, ["valor"])
+    assert not np.shares_memory(v["valor"].to_numpy(), base["valor"].to_numpy())
+    assert not np.shares_memory(so_valor["valor"].to_numpy(), base["valor"].to_numpy())
+    pd.testing.assert_frame_equal(v, _df())
+
+
+def test_objetos_em_lru_limitado():
+    s = SharedStore(max_objetos=2)
+    s.guardar_objeto("a", 1)
+    s.guardar_objeto("b", 2)
+    s.obter_objeto("a")
+    s.guardar_objeto("c", 3)
+    assert s.obter_objeto("b") is None
+    assert (s.obter_objeto("a"), s.obter_objeto("c")) == (1, 3)
+
+
+def test_memoizar_compartilhar_entrega_visoes():
+    @memoizar(compartilhar=True)
+    def carregar():
+        return _df()
+
+    a, b = carregar(), carregar()
+    assert np.shares_memory(a["valor"].to_numpy(), b["valor"].to_numpy())
+    a["valor"] = 0.0
+    assert carregar()["valor"].tolist() == [1.0, 2.0, 3.0, 4.0]
+
+
+def test_publicar_colunas_sem_tipo_arrow():
+    s = SharedStore()
+    df = pd.DataFrame({"x": [1, 2], "meta": [{"a": 1}, [1, 2]]})
+    base = s.publicar(df)
+    v = s.visao(base)
+    v.loc[0, "x"] = 5
+    assert base.loc[0, "x"] == 1
+
+
+def test_visao_continua_gravavel_depois_que_a_base_sai_do_lru():
+    s = SharedStore(max_tabelas=1)
+    v = s.visao(s.publicar(_df()))
+    so_valor = s.visao(s.publicar(_df()), ["valor"])
+    s.publicar(pd.DataFrame({"x": [1, 2]}))  # tira a base de _df() do LRU
+    gc.collect()
+    assert s.resumo()["aposentadas"] == 1
+
+    v.loc[0, "valor"] = 99.0  # sem a base viva seria escrita no buffer Arrow (somente leitura)
+    so_valor.loc[1, "valor"] = 7.0
+    assert v["valor"].tolist() == [99.0, 2.0, 3.0, 4.0]
+    assert so_valor["valor"].tolist() == [1.0, 7.0, 3.0, 4.0]
+
+    del v, so_valor
+    gc.collect()
+    assert s.resumo()["aposentadas"] == 0
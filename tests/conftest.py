@@ -0,0 +1,12 @@
+import pytest
+
+from src.cache import limpar_tudo
+
+
+@pytest.fixture(autouse=True)
+def _cache_isolado(tmp_path_factory, monkeypatch):
+    """Cada teste começa com cache vazio e disco em pasta temporária própria."""
+    monkeypatch.setenv("SRC_CACHE_DIR", str(tmp_path_factory.mktemp("cache")))
+    limpar_tudo()
+    yield
+    limpar_tudo()
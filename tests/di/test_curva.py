@@ -0,0 +1,106 @@
+import math
+from datetime import date
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src import b3_engine, di_service
+from src.di import MotorCurvaDI, PainelDI, interpolar_flat_forward
+
+CONTRATOS = ["DI1N23", "DI1F24", "DI1N24", "DI1F25", "DI1F26", "DI1F27", "DI1F29"]
+DIAS = b3_engine.listar_dias_uteis(date(2023, 3, 1), date(2023, 9, 29))
+
+
+def _painel(seed=0):
+    rng = np.random.default_rng(seed)
+    pontos = [(d, c, round(float(13.5 - 0.4 * i + rng.normal(0, 0.1)), 3))
+              for d in DIAS for i, c in enumerate(CONTRATOS) if rng.random() > 0.1]
+    datas, contratos, taxas = zip(*pontos)
+    return PainelDI.de_pontos(datas, contratos, np.array(taxas))
+
+
+def _flat_forward_ref(vertices, du):
+    """Uma data, um du: trecho a trecho, como na planilha."""
+    pontos = [(0, 0.0)] + [(d, -d / 252 * math.log(1 + t / 100)) for d, t in sorted(vertices)]
+    i = max(j for j, (d, _) in enumerate(pontos) if d <= du)
+    i = min(i, len(pontos) - 2)
+    (x0, y0), (x1, y1) = pontos[i], pontos[i + 1]
+    log_p = y0 + (y1 - y0) * (du - x0) / (x1 - x0)
+    return (math.exp(-log_p * 252 / du) - 1) * 100
+
+
+def test_du_do_painel_igual_ao_do_servico():
+    p = _painel()
+    assert p.contratos == CONTRATOS
+    for t in (0, 50, len(p.datas) - 1):
+        d = p.datas[t].date()
+        esperado = [di_service.calcular_dias_uteis_di(c, d) or np.nan for c in CONTRATOS]
+        np.testing.assert_array_equal(p.du[t], esperado)
+    # DI1N23 vence em 03/07/2023: depois disso sai da curva
+    assert np.isnan(p.taxas[p.linha(date(2023, 7, 3)), 0])
+
+
+def test_flat_forward_vetorizado_igual_ao_laco_por_data():
+    p = _painel()
+    alvos = np.array([1, 10, 21, 63, 126, 252, 504, 756, 1008, 1500])
+    taxas = interpolar_flat_forward(p.du, p.taxas, alvos)
+    for t in range(0, len(p.datas), 7):
+        vertices = [(d, x) for d, x in zip(p.du[t], p.taxas[t]) if np.isfinite(x)]
+        np.testing.assert_allclose(taxas[t], [_flat_forward_ref(vertices, q) for q in alvos], rtol=1e-12)
+        # Nos vértices, a própria taxa do contrato
+        np.testing.assert_allclose(interpolar_flat_forward(p.du[t], p.taxas[t], [d for d, _ in vertices])[0],
+                                   [x for _, x in vertices], rtol=1e-12)
+    # Alvos diferentes por data (T × Q) e linha sem vértice
+    por_data = np.tile(alvos, (len(p.datas), 1)) + np.arange(len(p.datas))[:, None]
+    np.testing.assert_allclose(interpolar_flat_forward(p.du, p.taxas, por_data)[5],
+                               interpolar_flat_forward(p.du[5:6], p.taxas[5:6], alvos + 5)[0])
+    assert np.isnan(interpolar_flat_forward([[np.nan, np.nan]], [[np.nan, np.nan]], [21])).all()
+
+
+def test_motor_guarda_curvas_e_fatores_de_desconto():
+    p = _painel()
+    motor = MotorCurvaDI(p)
+    d = date(2023, 6, 30)
+    curva = motor.curva(d)
+    assert motor.curva(pd.Timestamp(d)) is curva
+    fatores = motor.fatores_desconto([0, 252, 504])
+    taxas = motor.taxas([252, 504])
+    assert (fatores[0] == 1.0).all()
+    np.testing.assert_allclose(fatores[[252, 504]], (1 + taxas / 100) ** (-taxas.columns.to_numpy() / 252), rtol=1e-12)
+    np.testing.assert_allclose(curva.fator_desconto([252, 504]), fatores.loc[pd.Timestamp(d), [252, 504]], rtol=1e-12)
+    # Até o vencimento de um contrato: a taxa do próprio contrato
+    i = CONTRATOS.index("DI1F25")
+    taxa = p.taxas[p.linha(d), i]
+    assert curva.fator_desconto_datas([date(2025, 1, 2)])[0] == pytest.approx(
+        (1 + taxa / 100) ** (-p.du[p.linha(d), i] / 252), rel=1e-12)
+    assert curva.fator_desconto_datas([d])[0] == 1.0
+
+
+
+def test_du_do_servico_igual_a_contagem_dia_a_dia():
+    # Vencimento = 1º dia útil do mês (DI1F24: 01/01 é feriado → 02/01/2024)
+    casos = [("DI1F24", date(2023, 6, 30), date(2024, 1, 2)), ("DI1N23", date(2023, 7, 1), date(2023, 7, 3)),
+             ("DI1F27", date(2023, 12, 29), date(2027, 1, 4))]
+    for contrato, ref, venc in casos:
+        assert di_service.calcular_dias_uteis_di(contrato, ref) == len(b3_engine.listar_dias_uteis(ref, venc)) - 1
+    assert di_service.calcular_dias_uteis_di("DI1N23", date(2023, 7, 3)) == 0
+
+
+def test_painel_do_lote_usa_o_du_da_consulta():
+    lote = pd.DataFrame({"DATA_REF": [date(2023, 6, 30)] * 2 + [date(2023, 7, 3)],
+                         "VENCIMENTO": ["DI1F25", "DI1F24", "DI1F24"],
+                         "DIAS_UTEIS": [999, 500, 0], "TAXA (%)": [11.0, 12.0, 12.5]})
+    p = PainelDI.de_lote(lote)
+    assert p.contratos == ["DI1F24", "DI1F25"]
+    np.testing.assert_array_equal(p.du, [[500, 999], [np.nan, np.nan]])
+    assert np.isnan(p.taxas[1]).all()
+
+
+def test_curvas_compartilhadas_entre_motores():
+    d = date(2023, 6, 30)
+    curva = MotorCurvaDI(_painel()).curva(d)
+    assert MotorCurvaDI(_painel()).curva(d) is curva
+    assert MotorCurvaDI(_painel(seed=1)).curva(d) is not curva
+    with pytest.raises(ValueError):
+        curva.taxas[0] = 0.0
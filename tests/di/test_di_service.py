@@ -0,0 +1,73 @@
+import base64
+import json
+from datetime import date
+from pathlib import Path
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+from bs4 import BeautifulSoup
+
+from src import b3_engine, di_service
+
+TICKERS = ["DI1F24", "DI1N24", "DI1F25", "DI1F27"]
+DIAS = b3_engine.listar_dias_uteis(date(2023, 1, 2), date(2023, 12, 29))
+PAGINA = Path(__file__).parent / "fixtures" / "advfn_DI1F27.html"
+
+
+def _historico(ticker):
+    rng = np.random.default_rng(sum(map(ord, ticker)))
+    return pd.DataFrame({"DATA_DT": DIAS, "TAXA": rng.uniform(10, 14, len(DIAS)).round(3)}), None
+
+
+def test_lote_baixa_cada_contrato_uma_vez_e_bate_com_a_consulta_por_data():
+    datas = DIAS[::3] + [date(2023, 7, 1)]  # sábado: sem pregão
+    with patch.object(di_service, "consultar_taxas_di_advfn", side_effect=_historico) as advfn:
+        df, err = di_service.consultar_taxas_di_lote(datas, TICKERS)
+        assert advfn.call_count == len(TICKERS)
+        assert err is None
+        assert len(df) == (len(datas) - 1) * len(TICKERS)
+        # A consulta de uma data reaproveita o mesmo histórico em cache
+        for d in datas[::20]:
+            ref, _ = di_service.consultar_taxas_di_por_tickers(d, TICKERS)
+            dia = df[df["DATA_REF"] == d].drop(columns="DATA_REF").reset_index(drop=True)
+            pd.testing.assert_frame_equal(dia, ref, check_dtype=False)
+        assert advfn.call_count == len(TICKERS)
+
+
+def test_lote_ignora_vencidos_e_reporta_falhas():
+    def _advfn(ticker):
+        return (None, "Div de histórico não encontrada no HTML.") if ticker == "DI1F27" else _historico(ticker)
+
+    with patch.object(di_service, "consultar_taxas_di_advfn", side_effect=_advfn) as advfn:
+        df, err = di_service.consultar_taxas_di_lote([date(2023, 12, 28), date(2023, 6, 30)], ["DI1N23", *TICKERS])
+        # Falha não fica no cache: a próxima consulta tenta de novo
+        di_service.consultar_taxas_di_lote([date(2023, 6, 30)], ["DI1F27"])
+    assert "DI1F27" in err
+    assert sum(c.args == ("DI1F27",) for c in advfn.call_args_list) == 2
+    # DI1N23 vence em 03/07/2023: só entra em 30/06 (1 DU)
+    assert df.loc[df["VENCIMENTO"] == "DI1N23", ["DATA_REF", "DIAS_UTEIS"]].values.tolist() == [[date(2023, 6, 30), 1]]
+    assert df.groupby("DATA_REF")["DIAS_UTEIS"].apply(lambda s: s.is_monotonic_increasing).all()
+
+
+def _extrair_bs4(html: str):
+    """Extração anterior: árvore html.parser + conversão de fuso pelo .dt."""
+    div = BeautifulSoup(html, "html.parser").find("div", id="table_more_historical")
+    df = pd.DataFrame(json.loads(base64.b64decode(div.get("data-options")).decode("utf-8"))["data"])
+    datas = pd.to_datetime(df["Date"].astype(int), unit="s").dt.tz_localize("UTC").dt.tz_convert("America/Sao_Paulo")
+    return pd.DataFrame({"DATA_DT": datas.dt.date, "TAXA": df["ClosePrice"].astype(float)})
+
+
+def test_extracao_por_bytes_igual_a_da_arvore_html():
+    html = PAGINA.read_bytes()
+    df, err = di_service.extrair_historico_advfn(html)
+    assert err is None
+    pd.testing.assert_frame_equal(df, _extrair_bs4(html.decode("utf-8")))
+    # Perto da meia-noite: 06/11 01:30 UTC ainda é dia 5; 07/11 02:30 UTC já é dia 7 (horário de verão, UTC−2)
+    assert df["DATA_DT"].iloc[-4] == date(2018, 11, 5)
+    assert df["DATA_DT"].iloc[-5] == date(2018, 11, 7)
+
+    assert di_service.extrair_historico_advfn(html.replace(b"table_more_historical", b"x"))[1] == \
+        "Div de histórico não encontrada no HTML."
+    sem_opcoes = html.replace(b'data-options="ey', b'data-x="ey')
+    assert di_service.extrair_historico_advfn(sem_opcoes)[1] == "Atributo data-options ausente no HTML."
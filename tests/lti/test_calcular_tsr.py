@@ -10,7 +10,7 @@ T1 = pd.Timestamp("2026-03-31")
 
 
 def _bonif_df(rows: list[dict]) -> pd.DataFrame:
-    """Constrói df_bonif no formato retornado por _fetch_bonificacoes_b3."""
+    """Constrói df_bonif no formato retornado por buscar_bonificacoes_b3."""
     return pd.DataFrame(rows)
 
 
@@ -0,0 +1,105 @@
+import numpy as np
+import pandas as pd
+import pytest
+from datetime import date
+
+from src import b3_engine
+from src.lti.cenarios import Cenario, avaliar_cenarios, cenario_base, grade_cenarios
+from src.lti.config import OUTORGAS
+from src.lti.engine import ApuracaoResult, TickerResult, _calcular_grupos, calcular_tsr
+from src.tsr.precos import IndicePrecos
+
+CFG = OUTORGAS[2024]
+T0, T1 = pd.Timestamp(CFG.dt_divs_ini), pd.Timestamp(CFG.dt_divs_fim)
+TICKERS = [f"TK{i:02d}3" for i in range(13)] + ["TIMS3"]
+
+
+def _cotacoes(ini: date, fim: date, semente: int) -> pd.DataFrame:
+    rng = np.random.default_rng(semente)
+    dias = pd.to_datetime(b3_engine.listar_dias_uteis(ini, fim))
+    frames = []
+    for k, ticker in enumerate(TICKERS):
+        avg = 20.0 + k + rng.normal(0, 0.8, len(dias)).cumsum()
+        frames.append(pd.DataFrame({
+            "Ticker": ticker, "Date": dias, "Average": avg, "Close": avg + 0.1,
+            "Quantity": rng.integers(100, 10_000, len(dias)),
+        }))
+    return pd.concat(frames, ignore_index=True)
+
+
+def _apuracao(idx_p0: IndicePrecos, idx_pf: IndicePrecos, p0_ini, p0_fim, pf_ini, pf_fim,
+              excluidos=(), tipo="vwap") -> ApuracaoResult:
+    """Reproduz calcular_outorga (sem rede) para uma janela/base/exclusão."""
+    resultados = []
+    for k, ticker in enumerate(TICKERS):
+        p0 = idx_p0.preco(ticker, p0_ini, p0_fim, tipo)
+        pf = idx_pf.preco(ticker, pf_ini, pf_fim, tipo)
+        divs = pd.DataFrame([{"lastDatePriorEx": "15/06/2025", "value": f"{0.35 * (k % 4)}"}])
+        bonif = pd.DataFrame([{"lastDatePrior": "10/10/2024", "factor": "10", "label": "BONIFICACAO"}]) \
+            if k % 5 == 0 else pd.DataFrame()
+        tsr = calcular_tsr(ticker, p0, pf, divs, bonif, T0, T1)
+        resultados.append(TickerResult(
+            ticker=ticker, ticker_original=ticker, vwap_p0=p0, vwap_pf=pf,
+            dividendos_total=tsr["Dividendos/JCP (R$)"],
+            eventos_corporativos=tsr["_eventos"], divs_ajustados=tsr["_divs_detail"],
+            tsr=tsr["TSR Total (%)"] / 100, mult_corporativo=tsr["Mult. Corporativo"],
+            status="EXCLUIDO_FORCADO" if ticker in excluidos else "INCLUIDO",
+        ))
+    incluidos = sorted([r for r in resultados if r.status == "INCLUIDO"],
+                       key=lambda x: x.tsr or -999, reverse=True)
+    grupos = _calcular_grupos(incluidos)
+    return ApuracaoResult(outorga=CFG, tickers=resultados, ranking=incluidos, grupos=grupos)
+
+
+@pytest.fixture(scope="module")
+def indices():
+    return (
+        IndicePrecos(_cotacoes(date(2024, 1, 2), date(2024, 5, 31), 1)),
+        IndicePrecos(_cotacoes(date(2026, 1, 2), date(2026, 4, 30), 2)),
+    )
+
+
+@pytest.fixture(scope="module")
+def base(indices):
+    return _apuracao(*indices, CFG.dt_p0_ini, CFG.dt_p0_fim, CFG.dt_pf_ini, CFG.dt_pf_fim)
+
+
+def test_cenario_base_reproduz_apuracao(base):
+    res = avaliar_cenarios(base, [cenario_base(base)])
+    assert list(res.rank[:, 0]) == [t.rank for t in base.tickers]
+    assert list(res.grupo[:, 0]) == [t.grupo for t in base.tickers]
+    np.testing.assert_allclose(res.tsr[:, 0], [t.tsr for t in base.tickers])
+
+
+def test_cenarios_conferem_com_recalculo_completo(base, indices):
+    cenarios = grade_cenarios(
+        base,
+        deslocamentos_p0=(-15, 0, 21),
+        deslocamentos_pf=(0, -5),
+        bases=("vwap", "fechamento"),
+        exclusoes=((), ("TK033",), ("TK013", "TK073")),
+    )
+    assert len(cenarios) == 36
+    res = avaliar_cenarios(base, cenarios, *indices)
+
+    for j, c in enumerate(cenarios):
+        ref = _apuracao(*indices, c.p0_ini, c.p0_fim, c.pf_ini, c.pf_fim, c.excluidos, c.base_preco)
+        assert list(res.rank[:, j]) == [t.rank or 0 for t in ref.tickers], c.descricao()
+        assert list(res.grupo[:, j]) == [t.grupo or 0 for t in ref.tickers], c.descricao()
+
+    dist = res.distribuicao_grupos()
+    np.testing.assert_allclose(dist.sum(axis=1), 1.0)
+    assert dist.loc["TK033", 0] == pytest.approx(1 / 3)
+    assert res.distribuicao_rank("TIMS3").sum() == len(cenarios)
+    assert len(res.por_cenario("TIMS3")) == len(cenarios)
+    assert set(res.resumo().index) == set(TICKERS)
+
+
+def test_sem_indice_so_aceita_janela_da_apuracao(base):
+    b = cenario_base(base)
+    res = avaliar_cenarios(base, [b, Cenario(b.p0_ini, b.p0_fim, b.pf_ini, b.pf_fim,
+                                             excluidos=frozenset({"TIMS3"}))])
+    assert res.rank[TICKERS.index("TIMS3"), 1] == 0
+    assert sorted(res.rank[:, 1][res.rank[:, 1] > 0]) == list(range(1, len(TICKERS)))
+    with pytest.raises(ValueError):
+        avaliar_cenarios(base, [Cenario(b.p0_ini, b.p0_fim, b.pf_ini, b.pf_fim, "media")])
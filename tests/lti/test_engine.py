@@ -1,4 +1,5 @@
 import math
+import numpy as np
 import pandas as pd
 import pytest
 from src.lti.engine import _parse_float, _calcular_vwap, calcular_tsr
@@ -98,7 +99,7 @@ def test_buscar_vwap_mes_calcula_corretamente():
     df_day2 = _make_cotahist_df("VALE3", [{"avg": 60.0, "qty": 2000}])
 
     with patch("src.lti.engine.b3_engine.listar_dias_uteis") as mock_dias, \
-         patch("src.lti.engine.b3_engine.baixar_e_parsear_dia") as mock_baixar, \
+         patch("src.lti.engine.b3_engine.ler_cotacoes_dia") as mock_baixar, \
          patch("src.lti.engine.requests.Session"):
         mock_dias.return_value = [date(2026, 3, 2), date(2026, 3, 3)]
         mock_baixar.side_effect = [df_day1, df_day2]
@@ -118,7 +119,7 @@ def test_buscar_vwap_mes_calcula_corretamente():
 
 def test_buscar_vwap_mes_ticker_sem_dados():
     with patch("src.lti.engine.b3_engine.listar_dias_uteis") as mock_dias, \
-         patch("src.lti.engine.b3_engine.baixar_e_parsear_dia") as mock_baixar, \
+         patch("src.lti.engine.b3_engine.ler_cotacoes_dia") as mock_baixar, \
          patch("src.lti.engine.requests.Session"):
         mock_dias.return_value = [date(2026, 3, 2)]
         mock_baixar.return_value = None  # sem dados neste dia
@@ -130,7 +131,41 @@ def test_buscar_vwap_mes_ticker_sem_dados():
     assert df_cot.empty
 
 
-from src.lti.engine import _fetch_dividendos_b3, _fetch_bonificacoes_b3
+def test_cotacoes_do_periodo_sao_fatias_da_tabela_em_cache():
+    from src.lti.engine import TickerResult, buscar_cotacoes_periodo
+
+    dias = {date(2026, 3, 2): [("VALE3", 50.0, 1000), ("PETR4", 30.0, 500)],
+            date(2026, 3, 3): [("VALE3", 60.0, 2000), ("PETR4", 31.0, 700)]}
+
+    def baixar(d, tickers, session):
+        return pd.DataFrame([{"Ticker": t, "Date": d, "Close": p, "Average": p, "Quantity": q}
+                             for t, p, q in dias[d]])
+
+    with patch("src.lti.engine.b3_engine.listar_dias_uteis", return_value=list(dias)), \
+         patch("src.lti.engine.b3_engine.ler_cotacoes_dia", side_effect=baixar), \
+         patch("src.lti.engine.requests.Session"):
+        p1 = buscar_cotacoes_periodo(["VALE3", "PETR4", "ZZZT3"], date(2026, 3, 2), date(2026, 3, 31))
+        p2 = buscar_cotacoes_periodo(["VALE3", "PETR4", "ZZZT3"], date(2026, 3, 2), date(2026, 3, 31))
+
+    assert p1.vwaps["VALE3"] == pytest.approx(170000 / 3000) and p1.vwaps["ZZZT3"] is None
+    assert p1.limites == {"PETR4": (0, 2), "VALE3": (2, 4)}
+    # Segunda chamada: visão da mesma base do cache, sem cópia
+    assert np.shares_memory(p1.tabela["Average"].to_numpy(), p2.tabela["Average"].to_numpy())
+
+    t = TickerResult(ticker="VALE3", ticker_original="VALE3", vwap_p0=1.0, vwap_pf=1.0,
+                     dividendos_total=0.0, df_cotacoes_p0=p1.fatia("VALE3"), df_cotacoes_pf=p1.fatia("ZZZT3"))
+    quadro = t.df_cotacoes_p0
+    assert list(quadro["Average"]) == [50.0, 60.0] and list(quadro.index) == [0, 1]
+    assert t.df_cotacoes_pf.empty
+    # Fatia materializada uma vez; cada leitura é cópia rasa isolada
+    fatia = TickerResult.df_cotacoes_p0.bruto(t)
+    assert fatia._quadro is not None and t.df_cotacoes_p0 is not quadro
+    quadro.loc[0, "Average"] = -1.0
+    assert t.df_cotacoes_p0.loc[0, "Average"] == 50.0
+    assert p2.cotacoes("VALE3").loc[0, "Average"] == 50.0
+
+
+from src.tsr.dados import buscar_bonificacoes_b3, buscar_dividendos_b3
 
 
 def _make_empresas_df(ticker: str = "TIMS3") -> pd.DataFrame:
@@ -143,7 +178,7 @@ def _make_empresas_df(ticker: str = "TIMS3") -> pd.DataFrame:
     }])
 
 
-def test_fetch_dividendos_b3_retorna_dataframe():
+def test_buscar_dividendos_b3_retorna_dataframe():
     empresas = _make_empresas_df("TIMS3")
     fake_response = {
         "page": {"totalPages": 1},
@@ -161,13 +196,13 @@ def test_fetch_dividendos_b3_retorna_dataframe():
     mock_resp.json.return_value = fake_response
     mock_resp.raise_for_status = MagicMock()
 
-    with patch("src.lti.engine.curl_requests.Session") as mock_session_cls:
+    with patch("src.tsr.dados.curl_requests.Session") as mock_session_cls:
         mock_session = MagicMock()
         mock_session.get.return_value = mock_resp
         mock_session_cls.return_value = mock_session
 
         from datetime import date
-        df = _fetch_dividendos_b3(
+        df = buscar_dividendos_b3(
             "TIMS3", empresas,
             date(2024, 1, 1), date(2024, 12, 31),
         )
@@ -177,7 +212,7 @@ def test_fetch_dividendos_b3_retorna_dataframe():
     assert float(df.iloc[0]["value"]) == pytest.approx(1.50)
 
 
-def test_fetch_dividendos_b3_retorna_vazio_fora_do_periodo():
+def test_buscar_dividendos_b3_retorna_vazio_fora_do_periodo():
     empresas = _make_empresas_df("TIMS3")
     fake_response = {
         "page": {"totalPages": 1},
@@ -194,13 +229,13 @@ def test_fetch_dividendos_b3_retorna_vazio_fora_do_periodo():
     mock_resp.json.return_value = fake_response
     mock_resp.raise_for_status = MagicMock()
 
-    with patch("src.lti.engine.curl_requests.Session") as mock_session_cls:
+    with patch("src.tsr.dados.curl_requests.Session") as mock_session_cls:
         mock_session = MagicMock()
         mock_session.get.return_value = mock_resp
         mock_session_cls.return_value = mock_session
 
         from datetime import date
-        df = _fetch_dividendos_b3(
+        df = buscar_dividendos_b3(
             "TIMS3", empresas,
             date(2024, 1, 1), date(2024, 12, 31),
         )
@@ -280,7 +315,7 @@ def test_detectar_divergencia_yf():
 # Additional coverage: bonificações, SPLIT_YF, grupos N<6
 # ---------------------------------------------------------------------------
 
-def test_fetch_bonificacoes_b3_retorna_dataframe():
+def test_buscar_bonificacoes_b3_retorna_dataframe():
     empresas = _make_empresas_df("VALE3")
     fake_data = [
         {
@@ -301,13 +336,13 @@ def test_fetch_bonificacoes_b3_retorna_dataframe():
     mock_resp.text = "[...]"
     mock_resp.raise_for_status = MagicMock()
 
-    with patch("src.lti.engine.curl_requests.Session") as mock_session_cls:
+    with patch("src.tsr.dados.curl_requests.Session") as mock_session_cls:
         mock_session = MagicMock()
         mock_session.get.return_value = mock_resp
         mock_session_cls.return_value = mock_session
 
         from datetime import date
-        df = _fetch_bonificacoes_b3(
+        df = buscar_bonificacoes_b3(
             "VALE3", empresas,
             date(2024, 1, 1), date(2024, 12, 31),
         )
@@ -383,10 +418,10 @@ def test_get_ticker_info_tickers_normais_nao_afetados():
 
 
 # ---------------------------------------------------------------------------
-# _fetch_dividendos_b3 — filtro PN variante (PNB, PNC) para sufixos 4/5/6
+# buscar_dividendos_b3 — filtro PN variante (PNB, PNC) para sufixos 4/5/6
 # ---------------------------------------------------------------------------
 
-def test_fetch_dividendos_b3_aceita_pnb():
+def test_buscar_dividendos_b3_aceita_pnb():
     """USIM5 e AXIA6 podem retornar typeStock='PNB' ou 'PNC' — deve ser aceito."""
     empresas = _make_empresas_df("USIM5")
     # Sobrescreve o CODE para "USIM" (base correta após rstrip)
@@ -408,17 +443,80 @@ def test_fetch_dividendos_b3_aceita_pnb():
     mock_resp.json.return_value = fake_response
     mock_resp.raise_for_status = MagicMock()
 
-    with patch("src.lti.engine.curl_requests.Session") as mock_session_cls:
+    with patch("src.tsr.dados.curl_requests.Session") as mock_session_cls:
         mock_session = MagicMock()
         mock_session.get.return_value = mock_resp
         mock_session_cls.return_value = mock_session
 
         from datetime import date
-        from src.lti.engine import _fetch_dividendos_b3
-        df = _fetch_dividendos_b3(
+        df = buscar_dividendos_b3(
             "USIM5", empresas,
             date(2024, 1, 1), date(2024, 12, 31),
         )
 
     assert not df.empty, "PNB deveria ser aceito pelo filtro PN variante"
     assert float(df.iloc[0]["value"]) == pytest.approx(0.50)
+
+
+def test_calcular_todas_outorgas_anota_progresso():
+    from src.lti.engine import calcular_todas_outorgas
+
+    def fake_outorga(config, df_empresas, logger, progresso):
+        progresso({"outorga": config.ano, "etapa": "fim", "atual": 1, "total": 1, "ticker": None})
+        return config.ano
+
+    eventos = []
+    with patch("src.lti.engine.calcular_outorga", side_effect=fake_outorga):
+        res = calcular_todas_outorgas([2023, 1999, 2025], pd.DataFrame(),
+                                      logger=lambda m: None, progresso=eventos.append)
+    assert res == {2023: 2023, 2025: 2025}
+    assert [(e["outorga"], e["indice_outorga"], e["n_outorgas"]) for e in eventos] == [
+        (2023, 0, 2), (2025, 1, 2),
+    ]
+
+
+# ---------------------------------------------------------------------------
+# TickerResult compacto — quadros fatiados de uma tabela por outorga
+# ---------------------------------------------------------------------------
+
+import pickle
+from datetime import date as _date
+
+from src.lti.config import OUTORGAS
+from src.lti.engine import ApuracaoResult, TickerResult
+
+
+def _ticker_com_quadros(i: int) -> TickerResult:
+    return TickerResult(
+        ticker=f"TST{i}", ticker_original=f"TST{i}",
+        vwap_p0=10.0, vwap_pf=12.0, dividendos_total=0.0,
+        df_cotacoes_p0=pd.DataFrame(
+            {"Date": [_date(2023, 3, 1), _date(2023, 3, 2)], "Average": [10.0 + i, 11.0 + i]},
+            index=[7, 9],
+        ),
+        df_dividendos=pd.DataFrame([{"Ticker": f"TST{i}", "value": float(i)}]) if i % 2 else pd.DataFrame(),
+    )
+
+
+def test_ticker_result_compacta_quadros_sem_mudar_conteudo():
+    originais = [_ticker_com_quadros(i) for i in range(4)]
+    esperados = [(t.df_cotacoes_p0.copy(), t.df_dividendos.copy()) for t in originais]
+
+    resultado = ApuracaoResult(outorga=OUTORGAS[2024], tickers=originais)
+
+    assert not hasattr(resultado.tickers[0], "__dict__")
+    bruto = TickerResult.df_cotacoes_p0.bruto
+    assert bruto(originais[0]).tabela is bruto(originais[3]).tabela
+    for t, (cot, divs) in zip(resultado.tickers, esperados):
+        pd.testing.assert_frame_equal(t.df_cotacoes_p0, cot)
+        pd.testing.assert_frame_equal(t.df_dividendos, divs)
+        assert t.df_bonificacoes.empty
+
+    # Alterar o quadro materializado não contamina os demais tickers
+    quadro = resultado.tickers[0].df_cotacoes_p0
+    quadro.loc[7, "Average"] = -1.0
+    pd.testing.assert_frame_equal(resultado.tickers[0].df_cotacoes_p0, esperados[0][0])
+
+    copia = pickle.loads(pickle.dumps(resultado))
+    assert bruto(copia.tickers[1]).tabela is bruto(copia.tickers[2]).tabela
+    pd.testing.assert_frame_equal(copia.tickers[2].df_cotacoes_p0, esperados[2][0])
@@ -81,3 +81,50 @@ def test_config_aba_tem_ano_outorga():
     ws = wb["Config"]
     all_values = [ws.cell(row=r, column=2).value for r in range(1, ws.max_row + 1)]
     assert 2023 in all_values
+
+
+def test_cotacoes_aba_formata_data_e_ticker_original():
+    resultado = _make_resultado()
+    xlsx = gerar_excel_bytes(resultado)
+    wb = openpyxl.load_workbook(io.BytesIO(xlsx))
+    ws = wb["Cotacao_P0"]
+    header = [c.value for c in ws[1]]
+    assert header == ["Ticker", "Date", "Average", "Quantity", "Ticker_Original"]
+    assert [c.value for c in ws[2]] == ["VALE3", "02/03/2023", 50.0, 1000, "VALE3"]
+
+
+def test_write_frames_equivale_a_concat():
+    """Escrita empilhada sem concat produz as mesmas células que pd.concat + escrita célula a célula."""
+    import numpy as np
+    import xlsxwriter
+    from src.lti.excel_builder import _write_frames
+
+    df1 = pd.DataFrame({"Ticker": ["A3", "A3"], "Close": [1.5, np.nan], "Qtd": [10, 20]})
+    df2 = pd.DataFrame({"Ticker": ["B3"], "Close": [2.0], "Extra": ["x"], "Qtd": [30]})
+
+    buf = io.BytesIO()
+    with xlsxwriter.Workbook(buf, {"constant_memory": True}) as wb:
+        _write_frames(wb.add_worksheet("S"), [df1, df2], wb)
+
+    ws = openpyxl.load_workbook(io.BytesIO(buf.getvalue()))["S"]
+    lidas = [[c.value for c in row] for row in ws.iter_rows()]
+
+    esperado = pd.concat([df1, df2], ignore_index=True)
+    assert lidas[0] == list(esperado.columns)
+    for linha, (_, row) in zip(lidas[1:], esperado.iterrows()):
+        assert linha == [None if pd.isna(v) else v for v in row.tolist()]
+
+
+@pytest.mark.parametrize("max_workers", [1, 2])
+def test_escrever_zip_um_xlsx_por_outorga(max_workers):
+    import zipfile
+    from src.lti.excel_builder import escrever_zip, nome_arquivo
+
+    resultados = [_make_resultado(2023), _make_resultado(2024)]
+    buf = io.BytesIO()
+    escrever_zip(resultados, buf, max_workers=max_workers)
+
+    with zipfile.ZipFile(io.BytesIO(buf.getvalue())) as zf:
+        assert sorted(zf.namelist()) == sorted(nome_arquivo(r) for r in resultados)
+        for nome in zf.namelist():
+            assert "Resultado" in _abas(zf.read(nome))
@@ -0,0 +1,68 @@
+import io
+import json
+import zipfile
+
+import pandas as pd
+
+from src.lti.export import (
+    TABELAS, escrever_parquet_zip, gerar_json_bytes, tabelas_resultado,
+)
+from tests.lti.test_excel_builder import _make_resultado
+
+
+def _com_componentes(ano: int = 2023):
+    resultado = _make_resultado(ano)
+    vale = resultado.tickers[0]
+    vale.mult_corporativo = 2.0
+    vale.eventos_corporativos = [
+        {"date": pd.Timestamp(2024, 5, 10), "mult": 2.0, "factor": 100.0, "label": "DESDOBRAMENTO"},
+    ]
+    vale.divs_ajustados[0]["Pagamento"] = float("nan")
+    return resultado
+
+
+def test_json_contem_ranking_grupos_e_componentes():
+    payload = json.loads(gerar_json_bytes([_com_componentes()]))
+    (outorga,) = payload["outorgas"]
+    assert outorga["outorga"] == 2023
+    assert outorga["ranking"] == ["VALE3"]
+    assert outorga["grupos"] == {"1": ["VALE3"]}
+
+    vale = next(t for t in outorga["tickers"] if t["ticker"] == "VALE3")
+    assert vale["p_final_ajustado"] == 120.0
+    assert vale["ret_preco"] == (120.0 - 50.0) / 50.0
+    assert vale["ret_divs"] == 5.0 / 50.0
+
+    azul = next(t for t in outorga["tickers"] if t["ticker"] == "AZUL4")
+    assert azul["status"] == "EXCLUIDO_FORCADO"
+    assert azul["tsr"] is None and azul["ret_preco"] is None
+
+    (div,) = outorga["divs_ajustados"]
+    assert div["data_ex"] == "2023-06-15"
+    assert div["pagamento"] is None  # NaN vira null, não NaN inválido no JSON
+    assert outorga["eventos"][0]["data"] == "2024-05-10"
+
+
+def test_json_compacto_sem_espacos():
+    raw = gerar_json_bytes([_make_resultado()])
+    assert b", " not in raw and b": " not in raw
+
+
+def test_tabelas_empilham_outorgas():
+    tabelas = tabelas_resultado([_com_componentes(2023), _com_componentes(2024)])
+    assert set(tabelas) == set(TABELAS)
+    assert sorted(tabelas["tickers"]["outorga"].unique()) == [2023, 2024]
+    assert len(tabelas["grupos"]) == 2
+    assert str(tabelas["tickers"]["rank"].dtype) == "Int64"
+
+
+def test_parquet_zip_um_arquivo_por_tabela():
+    buf = io.BytesIO()
+    escrever_parquet_zip([_com_componentes()], buf)
+    with zipfile.ZipFile(io.BytesIO(buf.getvalue())) as zf:
+        assert sorted(zf.namelist()) == sorted(f"{t}.parquet" for t in TABELAS)
+        divs = pd.read_parquet(io.BytesIO(zf.read("divs_ajustados.parquet")))
+        eventos = pd.read_parquet(io.BytesIO(zf.read("eventos.parquet")))
+    assert divs.loc[0, "total_recebido"] == 5.0
+    assert eventos.loc[0, "mult"] == 2.0
+    assert eventos.loc[0, "data"] == pd.Timestamp(2024, 5, 10).date()
@@ -0,0 +1,56 @@
+"""
+Orçamento de cold start: mede `python -X importtime` em processo limpo.
+
+Falha quando um import pesado volta para o carregamento do módulo ou quando o
+custo acumulado de import passa do orçamento (µs, com folga de ~3x para CI).
+"""
+import os
+import subprocess
+import sys
+
+import pytest
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# módulo importado → (orçamento por módulo em µs, módulos que não podem ser carregados)
+_CASOS = {
+    "function_app": (
+        {"function_app": 500_000, "src.lti.config": 30_000,
+         "src.lti.result_cache": 30_000, "src.lti.jobs": 40_000},
+        {"pandas", "numpy", "polars", "streamlit", "yfinance", "xlsxwriter",
+         "curl_cffi", "src.lti.engine", "src.ticker_service"},
+    ),
+    "src.lti.engine": (
+        {},
+        {"streamlit", "yfinance", "xlsxwriter"},
+    ),
+}
+
+
+def _importtime(modulo: str) -> dict[str, int]:
+    """{módulo: µs acumulados} de um import em interpretador novo."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {modulo}"],
+        cwd=RAIZ, capture_output=True, text=True, check=True,
+    )
+    tempos = {}
+    for linha in proc.stderr.splitlines():
+        if not linha.startswith("import time:") or "|" not in linha:
+            continue
+        _, acumulado, nome = linha.split("|", 2)
+        if acumulado.strip().isdigit():
+            tempos[nome.strip()] = int(acumulado)
+    return tempos
+
+
+@pytest.mark.parametrize("modulo", list(_CASOS))
+def test_orcamento_de_import(modulo):
+    orcamento, proibidos = _CASOS[modulo]
+    tempos = _importtime(modulo)
+    assert modulo in tempos
+
+    carregados = {m for m in tempos if m.split(".")[0] in proibidos or m in proibidos}
+    assert not carregados, f"{modulo} carrega módulos pesados no import: {sorted(carregados)}"
+
+    estourados = {m: tempos[m] for m, limite in orcamento.items() if tempos.get(m, 0) > limite}
+    assert not estourados, f"Orçamento de import excedido (µs): {estourados}"
@@ -0,0 +1,162 @@
+import json
+import threading
+from unittest.mock import patch
+
+import azure.functions as func
+
+import function_app
+from src.lti.jobs import (
+    CONCLUIDO, ERRO, JobManager, LocalJobQueue, fracao_progresso,
+)
+from src.lti.result_cache import LocalFileCacheBackend, NullCacheBackend
+
+
+def _executor_bloqueado(liberar: threading.Event, chamadas: list):
+    def executar(anos, formato, progresso):
+        chamadas.append((anos, formato))
+        progresso({"outorga": anos[0], "etapa": "ticker", "ticker": "VALE3",
+                   "atual": 5, "total": 10, "indice_outorga": 0, "n_outorgas": 1})
+        liberar.wait(5)
+        return b"artefato", {"Content-Type": "application/json"}
+    return executar
+
+
+def test_fracao_progresso_combina_outorgas():
+    ev = {"atual": 25, "total": 50, "indice_outorga": 1, "n_outorgas": 2}
+    assert fracao_progresso(ev) == 0.75
+    assert fracao_progresso({"atual": 0, "total": 50}) == 0.0
+
+
+def test_submissoes_identicas_coalescem(tmp_path):
+    liberar, chamadas = threading.Event(), []
+    fila = LocalJobQueue(max_workers=2)
+    jobs = JobManager(_executor_bloqueado(liberar, chamadas), fila, LocalFileCacheBackend(str(tmp_path)))
+
+    j1 = jobs.submeter([2023, 2024], "json")
+    j2 = jobs.submeter([2024, 2023], "json")
+    j3 = jobs.submeter([2023], "json")
+    assert j1.id == j2.id and j3.id != j1.id
+
+    liberar.set()
+    assert jobs.aguardar(j1.id, timeout=5).status == CONCLUIDO
+    assert jobs.aguardar(j3.id, timeout=5).status == CONCLUIDO
+    fila.shutdown()
+
+    assert len(chamadas) == 2
+    assert jobs.artefato(j1.id).body == b"artefato"
+    # Já concluído e em cache: nova submissão não recalcula
+    assert jobs.submeter([2023, 2024], "json").id == j1.id
+    assert len(chamadas) == 2
+
+
+def test_job_com_erro_permite_nova_submissao(tmp_path):
+    def falha(anos, formato, progresso):
+        raise RuntimeError("B3 fora do ar")
+
+    fila = LocalJobQueue()
+    jobs = JobManager(falha, fila, LocalFileCacheBackend(str(tmp_path)))
+    j1 = jobs.submeter([2023], "xlsx")
+    assert jobs.aguardar(j1.id, timeout=5).status == ERRO
+    assert jobs.obter(j1.id).erro == "B3 fora do ar"
+    assert jobs.artefato(j1.id) is None
+    assert jobs.submeter([2023], "xlsx").id != j1.id
+    fila.shutdown()
+
+
+def _req(method, url, params=None, route_params=None):
+    return func.HttpRequest(method=method, url=url, body=b"",
+                            params=params or {}, route_params=route_params or {})
+
+
+def test_endpoints_submeter_status_download(tmp_path):
+    liberar, chamadas = threading.Event(), []
+    fila = LocalJobQueue()
+    jobs = JobManager(_executor_bloqueado(liberar, chamadas), fila, LocalFileCacheBackend(str(tmp_path)))
+    with patch.object(function_app, "_jobs", jobs):
+        r = function_app.apuracao_job_submeter(
+            _req("POST", "/api/apuracao/jobs", {"outorga": "2024", "format": "json"}))
+        assert r.status_code == 202
+        job_id = json.loads(r.get_body())["job_id"]
+        assert r.headers["Location"] == f"/api/apuracao/jobs/{job_id}"
+
+        rota = {"job_id": job_id}
+        r = function_app.apuracao_job_download(_req("GET", "/download", route_params=rota))
+        assert r.status_code == 409
+
+        liberar.set()
+        jobs.aguardar(job_id, timeout=5)
+        status = json.loads(function_app.apuracao_job_status(
+            _req("GET", "/status", route_params=rota)).get_body())
+        assert status["status"] == CONCLUIDO and status["progresso"] == 1.0
+
+        r = function_app.apuracao_job_download(_req("GET", "/download", route_params=rota))
+        assert r.status_code == 200 and r.get_body() == b"artefato"
+
+        r = function_app.apuracao_job_status(_req("GET", "/x", route_params={"job_id": "nao-existe"}))
+        assert r.status_code == 404
+    fila.shutdown()
+
+
+def test_download_com_cache_desligado():
+    # LTI_CACHE_BACKEND=off: o artefato fica no job, não no cache
+    liberar, chamadas = threading.Event(), []
+    liberar.set()
+    fila = LocalJobQueue()
+    jobs = JobManager(_executor_bloqueado(liberar, chamadas), fila, NullCacheBackend())
+    with patch.object(function_app, "_jobs", jobs):
+        r = function_app.apuracao_job_submeter(
+            _req("POST", "/api/apuracao/jobs", {"outorga": "2024", "format": "json"}))
+        job_id = json.loads(r.get_body())["job_id"]
+        assert jobs.aguardar(job_id, timeout=5).status == CONCLUIDO
+
+        r = function_app.apuracao_job_download(_req("GET", "/download", route_params={"job_id": job_id}))
+        assert r.status_code == 200 and r.get_body() == b"artefato"
+        assert r.headers["ETag"] == f'"{jobs.obter(job_id).chave}"'
+        # Reenvio reaproveita o job concluído em vez de recalcular
+        assert jobs.submeter([2024], "json").id == job_id
+    fila.shutdown()
+    assert len(chamadas) == 1
+
+
+def test_artefato_fica_so_no_cache(tmp_path):
+    liberar, chamadas = threading.Event(), []
+    liberar.set()
+    fila = LocalJobQueue()
+    cache = LocalFileCacheBackend(str(tmp_path))
+    jobs = JobManager(_executor_bloqueado(liberar, chamadas), fila, cache)
+    with patch.object(function_app, "_jobs", jobs):
+        job = jobs.submeter([2024], "json")
+        assert jobs.aguardar(job.id, timeout=5).status == CONCLUIDO
+        assert jobs.obter(job.id).artefato is None
+        rota = {"job_id": job.id}
+        r = function_app.apuracao_job_download(_req("GET", "/download", route_params=rota))
+        assert r.status_code == 200 and r.get_body() == b"artefato"
+
+        # Expirado no cache: download 410 e nova submissão recalcula
+        cache.ttl = -1
+        r = function_app.apuracao_job_download(_req("GET", "/download", route_params=rota))
+        assert r.status_code == 410
+        assert jobs.submeter([2024], "json").id != job.id
+    fila.shutdown()
+
+
+def test_jobs_terminados_saem_do_registro(tmp_path):
+    liberar, chamadas = threading.Event(), []
+    liberar.set()
+    fila = LocalJobQueue()
+    jobs = JobManager(_executor_bloqueado(liberar, chamadas), fila, NullCacheBackend(), max_jobs=2)
+
+    ids = []
+    for anos in ([2023], [2024], [2023, 2024]):
+        ids.append(jobs.submeter(anos, "json").id)
+        jobs.aguardar(ids[-1], timeout=5)
+    # Acima de max_jobs: o terminado mais antigo sai do registro
+    jobs.submeter([2024], "xlsx")
+    assert jobs.obter(ids[0]) is None and jobs.obter(ids[2]) is not None
+
+    # Terminados há mais de ttl também saem
+    with patch("src.lti.jobs.time.time", return_value=jobs.obter(ids[2]).atualizado_em + 3601):
+        jobs.submeter([2023], "xlsx")
+    assert all(jobs.obter(i) is None for i in ids)
+    assert jobs.submeter([2024], "json").id != ids[1]
+    fila.shutdown()
@@ -0,0 +1,86 @@
+import dataclasses
+import time
+from unittest.mock import patch
+
+import azure.functions as func
+import pandas as pd
+import pytest
+
+import function_app
+from src.lti.config import OUTORGAS
+from src.lti.result_cache import (
+    CacheEntry, LocalFileCacheBackend, chave_resultado, criar_backend, etag_confere,
+)
+from tests.lti.test_excel_builder import _make_resultado
+
+
+def test_chave_estavel_e_sensivel_a_entradas():
+    cfgs = [OUTORGAS[2023], OUTORGAS[2024]]
+    base = chave_resultado(cfgs, "xlsx", versao="2026-04-10")
+    assert chave_resultado(list(reversed(cfgs)), "xlsx", versao="2026-04-10") == base
+    assert chave_resultado(cfgs, "json", versao="2026-04-10") != base
+    assert chave_resultado(cfgs, "xlsx", versao="2026-04-11") != base
+    alterada = dataclasses.replace(OUTORGAS[2023], exclusoes_forcadas=["AZUL4"])
+    assert chave_resultado([alterada, OUTORGAS[2024]], "xlsx", versao="2026-04-10") != base
+
+
+@pytest.mark.parametrize("header,esperado", [
+    (None, False),
+    ('"abc"', True),
+    ('W/"abc"', True),
+    ('"x", "abc"', True),
+    ("*", True),
+    ('"abd"', False),
+])
+def test_etag_confere(header, esperado):
+    assert etag_confere(header, "abc") is esperado
+
+
+def test_backend_local_respeita_ttl(tmp_path):
+    backend = LocalFileCacheBackend(str(tmp_path), ttl=60)
+    backend.put("k", CacheEntry(body=b"dados", etag="k", headers={"Content-Type": "x"}))
+    entry = backend.get("k")
+    assert entry.body == b"dados" and entry.headers == {"Content-Type": "x"}
+    assert backend.get("outra") is None
+
+    backend.put("velha", CacheEntry(body=b"v", etag="velha", criado_em=time.time() - 120))
+    assert backend.get("velha") is None
+
+
+def _req(headers=None) -> func.HttpRequest:
+    return func.HttpRequest(
+        method="GET", url="/api/apuracao", body=b"",
+        params={"outorga": "2023", "format": "json"}, headers=headers or {},
+    )
+
+
+def test_endpoint_serve_do_cache_e_responde_304(tmp_path):
+    backend = LocalFileCacheBackend(str(tmp_path))
+    empresas = pd.DataFrame({"codigo": ["VALE"]})
+    with patch.object(function_app, "_cache", backend), \
+            patch("src.ticker_service.carregar_empresas", return_value=empresas), \
+            patch("src.lti.engine.calcular_todas_outorgas",
+                  return_value={2023: _make_resultado()}) as calc:
+        r1 = function_app.apuracao_lti(_req())
+        assert r1.status_code == 200
+        etag = r1.headers["ETag"]
+
+        r2 = function_app.apuracao_lti(_req())
+        assert r2.status_code == 200
+        assert r2.get_body() == r1.get_body()
+
+        r3 = function_app.apuracao_lti(_req({"If-None-Match": etag}))
+        assert r3.status_code == 304
+
+    assert calc.call_count == 1
+
+
+@pytest.mark.parametrize("env", [{"LTI_CACHE_BACKEND": "redis"}, {"LTI_CACHE_TTL": "6h"}])
+def test_configuracao_invalida_cai_no_backend_local(tmp_path, monkeypatch, env):
+    monkeypatch.setenv("LTI_CACHE_DIR", str(tmp_path))
+    for nome, valor in env.items():
+        monkeypatch.setenv(nome, valor)
+    with pytest.raises(ValueError):
+        criar_backend()
+    backend = function_app._criar_cache()
+    assert isinstance(backend, LocalFileCacheBackend) and backend.pasta == str(tmp_path)
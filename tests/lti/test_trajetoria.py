@@ -0,0 +1,172 @@
+import numpy as np
+import pandas as pd
+import pytest
+from datetime import date
+from unittest.mock import patch
+
+from src import b3_engine
+from src.lti.cenarios import ranquear
+from src.lti.config import OutorgaConfig
+from src.lti.engine import ApuracaoResult, CotacoesPeriodo, TickerResult, calcular_tsr
+from src.tsr.precos import IndicePrecos
+from src.lti.trajetoria import TrajetoriaTSR, carregar_trajetoria
+
+CFG = OutorgaConfig(
+    ano=2024, tickers=["AAAA3", "BBBB3", "CCCC3", "TIMS3", "ZZZZ3"],
+    dt_p0_ini=date(2024, 3, 1), dt_p0_fim=date(2024, 3, 28),
+    dt_pf_ini=date(2024, 9, 2), dt_pf_fim=date(2024, 9, 30),
+    dt_divs_ini=date(2024, 3, 1), dt_divs_fim=date(2024, 9, 30),
+)
+T0 = pd.Timestamp(CFG.dt_divs_ini)
+DIVS = {
+    "AAAA3": [("15/05/2024", "0.80"), ("14/08/2024", "0.50")],
+    "BBBB3": [("10/06/2024", "1.20")],
+    "TIMS3": [("20/05/2024", "0.30"), ("20/07/2024", "0.30")],
+}
+BONIF = {"BBBB3": [("01/07/2024", "100", "DESDOBRAMENTO")]}
+
+
+def _cotacoes() -> pd.DataFrame:
+    rng = np.random.default_rng(11)
+    dias = pd.to_datetime(b3_engine.listar_dias_uteis(CFG.dt_p0_ini, CFG.dt_pf_fim))
+    frames = []
+    for k, ticker in enumerate(["AAAA3", "BBBB3", "CCCC3", "TIMS3"]):
+        avg = 15.0 + 3 * k + rng.normal(0, 0.4, len(dias)).cumsum()
+        if ticker == "BBBB3":   # desdobramento 2:1 em 01/07 derruba o preço à metade
+            avg = np.where(dias > pd.Timestamp("2024-07-01"), avg / 2, avg)
+        frames.append(pd.DataFrame({
+            "Ticker": ticker, "Date": dias, "Average": avg,
+            "Quantity": rng.integers(100, 5_000, len(dias)),
+        }))
+    df = pd.concat(frames, ignore_index=True)
+    # CCCC3 muda de código para CCCC11 em agosto
+    df.loc[(df["Ticker"] == "CCCC3") & (df["Date"] >= pd.Timestamp("2024-08-01")), "Ticker"] = "CCCC11"
+    return df
+
+
+def _frames(ticker: str, ate: pd.Timestamp | None = None) -> tuple[pd.DataFrame, pd.DataFrame]:
+    divs = pd.DataFrame([{"lastDatePriorEx": d, "value": v} for d, v in DIVS.get(ticker, [])])
+    if ate is not None and not divs.empty:
+        divs = divs[pd.to_datetime(divs["lastDatePriorEx"], format="%d/%m/%Y") <= ate]
+    bonif = pd.DataFrame([{"lastDatePrior": d, "factor": f, "label": l} for d, f, l in BONIF.get(ticker, [])])
+    return divs, bonif
+
+
+def _resultado(indice: IndicePrecos) -> ApuracaoResult:
+    tickers = []
+    for orig in CFG.tickers:
+        ef = "CCCC11" if orig == "CCCC3" else orig
+        p0 = indice.vwap(orig, CFG.dt_p0_ini, CFG.dt_p0_fim)
+        pf = indice.vwap(ef, CFG.dt_pf_ini, CFG.dt_pf_fim)
+        if p0 is None or pf is None:
+            tickers.append(TickerResult(ticker=ef, ticker_original=orig, vwap_p0=p0, vwap_pf=pf,
+                                        dividendos_total=0.0, status="SEM_DADOS"))
+            continue
+        tsr = calcular_tsr(ef, p0, pf, *_frames(ef), T0, pd.Timestamp(CFG.dt_divs_fim))
+        tickers.append(TickerResult(
+            ticker=ef, ticker_original=orig, vwap_p0=p0, vwap_pf=pf,
+            dividendos_total=tsr["Dividendos/JCP (R$)"], eventos_corporativos=tsr["_eventos"],
+            divs_ajustados=tsr["_divs_detail"], tsr=tsr["TSR Total (%)"] / 100,
+            mult_corporativo=tsr["Mult. Corporativo"],
+        ))
+    return ApuracaoResult(outorga=CFG, tickers=tickers)
+
+
+@pytest.fixture(scope="module")
+def dados():
+    df = _cotacoes()
+    return df, _resultado(IndicePrecos(df))
+
+
+def test_trajetoria_confere_com_calcular_tsr_dia_a_dia(dados):
+    df, resultado = dados
+    traj = TrajetoriaTSR(resultado)
+    assert traj.atualizar(df) == df["Date"].nunique()
+    tsr, rank = traj.tabela("tsr"), traj.tabela("rank")
+    dias = list(traj.datas)
+    indice = IndicePrecos(df)
+
+    for pos in (0, 25, 60, 100, len(dias) - 1):
+        d = dias[pos]
+        ini = dias[max(0, pos - traj.janela + 1)]
+        esperado = []
+        for t in resultado.tickers:
+            if t.status != "INCLUIDO":
+                esperado.append(np.nan)
+                continue
+            nomes = [nm for nm in {t.ticker, t.ticker_original} if indice.n_pregoes(nm, ini, d)]
+            if len(nomes) != 1:
+                # Janela atravessa a troca de código (CCCC3 → CCCC11): sem referência direta
+                esperado.append(tsr.loc[t.ticker_original, d])
+                continue
+            pf = indice.vwap(nomes[0], ini, d)
+            r = calcular_tsr(t.ticker, t.vwap_p0, pf, *_frames(t.ticker, d), T0, d)
+            esperado.append(r["TSR Total (%)"] / 100)
+        np.testing.assert_allclose(tsr[d].to_numpy(), esperado, err_msg=str(d))
+        rk, _ = ranquear(np.array(esperado)[:, None])
+        assert list(rank[d]) == list(rk[:, 0])
+
+    # No último pregão (fim da janela Pf) a trajetória coincide com a apuração
+    assert dias[-1] == pd.Timestamp(CFG.dt_pf_fim)
+    final = tsr[dias[-1]]
+    for t in resultado.tickers:
+        if t.status == "INCLUIDO":
+            assert final[t.ticker_original] == pytest.approx(t.tsr)
+        else:
+            assert np.isnan(final[t.ticker_original])
+            assert traj.tabela("grupo").loc[t.ticker_original].eq(0).all()
+
+
+def test_atualizacao_incremental_igual_a_carga_unica(dados):
+    df, resultado = dados
+    unica = TrajetoriaTSR(resultado)
+    unica.atualizar(df)
+
+    incremental = TrajetoriaTSR(resultado)
+    for corte in pd.date_range("2024-03-01", "2024-10-01", freq="MS")[1:]:
+        incremental.atualizar(df[df["Date"] < corte])
+    # Reenvio de pregões já processados não duplica colunas
+    assert incremental.atualizar(df) == 0
+
+    for campo in ("tsr", "rank", "grupo"):
+        pd.testing.assert_frame_equal(incremental.tabela(campo), unica.tabela(campo))
+
+
+def test_carregar_estende_copia_sem_alterar_a_publicada(dados):
+    df, resultado = dados
+    publicada = TrajetoriaTSR(resultado)
+    publicada.atualizar(df[df["Date"] < "2024-06-01"])
+    antes = publicada.tabela("tsr")
+
+    def periodo(tickers, ini, fim, logger):
+        return CotacoesPeriodo(df[(df["Date"] >= pd.Timestamp(ini)) & (df["Date"] <= pd.Timestamp(fim))], {}, {})
+
+    with patch("src.lti.trajetoria.buscar_cotacoes_periodo", side_effect=periodo):
+        nova = carregar_trajetoria(resultado, ate=date(2024, 9, 30), trajetoria=publicada, logger=lambda _m: None)
+
+    assert nova is not publicada
+    pd.testing.assert_frame_equal(publicada.tabela("tsr"), antes)
+    unica = TrajetoriaTSR(resultado)
+    unica.atualizar(df[df["Date"] <= "2024-09-30"])
+    pd.testing.assert_frame_equal(nova.tabela("tsr"), unica.tabela("tsr"))
+
+
+def test_carregar_para_antes_de_pregao_com_falha(dados):
+    df, resultado = dados
+    falho = date(2024, 7, 15)
+
+    def periodo(tickers, ini, fim, logger):
+        recorte = df[(df["Date"] >= pd.Timestamp(ini)) & (df["Date"] <= pd.Timestamp(fim))]
+        falhos = [falho] if ini <= falho <= fim else []
+        return CotacoesPeriodo(recorte[recorte["Date"] != pd.Timestamp(falho)], {}, {}, falhos)
+
+    with patch("src.lti.trajetoria.buscar_cotacoes_periodo", side_effect=periodo) as p:
+        traj = carregar_trajetoria(resultado, ate=date(2024, 9, 30), logger=lambda _m: None)
+
+    # Para antes do pregão que falhou (sem buraco) e não segue para agosto
+    assert traj.ultima_data < falho and traj.ultima_data >= date(2024, 7, 12)
+    assert p.call_args.args[1] == date(2024, 7, 1)
+    # A próxima carga recomeça do pregão que falhou
+    with patch("src.lti.trajetoria.buscar_cotacoes_periodo", side_effect=periodo) as p:
+        carregar_trajetoria(resultado, ate=date(2024, 9, 30), trajetoria=traj, logger=lambda _m: None)
+    assert p.call_args_list[0].args[1] == traj.ultima_data + pd.Timedelta(days=1)
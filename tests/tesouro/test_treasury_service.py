@@ -0,0 +1,89 @@
+from io import BytesIO, StringIO
+from unittest import mock
+
+import pandas as pd
+
+from src import treasury_service as ts
+
+CSV = (
+    "Tipo Titulo;Data Vencimento;Data Base;Taxa Compra Manha;Taxa Venda Manha;PU Compra Manha;PU Venda Manha;PU Base Manha\n"
+    "Tesouro IPCA+;15/05/2035;03/01/2024;5,60;5,72;2100,10;2090,55;2089,90\n"
+    "Tesouro Prefixado;01/01/2027;02/01/2024;10,31;10,43;731,20;728,15;727,98\n"
+    "Tesouro IPCA+;15/05/2035;02/01/2024;5,58;5,70;2101,33;2091,02;2090,80\n"
+    "Tesouro Prefixado;01/01/2027;03/01/2024;10,29;10,41;731,95;728,90;728,70\n"
+    "Tesouro Selic;01/03/2029;13/12/2023;0,09;0,10;14010,11;13990,00;13989,70\n"
+).encode("latin-1")
+
+
+def _resposta(status=200, conteudo=CSV, headers=None):
+    r = mock.Mock(status_code=status, content=conteudo, headers=headers or {})
+    r.raise_for_status = mock.Mock()
+    return r
+
+
+def _referencia(conteudo):
+    """Leitura anterior: texto + parse_dates/dayfirst."""
+    return pd.read_csv(StringIO(conteudo.decode("latin-1")), sep=';', decimal=',',
+                       parse_dates=["Data Base", "Data Vencimento"], dayfirst=True)
+
+
+def test_csv_tipado_e_ordenado_por_data_base():
+    df = ts.ler_csv_tesouro(BytesIO(CSV))
+    assert isinstance(df["Tipo Titulo"].dtype, pd.CategoricalDtype)
+    assert df["Data Base"].is_monotonic_increasing
+    # Índice = Data Base, ordenado de uma vez na leitura
+    assert isinstance(df.index, pd.DatetimeIndex) and df.index.name is None
+    assert df.index.equals(pd.DatetimeIndex(df["Data Base"])) and df.index.is_monotonic_increasing
+    # Mesmos valores da leitura anterior, só em outra ordem
+    ref = _referencia(CSV).sort_values(["Data Base", "Tipo Titulo", "Data Vencimento"]).reset_index(drop=True)
+    pd.testing.assert_frame_equal(df.reset_index(drop=True).astype({"Tipo Titulo": object}), ref, check_dtype=False)
+
+
+def test_filtro_por_busca_binaria_igual_a_mascara():
+    df = ts.ler_csv_tesouro(BytesIO(CSV))
+    for ini, fim in [("2024-01-02", None), ("2023-12-13", "2024-01-02"), ("2024-01-05", None)]:
+        f = fim or ini
+        esperado = df[(df["Data Base"] >= ini) & (df["Data Base"] <= f)]
+        pd.testing.assert_frame_equal(ts.filtrar_data_base(df, pd.Timestamp(ini), fim and pd.Timestamp(fim)), esperado)
+    # Índice ordenado: só busca binária, sem comparar a coluna
+    with mock.patch.object(pd.Series, "__ge__", side_effect=AssertionError("varreu a coluna")):
+        assert len(ts.filtrar_data_base(df, pd.Timestamp("2024-01-03"))) == 2
+    # Fora de ordem: cai na máscara
+    embaralhado = df.iloc[::-1]
+    assert len(ts.filtrar_data_base(embaralhado, pd.Timestamp("2024-01-03"))) == 2
+
+
+def test_base_local_e_atualizacao_condicional():
+    with mock.patch.object(ts.requests, "get", return_value=_resposta(headers={"ETag": '"v1"'})) as get:
+        df = ts.atualizar_base_tesouro()
+        # Dentro de IDADE_MAXIMA: da base local, sem rede
+        pd.testing.assert_frame_equal(ts.atualizar_base_tesouro(), df)
+    assert get.call_count == 1
+
+    with mock.patch.object(ts.requests, "get", return_value=_resposta(status=304)) as get, \
+         mock.patch.object(ts, "ler_csv_tesouro") as ler:
+        pd.testing.assert_frame_equal(ts.atualizar_base_tesouro(forcar=True), df)
+    assert get.call_args.kwargs["headers"]["If-None-Match"] == '"v1"'
+    ler.assert_not_called()
+
+    # Servidor sem 304 mas conteúdo igual: não reprocessa
+    with mock.patch.object(ts.requests, "get", return_value=_resposta()), \
+         mock.patch.object(ts, "ler_csv_tesouro") as ler:
+        ts.atualizar_base_tesouro(forcar=True)
+    ler.assert_not_called()
+
+    # Conteúdo novo: reprocessa e regrava
+    novo = CSV + b"Tesouro Selic;01/03/2029;04/01/2024;0,09;0,10;14020,00;14000,00;13999,70\n"
+    with mock.patch.object(ts.requests, "get", return_value=_resposta(conteudo=novo)):
+        assert len(ts.atualizar_base_tesouro(forcar=True)) == len(df) + 1
+    base = ts._ler_base()[0]
+    assert len(base) == len(df) + 1 and base.index.equals(pd.DatetimeIndex(base["Data Base"]))
+
+    # Falha de rede: base local como estava
+    with mock.patch.object(ts.requests, "get", side_effect=ts.requests.ConnectionError("offline")):
+        assert len(ts.atualizar_base_tesouro(forcar=True)) == len(df) + 1
+
+
+def test_sem_base_e_sem_rede_devolve_vazio():
+    with mock.patch.object(ts.requests, "get", side_effect=ts.requests.ConnectionError("offline")):
+        assert ts.carregar_dados_tesouro().empty
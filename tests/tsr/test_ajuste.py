@@ -0,0 +1,187 @@
+from datetime import date
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src import b3_engine
+from src.tsr import normalizar_dividendos_lote, normalizar_eventos_lote
+from src.tsr.ajuste import SerieAjustada, base_ajustada, painel_ajustado, series_ajustadas
+
+DIAS = pd.to_datetime(b3_engine.listar_dias_uteis(date(2023, 1, 2), date(2024, 12, 31)))
+
+
+def _cotacoes(ticker, dias, seed=0):
+    rng = np.random.default_rng(seed)
+    close = 20 * np.exp(rng.normal(0, 0.02, len(dias)).cumsum())
+    return pd.DataFrame({
+        "Ticker": ticker, "Date": dias, "Open": close * 0.99, "High": close * 1.02, "Low": close * 0.97,
+        "Close": close, "Average": close, "Volume": 1e6, "Quantity": 1000,
+    })
+
+
+def _proventos(ticker):
+    bonif = pd.DataFrame({
+        "Ticker": ticker,
+        "lastDatePrior": ["15/03/2023", "10/07/2024", "31/12/2030"],
+        "label": ["DESDOBRAMENTO", "GRUPAMENTO", "BONIFICACAO"],
+        "factor": ["100,00", "0,5", "10,00"],
+    })
+    divs = pd.DataFrame({
+        "Ticker": ticker,
+        "lastDatePriorEx": ["28/04/2023", "28/04/2023", "29/11/2024", "10/01/2022"],
+        "value": ["0,50000000", "0,25000000", "1,00000000", "9,00000000"],
+        "label": "DIVIDENDO",
+    })
+    return normalizar_eventos_lote(bonif), normalizar_dividendos_lote(divs)
+
+
+def _ref(cot, eventos, dividendos):
+    """Ajuste retroativo evento a evento, pregão a pregão."""
+    cot = cot.set_index("Date")
+    fator = pd.Series(1.0, index=cot.index)
+    for d, mult in zip(eventos["date"], eventos["mult"]):
+        fator[cot.index <= d] /= mult
+    for d, valor in zip(dividendos["data_ex"], dividendos["valor"]):
+        com = cot.index[cot.index <= d]
+        if len(com) and d <= cot.index[-1]:
+            fator[cot.index <= d] *= 1 - valor / cot.at[com[-1], "Close"]
+    return cot[["Open", "High", "Low", "Close"]].mul(fator, axis=0)
+
+
+def test_fatores_iguais_ao_ajuste_evento_a_evento():
+    cot = _cotacoes("VALE3", DIAS)
+    eventos, dividendos = _proventos("VALE3")
+    s = SerieAjustada.vazia("VALE3").estender(cot, eventos, dividendos)
+    aj = s.ajustada()
+    pd.testing.assert_frame_equal(aj[["Open", "High", "Low", "Close"]], _ref(cot, eventos, dividendos),
+                                  check_freq=False, rtol=1e-12)
+    # Bonificação de 10% depois do fim da série ajusta até o último pregão;
+    # só eventos: desdobramento 2:1 e grupamento 2:1 se anulam antes de 2023-03-15
+    assert aj["Close"].iloc[-1] == pytest.approx(cot["Close"].iloc[-1] / 1.1)
+    so_eventos = s.ajustada(proventos=False)
+    assert so_eventos["Close"].iloc[0] == pytest.approx(cot["Close"].iloc[0] / 1.1)
+    assert so_eventos["Quantity"].iloc[0] == pytest.approx(1000 * 1.1)
+
+
+def test_estender_aplica_so_o_que_e_novo():
+    cot = _cotacoes("VALE3", DIAS)
+    eventos, dividendos = _proventos("VALE3")
+    corte = DIAS[300]
+    antes = cot[cot["Date"] <= corte]
+    s = SerieAjustada.vazia("VALE3").estender(
+        antes, eventos[eventos["date"] <= corte], dividendos[dividendos["data_ex"] <= corte])
+    # Dias e eventos novos chegam depois: mesmo resultado do cálculo do zero
+    s = s.estender(cot[cot["Date"] > corte], eventos, dividendos)
+    inteira = SerieAjustada.vazia("VALE3").estender(cot, eventos, dividendos)
+    np.testing.assert_allclose(s.fator_eventos * s.fator_proventos,
+                               inteira.fator_eventos * inteira.fator_proventos, rtol=1e-12)
+    # Dividendo corrigido na fonte: refaz do zero
+    corrigido = dividendos.assign(valor=dividendos["valor"] * 2)
+    np.testing.assert_allclose(s.estender(cot.iloc[:0], eventos, corrigido).ajustada()["Close"],
+                               _ref(cot, eventos, corrigido)["Close"], rtol=1e-12)
+
+
+def test_series_ajustadas_baixam_so_pregoes_fora_da_base():
+    dias_b3 = list(DIAS.date)
+    universo = pd.concat([_cotacoes("VALE3", DIAS, 1), _cotacoes("PETR4", DIAS, 2)], ignore_index=True)
+    eventos, dividendos = _proventos("VALE3")
+
+    def _dias(dias, max_workers=5):
+        return universo[universo["Date"].isin(pd.to_datetime(list(dias)))]
+
+    with patch("src.tsr.universo.cotacoes_dias", side_effect=_dias) as baixar, \
+         patch("src.tsr.universo.proventos_universo", return_value=(eventos, dividendos, ())):
+        s1 = series_ajustadas(["VALE3", "PETR4"], date(2024, 1, 2), date(2024, 6, 28), pd.DataFrame(),
+                              logger=lambda _m: None)
+        series_ajustadas(["VALE3"], date(2024, 2, 1), date(2024, 3, 1), pd.DataFrame(), logger=lambda _m: None)
+        assert baixar.call_args_list[-1].args[0] == []
+        painel = painel_ajustado(["VALE3", "PETR4"], date(2024, 1, 2), date(2024, 12, 31), pd.DataFrame(),
+                                 logger=lambda _m: None)
+
+    assert s1["VALE3"].cobertura == (date(2024, 1, 2), date(2024, 6, 28))
+    # 3ª consulta só baixou o 2º semestre
+    assert min(baixar.call_args_list[-1].args[0]) > date(2024, 6, 28)
+    assert base_ajustada.em_cache("VALE3")[1].cobertura == (date(2024, 1, 2), date(2024, 12, 31))
+    assert set(painel.columns.get_level_values(0)) == {"Open", "High", "Low", "Close", "Volume"}
+    assert len(painel) == len([d for d in dias_b3 if d.year == 2024])
+    # PETR4 sem proventos: igual ao bruto
+    bruto = universo[(universo["Ticker"] == "PETR4") & (universo["Date"].dt.year == 2024)]
+    np.testing.assert_array_equal(painel[("Close", "PETR4")].to_numpy(), bruto["Close"].to_numpy())
+
+
+def test_pregao_com_download_falho_fica_fora_da_cobertura():
+    dias = DIAS[(DIAS >= "2024-03-01")][:8]
+    universo = _cotacoes("VALE3", dias, 3)
+    falhou = {dias[3].date()}
+    sem_proventos = (normalizar_eventos_lote(pd.DataFrame()), normalizar_dividendos_lote(pd.DataFrame()), ())
+
+    def _baixar(pedidos, max_workers=5):
+        ok = [d for d in pedidos if d not in falhou]
+        return universo[universo["Date"].isin(pd.to_datetime(ok))]
+
+    def consultar():
+        return series_ajustadas(["VALE3"], dias[0].date(), dias[-1].date(), pd.DataFrame(),
+                                logger=lambda _m: None)["VALE3"]
+
+    with patch("src.tsr.universo.cotacoes_dias", side_effect=_baixar) as baixar, \
+         patch("src.tsr.universo.proventos_universo", return_value=sem_proventos):
+        s = consultar()
+        assert len(s) == 7
+        # Cobre só o trecho contínuo mais longo (sem o pregão que falhou)
+        assert s.cobertura == (dias[4].date(), dias[-1].date())
+
+        falhou.clear()  # fonte voltou: os pregões fora da cobertura são pedidos de novo
+        s = consultar()
+        assert dias[3].date() in baixar.call_args.args[0]
+        assert len(s) == 8 and s.cobertura == (dias[0].date(), dias[-1].date())
+
+
+def test_proventos_indisponiveis_nao_sobrescrevem_a_serie_salva():
+    universo = _cotacoes("VALE3", DIAS, 4)
+    eventos, dividendos = _proventos("VALE3")
+
+    def _dias(dias, max_workers=5):
+        return universo[universo["Date"].isin(pd.to_datetime(list(dias)))]
+
+    def consultar(proventos, ini, fim):
+        with patch("src.tsr.universo.cotacoes_dias", side_effect=_dias), \
+             patch("src.tsr.universo.proventos_universo", return_value=proventos):
+            return series_ajustadas(["VALE3", "PETR4"], ini, fim, pd.DataFrame(), logger=lambda _m: None)
+
+    salva = consultar((eventos, dividendos, ()), date(2024, 1, 2), date(2024, 6, 28))["VALE3"]
+    # Consulta de proventos falhou: volta a série salva, com os ajustes de antes
+    falha = (eventos.iloc[:0], dividendos.iloc[:0], ("VALE3", "PETR4"))
+    res = consultar(falha, date(2024, 1, 2), date(2024, 12, 31))
+    assert set(res) == {"VALE3"} and res["VALE3"] is salva
+    assert base_ajustada.em_cache("VALE3")[1].cobertura == (date(2024, 1, 2), date(2024, 6, 28))
+    np.testing.assert_array_equal(base_ajustada.em_cache("VALE3")[1].fator_eventos, salva.fator_eventos)
+
+
+def test_busca_ativos_traz_ticker_fora_do_mercado_a_vista_sem_ajuste():
+    from src.ticker_service import buscar_dados_hibrido
+
+    universo = _cotacoes("VALE3", DIAS, 5)  # a base de ações à vista (BDI 02/12) não tem ETFs
+    etf = _cotacoes("BOVA11", DIAS, 6)
+    eventos, dividendos = _proventos("VALE3")
+
+    def _dias(dias, max_workers=5):
+        return universo[universo["Date"].isin(pd.to_datetime(list(dias)))]
+
+    def _dia_bruto(d, tickers, _session):
+        linhas = etf[(etf["Date"] == pd.Timestamp(d)) & etf["Ticker"].isin(tickers)]
+        return linhas.assign(Date=linhas["Date"].dt.date)
+
+    with patch("src.tsr.universo.cotacoes_dias", side_effect=_dias), \
+         patch("src.tsr.universo.proventos_universo", return_value=(eventos, dividendos, ())), \
+         patch("src.b3_engine.ler_cotacoes_dia", side_effect=_dia_bruto) as bruto:
+        res, erros = buscar_dados_hibrido("VALE3, BOVA11", "02/01/2024", "28/06/2024", pd.DataFrame())
+
+    assert set(res) == {"VALE3", "BOVA11"}
+    assert all(chamada.args[1] == ["BOVA11"] for chamada in bruto.call_args_list)
+    bova = res["BOVA11"]
+    assert len(bova) == len(b3_engine.listar_dias_uteis(date(2024, 1, 2), date(2024, 6, 28)))
+    np.testing.assert_array_equal(bova["Adj Close"], bova["Close"])
+    assert not np.allclose(res["VALE3"]["Adj Close"], res["VALE3"]["Close"])
+    assert len(erros) == 1 and "BOVA11" in erros[0]
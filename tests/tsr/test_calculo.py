@@ -0,0 +1,82 @@
+import math
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.tsr import calcular_tsr, normalizar_dividendos, normalizar_eventos, parse_float, parse_float_serie
+
+T0 = pd.Timestamp("2023-01-01")
+T1 = pd.Timestamp("2025-12-31")
+
+
+def test_parse_float_serie_igual_ao_escalar():
+    valores = ["9.900,00000000000", "0,02500000000", "100", " 3.14 ", "abc", "", None, "1e3", "-80,0"]
+    vet = parse_float_serie(pd.Series(valores, dtype=object))
+    esc = np.array([parse_float(v) for v in valores])
+    np.testing.assert_array_equal(vet, esc)
+    np.testing.assert_array_equal(parse_float_serie(pd.Series([1, 2])), [1.0, 2.0])
+
+
+def test_normalizar_eventos_regras_b3_e_yahoo():
+    df_bonif = pd.DataFrame({
+        "lastDatePrior": ["14/04/2025", "10/06/2024", "14/04/2025", "19/12/2025", "01/01/2022", "05/05/2025"],
+        "label": ["GRUPAMENTO", "BONIFICACAO", "DESDOBRAMENTO", "RESG TOTAL RV", "DESDOBRAMENTO", "SPLIT_YF"],
+        "factor": ["0,025", "10,00", "7.900,00", "100", "100", 2.0],
+    })
+    ev = normalizar_eventos(df_bonif, T0, T1)
+    # RESG TOTAL RV ignorado; evento de 2022 fora de (t0, t1]; ordem estável por data
+    assert ev["label"].tolist() == ["BONIFICACAO", "GRUPAMENTO", "DESDOBRAMENTO", "SPLIT_YF"]
+    assert ev["mult"].tolist() == [1.1, 0.025, 80.0, 2.0]
+    assert normalizar_eventos(df_bonif.drop(columns="lastDatePrior"), T0, T1).empty
+
+
+def test_normalizar_dividendos_descarta_linhas_invalidas():
+    df_divs = pd.DataFrame({
+        "lastDatePriorEx": ["02/05/2024", "", "31/02/2024", "03/06/2024"],
+        "value": ["0,50", "1,00", "1,00", "abc"],
+        "label": ["JRS CAP PROPRIO", "DIVIDENDO", "DIVIDENDO", "DIVIDENDO"],
+    })
+    divs = normalizar_dividendos(df_divs)
+    assert divs["valor"].tolist() == [0.5]
+    assert divs["Tipo"].tolist() == ["JRS CAP PROPRIO"]
+    assert divs["Pagamento"].tolist() == [""]  # coluna ausente → row.get(..., "")
+
+
+def test_calcular_tsr_multiplicador_por_data_ex():
+    """Cada dividendo usa o produto dos eventos até a sua data ex (inclusive)."""
+    rng = np.random.default_rng(11)
+    dias = pd.date_range(T0, T1, freq="D")
+    datas_ev = rng.choice(dias, 8)
+    df_bonif = pd.DataFrame({
+        "lastDatePrior": pd.DatetimeIndex(datas_ev).strftime("%d/%m/%Y"),
+        "label": rng.choice(["BONIFICACAO", "GRUPAMENTO", "SPLIT_YF"], 8),
+        "factor": rng.choice([0.5, 2.0, 10.0], 8),
+    })
+    # Datas ex incluindo as próprias datas dos eventos (empate conta o evento)
+    datas_div = np.concatenate([rng.choice(dias, 30), datas_ev[:3]])
+    df_divs = pd.DataFrame({
+        "lastDatePriorEx": pd.DatetimeIndex(datas_div).strftime("%d/%m/%Y"),
+        "value": rng.uniform(0.1, 1.0, len(datas_div)),
+    })
+
+    res = calcular_tsr("TEST3", 10.0, 12.0, df_divs, df_bonif, T0, T1)
+
+    eventos = res["_eventos"]
+    assert [e["date"] for e in eventos] == sorted(e["date"] for e in eventos)
+    esperado_total = 0.0
+    for det, dt, val in zip(res["_divs_detail"], pd.DatetimeIndex(datas_div), df_divs["value"]):
+        m = math.prod(e["mult"] for e in eventos if e["date"] <= dt)
+        assert det["Multiplicador"] == pytest.approx(round(m, 6))
+        esperado_total += m * val
+    assert res["Dividendos/JCP (R$)"] == pytest.approx(round(esperado_total, 4))
+    assert res["Mult. Corporativo"] == pytest.approx(round(math.prod(e["mult"] for e in eventos), 6))
+
+
+def test_engine_e_pagina_usam_o_mesmo_calculo():
+    import src.lti.engine as engine
+    import src.tsr as tsr
+
+    assert engine.calcular_tsr is tsr.calcular_tsr
+    assert engine._parse_float is tsr.parse_float
+    assert engine._calcular_vwap is tsr.calcular_vwap
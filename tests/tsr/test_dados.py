@@ -0,0 +1,98 @@
+from datetime import date
+from unittest.mock import patch
+
+import pandas as pd
+
+from src import b3_engine
+from src.tsr import buscar_cotacoes_b3, buscar_cotacoes_lote, buscar_proventos_lote
+
+
+def _dia(d, tickers, session):
+    return pd.DataFrame({
+        "Ticker": list(tickers), "Date": d, "Open": 1.0, "High": 1.0, "Low": 1.0,
+        "Close": 1.0, "Average": 1.0, "Volume": 10.0, "Quantity": 10,
+    })
+
+
+def test_cotacoes_b3_baixa_cada_pregao_uma_vez_para_todos_os_tickers():
+    dias = [date(2024, 3, 1), date(2024, 3, 4), date(2024, 3, 5)]
+    with patch("src.tsr.dados.b3_engine.listar_dias_uteis", return_value=dias), \
+         patch("src.tsr.dados.b3_engine.ler_cotacoes_dia", side_effect=_dia) as baixar, \
+         patch("src.tsr.dados.requests.Session"):
+        df = buscar_cotacoes_b3(("VALE3", "PETR4", "ITUB4"), date(2024, 3, 1), date(2024, 3, 5))
+        # Mesma janela de novo: cache, nenhum download
+        buscar_cotacoes_b3(("VALE3", "PETR4", "ITUB4"), date(2024, 3, 1), date(2024, 3, 5))
+
+    assert baixar.call_count == len(dias)
+    assert all(sorted(c.args[1]) == ["ITUB4", "PETR4", "VALE3"] for c in baixar.call_args_list)
+    assert len(df) == 9
+    assert list(df["Ticker"].unique()) == ["ITUB4", "PETR4", "VALE3"]
+
+
+def test_janela_com_pregao_que_falhou_nao_entra_no_cache():
+    dias = [date(2024, 3, 1), date(2024, 3, 4), date(2024, 3, 5)]
+    tentativas = {}
+
+    def baixar(d, tickers, session):
+        tentativas[d] = tentativas.get(d, 0) + 1
+        if d == dias[0] and tentativas[d] == 1:
+            raise b3_engine.FalhaDownload("timeout")   # falha pontual: a nova tentativa passa
+        if d == dias[1]:
+            raise b3_engine.FalhaDownload("ZIP truncado")
+        if d == dias[2]:
+            return None                                # sem arquivo: não é falha
+        return _dia(d, tickers, session)
+
+    with patch("src.tsr.dados.b3_engine.listar_dias_uteis", return_value=dias), \
+         patch("src.tsr.dados.b3_engine.ler_cotacoes_dia", side_effect=baixar), \
+         patch("src.tsr.dados.requests.Session"):
+        df = buscar_cotacoes_b3(("VALE3",), dias[0], dias[-1], logger=lambda _m: None)
+        assert df.attrs["pregoes_falhos"] == [dias[1]] and len(df) == 1
+        buscar_cotacoes_b3(("VALE3",), dias[0], dias[-1], logger=lambda _m: None)
+    # Fora do cache: a segunda chamada baixou a janela de novo
+    assert tentativas == {dias[0]: 3, dias[1]: 4, dias[2]: 2}
+    assert buscar_cotacoes_b3.estatisticas.hits == 0
+
+
+def test_engine_lti_e_pagina_tsr_usam_o_mesmo_cache_de_janela():
+    from src.lti.engine import buscar_cotacoes_periodo
+
+    dias = [date(2024, 3, 1), date(2024, 3, 4)]
+    with patch("src.tsr.dados.b3_engine.listar_dias_uteis", return_value=dias), \
+         patch("src.tsr.dados.b3_engine.ler_cotacoes_dia", side_effect=_dia) as baixar, \
+         patch("src.tsr.dados.requests.Session"):
+        buscar_cotacoes_lote(["VALE3", "PETR4"], [], date(2024, 3, 1), date(2024, 3, 4))
+        periodo = buscar_cotacoes_periodo(["VALE3", "PETR4", "VALE3"], date(2024, 3, 1), date(2024, 3, 4),
+                                          logger=lambda _m: None)
+
+    assert baixar.call_count == len(dias)
+    assert periodo.limites == {"PETR4": (0, 2), "VALE3": (2, 4)}
+
+
+def test_cotacoes_lote_junta_b3_e_yahoo():
+    b3 = _dia(pd.Timestamp("2024-03-01"), ["VALE3"], None)
+    yf = _dia(pd.Timestamp("2024-03-01"), ["AAPL"], None)
+    with patch("src.tsr.dados.buscar_cotacoes_b3", return_value=b3) as p_b3, \
+         patch("src.tsr.dados.buscar_cotacoes_yf", return_value=yf) as p_yf:
+        df = buscar_cotacoes_lote(["VALE3", "VALE3"], ["AAPL"], date(2024, 3, 1), date(2024, 3, 1))
+    p_b3.assert_called_once_with(("VALE3",), date(2024, 3, 1), date(2024, 3, 1))
+    p_yf.assert_called_once()
+    assert sorted(df["Ticker"]) == ["AAPL", "VALE3"]
+
+
+def test_proventos_lote_busca_b3_e_yahoo_por_fonte():
+    divs = pd.DataFrame([{"lastDatePriorEx": "10/05/2024", "value": 1.0}])
+    t0, t1 = pd.Timestamp("2024-01-01"), pd.Timestamp("2024-12-31")
+    with patch("src.tsr.dados.buscar_dividendos_b3", return_value=divs) as d_b3, \
+         patch("src.tsr.dados.buscar_bonificacoes_b3", return_value=pd.DataFrame()) as b_b3, \
+         patch("src.tsr.dados.buscar_dividendos_yf", return_value=pd.DataFrame()) as d_yf, \
+         patch("src.tsr.dados.buscar_splits_yf", return_value=pd.DataFrame()) as s_yf:
+        res = buscar_proventos_lote({"VALE3": True, "PETR4": True, "AAPL": False},
+                                    pd.DataFrame(), t0, t1, logger=lambda _m: None)
+
+    assert set(res) == {"VALE3", "PETR4", "AAPL"}
+    assert d_b3.call_count == b_b3.call_count == 2
+    assert d_b3.call_args.args[2:4] == (date(2024, 1, 1), date(2024, 12, 31))
+    d_yf.assert_called_once_with("AAPL", t0, t1)
+    s_yf.assert_called_once_with("AAPL", t0, t1)
+    assert len(res["VALE3"][0]) == 1 and res["AAPL"][0].empty
@@ -0,0 +1,92 @@
+import numpy as np
+import pandas as pd
+import pytest
+from datetime import date
+
+from src import b3_engine
+from src.tsr.precos import IndicePrecos, calcular_preco, calcular_vwap
+
+
+def _cotacoes() -> pd.DataFrame:
+    """Dois tickers, pregões de 2024 embaralhados; alguns dias sem quantidade."""
+    rng = np.random.default_rng(7)
+    dias = b3_engine.listar_dias_uteis(date(2024, 1, 1), date(2024, 6, 30))
+    frames = []
+    for ticker, base in (("VALE3", 60.0), ("PETR4", 35.0)):
+        n = len(dias)
+        qty = rng.integers(0, 5_000, n).astype(float)
+        qty[::17] = 0
+        frames.append(pd.DataFrame({
+            "Ticker": ticker,
+            "Date": pd.to_datetime(dias),
+            "Average": base + rng.normal(0, 2, n).cumsum(),
+            "Close": base + rng.normal(0, 2, n).cumsum(),
+            "Quantity": qty,
+        }))
+    return pd.concat(frames, ignore_index=True).sample(frac=1.0, random_state=3)
+
+
+def _janela(df: pd.DataFrame, ticker: str, ini: date, fim: date) -> pd.DataFrame:
+    m = (df["Ticker"] == ticker) & (df["Date"] >= pd.Timestamp(ini)) & (df["Date"] <= pd.Timestamp(fim))
+    return df[m].sort_values("Date")
+
+
+JANELAS = [
+    (date(2024, 1, 1), date(2024, 1, 31)),
+    (date(2024, 2, 10), date(2024, 2, 12)),   # carnaval: 12/02 é feriado B3
+    (date(2024, 3, 15), date(2024, 6, 30)),
+    (date(2024, 1, 6), date(2024, 1, 7)),     # fim de semana: sem pregões
+    (date(2023, 1, 1), date(2023, 12, 31)),   # fora da base
+]
+
+
+@pytest.mark.parametrize("ini,fim", JANELAS)
+def test_indice_confere_com_calculo_por_dataframe(ini, fim):
+    df = _cotacoes()
+    indice = IndicePrecos(df)
+    for ticker in ("VALE3", "PETR4"):
+        df_t = _janela(df, ticker, ini, fim)
+        assert indice.n_pregoes(ticker, ini, fim) == len(df_t)
+        if df_t.empty:
+            assert indice.vwap(ticker, ini, fim) is None
+            assert indice.media(ticker, ini, fim) is None
+            assert indice.fechamento(ticker, ini, fim) is None
+            continue
+        assert indice.vwap(ticker, ini, fim) == pytest.approx(calcular_vwap(df_t), rel=1e-12)
+        assert indice.media(ticker, ini, fim) == pytest.approx(df_t["Close"].mean(), rel=1e-12)
+        assert indice.fechamento(ticker, ini, fim) == df_t["Close"].iloc[-1]
+
+
+def test_vwap_sem_quantidade_usa_media_simples():
+    df = pd.DataFrame({
+        "Ticker": ["AAAA3"] * 2,
+        "Date": [date(2024, 1, 2), date(2024, 1, 3)],
+        "Average": [10.0, 12.0],
+        "Quantity": [0, 0],
+    })
+    assert IndicePrecos(df).vwap("AAAA3", date(2024, 1, 1), date(2024, 1, 31)) == pytest.approx(11.0)
+
+
+def test_janelas_vetorizadas_iguais_as_escalares():
+    indice = IndicePrecos(_cotacoes())
+    inicios = [ini for ini, _ in JANELAS]
+    fins = [fim for _, fim in JANELAS]
+    for tipo in ("vwap", "media", "fechamento"):
+        vet = indice.precos_janelas("VALE3", inicios, fins, tipo)
+        esc = [indice.preco("VALE3", ini, fim, tipo) for ini, fim in JANELAS]
+        esperado = np.array([np.nan if v is None else v for v in esc])
+        np.testing.assert_allclose(vet, esperado, rtol=1e-12)
+    assert np.isnan(indice.vwap_janelas("ZZZZ3", inicios, fins)).all()
+    with pytest.raises(ValueError):
+        indice.preco("VALE3", date(2024, 1, 1), date(2024, 1, 31), "mediana")
+
+
+@pytest.mark.parametrize("ini,fim", JANELAS[:3])
+def test_calcular_preco_por_dataframe_confere_com_indice(ini, fim):
+    df = _cotacoes()
+    indice = IndicePrecos(df)
+    # Ordem dos pregões na janela não importa para o fechamento
+    df_t = _janela(df, "PETR4", ini, fim).sample(frac=1.0, random_state=1)
+    for tipo in ("vwap", "media", "fechamento"):
+        assert calcular_preco(df_t, tipo) == pytest.approx(indice.preco("PETR4", ini, fim, tipo), rel=1e-12)
+    assert calcular_preco(df_t.iloc[:0], "media") is None
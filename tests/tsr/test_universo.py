@@ -0,0 +1,188 @@
+import io
+import zipfile
+from datetime import date
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+import openpyxl
+import pandas as pd
+import pytest
+
+from src import b3_engine
+from src.tsr import calcular_tsr, normalizar_dividendos_lote, normalizar_eventos_lote
+from src.tsr.calculo import calcular_tsr_lote
+from src.tsr.universo import (
+    classificacao_empresas, gerar_excel_screener, historico_proventos, proventos_universo, screener,
+)
+
+P0 = (date(2024, 1, 2), date(2024, 1, 31))
+PF = (date(2025, 1, 2), date(2025, 1, 31))
+T0, T1 = pd.Timestamp(P0[1]), pd.Timestamp(PF[1])
+
+
+def _proventos(tickers, seed=5):
+    rng = np.random.default_rng(seed)
+    dias = pd.date_range("2023-06-01", "2025-06-30", freq="D")
+    divs, bonif = [], []
+    for t in tickers:
+        n = int(rng.integers(0, 12))
+        divs.append(pd.DataFrame({
+            "Ticker": t,
+            "lastDatePriorEx": pd.DatetimeIndex(rng.choice(dias, n)).strftime("%d/%m/%Y"),
+            "value": [f"{v:.8f}".replace(".", ",") for v in rng.uniform(0.05, 1.5, n)],
+            "label": "DIVIDENDO",
+        }))
+        k = int(rng.integers(0, 4))
+        bonif.append(pd.DataFrame({
+            "Ticker": t,
+            "lastDatePrior": pd.DatetimeIndex(rng.choice(dias, k)).strftime("%d/%m/%Y"),
+            "label": rng.choice(["BONIFICACAO", "DESDOBRAMENTO", "GRUPAMENTO", "RESG TOTAL RV"], k),
+            "factor": rng.choice(["10,00", "100,00", "0,5"], k),
+        }))
+    return divs, bonif
+
+
+def _cotacoes(tickers, janela, seed):
+    rng = np.random.default_rng(seed)
+    dias = pd.to_datetime(b3_engine.listar_dias_uteis(*janela))
+    return pd.concat([
+        pd.DataFrame({
+            "Ticker": t, "Date": dias,
+            "Average": rng.uniform(5, 50) + rng.normal(0, 0.3, len(dias)).cumsum(),
+            "Close": 20.0,
+            "Quantity": rng.integers(100, 1_000, len(dias)).astype(float),
+        })
+        for t in tickers
+    ], ignore_index=True)
+
+
+def test_calcular_tsr_lote_confere_com_calcular_tsr():
+    tickers = [f"TST{i % 10}{3 + i // 10}" for i in range(30)]
+    divs, bonif = _proventos(tickers)
+    rng = np.random.default_rng(1)
+    precos = pd.DataFrame({"p0": rng.uniform(5, 50, 30), "pf": rng.uniform(5, 50, 30)}, index=tickers)
+
+    lote = calcular_tsr_lote(
+        precos,
+        normalizar_eventos_lote(pd.concat(bonif, ignore_index=True)),
+        normalizar_dividendos_lote(pd.concat(divs, ignore_index=True)),
+        T0, T1,
+    )
+
+    for t, d, b in zip(tickers, divs, bonif):
+        # Fetchers entregam só a janela [t0, t1]; o lote recorta sozinho
+        d = d[pd.to_datetime(d["lastDatePriorEx"], format="%d/%m/%Y").between(T0, T1)]
+        ref = calcular_tsr(t, precos.at[t, "p0"], precos.at[t, "pf"], d, b, T0, T1)
+        linha = lote.loc[t]
+        for col in ("Mult. Corporativo", "Dividendos/JCP (R$)", "TSR Total (%)", "Ret. Preço (%)"):
+            assert linha[col] == pytest.approx(ref[col], abs=0.011), (t, col)
+        assert linha["Eventos"] == len(ref["_eventos"])
+        assert linha["Dividendos"] == len(ref["_divs_detail"])
+
+
+def test_screener_filtra_ordena_e_calcula_percentil():
+    tickers = ["AAAA3", "BBBB4", "CCCC3", "DDDD11"]
+    divs, bonif = _proventos(tickers, seed=2)
+    cot_p0 = _cotacoes(tickers, P0, 1)
+    cot_pf = _cotacoes(tickers[:3], PF, 2)  # DDDD11 sem negócios na janela final
+    eventos = normalizar_eventos_lote(pd.concat(bonif, ignore_index=True))
+    dividendos = normalizar_dividendos_lote(pd.concat(divs, ignore_index=True))
+    empresas = pd.DataFrame({
+        "CODE": ["AAAA", "BBBB", "CCCC"], "companyName": ["A SA", "B SA", "C SA"],
+        "segment": ["NM", "N2", "NM"],
+    })
+
+    df = screener(cot_p0, cot_pf, eventos, dividendos, P0, PF, classificacao=classificacao_empresas(empresas))
+    assert list(df["Ticker"]) == list(df.sort_values("TSR Total (%)", ascending=False)["Ticker"])
+    assert set(df["Ticker"]) == {"AAAA3", "BBBB4", "CCCC3"}
+    assert df["Percentil"].max() == 100.0
+    assert df.set_index("Ticker").at["BBBB4", "Empresa"] == "B SA"
+
+    nm = screener(cot_p0, cot_pf, eventos, dividendos, P0, PF,
+                  classificacao=classificacao_empresas(empresas), segmentos=["NM"])
+    assert set(nm["Ticker"]) == {"AAAA3", "CCCC3"}
+    so_a = screener(cot_p0, cot_pf, eventos, dividendos, P0, PF, tickers=["AAAA3"])
+    assert list(so_a["Ticker"]) == ["AAAA3"] and so_a["Percentil"].iloc[0] == 100.0
+
+    wb = openpyxl.load_workbook(io.BytesIO(gerar_excel_screener(df, {"Tipo P0": "vwap"})))
+    assert wb.sheetnames == ["Screener", "Parametros"]
+    assert wb["Screener"].max_row == len(df) + 1
+
+
+def _linha_cotahist(ticker: str, bdi: str, mercado: str = "010") -> str:
+    campos = {
+        "TIPO_DE_REGISTRO": "01", "DATA_DO_PREGAO": "20240301", "CODIGO_BDI": bdi,
+        "CODIGO_DE_NEGOCIACAO": ticker, "TIPO_DE_MERCADO": mercado, "NOME_DA_EMPRESA": "EMPRESA",
+        "PRECO_DE_ABERTURA": "1000", "PRECO_MAXIMO": "1100", "PRECO_MINIMO": "900",
+        "PRECO_MEDIO": "1000", "PRECO_ULTIMO_NEGOCIO": "1050", "QUANTIDADE_NEGOCIADA": "500",
+        "VOLUME_TOTAL_NEGOCIADO": "500000", "FATOR_DE_COTACAO": "1", "CODIGO_ISIN": "BRAAAAACNOR0",
+    }
+    return "".join(campos.get(c, "").ljust(w)[:w] for c, w in b3_engine.FIELD_SIZES.items())
+
+
+def test_baixar_acoes_dia_filtra_acoes_a_vista():
+    linhas = ["00HEADER", _linha_cotahist("AAAA3", "02"), _linha_cotahist("BBBB11", "12"),
+              _linha_cotahist("AAAA3F", "96"), _linha_cotahist("AAAAJ25", "78", "070"), "99TRAILER"]
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w") as z:
+        z.writestr("COTAHIST_D01032024.TXT", "\n".join(linhas).encode("latin1"))
+    session = MagicMock()
+    session.get.return_value = MagicMock(status_code=200, content=buf.getvalue())
+
+    df = b3_engine.baixar_acoes_dia(date(2024, 3, 1), session)
+    assert list(df["Ticker"]) == ["AAAA3", "BBBB11"]
+    assert df["Close"].tolist() == [10.5, 10.5]
+    assert df["BDI"].tolist() == ["02", "12"]
+
+
+def test_ler_cotacoes_dia_separa_sem_arquivo_de_falha():
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w") as z:
+        z.writestr("COTAHIST_D01032024.TXT", "\n".join(["00HEADER", _linha_cotahist("AAAA3", "02"), "99TRAILER"]))
+    session = MagicMock()
+
+    session.get.return_value = MagicMock(status_code=404)
+    assert b3_engine.ler_cotacoes_dia(date(2024, 3, 1), ["AAAA3"], session) is None
+    session.get.return_value = MagicMock(status_code=200, content=buf.getvalue())
+    assert b3_engine.ler_cotacoes_dia(date(2024, 3, 1), ["ZZZZ3"], session).empty
+    assert list(b3_engine.ler_cotacoes_dia(date(2024, 3, 1), ["AAAA3"], session)["Ticker"]) == ["AAAA3"]
+    session.get.return_value = MagicMock(status_code=200, content=b"<html>erro</html>")
+    with pytest.raises(b3_engine.FalhaDownload):
+        b3_engine.ler_cotacoes_dia(date(2024, 3, 1), ["AAAA3"], session)
+    # Na função antiga os três casos continuam sendo None
+    assert b3_engine.baixar_e_parsear_dia(date(2024, 3, 1), ["AAAA3"], session) is None
+
+
+def test_historico_sem_empresas_nao_entra_na_base():
+    # Lista de empresas vazia (falha no carregamento): ticker não resolvido
+    divs, bonif, ok = historico_proventos("PETR4", pd.DataFrame(), logger=lambda _m: None)
+    assert divs.empty and bonif.empty and not ok
+    assert historico_proventos.em_cache("PETR4", pd.DataFrame()) == (False, None)
+
+
+def test_proventos_universo_aponta_falhas_e_nao_cacheia():
+    divs = pd.DataFrame([{"Ticker": "AAAA3", "lastDatePriorEx": "10/05/2024", "value": 1.0, "label": "DIVIDENDO"}])
+    respostas = {"AAAA3": (divs, pd.DataFrame(), True), "BBBB3": (pd.DataFrame(), pd.DataFrame(), False)}
+    with patch("src.tsr.universo.historico_proventos", side_effect=lambda t, *_a, **_k: respostas[t]) as hist:
+        eventos, dividendos, falhos = proventos_universo(("AAAA3", "BBBB3"), pd.DataFrame())
+        proventos_universo(("AAAA3", "BBBB3"), pd.DataFrame())
+    assert falhos == ("BBBB3",)
+    assert list(dividendos["Ticker"].unique()) == ["AAAA3"] and eventos.empty
+    assert hist.call_count == 4
+
+
+def test_parsear_acoes_dia_usa_o_mesmo_filtro_de_baixar_acoes_dia():
+    linhas = ["00HEADER", _linha_cotahist("AAAA3", "02"), _linha_cotahist("BBBB11", "12"),
+              _linha_cotahist("BOVA11", "14"), "99TRAILER"]
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w") as z:
+        z.writestr("COTAHIST_D01032024.TXT", "\n".join(linhas).encode("latin1"))
+    session = MagicMock()
+    session.get.return_value = MagicMock(status_code=200, content=buf.getvalue())
+
+    acoes = b3_engine.parsear_acoes_dia(date(2024, 3, 1), session)
+    assert acoes.columns == ["ticker", "isin", "nome"]
+    assert acoes["ticker"].to_list() == list(b3_engine.baixar_acoes_dia(date(2024, 3, 1), session)["Ticker"])
+    assert acoes["ticker"].to_list() == ["AAAA3", "BBBB11"]
+    session.get.return_value = MagicMock(status_code=404)
+    assert b3_engine.parsear_acoes_dia(date(2024, 3, 1), session) is None
@@ -0,0 +1,53 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.volatility import Covariancia, CovarianciaEWMA, correlacao, correlacao_rolling, matrizes_rolling
+from src.volatility.estimadores import ewma_variancia
+
+
+def _retornos(T=600, N=6, buracos=0.003, seed=0):
+    rng = np.random.default_rng(seed)
+    base = rng.normal(0.0005, 0.02, (T, 1))
+    r = pd.DataFrame(0.6 * base + rng.normal(0.0005, 0.015, (T, N)),
+                     index=pd.bdate_range("2021-01-04", periods=T), columns=[f"T{i}" for i in range(N)])
+    r = r.mask(rng.random((T, N)) < buracos)
+    r.iloc[:80, 2] = np.nan  # listado depois
+    return r
+
+
+@pytest.mark.parametrize("dtype, tol", [(np.float32, 1e-6), (np.float64, 1e-12)])
+def test_blocos_e_dia_a_dia_iguais_ao_pandas(dtype, tol):
+    r = _retornos(buracos=0.05)
+    np.testing.assert_allclose(correlacao(r, bloco=64, dtype=dtype), r.corr(), atol=tol)
+    np.testing.assert_allclose(correlacao(r, completas=True, dtype=dtype), r.dropna().corr(), atol=tol)
+    # Um dia a mais: O(N²) sobre o estado, sem refazer o histórico
+    cov = Covariancia(r.shape[1], dtype).adicionar(r.to_numpy()[:-1])
+    cov.adicionar(r.to_numpy()[-1])
+    np.testing.assert_allclose(cov.covariancia(), r.cov(), atol=tol * 1e-3)
+    assert cov.n[0, 2] == r[["T0", "T2"]].dropna().shape[0]
+
+
+def test_janela_rolling_remove_o_dia_que_sai():
+    r = _retornos()
+    pares = correlacao_rolling(r, 63)
+    ref = pd.concat({f"{a} × {b}": r[a].rolling(63).corr(r[b])
+                     for i, a in enumerate(r.columns) for b in r.columns[i + 1:]}, axis=1)
+    pd.testing.assert_frame_equal(pares, ref, atol=1e-12)
+
+    matrizes = dict(matrizes_rolling(r, 63, dtype=np.float64))
+    assert next(iter(matrizes)) == r.index[62]
+    for t in (100, 400, len(r) - 1):
+        np.testing.assert_allclose(matrizes[r.index[t]], r.iloc[t - 62:t + 1].corr(min_periods=63), atol=1e-10)
+
+
+def test_ewma_par_a_par_como_ewma_variancia():
+    r = _retornos(buracos=0.05)
+    ewma = CovarianciaEWMA(r.shape[1], 0.94).adicionar(r.to_numpy())
+    x = r.to_numpy()
+    # Diagonal: mesma recorrência da vol EWMA, bit a bit
+    np.testing.assert_array_equal(np.diagonal(ewma.covariancia()), ewma_variancia(x ** 2, 0.94, ignorar_na=True)[-1])
+    # Fora da diagonal: EWMA do produto nos dias com os dois
+    produto = x[:, 0] * x[:, 2]
+    assert ewma.covariancia()[0, 2] == ewma_variancia(produto[:, None], 0.94, ignorar_na=True)[-1, 0]
+    assert np.allclose(np.diagonal(ewma.correlacao()), 1.0)
@@ -0,0 +1,160 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.volatility import FA, Painel, janelas_padrao, vol_janelas, vol_periodo, vol_rolling, vol_rolling_janelas
+from src.volatility.estimadores import ewma_variancia
+
+# ---------------------------------------------------------------------------
+# Referência: fórmulas da página Volatilidade, ticker a ticker em pandas
+# ---------------------------------------------------------------------------
+
+def _rs(df):
+    return (np.log(df["High"] / df["Open"]) * np.log(df["High"] / df["Close"])
+            + np.log(df["Low"] / df["Open"]) * np.log(df["Low"] / df["Close"]))
+
+
+def _roll_ref(df, met, janela, lam=0.94, k=0.34):
+    lr = np.log(df["Close"] / df["Close"].shift(1))
+    hl2 = np.log(df["High"] / df["Low"]) ** 2
+    if met == "historica":
+        return lr.rolling(janela).std() * np.sqrt(FA)
+    if met == "parkinson":
+        return np.sqrt(hl2.rolling(janela).mean() / (4 * np.log(2)) * FA)
+    if met == "garman_klass":
+        gk = 0.5 * hl2 - (2 * np.log(2) - 1) * np.log(df["Close"] / df["Open"]) ** 2
+        return np.sqrt(gk.rolling(janela).mean() * FA)
+    if met == "rogers_satchell":
+        return np.sqrt(_rs(df).rolling(janela).mean() * FA)
+    if met == "yang_zhang":
+        v_n = np.log(df["Open"] / df["Close"].shift(1)).rolling(janela).var()
+        v_d = np.log(df["Close"] / df["Open"]).rolling(janela).var()
+        k_adj = k / (1 + k + (janela + 1) / (janela - 1))
+        return np.sqrt((v_n + k_adj * v_d + (1 - k_adj) * _rs(df).rolling(janela).mean()) * FA)
+    return np.sqrt((lr ** 2).ewm(alpha=1 - lam, adjust=False).mean() * FA)
+
+
+def _periodo_ref(df_periodo, met, n, lam=0.94, k=0.34):
+    df = df_periodo.iloc[-n:]
+    if met == "yang_zhang":
+        df = df_periodo.iloc[max(0, len(df_periodo) - n - 1):]
+        log_oc = np.log(df["Open"] / df["Close"].shift(1)).dropna()
+        log_co = np.log(df["Close"] / df["Open"]).dropna()
+        rs = _rs(df).dropna()
+        if len(rs) < 5:
+            return np.nan
+        k_adj = k / (1 + k + (len(rs) + 1) / (len(rs) - 1))
+        return np.sqrt((log_oc.var() + k_adj * log_co.var() + (1 - k_adj) * rs.mean()) * FA)
+    lr = np.log(df["Close"] / df["Close"].shift(1)).dropna()
+    if met == "historica":
+        return lr.std() * np.sqrt(FA)
+    if met == "ewma":
+        return float(np.sqrt((lr ** 2).ewm(alpha=1 - lam, adjust=False).mean().iloc[-1] * FA))
+    if met == "parkinson":
+        return np.sqrt((np.log(df["High"] / df["Low"]) ** 2).dropna().mean() / (4 * np.log(2)) * FA)
+    if met == "garman_klass":
+        gk = 0.5 * np.log(df["High"] / df["Low"]) ** 2 - (2 * np.log(2) - 1) * np.log(df["Close"] / df["Open"]) ** 2
+        return np.sqrt(gk.dropna().mean() * FA)
+    return np.sqrt(_rs(df).dropna().mean() * FA)
+
+
+METODOS = ["historica", "parkinson", "garman_klass", "rogers_satchell", "yang_zhang", "ewma"]
+
+
+def _download(seed=3):
+    """Formato do yf.download: colunas (campo, ticker), calendário comum com buracos."""
+    rng = np.random.default_rng(seed)
+    datas = pd.bdate_range("2020-01-01", "2023-12-31")
+    tickers = ["AAAA3.SA", "BBBB4.SA", "CCC"]
+    campos = {}
+    for t in tickers:
+        close = 30 * np.exp(rng.normal(0, 0.02, len(datas)).cumsum())
+        open_ = close * np.exp(rng.normal(0, 0.01, len(datas)))
+        high = np.maximum(open_, close) * np.exp(np.abs(rng.normal(0, 0.01, len(datas))))
+        low = np.minimum(open_, close) * np.exp(-np.abs(rng.normal(0, 0.01, len(datas))))
+        campos[t] = {"Open": open_, "High": high, "Low": low, "Close": close, "Volume": rng.uniform(1e5, 1e6, len(datas))}
+    dados = pd.concat({c: pd.DataFrame({t: campos[t][c] for t in tickers}, index=datas)
+                       for c in ["Close", "High", "Low", "Open", "Volume"]}, axis=1)
+    # Feriados diferentes por ticker, ticker listado depois e um Close faltando
+    for t, frac in zip(tickers, [0.03, 0.05, 0.0]):
+        dados.loc[rng.random(len(datas)) < frac, (slice(None), t)] = np.nan
+    dados.loc[:datas[300], (slice(None), "CCC")] = np.nan
+    dados.loc[datas[700], ("Close", "BBBB4.SA")] = np.nan
+    return dados, tickers
+
+
+@pytest.mark.parametrize("janela", [21, 63])
+def test_vol_rolling_igual_ao_pandas_por_ticker(janela):
+    dados, tickers = _download()
+    painel = Painel.de_yfinance(dados)
+    res = vol_rolling(painel, METODOS, janela)
+    for t in tickers:
+        df = dados.xs(t, axis=1, level=1).dropna(how="all")
+        for met in METODOS:
+            ref = _roll_ref(df, met, janela)
+            got = res[met][t].dropna()
+            assert got.index.equals(ref.dropna().index), (t, met)
+            np.testing.assert_allclose(got, ref.dropna(), rtol=1e-9, err_msg=f"{t} {met}")
+
+
+def test_vol_janelas_igual_a_tabela_da_pagina():
+    dados, tickers = _download()
+    ini, fim = pd.Timestamp("2020-06-01"), pd.Timestamp("2023-12-31")
+    painel = Painel.de_yfinance(dados).recortar(ini, fim)
+    rotulos = ["Histórica (C-C)", "Parkinson", "Garman-Klass", "Rogers-Satchell", "Yang-Zhang", "EWMA"]
+    tab = vol_janelas(painel, rotulos, lam=0.9)
+
+    linhas = 0
+    for t in tickers:
+        df_periodo = dados.xs(t, axis=1, level=1).dropna(how="all").loc[ini:fim]
+        janelas = janelas_padrao(len(df_periodo))
+        sub = tab[tab["Ticker"] == t]
+        assert list(sub["Janela"]) == [r for _, r in janelas]
+        for (n, _), (_, linha) in zip(janelas, sub.iterrows()):
+            for met, rot in zip(METODOS, rotulos):
+                assert linha[rot] == pytest.approx(_periodo_ref(df_periodo, met, n, lam=0.9), rel=1e-10), (t, n, met)
+        linhas += len(janelas)
+    assert len(tab) == linhas
+
+
+def test_momentos_servem_qualquer_conjunto_de_janelas():
+    dados, tickers = _download()
+    painel = Painel.de_yfinance(dados)
+    janelas = [5, 21, 42, 126]
+    res = vol_rolling_janelas(painel, METODOS, janelas)
+    for janela in janelas:
+        ref = vol_rolling(painel, METODOS, janela)
+        for met in METODOS:
+            pd.testing.assert_frame_equal(res[janela][met], ref[met], rtol=1e-12)
+    assert res[5]["ewma"] is res[126]["ewma"]
+
+    # Períodos de comprimento arbitrário (não só múltiplos de 252)
+    for n in [2, 7, 37, 500, 1100]:
+        for met in METODOS:
+            got = vol_periodo(painel, met, n)
+            for t in tickers:
+                df = dados.xs(t, axis=1, level=1).dropna(how="all")
+                ref = _periodo_ref(df, met, min(n, len(df)))
+                assert got[t] == pytest.approx(ref, rel=1e-9, nan_ok=True), (t, n, met)
+
+
+def test_vol_periodo_n_por_ticker_e_yz_minimo():
+    dados, tickers = _download()
+    painel = Painel.de_yfinance(dados).recortar("2023-12-01", "2023-12-31")
+    n = painel.alinhado().n_validos
+    np.testing.assert_allclose(vol_periodo(painel, "yang_zhang", n), vol_periodo(painel, "Yang-Zhang"))
+    assert vol_periodo(painel, "yang_zhang", 3).isna().all()
+    with pytest.raises(ValueError):
+        vol_periodo(painel, "desconhecido")
+
+
+def test_ewma_bate_com_pandas_inclusive_com_buracos():
+    rng = np.random.default_rng(0)
+    x = rng.normal(0, 1, (200, 4)) ** 2
+    x[:5, 1] = np.nan
+    x[rng.random((200, 4)) < 0.1] = np.nan
+    ref = pd.DataFrame(x).ewm(alpha=1 - 0.94, adjust=False).mean().to_numpy()
+    np.testing.assert_array_equal(ewma_variancia(x, 0.94), ref)
+    ref_pulando = pd.DataFrame(x).ewm(alpha=1 - 0.94, adjust=False, ignore_na=True).mean().to_numpy()
+    np.testing.assert_array_equal(ewma_variancia(x, 0.94, ignorar_na=True), ref_pulando)
+
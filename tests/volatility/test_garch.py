@@ -0,0 +1,71 @@
+from datetime import date
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+
+pytest.importorskip("arch")
+
+from src.volatility import Painel, vol_janelas
+from src.volatility import garch
+from src.volatility.garch import ajuste_garch, roll_garch, vol_garch_janelas, vol_periodo_garch
+
+from tests.volatility.test_estimadores import _download
+
+
+def _series():
+    dados, tickers = _download()
+    painel = Painel.de_yfinance(dados).recortar("2021-06-01", "2023-12-31")
+    return {t: painel.ticker(t) for t in tickers}
+
+
+def test_janelas_aninhadas_com_warm_start_e_cache():
+    series = _series()
+    comprimentos = {t: [252, 504, len(df)] for t, df in series.items()}
+
+    with patch.object(garch, "ajustar", wraps=garch.ajustar) as ajustar:
+        vols = vol_garch_janelas(series, comprimentos, max_workers=1)
+    # Uma janela por chamada; a partir da 2ª do ticker, parte da anterior
+    assert ajustar.call_count == 9
+    iniciais = [c.args[1] for c in ajustar.call_args_list]
+    assert iniciais[0] is None and all(i is not None for i in iniciais[1:3])
+
+    for (t, n), v in vols.items():
+        assert v == pytest.approx(vol_periodo_garch(series[t].iloc[-n:]), rel=1e-3), (t, n)
+
+    # Mesmos dados: tudo do cache, nenhum ajuste
+    with patch.object(garch, "ajustar", side_effect=AssertionError("reajustou")):
+        assert vol_garch_janelas(series, comprimentos, max_workers=1) == vols
+
+
+def test_pool_de_processos_igual_ao_serial():
+    series = _series()
+    comprimentos = {t: [252, len(df)] for t, df in series.items()}
+    serial = vol_garch_janelas(series, comprimentos, max_workers=1)
+    ajuste_garch.limpar()
+    paralelo = vol_garch_janelas(series, comprimentos, max_workers=3)
+    assert paralelo.keys() == serial.keys()
+    np.testing.assert_allclose(list(paralelo.values()), list(serial.values()), rtol=1e-12)
+
+
+def test_roll_garch_e_tabela_usam_o_lote():
+    series = _series()
+    df = series["CCC"]
+    cond = roll_garch(df)
+    assert cond.index.equals(df.index) and cond.iloc[0] != cond.iloc[0] and cond.iloc[1:].notna().all()
+    assert roll_garch(df.iloc[:50]).isna().all()
+
+    painel = Painel.de_yfinance(_download()[0], ["CCC"]).recortar("2021-06-01", "2023-12-31")
+    tab = vol_janelas(painel, ["GARCH(1,1)"])
+    assert list(tab["Dias Úteis"]) == [252, 504, len(df)]
+    with patch.object(garch, "ajustar", side_effect=AssertionError("reajustou")):
+        assert tab.equals(vol_janelas(painel, ["GARCH(1,1)"]))
+
+
+def test_ajuste_garch_sem_retornos_so_responde_do_cache():
+    with pytest.raises(ValueError, match="_lr"):
+        ajuste_garch("AAA", date(2023, 12, 29), 252, "h")
+    lr = np.log(_series()["CCC"]["Close"]).diff().dropna().to_numpy()[-251:] * 100
+    ajuste = ajuste_garch("AAA", date(2023, 12, 29), 252, "h", _lr=lr)
+    # Com o ajuste no cache a chamada sem _lr responde dele
+    assert ajuste_garch("AAA", date(2023, 12, 29), 252, "h") == ajuste
@@ -0,0 +1,85 @@
+import io
+from datetime import date
+from unittest.mock import patch
+
+import numpy as np
+import openpyxl
+import pandas as pd
+import pytest
+
+import src.volatility.resultado as resultado
+from src.volatility import calcular_volatilidade, gerar_excel_volatilidade
+
+from tests.volatility.test_estimadores import _download
+
+METODOS = ("Histórica (C-C)", "Yang-Zhang", "EWMA")
+
+
+def test_resultado_calculado_uma_vez_e_reusado():
+    dados, tickers = _download()
+    args = (tuple(tickers), date(2021, 1, 4), date(2023, 12, 29), METODOS, 0.94)
+    with patch("yfinance.download", return_value=dados) as dl, \
+         patch.object(resultado, "vol_janelas", wraps=resultado.vol_janelas) as tab:
+        res = calcular_volatilidade(*args)
+        assert calcular_volatilidade(*args) is res
+    assert dl.call_count == 1 and tab.call_count == 1
+
+    assert res.tickers == tickers
+    assert list(res.tabela.columns) == ["Ticker", "Janela", "Dias Úteis", *METODOS]
+    assert list(res.rolling) == [21, 42, 63, 126]
+    serie = res.rolling[21]["Yang-Zhang"]
+    assert serie.index[0] >= pd.Timestamp(args[1]) and serie.index[-1] <= pd.Timestamp(args[2])
+    # Aquecimento baixado antes de dt_ini: até a maior janela já começa cheia
+    assert res.rolling[126]["Histórica (C-C)"].iloc[0].notna().sum() >= 2
+
+
+def test_excel_renderiza_o_resultado_sem_recalcular():
+    dados, tickers = _download()
+    with patch("yfinance.download", return_value=dados):
+        res = calcular_volatilidade(tuple(tickers), date(2021, 1, 4), date(2023, 12, 29), METODOS)
+    nomes = {"AAAA3.SA": "AAAA3", "BBBB4.SA": "BBBB4"}
+    with patch.object(resultado, "vol_janelas", side_effect=AssertionError("recalculou")):
+        wb = openpyxl.load_workbook(io.BytesIO(gerar_excel_volatilidade(res, nomes)))
+    assert wb.sheetnames == ["AAAA3", "BBBB4", "CCC", "Resumo", "Correlação", "Correlação EWMA"]
+    resumo = list(wb["Resumo"].values)
+    assert resumo[0] == ("Ticker", "Janela", "Dias Úteis", *METODOS)
+    assert len(resumo) == len(res.tabela) + 1
+    assert resumo[1][3] == pytest.approx(res.tabela.iloc[0][METODOS[0]])
+    corr = list(wb["Correlação"].values)
+    assert corr[0] == (None, "AAAA3", "BBBB4", "CCC")
+    assert corr[1][2] == pytest.approx(res.correlacao.iloc[0, 1])
+
+
+def test_correlacao_igual_a_da_pagina():
+    dados, tickers = _download()
+    with patch("yfinance.download", return_value=dados):
+        res = calcular_volatilidade(tuple(tickers), date(2021, 1, 4), date(2023, 12, 29), METODOS)
+    # O que a aba Correlação fazia: fechamentos → log-retornos → dropna → corr
+    closes = res.fechamentos()
+    ref = np.log(closes / closes.shift(1)).dropna().corr()
+    pd.testing.assert_frame_equal(res.correlacao, ref, check_names=False, atol=1e-6)
+    assert np.allclose(np.diagonal(res.correlacao_ewma), 1.0)
+
+
+def test_download_vazio_nao_fica_no_cache():
+    with patch("yfinance.download", return_value=pd.DataFrame()) as dl:
+        assert calcular_volatilidade(("XXXX3.SA",), date(2023, 1, 2), date(2023, 12, 29), METODOS) is None
+        assert calcular_volatilidade(("XXXX3.SA",), date(2023, 1, 2), date(2023, 12, 29), METODOS) is None
+    assert dl.call_count == 2
+
+
+def test_fonte_b3_usa_cotahist_ajustado_e_yahoo_so_para_os_demais():
+    dados, tickers = _download()
+    b3 = dados.loc[:, (slice(None), ["AAAA3.SA", "BBBB4.SA"])].rename(columns=lambda t: t.removesuffix(".SA"), level=1)
+    yf = dados.loc[:, (slice(None), ["CCC"])]
+    with patch("src.tsr.ajuste.painel_ajustado", return_value=b3) as cotahist, \
+         patch("yfinance.download", return_value=yf) as dl:
+        res = calcular_volatilidade(tuple(tickers), date(2021, 1, 4), date(2023, 12, 29), METODOS, fonte="b3")
+    assert cotahist.call_args.args[0] == ["AAAA3", "BBBB4"]
+    assert dl.call_args.args[0] == ["CCC"]
+    assert res.tickers == tickers
+    with patch("yfinance.download", return_value=dados):
+        ref = calcular_volatilidade(tuple(tickers), date(2021, 1, 4), date(2023, 12, 29), METODOS)
+    pd.testing.assert_frame_equal(res.tabela, ref.tabela)
+    with pytest.raises(ValueError):
+        calcular_volatilidade(tuple(tickers), date(2021, 1, 4), date(2023, 12, 29), METODOS, fonte="bloomberg")